@@ -1,4 +1,5 @@
-import os, httpx
+import os
+from app import http_client
 BOT = os.getenv("TELEGRAM_BOT_TOKEN")
 CHAT = os.getenv("TELEGRAM_CHAT_ID")
 
@@ -6,6 +7,5 @@ async def send_telegram(text: str):
     if not BOT or not CHAT: return False
     url = f"https://api.telegram.org/bot{BOT}/sendMessage"
     payload = {"chat_id": CHAT, "text": text}
-    async with httpx.AsyncClient() as client:
-        r = await client.post(url, json=payload)
+    r = await http_client.post(url, json=payload)
     return r.status_code == 200
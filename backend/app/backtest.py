@@ -0,0 +1,295 @@
+# backend/app/backtest.py
+# Vectorized backtest of the detector signal set over stored history.
+#
+# - signals are the full-history hits of the pipeline detectors (main.detect_all,
+#   signals.compute_all_signals incl. its structure order blocks, the ict_models BOS / CHoCH,
+#   the session sweeps) plus ict_service.compute_ict_signals' SMA cross / RSI rules rebuilt on
+#   app/indicator_series arrays. A hit is known at the close of its confirming bar (an order
+#   block one bar after its candle, a structure order block at its break), never earlier
+# - rules: enter at the next bar's open (or the confirming close), stop `stop_atr` x ATR or
+#   `stop_pct` away, target `target_r` x that risk, out after `max_bars` bars; cost per side in bps
+# - fills are evaluated on a (trades x max_bars) matrix of the bars from entry on, in chunks of
+#   BACKTEST_CHUNK_CELLS cells: first stop and first target touch are an argmax per row. A bar
+#   touching both counts as the stop; a bar opening beyond the stop (or the target) fills at
+#   its open
+# - overlap=False keeps one open trade per signal type: the next allowed entry after every
+#   trade is one searchsorted, only the trades kept are walked
+# - PnL in R (multiples of the risk taken) and %, win rate, expectancy, profit factor and max
+#   drawdown of the equity curve in exit order; overall, per signal type and per source
+
+import os
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from app.candle_series import CandleSeries, as_series, format_time
+from app.indicator_series import IndicatorFrame
+from app.mtf import side
+from app.pipeline import PIPELINE, REGISTRY
+
+BACKTEST_CHUNK_CELLS = int(os.getenv("BACKTEST_CHUNK_CELLS", str(1 << 21)))
+BACKTEST_MAX_BARS = 5000    # longest time exit
+
+# source -> pipeline families; "ict_signals" is computed here from indicator arrays
+SOURCES = {"detect_all": ("main",), "signals": ("signals",), "ict_models": ("ict_models",),
+           "sessions": ("sessions",), "ict_signals": ()}
+# bars after the hit bar until the signal is confirmed (the order block needs the next bar's retest)
+CONFIRM_LAG = {"order_blocks": 1}
+ENTRIES = ("next_open", "close")
+STOP, TARGET, TIME, EOD = 0, 1, 2, 3
+EXIT_NAMES = ("stop", "target", "time", "end_of_data")
+
+class Rules:
+    """How a signal becomes a trade."""
+    def __init__(self, entry: str = "next_open", stop_atr: float = 1.5, stop_pct: Optional[float] = None,
+                 target_r: float = 2.0, max_bars: int = 60, cost_bps: float = 0.0, overlap: bool = True,
+                 atr_period: int = 14):
+        if entry not in ENTRIES:
+            raise ValueError(f"entry must be one of {', '.join(ENTRIES)}")
+        if not 1 <= max_bars <= BACKTEST_MAX_BARS:
+            raise ValueError(f"max_bars must be 1..{BACKTEST_MAX_BARS}")
+        if (stop_pct if stop_pct is not None else stop_atr) <= 0 or target_r < 0 or cost_bps < 0:
+            raise ValueError("stop must be > 0, target_r and cost_bps >= 0")
+        self.entry = entry
+        self.stop_atr = stop_atr
+        self.stop_pct = stop_pct
+        self.target_r = target_r
+        self.max_bars = int(max_bars)
+        self.cost_bps = cost_bps
+        self.overlap = overlap
+        self.atr_period = atr_period
+
+    def to_dict(self) -> Dict[str, Any]:
+        return dict(vars(self))
+
+# ---------- signals ----------
+def indicator_hits(series: CandleSeries) -> Dict[str, np.ndarray]:
+    """compute_ict_signals' rules at every bar: SMA(9) / SMA(21) crosses, RSI(14) entering 30 / 70."""
+    fr = IndicatorFrame(series)
+    d = fr.sma(9) - fr.sma(21)
+    r = fr.rsi(14)
+    with np.errstate(invalid="ignore"):
+        below, above = r < 30, r > 70
+        return {"sma_cross_buy": np.flatnonzero((d[:-1] < 0) & (d[1:] > 0)) + 1,
+                "sma_cross_sell": np.flatnonzero((d[:-1] > 0) & (d[1:] < 0)) + 1,
+                "rsi_buy": np.flatnonzero(below[1:] & ~below[:-1]) + 1,
+                "rsi_sell": np.flatnonzero(above[1:] & ~above[:-1]) + 1}
+
+class Entries:
+    """Signals by confirming bar: idx (ascending), code -> kinds[code] = (type, source)."""
+    def __init__(self, idx: np.ndarray, code: np.ndarray, kinds: List[Tuple[str, str]]):
+        self.idx = idx
+        self.code = code
+        self.kinds = kinds
+
+    def __len__(self) -> int:
+        return len(self.idx)
+
+def collect(series: CandleSeries, sources: Iterable[str] = tuple(SOURCES)) -> Entries:
+    """Every signal of `sources` over the whole series, at the bar it is confirmed."""
+    srcs = list(dict.fromkeys(sources))
+    unknown = [s for s in srcs if s not in SOURCES]
+    if unknown:
+        raise ValueError(f"unknown source(s): {', '.join(unknown)}; known: {', '.join(SOURCES)}")
+    n = len(series)
+    parts: List[Tuple[np.ndarray, str, str]] = []
+    fams = {f: s for s in srcs for f in SOURCES[s]}
+    if fams:
+        res = PIPELINE.run(series, tuple(fams))
+        for name, hits in res.hits.items():
+            src, lag = fams[REGISTRY[name].family], CONFIRM_LAG.get(name, 0)
+            parts.extend((idx + lag, typ, src) for typ, idx in hits.items())
+    if "ict_signals" in srcs:
+        parts.extend((idx, typ, "ict_signals") for typ, idx in indicator_hits(series).items())
+    parts = [(idx[idx < n], typ, src) for idx, typ, src in parts if side(typ)]
+    if not parts:
+        return Entries(np.zeros(0, np.int64), np.zeros(0, np.int64), [])
+    idx = np.concatenate([p[0] for p in parts]).astype(np.int64)
+    code = np.repeat(np.arange(len(parts)), [len(p[0]) for p in parts])
+    o = np.argsort(idx, kind="stable")
+    return Entries(idx[o], code[o], [(typ, src) for _, typ, src in parts])
+
+# ---------- fills ----------
+def _first(mask: np.ndarray) -> np.ndarray:
+    """Column of the first True per row; the width when none."""
+    k = mask.argmax(axis=1)
+    k[~mask[np.arange(len(k)), k]] = mask.shape[1]
+    return k
+
+def exits(s: CandleSeries, p0: np.ndarray, side_: np.ndarray, stop: np.ndarray, target: np.ndarray,
+          max_bars: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """(exit bar, exit price, exit reason) of trades whose path starts at bar p0 (NaN target: none)."""
+    n, N, H = len(s), len(p0), max_bars
+    exit_i = np.empty(N, dtype=np.int64)
+    exit_px = np.empty(N, dtype=np.float64)
+    reason = np.empty(N, dtype=np.int8)
+    offs = np.arange(H)
+    step = max(1, BACKTEST_CHUNK_CELLS // H)
+    for a in range(0, N, step):
+        b = min(N, a + step)
+        start = p0[a:b]
+        rows = start[:, None] + offs
+        valid = rows < n
+        np.minimum(rows, n - 1, out=rows)
+        hh, ll = s.h[rows], s.l[rows]
+        long_ = side_[a:b, None] > 0
+        st, tg = stop[a:b, None], target[a:b, None]
+        with np.errstate(invalid="ignore"):
+            ks = _first(valid & np.where(long_, ll <= st, hh >= st))
+            kt = _first(valid & np.where(long_, hh >= tg, ll <= tg))
+        last = np.minimum(start + H, n) - 1 - start
+        k = np.minimum(np.minimum(ks, kt), last)
+        i = start + k
+        why = np.where(ks <= np.minimum(kt, last), STOP,
+                       np.where(kt <= last, TARGET, np.where(start + H <= n, TIME, EOD)))
+        o, lg = s.o[i], side_[a:b] > 0
+        px = s.c[i].copy()
+        hit_stop, hit_tgt = why == STOP, why == TARGET
+        px[hit_stop] = np.where(lg, np.minimum(o, stop[a:b]), np.maximum(o, stop[a:b]))[hit_stop]
+        px[hit_tgt] = np.where(lg, np.maximum(o, target[a:b]), np.minimum(o, target[a:b]))[hit_tgt]
+        exit_i[a:b], exit_px[a:b], reason[a:b] = i, px, why
+    return exit_i, exit_px, reason
+
+def _one_at_a_time(entry_i: np.ndarray, exit_i: np.ndarray, code: np.ndarray) -> np.ndarray:
+    """Trades kept when a signal type may not enter again before its open trade has exited."""
+    keep = np.zeros(len(entry_i), dtype=bool)
+    for c in np.unique(code).tolist():
+        sel = np.flatnonzero(code == c)
+        nxt = np.searchsorted(entry_i[sel], exit_i[sel], side="right")
+        j = 0
+        while j < len(sel):
+            keep[sel[j]] = True
+            j = int(nxt[j])
+    return keep
+
+# ---------- run ----------
+class Result:
+    """Trades of one run as arrays, in exit order."""
+    COLUMNS = ("code", "side", "signal_i", "entry_i", "entry_px", "stop", "target", "exit_i", "exit_px",
+               "reason", "r", "ret")
+
+    def __init__(self, series: CandleSeries, entries: Entries, rules: Rules, cols: Dict[str, np.ndarray],
+                 timing_ms: Dict[str, float]):
+        self.series = series
+        self.entries = entries
+        self.rules = rules
+        for k in self.COLUMNS:
+            setattr(self, k, cols[k])
+        self.timing_ms = timing_ms
+
+    def __len__(self) -> int:
+        return len(self.r)
+
+    def metrics(self, sel=slice(None)) -> Dict[str, Any]:
+        r, ret = self.r[sel], self.ret[sel]
+        n = len(r)
+        if not n:
+            return {"trades": 0}
+        win, loss = r > 0, r < 0
+        gross_win, gross_loss = float(r[win].sum()), float(-r[loss].sum())
+        eq_r, eq_pct = np.cumsum(r), np.cumsum(ret) * 100.0
+        dd_r = float((np.maximum.accumulate(np.maximum(eq_r, 0.0)) - eq_r).max())
+        dd_pct = float((np.maximum.accumulate(np.maximum(eq_pct, 0.0)) - eq_pct).max())
+        why = np.bincount(self.reason[sel], minlength=len(EXIT_NAMES))
+        return {"trades": n, "wins": int(win.sum()), "losses": int(loss.sum()),
+                "win_rate": round(float(win.mean()), 4),
+                "avg_win_r": round(float(r[win].mean()), 4) if win.any() else None,
+                "avg_loss_r": round(float(r[loss].mean()), 4) if loss.any() else None,
+                "expectancy_r": round(float(r.mean()), 4), "total_r": round(float(eq_r[-1]), 4),
+                "profit_factor": round(gross_win / gross_loss, 4) if gross_loss > 0 else None,
+                "max_drawdown_r": round(dd_r, 4),
+                "expectancy_pct": round(float(ret.mean()) * 100.0, 5), "return_pct": round(float(eq_pct[-1]), 4),
+                "max_drawdown_pct": round(dd_pct, 4),
+                "avg_bars": round(float((self.exit_i[sel] - self.entry_i[sel] + 1).mean()), 2),
+                "exits": dict(zip(EXIT_NAMES, why.tolist()))}
+
+    def trades(self, limit: int = 100) -> List[Dict[str, Any]]:
+        """The last `limit` trades to exit, newest first."""
+        t = self.series.t
+        kinds = self.entries.kinds
+        out = []
+        for j in range(len(self) - 1, max(len(self) - max(limit, 0), 0) - 1, -1):
+            typ, src = kinds[int(self.code[j])]
+            tgt = float(self.target[j])
+            out.append({"type": typ, "source": src, "side": int(self.side[j]),
+                        "signal_time": format_time(t[self.signal_i[j]]), "entry_time": format_time(t[self.entry_i[j]]),
+                        "entry": float(self.entry_px[j]), "stop": float(self.stop[j]),
+                        "target": None if np.isnan(tgt) else tgt, "exit_time": format_time(t[self.exit_i[j]]),
+                        "exit": float(self.exit_px[j]), "exit_reason": EXIT_NAMES[int(self.reason[j])],
+                        "r": round(float(self.r[j]), 4), "return_pct": round(float(self.ret[j]) * 100.0, 5)})
+        return out
+
+    def report(self, trades: int = 100) -> Dict[str, Any]:
+        s = self.series
+        kinds = self.entries.kinds
+        # every type detected, with or without trades
+        by_type = {typ: {"source": src, **self.metrics(self.code == c)} for c, (typ, src) in enumerate(kinds)}
+        src_of = np.asarray([src for _, src in kinds], dtype=object)
+        code_src = src_of[self.code] if len(self) else np.zeros(0, dtype=object)
+        by_source = {src: self.metrics(code_src == src) for src in dict.fromkeys(src_of.tolist())}
+        return {"bars": len(s), "from": format_time(s.t[0]) if len(s) else None,
+                "to": format_time(s.t[-1]) if len(s) else None, "rules": self.rules.to_dict(),
+                "signals": len(self.entries), "summary": self.metrics(), "by_type": by_type, "by_source": by_source,
+                "trades": self.trades(trades),
+                "timing_ms": {k: round(v, 3) for k, v in self.timing_ms.items()}}
+
+def run(candles, sources: Iterable[str] = tuple(SOURCES), rules: Optional[Rules] = None) -> Result:
+    """Detect every signal of `sources` over the bars and trade it under `rules`."""
+    rules = rules or Rules()
+    s = as_series(candles)
+    n = len(s)
+    timing: Dict[str, float] = {}
+    t0 = time.perf_counter()
+    ent = collect(s, sources)
+    timing["signals"] = (time.perf_counter() - t0) * 1000.0
+    t0 = time.perf_counter()
+    sd = np.asarray([side(typ) for typ, _ in ent.kinds], dtype=np.int64)[ent.code] if len(ent) else \
+        np.zeros(0, np.int64)
+    sig = ent.idx
+    p0 = sig + 1    # the path starts on the bar after the confirming close either way
+    ok = p0 < n
+    if rules.entry == "next_open":
+        px = s.o[np.minimum(p0, n - 1)]
+    else:
+        px = s.c[sig]
+    if rules.stop_pct is not None:
+        risk = px * rules.stop_pct
+    else:
+        risk = rules.stop_atr * IndicatorFrame(s).atr(rules.atr_period)[sig] if n else np.zeros(0)
+    with np.errstate(invalid="ignore"):
+        ok &= np.isfinite(risk) & (risk > 0)
+    sel = np.flatnonzero(ok)
+    code, sd, sig, p0, px, risk = ent.code[sel], sd[sel], sig[sel], p0[sel], px[sel], risk[sel]
+    stop = px - sd * risk
+    target = px + sd * risk * rules.target_r if rules.target_r > 0 else np.full(len(px), np.nan)
+    exit_i, exit_px, reason = exits(s, p0, sd, stop, target, rules.max_bars)
+    if not rules.overlap and len(p0):
+        keep = _one_at_a_time(p0, exit_i, code)
+        code, sd, sig, p0, px, risk, stop, target, exit_i, exit_px, reason = (
+            x[keep] for x in (code, sd, sig, p0, px, risk, stop, target, exit_i, exit_px, reason))
+    pnl = sd * (exit_px - px) - (px + exit_px) * rules.cost_bps / 1e4
+    # equity in exit order (ties by entry)
+    o = np.lexsort((p0, exit_i))
+    cols = {"code": code, "side": sd, "signal_i": sig, "entry_i": p0, "entry_px": px, "stop": stop,
+            "target": target, "exit_i": exit_i, "exit_px": exit_px, "reason": reason,
+            "r": pnl / risk, "ret": pnl / px}
+    timing["trades"] = (time.perf_counter() - t0) * 1000.0
+    res = Result(s, ent, rules, {k: v[o] for k, v in cols.items()}, timing)
+    _count(n, len(res), sum(timing.values()))
+    return res
+
+_lock = threading.Lock()
+_totals = {"runs": 0, "bars": 0, "trades": 0, "last_ms": 0.0}
+
+def _count(bars: int, trades: int, ms: float):
+    with _lock:
+        _totals["runs"] += 1
+        _totals["bars"] += bars
+        _totals["trades"] += trades
+        _totals["last_ms"] = round(ms, 3)
+
+def stats() -> Dict[str, Any]:
+    with _lock:
+        return dict(_totals)
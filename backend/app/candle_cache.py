@@ -0,0 +1,252 @@
+# backend/app/candle_cache.py
+# Shared in-process candle cache used by every candle fetch path
+# (main.get_candles, ict_service failover, providers.get_candles, proxy_candles).
+#
+# - key: (provider, normalized symbol, interval, outputsize)
+# - TTL derived from the bar interval (short bars expire quickly, daily bars live longer)
+# - LRU eviction bounded by entry count and an approximate memory cap
+# - single-flight: concurrent identical misses share one upstream call
+
+import os
+import sys
+import time
+import asyncio
+import threading
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+CACHE_MAX_ENTRIES = int(os.getenv("CANDLE_CACHE_MAX_ENTRIES", "512"))
+CACHE_MAX_BYTES = int(os.getenv("CANDLE_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+# fraction of one bar we are willing to serve stale data for, clamped to [MIN, MAX] seconds
+CACHE_TTL_FRACTION = 0.25
+CACHE_MIN_TTL = 5.0
+CACHE_MAX_TTL = 900.0
+
+# ---------- interval / symbol helpers ----------
+_UNIT_SECONDS = {
+    "s": 1, "sec": 1,
+    "m": 60, "min": 60,
+    "h": 3600, "hour": 3600,
+    "d": 86400, "day": 86400,
+    "w": 604800, "week": 604800,
+    "mo": 2592000, "month": 2592000,
+}
+
+def interval_seconds(interval: str) -> int:
+    """
+    Parse provider interval strings into seconds.
+    Accepts TwelveData/AlphaVantage style ("1min", "4h", "1day", "1week"),
+    short style ("5m", "1h") and Finnhub resolutions ("1", "60", "D", "W", "M").
+    Unknown values fall back to 60 seconds.
+    """
+    s = str(interval or "").strip().lower()
+    if s in ("d", "w", "m"):
+        return {"d": 86400, "w": 604800, "m": 2592000}[s]
+    if s.isdigit():
+        # bare number = minutes (Finnhub resolution)
+        return int(s) * 60
+    num = ""
+    for ch in s:
+        if ch.isdigit():
+            num += ch
+        else:
+            break
+    unit = s[len(num):]
+    if unit not in _UNIT_SECONDS:
+        return 60
+    return int(num or 1) * _UNIT_SECONDS[unit]
+
+def normalize_symbol(symbol: str) -> str:
+    """XAU/USD, xauusd and 'XAU-USD ' all map to the same cache key (XAUUSD)."""
+    s = str(symbol or "").strip().upper()
+    for ch in ("/", "-", "_", " "):
+        s = s.replace(ch, "")
+    return s
+
+def ttl_for_interval(interval: str) -> float:
+    ttl = interval_seconds(interval) * CACHE_TTL_FRACTION
+    return max(CACHE_MIN_TTL, min(CACHE_MAX_TTL, ttl))
+
+def _estimate_size(value: Any) -> int:
+    """Rough byte size of a cached payload (CandleSeries, lists/dicts of scalars)."""
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        for k, v in value.items():
+            size += sys.getsizeof(k) + _estimate_size(v)
+    elif isinstance(value, (list, tuple)):
+        for v in value:
+            size += _estimate_size(v)
+    return size
+
+# ---------- cache ----------
+class _Flight:
+    """One in-flight upstream call that late arrivals wait on."""
+    def __init__(self):
+        self.done = threading.Event()
+        self.value: Any = None
+        self.exc: Optional[BaseException] = None
+
+class CandleCache:
+    def __init__(self, max_entries: int = CACHE_MAX_ENTRIES, max_bytes: int = CACHE_MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        # key -> (expires_at, size, value); ordered oldest-used first
+        self._entries: "OrderedDict[Tuple, Tuple[float, int, Any]]" = OrderedDict()
+        self._inflight: Dict[Tuple, _Flight] = {}
+        self._ainflight: Dict[Tuple, "asyncio.Task"] = {}
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(provider: str, symbol: str, interval: str, outputsize: Any) -> Tuple:
+        return (str(provider).lower(), normalize_symbol(symbol), str(interval), int(outputsize or 0))
+
+    def _drop(self, key):
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+    def get(self, key: Tuple) -> Optional[Any]:
+        with self._lock:
+            return self._get_locked(key)
+
+    def _get_locked(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] < time.monotonic():
+            self._drop(key)
+            return None
+        self._entries.move_to_end(key)
+        return entry[2]
+
+    def lookup(self, provider: str, symbol: str, interval: str, outputsize: Any) -> Optional[Any]:
+        """Counted cache read for callers that fill misses themselves (e.g. batched fetches)."""
+        key = self.make_key(provider, symbol, interval, outputsize)
+        with self._lock:
+            value = self._get_locked(key)
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return value
+
+    def store(self, provider: str, symbol: str, interval: str, outputsize: Any, value: Any):
+        self.put(self.make_key(provider, symbol, interval, outputsize), value, ttl_for_interval(interval))
+
+    def put(self, key: Tuple, value: Any, ttl: float):
+        size = _estimate_size(value)
+        with self._lock:
+            if size > self.max_bytes:
+                return
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (time.monotonic() + ttl, size, value)
+            self._bytes += size
+            while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+                oldest = next(iter(self._entries))
+                self._drop(oldest)
+                self.evictions += 1
+
+    def get_or_fetch(self, provider: str, symbol: str, interval: str, outputsize: Any,
+                     fetch: Callable[[], Any], is_valid: Callable[[Any], bool] = lambda v: v is not None) -> Any:
+        """
+        Return a cached value or call `fetch()` once for all concurrent callers of the same key.
+        Only results accepted by `is_valid` are stored; errors are shared with waiters but not cached.
+        Cached values are shared between callers and must be treated as read-only.
+        """
+        key = self.make_key(provider, symbol, interval, outputsize)
+        with self._lock:
+            cached = self._get_locked(key)
+            if cached is not None:
+                self.hits += 1
+                return cached
+            flight = self._inflight.get(key)
+            if flight is not None:
+                self.coalesced += 1
+                leader = False
+            else:
+                self.misses += 1
+                flight = self._inflight[key] = _Flight()
+                leader = True
+
+        if not leader:
+            flight.done.wait()
+            if flight.exc is not None:
+                raise flight.exc
+            return flight.value
+
+        try:
+            value = fetch()
+            flight.value = value
+            if is_valid(value):
+                self.put(key, value, ttl_for_interval(interval))
+            return value
+        except BaseException as e:
+            flight.exc = e
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            flight.done.set()
+
+    async def aget_or_fetch(self, provider: str, symbol: str, interval: str, outputsize: Any,
+                            fetch: Callable[[], Awaitable[Any]],
+                            is_valid: Callable[[Any], bool] = lambda v: v is not None) -> Any:
+        """
+        Async twin of get_or_fetch: concurrent coroutines for one key await a single upstream call.
+        The upstream call runs as its own task, so a cancelled caller (e.g. a hedged-failover
+        loser) neither cancels it for the other waiters nor loses the result for the cache.
+        """
+        key = self.make_key(provider, symbol, interval, outputsize)
+        with self._lock:
+            cached = self._get_locked(key)
+            if cached is not None:
+                self.hits += 1
+                return cached
+            task = self._ainflight.get(key)
+            if task is not None:
+                self.coalesced += 1
+            else:
+                self.misses += 1
+                task = asyncio.ensure_future(self._afill(key, interval, fetch, is_valid))
+                # retrieve failures nobody awaited any more so asyncio does not log them
+                task.add_done_callback(lambda t: t.cancelled() or t.exception())
+                self._ainflight[key] = task
+        return await asyncio.shield(task)
+
+    async def _afill(self, key: Tuple, interval: str, fetch, is_valid) -> Any:
+        try:
+            value = await fetch()
+            if is_valid(value):
+                self.put(key, value, ttl_for_interval(interval))
+            return value
+        finally:
+            with self._lock:
+                self._ainflight.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses + self.coalesced
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "evictions": self.evictions,
+                "inflight": len(self._inflight) + len(self._ainflight),
+                "hit_ratio": round((self.hits + self.coalesced) / lookups, 4) if lookups else None,
+            }
+
+# process-wide instance shared by all routers/apps
+CACHE = CandleCache()
@@ -0,0 +1,190 @@
+# backend/app/candle_series.py
+# Columnar candle container shared by fetchers, caches and detectors.
+#
+# One CandleSeries holds contiguous NumPy columns instead of a list of per-bar dicts:
+#   t: int64 epoch seconds (UTC, bar open time)    o/h/l/c/v: float64
+# That is 48 bytes per bar instead of a dict plus boxed floats (~10x less memory).
+# Slicing (series[a:b], tail(n)) returns views that share the parent's buffers.
+#
+# Existing detectors index bars like dicts (c["high"], c["h"], c["time"], ...). Indexing a
+# series with an int returns a Bar view that answers every key shape used in the backend,
+# so those detectors accept a CandleSeries unchanged. Convert back to per-bar dicts only
+# at the API edge with to_records(style).
+
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Union
+
+import numpy as np
+
+COLUMNS = ("t", "o", "h", "l", "c", "v")
+
+# key -> column, for every candle dict shape in the backend
+FIELD_ALIASES = {
+    "t": "t", "time": "t", "datetime": "t", "ts": "t", "timestamp": "t",
+    "o": "o", "open": "o",
+    "h": "h", "high": "h",
+    "l": "l", "low": "l",
+    "c": "c", "close": "c",
+    "v": "v", "volume": "v",
+}
+# time keys that carry a "YYYY-MM-DD HH:MM:SS" string rather than epoch seconds
+STRING_TIME_KEYS = ("time", "datetime", "ts")
+
+# to_records() output shapes, matching what each API returned before
+RECORD_STYLES = {
+    "time": ("time", "open", "high", "low", "close", "volume"),      # main.py
+    "t": ("t", "o", "h", "l", "c"),                                  # ict_service
+    "datetime": ("datetime", "open", "high", "low", "close", "volume"),  # proxy_candles / providers
+    "ts": ("ts", "open", "high", "low", "close", "volume"),          # detectors/api
+}
+
+def format_time(epoch: int) -> str:
+    return datetime.fromtimestamp(int(epoch), timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+
+def parse_time(value: Any) -> Optional[int]:
+    """Epoch seconds from an int/float/numeric string/ISO string; naive strings are UTC."""
+    if value is None or isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float, np.integer, np.floating)):
+        return int(value)
+    s = str(value).strip()
+    if not s:
+        return None
+    if s.lstrip("-").isdigit():
+        return int(s)
+    try:
+        d = datetime.fromisoformat(s.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if d.tzinfo is None:
+        d = d.replace(tzinfo=timezone.utc)
+    return int(d.timestamp())
+
+class Bar:
+    """Read-only dict-like view of one bar of a CandleSeries."""
+    __slots__ = ("_s", "_i")
+
+    def __init__(self, series: "CandleSeries", i: int):
+        self._s = series
+        self._i = i
+
+    def __getitem__(self, key: str):
+        col = FIELD_ALIASES[key]
+        value = getattr(self._s, col)[self._i]
+        if col == "t":
+            return format_time(value) if key in STRING_TIME_KEYS else int(value)
+        return float(value)
+
+    def get(self, key: str, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __contains__(self, key: str) -> bool:
+        return key in FIELD_ALIASES
+
+    def to_dict(self, style: str = "time") -> Dict[str, Any]:
+        return {k: self[k] for k in RECORD_STYLES[style]}
+
+    def __repr__(self):
+        return f"Bar({self.to_dict('t')})"
+
+class CandleSeries:
+    __slots__ = COLUMNS
+
+    def __init__(self, t, o, h, l, c, v=None):
+        self.t = np.asarray(t, dtype=np.int64)
+        self.o = np.asarray(o, dtype=np.float64)
+        self.h = np.asarray(h, dtype=np.float64)
+        self.l = np.asarray(l, dtype=np.float64)
+        self.c = np.asarray(c, dtype=np.float64)
+        self.v = np.zeros(len(self.t), dtype=np.float64) if v is None else np.asarray(v, dtype=np.float64)
+
+    # ---------- construction ----------
+    @classmethod
+    def empty(cls) -> "CandleSeries":
+        z = np.zeros(0)
+        return cls(z, z, z, z, z, z)
+
+    @classmethod
+    def from_records(cls, records: Iterable[Dict[str, Any]]) -> "CandleSeries":
+        """
+        Adapter for any per-bar dict shape used in the backend
+        ({"time","open",...}, {"t","o",...}, {"datetime",...}, {"ts",...}).
+        Ascending by time; rows with an unusable time or price are dropped
+        (see app.normalize.normalize_records for the reject counts).
+        """
+        from app.normalize import normalize_records  # normalize builds on this module
+        return normalize_records(records).series
+
+    @classmethod
+    def concat(cls, parts: List["CandleSeries"]) -> "CandleSeries":
+        parts = [p for p in parts if len(p)]
+        if not parts:
+            return cls.empty()
+        return cls(*(np.concatenate([getattr(p, k) for p in parts]) for k in COLUMNS))
+
+    # ---------- sequence protocol ----------
+    def __len__(self) -> int:
+        return len(self.t)
+
+    def __bool__(self) -> bool:
+        return len(self.t) > 0
+
+    def __getitem__(self, idx: Union[int, slice]):
+        if isinstance(idx, slice):
+            # basic slicing -> NumPy views, no copy
+            return CandleSeries(*(getattr(self, k)[idx] for k in COLUMNS))
+        n = len(self.t)
+        i = int(idx)
+        if i < 0:
+            i += n
+        if not 0 <= i < n:
+            raise IndexError("CandleSeries index out of range")
+        return Bar(self, i)
+
+    def __iter__(self) -> Iterator[Bar]:
+        for i in range(len(self.t)):
+            yield Bar(self, i)
+
+    def __add__(self, other: "CandleSeries") -> "CandleSeries":
+        return CandleSeries.concat([self, other])
+
+    def __sizeof__(self) -> int:
+        return object.__sizeof__(self) + sum(getattr(self, k).nbytes for k in COLUMNS)
+
+    def __repr__(self):
+        if not len(self):
+            return "CandleSeries(0 bars)"
+        return f"CandleSeries({len(self)} bars, {format_time(self.t[0])} .. {format_time(self.t[-1])})"
+
+    # ---------- helpers ----------
+    def tail(self, n: int) -> "CandleSeries":
+        return self[-n:] if n > 0 else self[0:0]
+
+    def sorted(self) -> "CandleSeries":
+        """Ascending by time; later duplicates of a timestamp win."""
+        if len(self.t) < 2 or (np.all(self.t[1:] > self.t[:-1])):
+            return self
+        order = np.argsort(self.t, kind="stable")
+        t = self.t[order]
+        keep = np.ones(len(t), dtype=bool)
+        keep[:-1] = t[1:] != t[:-1]
+        idx = order[keep]
+        return CandleSeries(*(getattr(self, k)[idx] for k in COLUMNS))
+
+    def to_records(self, style: str = "time", epoch: bool = False) -> List[Dict[str, Any]]:
+        """Per-bar dicts in one of RECORD_STYLES (API edge only); epoch=True keeps int times."""
+        keys = RECORD_STYLES[style]
+        times = self.t.tolist()
+        if keys[0] in STRING_TIME_KEYS and not epoch:
+            times = [format_time(x) for x in times]
+        cols = [times] + [getattr(self, FIELD_ALIASES[k]).tolist() for k in keys[1:]]
+        return [dict(zip(keys, row)) for row in zip(*cols)]
+
+def as_series(candles: Union["CandleSeries", Iterable[Dict[str, Any]]]) -> CandleSeries:
+    """Accept either a CandleSeries or any list of candle dicts."""
+    if isinstance(candles, CandleSeries):
+        return candles
+    return CandleSeries.from_records(candles)
@@ -0,0 +1,219 @@
+# backend/app/candle_store.py
+# Persistent on-disk candle store (survives restarts, serves long history without API calls).
+#
+# Layout: <CANDLE_STORE_DIR>/<SYMBOL>/<seconds>s/
+#   t.<gen> o.<gen> h.<gen> l.<gen> c.<gen> v.<gen>   one raw little-endian column per file
+#   meta.json                                         {"count": n, "gen": g}  <- commit point
+# - append-only: new closed bars are appended to every column, then meta.json is replaced
+#   atomically; readers only ever map the first `count` rows, so a concurrent append is
+#   invisible until it is committed
+# - bars that land before the last stored bar (backfill) rewrite the series into a new generation
+#   and swap meta.json; readers still mapping the old generation keep their (unlinked) files
+# - reads are np.memmap views (zero-copy into CandleSeries / detectors); range lookups use a
+#   sparse in-memory index of every INDEX_STRIDE-th timestamp plus one bounded searchsorted
+# Only closed bars are stored; the forming bar always comes from the provider.
+
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+from app.candle_cache import interval_seconds, normalize_symbol
+from app.candle_series import COLUMNS, CandleSeries
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX
+    fcntl = None
+
+# default is backend/data/candles, whatever the working directory
+STORE_DIR = os.getenv("CANDLE_STORE_DIR") or os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "candles")
+INDEX_STRIDE = 1024
+DTYPES = {"t": np.int64, "o": np.float64, "h": np.float64, "l": np.float64, "c": np.float64, "v": np.float64}
+
+class _Reader:
+    """Mapped view of one committed generation of a series."""
+    def __init__(self, path: str, count: int, gen: int, stamp: Tuple[int, int]):
+        self.count = count
+        self.gen = gen
+        self.stamp = stamp
+        if count:
+            self.cols = {k: np.memmap(os.path.join(path, f"{k}.{gen}"), dtype=DTYPES[k], mode="r", shape=(count,))
+                         for k in COLUMNS}
+            # sparse index: every INDEX_STRIDE-th timestamp (tiny, kept in RAM)
+            self.index = np.array(self.cols["t"][::INDEX_STRIDE])
+        else:
+            self.cols = {k: np.zeros(0, dtype=DTYPES[k]) for k in COLUMNS}
+            self.index = np.zeros(0, dtype=np.int64)
+
+    def bound(self, ts: int, side: str) -> int:
+        """searchsorted over the mapped timestamps, touching one index block of the file."""
+        blk = int(np.searchsorted(self.index, ts, side=side)) - 1
+        if blk < 0:
+            return 0
+        lo = blk * INDEX_STRIDE
+        hi = min(self.count, lo + INDEX_STRIDE)
+        return lo + int(np.searchsorted(self.cols["t"][lo:hi], ts, side=side))
+
+    def series(self, i: int, j: int) -> CandleSeries:
+        return CandleSeries(*(self.cols[k][i:j] for k in COLUMNS))
+
+def _covered(r: _Reader, bars: CandleSeries) -> bool:
+    """True when every bar time in `bars` is already stored."""
+    i = r.bound(int(bars.t[0]), "left")
+    j = r.bound(int(bars.t[-1]), "right")
+    return j - i >= len(bars) and bool(np.isin(bars.t, r.cols["t"][i:j]).all())
+
+class _Series:
+    def __init__(self, root: str, symbol: str, interval: str):
+        self.symbol = normalize_symbol(symbol)
+        self.seconds = interval_seconds(interval)
+        self.path = os.path.join(root, self.symbol, f"{self.seconds}s")
+        self.lock = threading.Lock()
+        self.reader: Optional[_Reader] = None
+
+    # ---------- commit record ----------
+    def _meta_path(self) -> str:
+        return os.path.join(self.path, "meta.json")
+
+    def _stamp(self) -> Tuple[int, int]:
+        # every commit is a fresh file (os.replace), so inode + mtime identify it
+        try:
+            st = os.stat(self._meta_path())
+            return st.st_ino, st.st_mtime_ns
+        except OSError:
+            return 0, 0
+
+    def _read_meta(self) -> Tuple[int, int, Tuple[int, int]]:
+        stamp = self._stamp()
+        try:
+            with open(self._meta_path()) as f:
+                m = json.load(f)
+            return int(m["count"]), int(m["gen"]), stamp
+        except (OSError, ValueError, KeyError):
+            return 0, 0, (0, 0)
+
+    def _write_meta(self, count: int, gen: int):
+        tmp = self._meta_path() + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump({"count": count, "gen": gen, "symbol": self.symbol, "interval_s": self.seconds}, f)
+        os.replace(tmp, self._meta_path())
+
+    # ---------- read side ----------
+    def view(self) -> _Reader:
+        r = self.reader
+        if r is None or r.stamp != self._stamp():
+            count, gen, stamp = self._read_meta()
+            r = self.reader = _Reader(self.path, count, gen, stamp)
+        return r
+
+    # ---------- write side ----------
+    def _flock(self):
+        os.makedirs(self.path, exist_ok=True)
+        f = open(os.path.join(self.path, ".lock"), "a")
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX)   # other worker processes writing the same series
+        return f
+
+    def _append_columns(self, gen: int, count: int, bars: CandleSeries):
+        for k in COLUMNS:
+            with open(os.path.join(self.path, f"{k}.{gen}"), "r+b" if count else "wb") as f:
+                # drop anything past the commit point left by an interrupted append
+                f.truncate(count * 8)
+                f.seek(count * 8)
+                f.write(np.ascontiguousarray(getattr(bars, k), dtype=DTYPES[k]).tobytes())
+
+    def write(self, bars: CandleSeries) -> int:
+        """Persist closed `bars` (ascending). Returns the number of new bars stored."""
+        if not len(bars):
+            return 0
+        with self.lock:
+            lockf = self._flock()
+            try:
+                count, gen, _ = self._read_meta()
+                cur = _Reader(self.path, count, gen, (0, 0))
+                split = int(np.searchsorted(bars.t, cur.cols["t"][-1], side="right")) if count else 0
+                if split == 0 or _covered(cur, bars[:split]):
+                    new = bars[split:]
+                    if not len(new):
+                        return 0
+                    self._append_columns(gen, count, new)
+                    self._write_meta(count + len(new), gen)
+                    return len(new)
+                # bars before the last stored one that are not on disk yet (backfill): new generation
+                merged = CandleSeries.concat([bars, cur.series(0, count)]).sorted()
+                added = len(merged) - count
+                self._append_columns(gen + 1, 0, merged)
+                self._write_meta(len(merged), gen + 1)
+                for k in COLUMNS:
+                    try:
+                        os.remove(os.path.join(self.path, f"{k}.{gen}"))
+                    except OSError:
+                        pass
+                return added
+            finally:
+                lockf.close()
+
+class CandleStore:
+    def __init__(self, root: str = STORE_DIR):
+        self.root = root
+        self._series: Dict[Tuple[str, int], _Series] = {}
+        self._lock = threading.Lock()
+        self.bars_written = 0
+        self.reads = 0
+
+    def _get(self, symbol: str, interval: str) -> _Series:
+        key = (normalize_symbol(symbol), interval_seconds(interval))
+        with self._lock:
+            s = self._series.get(key)
+            if s is None:
+                s = self._series[key] = _Series(self.root, symbol, interval)
+            return s
+
+    def append(self, symbol: str, interval: str, bars: CandleSeries, now: Optional[float] = None) -> int:
+        """
+        Store the closed bars of `bars`; the forming bar (open time + interval > now) is skipped.
+        Bars already on disk are ignored, older ones trigger a rewrite (backfill).
+        """
+        if not isinstance(bars, CandleSeries) or not len(bars):
+            return 0
+        s = self._get(symbol, interval)
+        now = time.time() if now is None else now
+        closed = bars[:int(np.searchsorted(bars.t, now - s.seconds, side="right"))]
+        if not len(closed) or _covered(s.view(), closed):
+            return 0   # nothing new (the common case on every poll): no lock, no write
+        n = s.write(closed)
+        self.bars_written += n
+        return n
+
+    def read(self, symbol: str, interval: str, start: Optional[int] = None, end: Optional[int] = None,
+             limit: Optional[int] = None) -> CandleSeries:
+        """Bars with start <= t <= end (epoch seconds), zero-copy; `limit` keeps the newest."""
+        r = self._get(symbol, interval).view()
+        self.reads += 1
+        i = 0 if start is None else r.bound(start, "left")
+        j = r.count if end is None else r.bound(end, "right")
+        if limit is not None and j - i > limit:
+            i = j - limit
+        return r.series(i, max(i, j))
+
+    def tail(self, symbol: str, interval: str, n: int) -> CandleSeries:
+        return self.read(symbol, interval, limit=n)
+
+    def coverage(self, symbol: str, interval: str) -> Dict[str, Any]:
+        r = self._get(symbol, interval).view()
+        if not r.count:
+            return {"count": 0, "first": None, "last": None}
+        return {"count": r.count, "first": int(r.cols["t"][0]), "last": int(r.cols["t"][-1])}
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            series = len(self._series)
+        return {"dir": self.root, "series_open": series, "bars_written": self.bars_written, "reads": self.reads}
+
+# process-wide instance
+STORE = CandleStore()
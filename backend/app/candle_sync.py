@@ -0,0 +1,165 @@
+# backend/app/candle_sync.py
+# Incremental "fetch only new bars" sync for candle series.
+#
+# One SeriesState per (feed, symbol, interval) remembers the window we already hold.
+# The last bar of a window is treated as still forming; the next poll asks the
+# provider only for bars since that bar (start_date + a small outputsize) and
+# merges them in, replacing the forming bar. A full refetch is done only on the
+# first call, when a larger window is requested, or when the incremental
+# response does not line up with what we hold (gap / provider reshuffle).
+# A full fetch cut short on low credits (quota.Shrunk) only claims the bars it got, so the
+# next call for the full window refetches, and windows short of what was asked are handed
+# back still wrapped in Shrunk (not cached as the full window).
+
+import asyncio
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from app.candle_cache import interval_seconds, normalize_symbol
+from app.candle_series import CandleSeries
+from app.quota import Shrunk, unshrunk
+
+# hard ceiling on bars kept per series (TwelveData max outputsize)
+SYNC_MAX_BARS = 5000
+
+def _is_bars(res: Any) -> bool:
+    return isinstance(unshrunk(res), (list, CandleSeries))
+
+class SeriesState:
+    def __init__(self, feed: str, symbol: str, interval: str):
+        self.feed = feed
+        self.symbol = symbol
+        self.interval = interval
+        self.candles: Any = []     # CandleSeries (or list of dicts) once synced
+        self.capacity = 0          # largest window fetched in full so far
+        self.shrunk = False        # the last full fetch was cut short on low credits
+        self.synced_at = 0.0
+        self.lock = threading.Lock()      # seed()
+        self.alock = asyncio.Lock()       # async_sync()
+
+    @property
+    def last_closed(self) -> Optional[Dict[str, Any]]:
+        return self.candles[-2] if len(self.candles) >= 2 else None
+
+    @property
+    def forming(self) -> Optional[Dict[str, Any]]:
+        return self.candles[-1] if self.candles else None
+
+class SeriesSync:
+    def __init__(self, max_bars: int = SYNC_MAX_BARS):
+        self.max_bars = max_bars
+        self._states: Dict[Tuple[str, str, str], SeriesState] = {}
+        self._lock = threading.Lock()
+        self.full_fetches = 0
+        self.incremental_fetches = 0
+        self.bars_received = 0
+
+    def state(self, feed: str, symbol: str, interval: str) -> SeriesState:
+        key = (feed, normalize_symbol(symbol), str(interval))
+        with self._lock:
+            st = self._states.get(key)
+            if st is None:
+                st = self._states[key] = SeriesState(feed, symbol, interval)
+            return st
+
+    def seed(self, feed: str, symbol: str, interval: str, candles: Any) -> bool:
+        """
+        Prime an empty series with bars held elsewhere (e.g. the on-disk store after a
+        restart) so the next sync fetches only what is newer. No-op once the series is synced.
+        """
+        if len(candles) < 2:
+            return False
+        st = self.state(feed, symbol, interval)
+        with st.lock:
+            if len(st.candles):
+                return False
+            st.candles = candles
+            st.capacity = len(candles)
+            # as if synced when the last bar closed: _plan falls back to a full fetch when stale
+            st.synced_at = float(candles[-1]["t"] + interval_seconds(interval))
+            return True
+
+    def _plan(self, st: SeriesState, outputsize: int) -> Tuple[int, Optional[Dict[str, Any]]]:
+        """Return (bars to request, forming bar to resume from or None for a full refetch)."""
+        behind = int((time.time() - st.synced_at) // interval_seconds(st.interval)) + 2
+        if len(st.candles) < 2 or outputsize > st.capacity or behind >= st.capacity:
+            return max(outputsize, st.capacity), None
+        return min(behind, st.capacity), st.forming
+
+    def _merge(self, st: SeriesState, res: List[Dict[str, Any]], forming, time_of) -> bool:
+        """Apply an incremental response; False if it does not start at the forming bar."""
+        self.incremental_fetches += 1
+        self.bars_received += len(res)
+        if not res or time_of(res[0]) != time_of(forming):
+            return False
+        merged = st.candles[:-1] + res
+        st.candles = merged[-st.capacity:]
+        st.synced_at = time.time()
+        return True
+
+    def _replace(self, st: SeriesState, res: Any, outputsize: int):
+        self.full_fetches += 1
+        self.bars_received += len(res)
+        st.shrunk = isinstance(res, Shrunk)
+        if st.shrunk:
+            # only what came back is held; a later call for more refetches in full
+            res = res.bars
+            st.capacity = len(res)
+        else:
+            # an unflagged short response is all the history the provider has: keep the
+            # requested capacity so polls stay incremental while the series grows into it
+            st.capacity = max(outputsize, st.capacity)
+        st.candles = res[-st.capacity:] if st.capacity else res[:0]
+        st.synced_at = time.time()
+
+    @staticmethod
+    def _window(st: SeriesState, outputsize: int) -> Any:
+        out = st.candles[-outputsize:]
+        return Shrunk(out, outputsize, len(out)) if st.shrunk and len(out) < outputsize else out
+
+    async def async_sync(self, feed: str, symbol: str, interval: str, outputsize: int,
+                         fetch: Callable[[int, Optional[str]], Awaitable[Any]],
+                         time_of: Callable[[Dict[str, Any]], Any],
+                         start_of: Callable[[Dict[str, Any]], str]) -> Any:
+        """
+        Bring the (feed, symbol, interval) series up to date and return its last `outputsize` bars.
+        `feed` separates callers that hold differently shaped candles for the same symbol.
+        Concurrent calls for one series are serialised with an asyncio lock.
+
+        fetch(outputsize, start_date) -> awaitable of an ascending CandleSeries / list of candles
+            (quota.Shrunk-wrapped when the provider call was cut short), or an error value
+        time_of(bar) -> comparable bar timestamp
+        start_of(bar) -> provider start_date string for that bar
+        Provider errors are returned unchanged and leave the held window untouched.
+        """
+        outputsize = max(1, min(int(outputsize), self.max_bars))
+        st = self.state(feed, symbol, interval)
+        async with st.alock:
+            size, forming = self._plan(st, outputsize)
+            if forming is not None:
+                res = await fetch(size, start_of(forming))
+                if not _is_bars(res):
+                    return res
+                # a cut incremental response does not start at the forming bar: full refetch below
+                if self._merge(st, unshrunk(res), forming, time_of):
+                    return self._window(st, outputsize)
+                size = max(outputsize, st.capacity)
+            res = await fetch(size, None)
+            if not _is_bars(res):
+                return res
+            self._replace(st, res, outputsize)
+            return self._window(st, outputsize)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            series = len(self._states)
+        return {
+            "series": series,
+            "full_fetches": self.full_fetches,
+            "incremental_fetches": self.incremental_fetches,
+            "bars_received": self.bars_received,
+        }
+
+# process-wide instance
+SYNC = SeriesSync()
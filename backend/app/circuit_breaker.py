@@ -0,0 +1,170 @@
+# backend/app/circuit_breaker.py
+# Per-provider circuit breakers and health scores.
+#
+# closed    - calls flow; outcomes (error / slow) go into a rolling window
+# open      - error rate over the window crossed the threshold: calls fail fast with
+#             CircuitOpenError (no round trip) until the cooldown expires
+# half_open - cooldown over: one probe call is let through; success closes the
+#             breaker, failure re-opens it with a longer cooldown
+# Health scores (success rate, breaker state, p95 latency) drive the adaptive
+# provider order used by app/failover.race.
+
+import asyncio
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Dict, List
+
+from app.provider_stats import LATENCY
+from app.quota import QuotaExhausted
+
+BREAKER_WINDOW = 20
+BREAKER_MIN_CALLS = 5
+BREAKER_FAILURE_RATE = 0.5
+# calls slower than this count as failures for tripping purposes
+BREAKER_SLOW_CALL_MS = float(os.getenv("BREAKER_SLOW_CALL_MS", "5000"))
+BREAKER_COOLDOWN = 30.0
+BREAKER_MAX_COOLDOWN = 300.0
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+class CircuitOpenError(Exception):
+    def __init__(self, provider: str, retry_in: float):
+        super().__init__(f"circuit open for {provider}, retry in {retry_in:.0f}s")
+        self.provider = provider
+        self.retry_in = retry_in
+
+class CircuitBreaker:
+    def __init__(self, name: str):
+        self.name = name
+        self.state = CLOSED
+        self._outcomes = deque(maxlen=BREAKER_WINDOW)   # True = healthy call
+        self._opened_at = 0.0
+        self._cooldown = BREAKER_COOLDOWN
+        self._probe_inflight = False
+        self._lock = threading.Lock()
+        self.trips = 0
+
+    def _failure_rate(self) -> float:
+        if not self._outcomes:
+            return 0.0
+        return 1.0 - sum(self._outcomes) / len(self._outcomes)
+
+    def allow(self):
+        """Raise CircuitOpenError unless a call may go upstream now."""
+        with self._lock:
+            if self.state == OPEN:
+                waited = time.monotonic() - self._opened_at
+                if waited < self._cooldown:
+                    raise CircuitOpenError(self.name, self._cooldown - waited)
+                self.state = HALF_OPEN
+            if self.state == HALF_OPEN:
+                if self._probe_inflight:
+                    raise CircuitOpenError(self.name, 0)
+                self._probe_inflight = True
+
+    def record(self, ok: bool, latency_ms: float):
+        healthy = ok and latency_ms <= BREAKER_SLOW_CALL_MS
+        with self._lock:
+            if self.state == HALF_OPEN:
+                self._probe_inflight = False
+                if healthy:
+                    self.state = CLOSED
+                    self._outcomes.clear()
+                    self._cooldown = BREAKER_COOLDOWN
+                else:
+                    self._trip(min(self._cooldown * 2, BREAKER_MAX_COOLDOWN))
+                return
+            self._outcomes.append(healthy)
+            if (self.state == CLOSED and len(self._outcomes) >= BREAKER_MIN_CALLS
+                    and self._failure_rate() >= BREAKER_FAILURE_RATE):
+                self._trip(self._cooldown)
+
+    def release(self):
+        """Call was abandoned (cancelled) before an outcome: free the half-open probe slot."""
+        with self._lock:
+            self._probe_inflight = False
+
+    def _trip(self, cooldown: float):
+        self.state = OPEN
+        self._opened_at = time.monotonic()
+        self._cooldown = cooldown
+        self.trips += 1
+
+    def score(self) -> float:
+        """
+        0..1, higher is healthier: success rate, halved while half-open, damped when the
+        p95 latency exceeds one second; open breakers score 0.
+        """
+        with self._lock:
+            if self.state == OPEN:
+                return 0.0
+            success = 1.0 - self._failure_rate()
+            state_factor = 0.5 if self.state == HALF_OPEN else 1.0
+        p95 = LATENCY.percentile(self.name, 95)
+        latency_factor = 1.0 if p95 is None or p95 <= 1000.0 else 1000.0 / p95
+        return round(success * state_factor * latency_factor, 3)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            out = {
+                "state": self.state,
+                "failure_rate": round(self._failure_rate(), 3),
+                "calls_in_window": len(self._outcomes),
+                "trips": self.trips,
+            }
+            if self.state == OPEN:
+                out["retry_in_s"] = round(max(0.0, self._cooldown - (time.monotonic() - self._opened_at)), 1)
+        out["score"] = self.score()
+        return out
+
+class BreakerRegistry:
+    def __init__(self):
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+
+    def get(self, name: str) -> CircuitBreaker:
+        with self._lock:
+            br = self._breakers.get(name)
+            if br is None:
+                br = self._breakers[name] = CircuitBreaker(name)
+            return br
+
+    def order(self, names: List[str]) -> List[str]:
+        """Healthiest first; scores are bucketed to 0.1 so the configured order breaks near-ties."""
+        pref = {n: i for i, n in enumerate(names)}
+        return sorted(names, key=lambda n: (-round(self.get(n).score(), 1), pref[n]))
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            names = list(self._breakers)
+        latency = LATENCY.snapshot()
+        out = {}
+        for name in names:
+            out[name] = {**self.get(name).snapshot(), "latency": latency.get(name)}
+        return out
+
+# process-wide instance
+BREAKERS = BreakerRegistry()
+
+async def guarded(provider: str, fn: Callable[[], Awaitable[Any]],
+                  is_valid: Callable[[Any], bool] = lambda v: v is not None) -> Any:
+    """
+    Run one upstream provider call behind its breaker.
+    Raises CircuitOpenError without calling `fn` while the breaker is open.
+    """
+    br = BREAKERS.get(provider)
+    br.allow()
+    t0 = time.perf_counter()
+    try:
+        value = await fn()
+    except (asyncio.CancelledError, QuotaExhausted):
+        # abandoned, or refused locally by the quota scheduler: not the provider's fault
+        br.release()
+        raise
+    except Exception:
+        br.record(False, (time.perf_counter() - t0) * 1000.0)
+        raise
+    br.record(is_valid(value), (time.perf_counter() - t0) * 1000.0)
+    return value
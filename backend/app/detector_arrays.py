@@ -0,0 +1,282 @@
+# backend/app/detector_arrays.py
+# Array versions of the ICT detectors for bulk history.
+#
+# Every pattern condition is evaluated at every bar with shifted-array comparisons over the
+# CandleSeries columns; the *_hits() functions return {signal type: int64 bar index array}.
+# The detect_* wrappers cut those hits down to what the loop versions report for a window
+# (main.detect_* only look at the last bars) and build the same signal dicts in the same
+# order. The loop versions in main.py, signals.py and ict_models.py are the reference;
+# app/test_detectors.py checks both give identical output.
+# Every function accepts a CandleSeries or a BarFeatures: per-bar features (body, range,
+# wicks, lookback extremes, market structure, session levels) are computed once per
+# BarFeatures and shared by all detectors run over it (see app/pipeline.py).
+
+from functools import cached_property
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
+from app.candle_series import CandleSeries, as_series, format_time
+from app.rolling import trailing_max, trailing_min
+
+Hits = Dict[str, np.ndarray]
+
+# main.detect_turtle_soup / detect_liq_sweep default lookback
+EXTREME_LOOKBACK = 10
+
+class BarFeatures:
+    """Columns of one CandleSeries plus derived per-bar features, each computed at most once."""
+    def __init__(self, series: CandleSeries):
+        self.series = series
+        self.t, self.o, self.h, self.l, self.c = series.t, series.o, series.h, series.l, series.c
+        self._extremes: Dict[Tuple[int, int], Tuple[np.ndarray, np.ndarray]] = {}
+        self._structure: Dict[int, Any] = {}
+        self._sessions: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+
+    def __len__(self) -> int:
+        return len(self.t)
+
+    @cached_property
+    def body(self) -> np.ndarray:
+        return self.c - self.o
+
+    @cached_property
+    def abs_body(self) -> np.ndarray:
+        return np.abs(self.body)
+
+    @cached_property
+    def range(self) -> np.ndarray:
+        return self.h - self.l
+
+    @cached_property
+    def upper_wick(self) -> np.ndarray:
+        return self.h - np.maximum(self.o, self.c)
+
+    @cached_property
+    def lower_wick(self) -> np.ndarray:
+        return np.minimum(self.o, self.c) - self.l
+
+    def extremes(self, lookback: int, gap: int = 0) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        (highest high, lowest low) of the `lookback` bars ending `gap` bars before every bar
+        (sparse table); NaN where no such bar exists.
+        """
+        e = self._extremes.get((lookback, gap))
+        if e is None:
+            if gap:
+                hi, lo = self.extremes(lookback)
+                pad = np.full(min(gap, len(hi)), np.nan)
+                e = (np.r_[pad, hi[:len(hi) - gap]], np.r_[pad, lo[:len(lo) - gap]])
+            else:
+                e = (trailing_max(self.h, lookback), trailing_min(self.l, lookback))
+            self._extremes[(lookback, gap)] = e
+        return e
+
+    def structure(self, strength: int):
+        """app.structure.analyze() of the series (swings, BOS / CHoCH), once per strength."""
+        st = self._structure.get(strength)
+        if st is None:
+            from app.structure import analyze
+            st = self._structure[strength] = analyze(self.series, strength)
+        return st
+
+    def session_levels(self, name: str) -> Tuple[np.ndarray, np.ndarray]:
+        """(high, low) of the last completed `name` session day at every bar (app/sessions.py)."""
+        e = self._sessions.get(name)
+        if e is None:
+            from app.sessions import WINDOWS, prior_levels
+            e = self._sessions[name] = prior_levels(self.series, WINDOWS[name])
+        return e
+
+def features(candles) -> BarFeatures:
+    return candles if isinstance(candles, BarFeatures) else BarFeatures(as_series(candles))
+
+def _idx(mask: np.ndarray, offset: int = 0) -> np.ndarray:
+    return np.flatnonzero(mask).astype(np.int64) + offset
+
+def _none(*types: str) -> Hits:
+    return {k: np.zeros(0, np.int64) for k in types}
+
+# ---------- main.py family ----------
+def order_block_hits(candles) -> Hits:
+    """Index of the strong candle j whose open is retested by bar j + 1."""
+    f = features(candles)
+    o, body = f.o[:-1], f.body[:-1]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        strong = f.abs_body[:-1] / o > 0.0025
+        buy = (body > 0) & strong & (np.abs(f.l[1:] - o) / o < 0.0035)
+        sell = (body < 0) & strong & (np.abs(f.h[1:] - o) / o < 0.0035)
+    return {"order_block_buy": _idx(buy), "order_block_sell": _idx(sell)}
+
+def fvg3_hits(candles) -> Hits:
+    """Index of the third bar C of a gap between bars A = C - 2 and C."""
+    f = features(candles)
+    return {"fvg_bull": _idx(f.h[:-2] < f.l[2:], 2), "fvg_bear": _idx(f.l[:-2] > f.h[2:], 2)}
+
+def turtle_levels(f: BarFeatures, hi: np.ndarray, lo: np.ndarray, first: int = 1) -> Tuple[np.ndarray, np.ndarray]:
+    """Bars k >= first that close back inside after bar k - 1 broke the level in force at k (short, long)."""
+    if len(f) <= first:
+        return np.zeros(0, np.int64), np.zeros(0, np.int64)
+    k = slice(first, None)
+    short = (f.h[first - 1:-1] > hi[k]) & (f.c[k] < hi[k])
+    long_ = (f.l[first - 1:-1] < lo[k]) & (f.c[k] > lo[k])
+    return _idx(short, first), _idx(long_, first)
+
+def sweep_levels(f: BarFeatures, hi: np.ndarray, lo: np.ndarray, first: int = 0) -> Tuple[np.ndarray, np.ndarray]:
+    """Bars k >= first whose wick clears the level in force at k and close back inside (high, low)."""
+    if len(f) <= first:
+        return np.zeros(0, np.int64), np.zeros(0, np.int64)
+    k = slice(first, None)
+    high = (f.h[k] > hi[k]) & (f.c[k] < hi[k])
+    low = (f.l[k] < lo[k]) & (f.c[k] > lo[k])
+    return _idx(high, first), _idx(low, first)
+
+def turtle_soup_hits(candles, lookback: int = EXTREME_LOOKBACK) -> Hits:
+    """
+    Index of the bar k that closes back inside after bar k - 1 broke the extreme of the
+    `lookback` bars before it (k - 1 - lookback .. k - 2).
+    """
+    if lookback < 1:
+        raise ValueError("lookback must be >= 1")
+    f = features(candles)
+    if len(f) < 6:
+        return _none("turtle_short_fail", "turtle_long_fail")
+    # only bars with a full window before the breakout bar
+    short, long_ = turtle_levels(f, *f.extremes(lookback, gap=2), first=max(5, lookback + 1))
+    return {"turtle_short_fail": short, "turtle_long_fail": long_}
+
+def liq_sweep_hits(candles, lookback: int = EXTREME_LOOKBACK) -> Hits:
+    """Index of the bar k whose wick clears the extreme of the `lookback` bars before it and closes back inside."""
+    if lookback < 1:
+        raise ValueError("lookback must be >= 1")
+    f = features(candles)
+    if len(f) < 6:
+        return _none("liquidity_sweep_high", "liquidity_sweep_low")
+    high, low = sweep_levels(f, *f.extremes(lookback, gap=1), first=max(5, lookback))
+    return {"liquidity_sweep_high": high, "liquidity_sweep_low": low}
+
+# ---------- session levels (app/sessions.py) ----------
+def session_sweep_hits(candles, sessions: Tuple[str, ...] = ("asia", "london", "newyork")) -> Hits:
+    """liq_sweep_hits against the previous completed session's high / low, per session."""
+    f = features(candles)
+    out: Hits = {}
+    for name in sessions:
+        out[f"{name}_sweep_high"], out[f"{name}_sweep_low"] = sweep_levels(f, *f.session_levels(name))
+    return out
+
+def session_turtle_hits(candles, sessions: Tuple[str, ...] = ("asia", "london", "newyork")) -> Hits:
+    """turtle_soup_hits against the previous completed session's high / low, per session."""
+    f = features(candles)
+    out: Hits = {}
+    for name in sessions:
+        out[f"{name}_turtle_short_fail"], out[f"{name}_turtle_long_fail"] = turtle_levels(f, *f.session_levels(name))
+    return out
+
+# ---------- signals.py / ict_models.py family ----------
+def gap_hits(candles) -> Hits:
+    """signals.detect_fvg: bar i gaps over bar i - 1 (the last bar is never reported)."""
+    f = features(candles)
+    n = len(f)
+    cur = slice(1, n - 1) if n > 1 else slice(0, 0)
+    prev = slice(0, max(n - 2, 0))
+    return {"fvg_up": _idx(f.l[cur] > f.h[prev], 1), "fvg_down": _idx(f.h[cur] < f.l[prev], 1)}
+
+def turtle_break_hits(candles) -> Hits:
+    """signals.detect_turtle_soup: bar i - 1 takes bar i - 2's extreme, bar i closes past i - 1's open."""
+    f = features(candles)
+    a, b, c = slice(0, -2), slice(1, -1), slice(2, None)
+    return {"turtle_bull": _idx((f.l[b] < f.l[a]) & (f.c[c] > f.o[b]), 2),
+            "turtle_bear": _idx((f.h[b] > f.h[a]) & (f.c[c] < f.o[b]), 2)}
+
+def bos_hits(candles) -> Hits:
+    """ict_models.detect_bos: bar i (i >= 2) takes out bar i - 1's extreme and closes beyond it."""
+    f = features(candles)
+    if len(f) < 3:
+        return _none("bos_bull", "bos_bear")
+    p, c = slice(1, -1), slice(2, None)
+    return {"bos_bull": _idx((f.h[c] > f.h[p]) & (f.c[c] > f.h[p]), 2),
+            "bos_bear": _idx((f.l[c] < f.l[p]) & (f.c[c] < f.l[p]), 2)}
+
+def order(hits: Hits, descending: bool = False) -> Tuple[np.ndarray, List[str]]:
+    """Bar indices of all hits by bar (types in dict order within a bar) and their types."""
+    if not hits:
+        return np.zeros(0, np.int64), []
+    idx = np.concatenate(list(hits.values()))
+    rank = np.concatenate([np.full(len(v), r) for r, v in enumerate(hits.values())])
+    o = np.lexsort((rank, -idx if descending else idx))
+    types = list(hits)
+    return idx[o], [types[r] for r in rank[o].tolist()]
+
+def ordered(hits: Hits, descending: bool = False) -> List[Tuple[int, str]]:
+    """(bar index, signal type) pairs in order()."""
+    idx, types = order(hits, descending)
+    return list(zip(idx.tolist(), types))
+
+# ---------- loop-compatible signal dicts ----------
+_NOTES = {
+    "order_block_buy": "Bullish order block (demand) detected",
+    "order_block_sell": "Bearish order block (supply) detected",
+    "fvg_bull": "Bullish FVG (gap up) - possible buy on fill",
+    "fvg_bear": "Bearish FVG (gap down) - possible sell on fill",
+    "turtle_short_fail": "Failed breakout above high - contrarian short signal",
+    "turtle_long_fail": "Failed breakdown below low - contrarian long signal",
+    "liquidity_sweep_high": "Liquidity sweep above recent high (sell liquidity) detected",
+    "liquidity_sweep_low": "Liquidity sweep below recent low (buy liquidity) detected",
+}
+
+def last_bar(hits: Hits, n: int) -> Hits:
+    return {k: v[v == n - 1] for k, v in hits.items()}
+
+def order_block_window(hits: Hits, n: int, lookback: int = 30) -> Hits:
+    """Hits main.detect_order_blocks still reports for a window of n bars."""
+    lo, hi = n - min(n, lookback) + 1, n - 2
+    return {k: v[(v >= lo) & (v <= hi)] for k, v in hits.items()}
+
+def order_block_records(f: BarFeatures, hits: Hits, descending: bool = True) -> List[Dict[str, Any]]:
+    n = len(f)
+    return [{"type": k, "index_from_end": n - j, "price": float(f.o[j]), "time": format_time(f.t[j]),
+             "note": _NOTES[k]} for j, k in ordered(hits, descending)]
+
+def fvg3_records(f: BarFeatures, hits: Hits) -> List[Dict[str, Any]]:
+    out = []
+    for j, k in ordered(hits):
+        top, bottom = (float(f.l[j]), float(f.h[j - 2])) if k == "fvg_bull" else (float(f.l[j - 2]), float(f.h[j]))
+        out.append({"type": k, "time": format_time(f.t[j]), "gap_top": top, "gap_bottom": bottom, "note": _NOTES[k]})
+    return out
+
+def turtle_soup_records(f: BarFeatures, hits: Hits) -> List[Dict[str, Any]]:
+    return [{"type": k, "time": format_time(f.t[j]), "price": float(f.c[j]), "note": _NOTES[k]}
+            for j, k in ordered(hits)]
+
+def liq_sweep_records(f: BarFeatures, hits: Hits) -> List[Dict[str, Any]]:
+    return [{"type": k, "time": format_time(f.t[j]),
+             "sweep_price": float(f.h[j] if k == "liquidity_sweep_high" else f.l[j]), "note": _NOTES[k]}
+            for j, k in ordered(hits)]
+
+def simple_records(f: BarFeatures, hits: Hits, price: bool = True) -> List[Dict[str, Any]]:
+    """{"time": epoch, "type"[, "price": close]} as in signals.py / ict_models.py."""
+    idx, types = order(hits)
+    times = f.t[idx].tolist()
+    if not price:
+        return [{"time": t, "type": k} for t, k in zip(times, types)]
+    return [{"time": t, "type": k, "price": p} for t, k, p in zip(times, types, f.c[idx].tolist())]
+
+def detect_order_blocks(candles, lookback: int = 30) -> List[Dict[str, Any]]:
+    f = features(candles)
+    return order_block_records(f, order_block_window(order_block_hits(f), len(f), lookback))
+
+def detect_fvg(candles) -> List[Dict[str, Any]]:
+    f = features(candles)
+    return fvg3_records(f, last_bar(fvg3_hits(f), len(f)))
+
+def detect_turtle_soup(candles, lookback: int = EXTREME_LOOKBACK) -> List[Dict[str, Any]]:
+    f = features(candles)
+    return turtle_soup_records(f, last_bar(turtle_soup_hits(f, lookback), len(f)))
+
+def detect_liq_sweep(candles, lookback: int = EXTREME_LOOKBACK) -> List[Dict[str, Any]]:
+    f = features(candles)
+    return liq_sweep_records(f, last_bar(liq_sweep_hits(f, lookback), len(f)))
+
+def detect_bos(candles) -> List[Dict[str, Any]]:
+    f = features(candles)
+    return simple_records(f, bos_hits(f))
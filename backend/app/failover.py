@@ -0,0 +1,101 @@
+# backend/app/failover.py
+# Hedged / parallel provider failover.
+#
+# Modes:
+#   sequential - classic chain: next provider only after the previous one failed
+#   hedged     - start the next provider when the current one has not answered within
+#                the hedge delay (its recent p95 latency by default) or as soon as it fails;
+#                the first valid response wins and the losers are cancelled
+#   parallel   - fire every provider at once (latency-critical alert paths)
+# Worst-case latency is no longer the sum of all provider timeouts.
+# Attempts are reordered by provider health score (app/circuit_breaker) unless adaptive=False.
+
+import asyncio
+import os
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from app.circuit_breaker import BREAKERS
+from app.provider_stats import LATENCY
+
+FAILOVER_MODES = ("sequential", "hedged", "parallel")
+FAILOVER_MODE = os.getenv("FAILOVER_MODE", "hedged")
+# used until a provider has latency samples; p95-derived delays are clamped to [MIN, MAX]
+HEDGE_DELAY_DEFAULT = float(os.getenv("FAILOVER_HEDGE_DELAY", "1.5"))
+HEDGE_DELAY_MIN = 0.25
+HEDGE_DELAY_MAX = 5.0
+
+Attempt = Tuple[str, Callable[[], Awaitable[Any]]]
+
+def hedge_delay_for(provider: str) -> float:
+    """Seconds to wait on `provider` before hedging: its p95 latency, clamped."""
+    p95 = LATENCY.percentile(provider, 95)
+    if p95 is None:
+        return HEDGE_DELAY_DEFAULT
+    return max(HEDGE_DELAY_MIN, min(HEDGE_DELAY_MAX, p95 / 1000.0))
+
+async def _run(fn: Callable[[], Awaitable[Any]]) -> Any:
+    return await fn()
+
+async def race(attempts: List[Attempt], is_valid: Callable[[Any], bool] = lambda v: v is not None,
+               mode: Optional[str] = None, hedge_delay: Optional[float] = None,
+               adaptive: bool = True) -> Dict[str, Any]:
+    """
+    Run provider attempts according to `mode` and return the first valid result.
+
+    Returns {"provider", "result", "ttfb_ms", "mode", "errors"}; provider is None when all failed.
+    ttfb_ms is the time from the start of the failover call until the winning response arrived.
+    Invalid results and exceptions are collected in `errors` keyed by provider name.
+    """
+    mode = mode or FAILOVER_MODE
+    if mode not in FAILOVER_MODES:
+        mode = "hedged"
+    t0 = time.perf_counter()
+    errors: Dict[str, Any] = {}
+    pending: Dict["asyncio.Task", str] = {}
+    queue = list(attempts)
+    if adaptive and len(queue) > 1:
+        rank = {name: i for i, name in enumerate(BREAKERS.order([name for name, _ in queue]))}
+        queue.sort(key=lambda a: rank[a[0]])
+
+    def launch():
+        name, fn = queue.pop(0)
+        pending[asyncio.ensure_future(_run(fn))] = name
+        return name
+
+    try:
+        if mode == "parallel":
+            while queue:
+                launch()
+        elif queue:
+            launch()
+        while pending:
+            if mode == "hedged" and queue:
+                last = list(pending.values())[-1]
+                timeout = hedge_delay if hedge_delay is not None else hedge_delay_for(last)
+            else:
+                timeout = None
+            done, _ = await asyncio.wait(list(pending), timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            if not done:
+                # hedge: current provider is slow, start the next one alongside it
+                launch()
+                continue
+            for task in done:
+                name = pending.pop(task)
+                try:
+                    value = task.result()
+                except Exception as e:
+                    errors[name] = str(e)
+                    continue
+                if is_valid(value):
+                    return {"provider": name, "result": value, "mode": mode, "errors": errors,
+                            "ttfb_ms": round((time.perf_counter() - t0) * 1000.0, 1)}
+                errors[name] = value
+            if queue and (not pending or mode == "hedged"):
+                # a provider failed: move on immediately instead of waiting out a timer
+                launch()
+        return {"provider": None, "result": None, "mode": mode, "errors": errors,
+                "ttfb_ms": round((time.perf_counter() - t0) * 1000.0, 1)}
+    finally:
+        for task in pending:
+            task.cancel()
@@ -0,0 +1,241 @@
+# backend/app/fvg_tracker.py
+# Fair value gap lifecycle: every 3-bar gap (main.detect_fvg's definition) is tracked from the
+# bar that completes it until price has traded through it.
+#
+# - a bullish gap [A.high, C.low] is mitigated from the top as later lows trade into it and is
+#   filled once a low reaches A.high; bearish gaps mirror it from the bottom. The unmitigated
+#   part is kept as open_bottom / open_top
+# - open gaps live in an app/interval_index.IntervalIndex per side keyed by their open part,
+#   so near-price queries and the per-bar mitigation scan only visit the O(log n) search
+#   path plus the gaps they return
+# - a tracker is bootstrapped from a whole series with arrays (gaps from detector_arrays,
+#   later extremes as a suffix min / max) and then fed bar by bar; the forming bar mitigates
+#   (its range only widens while it forms) but only closed bars create gaps
+# - FVG_BOOK holds one tracker per (symbol, interval), least recently used evicted
+
+import itertools
+import os
+import threading
+from collections import OrderedDict, deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app import detector_arrays as da
+from app.candle_cache import normalize_symbol
+from app.candle_series import CandleSeries, as_series, format_time
+from app.interval_index import IntervalIndex
+from app.live_detectors import Row, _row
+
+FVG_MAX_OPEN = int(os.getenv("FVG_MAX_OPEN", "5000"))          # open gaps per tracker; oldest dropped
+FVG_MAX_TRACKERS = int(os.getenv("FVG_MAX_TRACKERS", "500"))   # (symbol, interval) pairs
+
+BULL, BEAR = "fvg_bull", "fvg_bear"
+
+_ids = itertools.count(1)
+
+class Gap:
+    __slots__ = ("id", "type", "t", "top", "bottom", "open_top", "open_bottom", "filled_t")
+
+    def __init__(self, type_: str, t: int, top: float, bottom: float):
+        self.id = next(_ids)
+        self.type = type_
+        self.t = t
+        self.top, self.bottom = top, bottom
+        self.open_top, self.open_bottom = top, bottom
+        self.filled_t: Optional[int] = None
+
+    @property
+    def mitigated(self) -> float:
+        """Share of the gap price has traded into (0 untouched, 1 filled)."""
+        size = self.top - self.bottom
+        return 1.0 if size <= 0 else 1.0 - (self.open_top - self.open_bottom) / size
+
+    def distance(self, price: float) -> float:
+        """0 inside the open part, else the distance to its nearest edge."""
+        return max(self.open_bottom - price, price - self.open_top, 0.0)
+
+    def record(self, price: Optional[float] = None) -> Dict[str, Any]:
+        rec = {"id": self.id, "type": self.type, "time": format_time(self.t), "gap_top": self.top,
+               "gap_bottom": self.bottom, "open_top": self.open_top, "open_bottom": self.open_bottom,
+               "state": "filled" if self.filled_t is not None else "partial" if self.mitigated > 0 else "open",
+               "mitigated": round(self.mitigated, 4)}
+        if price is not None:
+            rec["distance"] = self.distance(price)
+        return rec
+
+class FVGTracker:
+    """Open fair value gaps of one symbol / interval, fed from its candle series."""
+    def __init__(self, max_open: int = FVG_MAX_OPEN):
+        self.max_open = max_open
+        self.bull = IntervalIndex()
+        self.bear = IntervalIndex()
+        self.order: "OrderedDict[int, Gap]" = OrderedDict()   # open gaps by creation
+        self.closed: Deque[Row] = deque(maxlen=2)              # last two closed bars
+        self.pending: Optional[Row] = None                    # forming bar
+        self.created = self.filled = self.dropped = 0
+
+    def reset(self):
+        self.__init__(self.max_open)
+
+    @property
+    def last_t(self) -> Optional[int]:
+        return self.pending[0] if self.pending is not None else None
+
+    def __len__(self) -> int:
+        return len(self.order)
+
+    def _index(self, gap: Gap) -> IntervalIndex:
+        return self.bull if gap.type == BULL else self.bear
+
+    def _add(self, gap: Gap):
+        self.created += 1
+        self._index(gap).insert(gap, gap.open_bottom, gap.open_top)
+        self.order[gap.id] = gap
+        while len(self.order) > self.max_open:
+            _, old = self.order.popitem(last=False)
+            self._index(old).remove(old, old.open_bottom)
+            self.dropped += 1
+
+    def _mitigate(self, row: Row) -> List[Gap]:
+        """Trade the bar's range into the open gaps; returns those it filled."""
+        t, _, h, l, _ = row
+        filled = []
+        for gap in [g for g in self.bull.overlapping(l, float("inf")) if g.open_top > l]:
+            self.bull.remove(gap, gap.open_bottom)
+            if l <= gap.open_bottom:
+                gap.open_top, gap.filled_t = gap.open_bottom, t
+                filled.append(gap)
+            else:
+                gap.open_top = l
+                self.bull.insert(gap, gap.open_bottom, gap.open_top)
+        for gap in [g for g in self.bear.overlapping(float("-inf"), h) if g.open_bottom < h]:
+            self.bear.remove(gap, gap.open_bottom)
+            if h >= gap.open_top:
+                gap.open_bottom, gap.filled_t = gap.open_top, t
+                filled.append(gap)
+            else:
+                gap.open_bottom = h
+                self.bear.insert(gap, gap.open_bottom, gap.open_top)
+        for gap in filled:
+            del self.order[gap.id]
+        self.filled += len(filled)
+        return filled
+
+    def on_bar(self, bar) -> Tuple[List[Gap], List[Gap]]:
+        """Feed the next bar, or the forming bar again (same time); returns (created, filled)."""
+        row = _row(bar)
+        created: List[Gap] = []
+        if self.pending is not None and row[0] < self.pending[0]:
+            return [], []
+        if self.pending is not None and row[0] > self.pending[0]:
+            c = self.pending
+            if len(self.closed) == 2:
+                a = self.closed[0]
+                if a[2] < c[3]:
+                    created.append(Gap(BULL, c[0], c[3], a[2]))
+                if a[3] > c[2]:
+                    created.append(Gap(BEAR, c[0], a[3], c[2]))
+            self.closed.append(c)
+            for gap in created:
+                self._add(gap)
+        self.pending = row
+        return created, self._mitigate(row)
+
+    def load(self, series: CandleSeries) -> List[Gap]:
+        """Bootstrap from a whole series (the last bar is taken as forming); returns the gaps it already filled."""
+        self.reset()
+        s = as_series(series)
+        n = len(s)
+        if n == 0:
+            return []
+        hits = da.fvg3_hits(s[:n - 1])
+        low_after = np.minimum.accumulate(s.l[::-1])[::-1]    # lowest low from bar i on
+        high_after = np.maximum.accumulate(s.h[::-1])[::-1]
+        gaps, filled = [], []
+        for j in hits["fvg_bull"].tolist():
+            gaps.append((j, Gap(BULL, int(s.t[j]), float(s.l[j]), float(s.h[j - 2]))))
+        for j in hits["fvg_bear"].tolist():
+            gaps.append((j, Gap(BEAR, int(s.t[j]), float(s.l[j - 2]), float(s.h[j]))))
+        for j, gap in sorted(gaps, key=lambda x: x[0]):
+            if gap.type == BULL:
+                gap.open_top = min(gap.top, max(float(low_after[j + 1]), gap.bottom))
+            else:
+                gap.open_bottom = max(gap.bottom, min(float(high_after[j + 1]), gap.top))
+            if gap.open_top > gap.open_bottom:
+                self._add(gap)
+            else:
+                # only filled gaps pay for locating the bar that filled them
+                if gap.type == BULL:
+                    k = np.argmax(s.l[j + 1:] <= gap.bottom)
+                else:
+                    k = np.argmax(s.h[j + 1:] >= gap.top)
+                gap.filled_t = int(s.t[j + 1 + k])
+                filled.append(gap)
+                self.created += 1
+                self.filled += 1
+        self.closed.extend(_row(s[j]) for j in range(max(0, n - 3), n - 1))
+        self.pending = _row(s[n - 1])
+        return filled
+
+    def feed(self, series: CandleSeries) -> Tuple[List[Gap], List[Gap]]:
+        """
+        Fold in a polled window: bars from the forming one onwards. A fresh tracker, or a
+        window that starts after the forming bar (a gap), bootstraps from the window instead.
+        """
+        s = as_series(series)
+        last = self.last_t
+        if last is None or (len(s) and int(s.t[0]) > last):
+            self.load(s)
+            return [], []
+        created, filled = [], []
+        for j in range(int(np.searchsorted(s.t, last)), len(s)):
+            c, f = self.on_bar(s[j])
+            created.extend(c)
+            filled.extend(f)
+        return created, filled
+
+    def near(self, price: float, distance: Optional[float] = None) -> List[Gap]:
+        """Open gaps within `distance` of price (all when None), nearest first."""
+        if distance is None:
+            gaps = list(self.bull) + list(self.bear)
+        else:
+            lo, hi = price - distance, price + distance
+            gaps = self.bull.overlapping(lo, hi) + self.bear.overlapping(lo, hi)
+        return sorted(gaps, key=lambda g: (g.distance(price), -g.t))
+
+class FVGBook:
+    """Process-wide FVG trackers keyed by (symbol, interval)."""
+    def __init__(self, max_trackers: int = FVG_MAX_TRACKERS, max_open: int = FVG_MAX_OPEN):
+        self.max_trackers = max_trackers
+        self.max_open = max_open
+        self._lock = threading.Lock()
+        self._trackers: "OrderedDict[Tuple[str, str], FVGTracker]" = OrderedDict()
+        self.evicted = 0
+
+    def feed(self, symbol: str, interval: str, series: CandleSeries) -> FVGTracker:
+        key = (normalize_symbol(symbol), interval)
+        with self._lock:
+            tr = self._trackers.get(key)
+            if tr is None:
+                tr = self._trackers[key] = FVGTracker(self.max_open)
+                while len(self._trackers) > self.max_trackers:
+                    self._trackers.popitem(last=False)
+                    self.evicted += 1
+            self._trackers.move_to_end(key)
+            tr.feed(series)
+            return tr
+
+    def get(self, symbol: str, interval: str) -> Optional[FVGTracker]:
+        with self._lock:
+            return self._trackers.get((normalize_symbol(symbol), interval))
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            trs = list(self._trackers.values())
+            return {"trackers": len(trs), "open": sum(len(t) for t in trs),
+                    "created": sum(t.created for t in trs), "filled": sum(t.filled for t in trs),
+                    "dropped": sum(t.dropped for t in trs), "evicted_trackers": self.evicted}
+
+# process-wide instance
+FVG_BOOK = FVGBook()
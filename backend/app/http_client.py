@@ -0,0 +1,152 @@
+# backend/app/http_client.py
+# App-lifetime HTTP client layer shared by every provider and Telegram call.
+#
+# - one httpx.AsyncClient per upstream host, kept alive for the life of the app
+#   (connection reuse instead of a TCP/TLS handshake per request)
+# - per-host connection limits so one slow provider cannot starve the others
+# - HTTP/2 for hosts that speak it, when the optional `h2` package is installed
+# - provider requests wait for a credit from the quota scheduler (app/quota.py)
+# - a pooled requests.Session for the remaining sync scripts/routers
+# Call `aclose()` from the app shutdown hook.
+
+import asyncio
+import time
+from typing import Any, Dict, Optional
+from urllib.parse import parse_qs, urlsplit
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+
+from app.provider_stats import LATENCY
+from app.quota import QUOTA
+
+try:
+    import h2  # noqa: F401  (httpx only needs it importable)
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+DEFAULT_TIMEOUT = 8.0
+DEFAULT_MAX_CONNECTIONS = 10
+
+# max concurrent connections per upstream host
+HOST_LIMITS: Dict[str, int] = {
+    "api.twelvedata.com": 16,
+    "finnhub.io": 8,
+    "www.alphavantage.co": 4,
+    "api.telegram.org": 4,
+}
+# upstream host -> provider name used for latency stats
+HOST_PROVIDERS: Dict[str, str] = {
+    "api.twelvedata.com": "twelvedata",
+    "finnhub.io": "finnhub",
+    "www.alphavantage.co": "alphavantage",
+    "api.telegram.org": "telegram",
+}
+# hosts known to negotiate HTTP/2 over TLS
+HTTP2_HOSTS = {"api.twelvedata.com", "api.telegram.org"}
+
+# event loop -> {host: client}; a client is bound to the loop it was created on, so every
+# loop (the app's, a test client's, a worker thread's) gets its own pool
+_clients: Dict[asyncio.AbstractEventLoop, Dict[str, httpx.AsyncClient]] = {}
+_session: Optional[requests.Session] = None
+
+def _host(url: str) -> str:
+    return urlsplit(url).hostname or ""
+
+def get_client(url: str) -> httpx.AsyncClient:
+    """Return the pooled AsyncClient for the host of `url` on the running loop (created on first use)."""
+    loop = asyncio.get_running_loop()
+    clients = _clients.get(loop)
+    if clients is None:
+        # a loop that closed without aclose() (no shutdown hook ran) can no longer be awaited on
+        for old in [l for l in _clients if l.is_closed()]:
+            del _clients[old]
+        clients = _clients[loop] = {}
+    host = _host(url)
+    client = clients.get(host)
+    if client is None or client.is_closed:
+        n = HOST_LIMITS.get(host, DEFAULT_MAX_CONNECTIONS)
+        client = httpx.AsyncClient(
+            timeout=DEFAULT_TIMEOUT,
+            limits=httpx.Limits(max_connections=n, max_keepalive_connections=n),
+            http2=HTTP2_AVAILABLE and host in HTTP2_HOSTS,
+        )
+        clients[host] = client
+    return client
+
+def _record(url: str, t0: float):
+    provider = HOST_PROVIDERS.get(_host(url))
+    if provider:
+        LATENCY.record(provider, (time.perf_counter() - t0) * 1000.0)
+
+def _api_key(url: str, params: Optional[Dict[str, Any]]) -> str:
+    query = {k: v[0] for k, v in parse_qs(urlsplit(url).query).items()}
+    query.update(params or {})
+    return str(query.get("apikey") or query.get("token") or "")
+
+async def _take_credit(provider: str, key: str, url: str, params: Optional[Dict[str, Any]]):
+    """Block for a quota credit (raises QuotaExhausted). Params go out as given: fetchers that
+    shrink outputsize on low credits do it themselves (QUOTA.shrink_outputsize) and flag it."""
+    symbols = str((params or {}).get("symbol") or parse_qs(urlsplit(url).query).get("symbol", [""])[0])
+    # TwelveData batch requests cost one credit per symbol
+    cost = max(1, len([x for x in symbols.split(",") if x])) if provider == "twelvedata" else 1
+    await QUOTA.acquire(provider, key, cost=cost)
+
+async def get(url: str, params: Optional[Dict[str, Any]] = None, headers: Optional[Dict[str, str]] = None,
+              timeout: float = DEFAULT_TIMEOUT) -> httpx.Response:
+    provider = HOST_PROVIDERS.get(_host(url))
+    key = _api_key(url, params) if provider else ""
+    if provider:
+        await _take_credit(provider, key, url, params)
+    t0 = time.perf_counter()
+    r = await get_client(url).get(url, params=params, headers=headers, timeout=timeout)
+    _record(url, t0)
+    if provider:
+        QUOTA.observe(provider, key, r.headers, r.status_code)
+    return r
+
+async def post(url: str, json: Any = None, data: Any = None, headers: Optional[Dict[str, str]] = None,
+               timeout: float = DEFAULT_TIMEOUT) -> httpx.Response:
+    t0 = time.perf_counter()
+    r = await get_client(url).post(url, json=json, data=data, headers=headers, timeout=timeout)
+    _record(url, t0)
+    return r
+
+async def get_json(url: str, params: Optional[Dict[str, Any]] = None, headers: Optional[Dict[str, str]] = None,
+                   timeout: float = DEFAULT_TIMEOUT) -> Any:
+    """GET and decode JSON; raises httpx.HTTPError on transport errors and 4xx/5xx."""
+    r = await get(url, params=params, headers=headers, timeout=timeout)
+    r.raise_for_status()
+    return r.json()
+
+async def aclose():
+    """Close the running loop's clients; pools of other loops still alive are closed on their loop."""
+    global _session
+    loop = asyncio.get_running_loop()
+    pending = []
+    for other, clients in list(_clients.items()):
+        if other is loop:
+            for client in clients.values():
+                await client.aclose()
+        elif not other.is_closed() and other.is_running():
+            pending += [asyncio.wrap_future(asyncio.run_coroutine_threadsafe(client.aclose(), other))
+                        for client in clients.values()]
+    _clients.clear()
+    if pending:
+        # a wedged worker loop must not hold up shutdown
+        await asyncio.wait(pending, timeout=DEFAULT_TIMEOUT)
+    if _session is not None:
+        _session.close()
+        _session = None
+
+def get_session() -> requests.Session:
+    """Pooled keep-alive session for code paths that are still synchronous."""
+    global _session
+    if _session is None:
+        _session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=len(HOST_LIMITS) + 4, pool_maxsize=DEFAULT_MAX_CONNECTIONS)
+        _session.mount("https://", adapter)
+        _session.mount("http://", adapter)
+    return _session
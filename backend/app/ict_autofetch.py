@@ -1,11 +1,15 @@
 # backend/app/ict_autofetch.py
 import os
-import time
-import requests
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 from typing import List, Dict, Any
 
+from app import http_client
+from app.candle_cache import CACHE
+from app.candle_series import CandleSeries
+from app.normalize import normalize_twelvedata
+from app.resample import RESAMPLER, BASE_INTERVAL, base_bars_for, can_resample
+
 router = APIRouter(prefix="/ict", tags=["ict"])
 
 TWELVE_ENV = "TWELVEDATA_API_KEY"
@@ -36,15 +40,16 @@ except Exception:
                 return {"fvg_signals": []}
 
 # ----- TwelveData fetch helper -----
-def fetch_twelvedata_candles(symbol: str, interval: str, outputsize: int, api_key: str) -> List[Dict[str, Any]]:
+async def _twelvedata_series(symbol: str, interval: str, outputsize: int, api_key: str) -> CandleSeries:
     params = {
         "symbol": symbol,
         "interval": interval,
         "outputsize": outputsize,
         "format": "JSON",
+        "timezone": "UTC",
         "apikey": api_key
     }
-    r = requests.get(TWELVE_URL, params=params, timeout=15)
+    r = await http_client.get(TWELVE_URL, params=params, timeout=15)
     if r.status_code != 200:
         raise HTTPException(status_code=502, detail=f"TwelveData HTTP {r.status_code}")
     data = r.json()
@@ -55,40 +60,29 @@ def fetch_twelvedata_candles(symbol: str, interval: str, outputsize: int, api_ke
     if not values:
         # Sometimes TwelveData returns 'values' or 'values' key; guard
         raise HTTPException(status_code=502, detail="No 'values' returned by TwelveData")
-    candles = []
-    # TwelveData usually returns newest-first, reverse -> oldest-first
-    for v in reversed(values):
-        # v expected to have 'datetime', 'open', 'high', 'low', 'close'
-        dt_str = v.get("datetime") or v.get("datetime")
-        # Accept either full time string or ISO etc.
-        # Try several parse patterns
-        try:
-            # expect format "YYYY-MM-DD HH:MM:SS"
-            t_struct = time.strptime(dt_str, "%Y-%m-%d %H:%M:%S")
-            epoch = int(time.mktime(t_struct))
-        except Exception:
-            # fallback: if we already have epoch numeric string
-            try:
-                epoch = int(float(v.get("timestamp") or v.get("time", 0)))
-            except Exception:
-                epoch = int(time.time())
-        candle = {
-            "time": epoch,
-            "open": float(v["open"]),
-            "high": float(v["high"]),
-            "low": float(v["low"]),
-            "close": float(v["close"]),
-        }
-        candles.append(candle)
-    return candles
+    # oldest-first (UTC); rows with unparseable times are dropped
+    return normalize_twelvedata(values, tz="UTC").series
+
+async def fetch_twelvedata_candles(symbol: str, interval: str, outputsize: int, api_key: str) -> List[Dict[str, Any]]:
+    if can_resample(interval, outputsize):
+        # higher timeframes are resampled from the cached 1min series shared with the other routes
+        size = base_bars_for(interval, outputsize)
+        base = await CACHE.aget_or_fetch("twelvedata", symbol, BASE_INTERVAL, size,
+                                         lambda: _twelvedata_series(symbol, BASE_INTERVAL, size, api_key))
+        series = RESAMPLER.get("fvg_auto.twelvedata", symbol, interval, outputsize, base)
+    else:
+        series = await _twelvedata_series(symbol, interval, outputsize, api_key)
+    # epoch seconds
+    return [{k: r[k] for k in ("time", "open", "high", "low", "close")}
+            for r in series.to_records("time", epoch=True)]
 
 # ----- endpoint -----
 @router.post("/fvg_auto")
-def fvg_auto(req: AutoFVGRequest):
+async def fvg_auto(req: AutoFVGRequest):
     api_key = os.getenv(TWELVE_ENV)
     if not api_key:
         raise HTTPException(status_code=500, detail=f"Missing env var {TWELVE_ENV}")
-    candles = fetch_twelvedata_candles(req.symbol, req.interval, req.limit, api_key)
+    candles = await fetch_twelvedata_candles(req.symbol, req.interval, req.limit, api_key)
     # call your real FVG function which should accept a list of candles
     result = compute_fvg_from_candles(candles)
     return {"status": "ok", "symbol": req.symbol, "candles_count": len(candles), **(result or {})}
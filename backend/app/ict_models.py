@@ -1,3 +1,8 @@
+from app import pipeline, sessions, structure
+from app.candle_series import as_series
+
+# bar-to-bar breaks: kept as the reference for detector_arrays.bos_hits; the models report
+# swing-based BOS / CHoCH from app/structure.py
 def detect_bos(candles):
     signals = []
     for i in range(2, len(candles)):
@@ -8,16 +13,23 @@ def detect_bos(candles):
             signals.append({"time": cur["t"], "type": "bos_bear", "price": cur["c"]})
     return signals
 
-def detect_choch(candles):
-    signals = []
-    return signals
+def detect_choch(candles, strength=structure.DEFAULT_STRENGTH):
+    return [e for e in structure.analyze(candles, strength).records() if e["type"].startswith("choch")]
 
-def detect_sessions():
-    return {"london":"07:00-10:00","newyork":"13:00-16:00","asia":"00:00-03:00"}
+def detect_sessions(candles=None):
+    # session / killzone windows (local time, DST aware); with candles also the label of the
+    # last bar and each session's levels over its last two days (app/sessions.py)
+    out = {name: w.label for name, w in sessions.WINDOWS.items()}
+    if candles is None or not len(candles):
+        return out
+    s = as_series(candles)
+    lab = sessions.labels(s[-1:])
+    out["current"] = sessions.label_names(int(lab["sessions"][0]), int(lab["killzone"][0]))
+    out["levels"] = {w.name: sessions.levels(s, w).take(slice(-2, None)).records(w) for w in sessions.SESSION_WINDOWS}
+    return out
 
 def compute_all_ict_models(candles):
     return {
-        "bos": detect_bos(candles),
-        "choch": detect_choch(candles),
-        "sessions": detect_sessions()
+        **pipeline.ict_model_family(candles),   # swing-based "bos" and "choch"
+        "sessions": detect_sessions(candles)
     }
@@ -1,12 +1,28 @@
 # backend/app/ict_service.py
-# Run with e.g. `uvicorn ict_service:app --host 0.0.0.0 --port 8000`
+# Run (from backend/) with e.g. `uvicorn app.ict_service:app --host 0.0.0.0 --port 8000`
 from fastapi import FastAPI, HTTPException
 from pydantic import BaseModel
-import os, time, requests, statistics, math
+import os, time, statistics, math, asyncio
 from typing import List, Dict, Any, Optional
+from app.candle_cache import CACHE
+from app.candle_sync import SYNC
+from app import http_client
+from app.failover import race
+from app.circuit_breaker import BREAKERS, guarded
+from app.quota import QUOTA, PRIORITY_LIVE, Shrunk, priority, unshrunk
+from app.candle_series import CandleSeries, as_series, format_time
+from app.normalize import normalize_records, normalize_twelvedata, normalize_finnhub, normalize_alphavantage
+from app import normalize
+from app.resample import RESAMPLER, BASE_INTERVAL, base_bars_for, can_resample
+from app.indicators import SMA, RSI, ATR, Bollinger, IndicatorBank, BankStore
+from app import indicator_series
 
 app = FastAPI(title="ICT Charting API (failover providers)")
 
+@app.on_event("shutdown")
+async def _close_http_clients():
+    await http_client.aclose()
+
 # env keys (backend/.env must expose these to container)
 TWELVEDATA_KEY = os.getenv("TWELVEDATA_API_KEY", "")
 FINNHUB_KEY    = os.getenv("FINNHUB_API_KEY", "")
@@ -15,86 +31,117 @@ TELEGRAM_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN", "")
 TELEGRAM_CHAT  = os.getenv("TELEGRAM_CHAT_ID", "")
 
 # ---------- utilities ----------
-def _req_get(url, params=None, headers=None, timeout=8):
+async def _req_get(url, params=None, headers=None, timeout=8):
     try:
-        r = requests.get(url, params=params, headers=headers, timeout=timeout)
-        r.raise_for_status()
-        return r.json()
+        return await http_client.get_json(url, params=params, headers=headers, timeout=timeout)
     except Exception as e:
         # return exception for caller decision
         return {"_error": str(e)}
 
-def _normalize_candle_list(candles: List[Dict[str,Any]]) -> List[Dict[str,Any]]:
+def _normalize_candle_list(candles: List[Dict[str,Any]]) -> CandleSeries:
     """
     Expect list of dicts with keys: datetime/open/high/low/close (strings or numbers).
-    Convert to numeric and unix timestamp for 't'.
+    Returns an ascending CandleSeries (unix 't'; naive datetime strings are read as UTC).
+    Rows without a usable time or price are dropped (counted in app.normalize stats).
     """
-    out = []
-    for c in candles:
-        try:
-            dt = c.get("datetime") or c.get("time") or c.get("t") or c.get("timestamp")
-            # If 't' is present as integer -> keep
-            tval = None
-            if isinstance(dt, (int, float)):
-                tval = int(dt)
-            else:
-                # try ISO string -> time.mktime
-                if isinstance(dt, str):
-                    # attempt parse naive ISO (remove timezone)
-                    try:
-                        # Try to parse as YYYY-MM-DD HH:MM:SS or YYYY-MM-DDTHH:MM:SS
-                        import datetime as _dt
-                        s = dt.replace("T", " ").split("+")[0].split("Z")[0]
-                        d = _dt.datetime.strptime(s, "%Y-%m-%d %H:%M:%S")
-                        tval = int(d.timestamp())
-                    except Exception:
-                        # fallback 0
-                        tval = 0
-                else:
-                    tval = 0
-            o = float(c.get("open", c.get("o", 0)))
-            h = float(c.get("high", c.get("h", 0)))
-            l = float(c.get("low", c.get("l", 0)))
-            cval = float(c.get("close", c.get("c", c.get("close", 0))))
-            out.append({"t": tval, "o": o, "h": h, "l": l, "c": cval})
-        except Exception:
-            continue
-    # sort by t
-    out.sort(key=lambda x: x["t"])
-    return out
+    return normalize_records(candles).series
 
 # ---------- Provider fetchers (failover order) ----------
-def fetch_twelvedata(symbol: str, interval: str="1min", outputsize: int=100) -> Dict[str,Any]:
-    """Return dict {status:..., data: [candles...]} or error dict."""
+async def fetch_twelvedata(symbol: str, interval: str="1min", outputsize: int=100, start_date: Optional[str]=None) -> Dict[str,Any]:
+    """
+    Return dict {status, candles} or error dict; "shrunk_to" is set when outputsize was cut
+    because credits ran low.
+    """
     if not TWELVEDATA_KEY:
         return {"_error": "no_twelvedata_key"}
     url = "https://api.twelvedata.com/time_series"
+    sent = QUOTA.shrink_outputsize("twelvedata", TWELVEDATA_KEY, outputsize)
     params = {
         "symbol": symbol,
         "interval": interval,
-        "outputsize": outputsize,
+        "outputsize": sent,
         "apikey": TWELVEDATA_KEY,
-        "format": "JSON"
+        "format": "JSON",
+        "timezone": "UTC"
     }
-    resp = _req_get(url, params=params)
+    if start_date:
+        params["start_date"] = start_date
+    resp = await _req_get(url, params=params)
     if resp is None or "_error" in resp:
         return {"_error": resp.get("_error") if resp else "no_response"}
     if resp.get("status") == "ok" and "values" in resp:
-        candles = []
-        for v in resp["values"]:
-            candles.append({
-                "datetime": v.get("datetime") or v.get("timestamp"),
-                "open": v.get("open"),
-                "high": v.get("high"),
-                "low": v.get("low"),
-                "close": v.get("close")
-            })
-        return {"status":"ok", "candles": _normalize_candle_list(candles)}
+        return _td_ok(resp["values"], outputsize, sent)
     else:
         # API error text
         return {"_error": resp}
 
-def fetch_finnhub(symbol: str, interval: str="1", outputsize: int=100) -> Dict[str,Any]:
+def _td_candles(values: List[Dict[str,Any]]) -> CandleSeries:
+    # requested with timezone=UTC
+    return normalize_twelvedata(values, tz="UTC").series
+
+def _td_ok(values: List[Dict[str,Any]], requested: int, sent: int) -> Dict[str,Any]:
+    res = {"status":"ok", "candles": _td_candles(values)}
+    if sent < requested:
+        res["shrunk_to"] = sent
+    return res
+
+def _bars(r: Dict[str,Any], outputsize: int) -> Any:
+    """The candles of an ok result, Shrunk-wrapped when the call was cut short; else the error."""
+    if r.get("status") != "ok":
+        return r
+    return Shrunk(r["candles"], outputsize, r["shrunk_to"]) if "shrunk_to" in r else r["candles"]
+
+# TwelveData accepts up to 120 comma-separated symbols per time_series call; chunks are
+# further capped at the key's per-minute credits (QUOTA.batch_size)
+TD_BATCH_MAX = int(os.getenv("TWELVEDATA_BATCH_MAX", "120"))
+
+async def fetch_twelvedata_batch(symbols: List[str], interval: str="1min", outputsize: int=100) -> Dict[str,Dict[str,Any]]:
+    """One time_series call for many symbols -> {symbol: {status, candles[, shrunk_to]} or {_error}}."""
+    if not TWELVEDATA_KEY:
+        return {s: {"_error": "no_twelvedata_key"} for s in symbols}
+    url = "https://api.twelvedata.com/time_series"
+    sent = QUOTA.shrink_outputsize("twelvedata", TWELVEDATA_KEY, outputsize)
+    params = {
+        "symbol": ",".join(symbols),
+        "interval": interval,
+        "outputsize": sent,
+        "apikey": TWELVEDATA_KEY,
+        "format": "JSON",
+        "timezone": "UTC"
+    }
+    resp = await _req_get(url, params=params)
+    if resp is None or "_error" in resp:
+        err = resp.get("_error") if resp else "no_response"
+        return {s: {"_error": err} for s in symbols}
+    # a single symbol comes back un-nested
+    if len(symbols) == 1:
+        resp = {symbols[0]: resp}
+    out = {}
+    for s in symbols:
+        d = resp.get(s) or {}
+        if d.get("status") == "ok" and "values" in d:
+            out[s] = _td_ok(d["values"], outputsize, sent)
+        else:
+            out[s] = {"_error": d}
+    return out
+
+def _td_start_date(candle) -> str:
+    # start_date is read in the request timezone (UTC)
+    return format_time(candle["t"])
+
+async def fetch_twelvedata_synced(symbol: str, interval: str="1min", outputsize: int=100) -> Dict[str,Any]:
+    """fetch_twelvedata that only downloads bars newer than the series we already hold."""
+    async def _fetch(size, start):
+        return _bars(await fetch_twelvedata(symbol, interval=interval, outputsize=size, start_date=start), size)
+    res = await SYNC.async_sync("ict_service.twelvedata", symbol, interval, outputsize, _fetch,
+                                time_of=lambda c: c["t"], start_of=_td_start_date)
+    if isinstance(res, Shrunk):
+        return {"status":"ok", "candles": res.bars, "shrunk_to": res.sent}
+    if isinstance(res, CandleSeries):
+        return {"status":"ok", "candles": res}
+    return res
+
+async def fetch_finnhub(symbol: str, interval: str="1", outputsize: int=100) -> Dict[str,Any]:
     # finnhub uses resolution param: 1, 5, 15, 60, D
     if not FINNHUB_KEY:
         return {"_error": "no_finnhub_key"}
@@ -109,25 +156,16 @@ def fetch_finnhub(symbol: str, interval: str="1", outputsize: int=100) -> Dict[s
         "to": int(time.time()),
         "token": FINNHUB_KEY
     }
-    resp = _req_get(url, params=params)
+    resp = await _req_get(url, params=params)
     if resp is None or "_error" in resp:
         return {"_error": resp.get("_error") if resp else "no_response"}
     # Finnhub returns c, h, l, o, t arrays
     if resp.get("s") == "ok" and "t" in resp:
-        candles = []
-        for i, tt in enumerate(resp["t"]):
-            candles.append({
-                "datetime": int(tt),
-                "open": resp["o"][i],
-                "high": resp["h"][i],
-                "low": resp["l"][i],
-                "close": resp["c"][i]
-            })
-        return {"status":"ok", "candles": _normalize_candle_list(candles)}
+        return {"status":"ok", "candles": normalize_finnhub(resp).series}
     else:
         return {"_error": resp}
 
-def fetch_alpha(symbol: str, interval: str="1min", outputsize: int=100) -> Dict[str,Any]:
+async def fetch_alpha(symbol: str, interval: str="1min", outputsize: int=100) -> Dict[str,Any]:
     if not ALPHAVANTAGE_KEY:
         return {"_error": "no_alphavantage_key"}
     # Alphavantage endpoints: TIME_SERIES_INTRADAY for stocks; for crypto use DIGITAL_CURRENCY_INTRADAY (limited)
@@ -140,7 +178,7 @@ def fetch_alpha(symbol: str, interval: str="1min", outputsize: int=100) -> Dict[
         "apikey": ALPHAVANTAGE_KEY,
         "outputsize": "compact"
     }
-    resp = _req_get(url, params=params)
+    resp = await _req_get(url, params=params)
     if resp is None or "_error" in resp:
         return {"_error": resp.get("_error") if resp else "no_response"}
     # Alphavantage returns e.g. "Time Series (1min)" key
@@ -150,108 +188,114 @@ def fetch_alpha(symbol: str, interval: str="1min", outputsize: int=100) -> Dict[
             key = k
             break
     if key:
-        candles = []
-        for dt, v in resp[key].items():
-            candles.append({
-                "datetime": dt,
-                "open": v["1. open"],
-                "high": v["2. high"],
-                "low": v["3. low"],
-                "close": v["4. close"]
-            })
-        return {"status":"ok", "candles": _normalize_candle_list(candles)}
+        return {"status":"ok", "candles": normalize_alphavantage(resp).series}
     else:
         return {"_error": resp}
 
 # ---------- Failover logic ----------
-def fetch_candles_with_failover(symbol: str, interval="1min", outputsize=150):
+async def _cached(provider: str, fetch, symbol: str, interval: str, outputsize: int) -> Dict[str,Any]:
+    # cache in front of the breaker: cached bars are still served while a provider's circuit is open.
+    # Only the CandleSeries is cached, the same value type app.main stores under the same key;
+    # a window cut short on low credits is served but not cached under the full outputsize.
+    async def _fetch():
+        return _bars(await fetch(symbol, interval=interval, outputsize=outputsize), outputsize)
+    ok = lambda r: isinstance(r, CandleSeries)
+    res = await CACHE.aget_or_fetch(provider, symbol, interval, outputsize,
+                                    lambda: guarded(provider, _fetch, lambda r: ok(unshrunk(r))), is_valid=ok)
+    return {"status":"ok", "candles": unshrunk(res)} if ok(unshrunk(res)) else res
+
+async def fetch_candles_with_failover(symbol: str, interval="1min", outputsize=150, mode: Optional[str]=None):
     # Priority: TwelveData -> Finnhub -> AlphaVantage
     # User can pass crypto exchange format to finnhub e.g. BINANCE:BTCUSDT
     # Normalize symbol for twelvedata input (TwelveData supports many notations)
-    # Try TwelveData
-    r = fetch_twelvedata(symbol, interval=interval, outputsize=outputsize)
-    if r.get("status") == "ok":
-        return {"provider":"twelvedata", "candles": r["candles"]}
-    # Try Finnhub
-    r2 = fetch_finnhub(symbol, interval=interval, outputsize=outputsize)
-    if r2.get("status") == "ok":
-        return {"provider":"finnhub", "candles": r2["candles"]}
-    # Try AlphaVantage
-    r3 = fetch_alpha(symbol, interval=interval, outputsize=outputsize)
-    if r3.get("status") == "ok":
-        return {"provider":"alphavantage", "candles": r3["candles"]}
+    # Every provider call goes through the shared candle cache.
+    # mode: sequential | hedged (default, FAILOVER_MODE env) | parallel - see app/failover.py
+    if can_resample(interval, outputsize):
+        # higher timeframes come from the shared 1min series (see app/resample.py)
+        base = await fetch_candles_with_failover(symbol, BASE_INTERVAL, base_bars_for(interval, outputsize), mode)
+        if base.get("provider") is None:
+            return base
+        bars = RESAMPLER.get(f"ict.{base['provider']}", symbol, interval, outputsize, base["candles"])
+        return {**base, "candles": bars, "resampled_from": BASE_INTERVAL}
+    attempts = [
+        ("twelvedata", lambda: _cached("twelvedata", fetch_twelvedata_synced, symbol, interval, outputsize)),
+        ("finnhub", lambda: _cached("finnhub", fetch_finnhub, symbol, interval, outputsize)),
+        ("alphavantage", lambda: _cached("alphavantage", fetch_alpha, symbol, interval, outputsize)),
+    ]
+    res = await race(attempts, is_valid=lambda r: r.get("status") == "ok", mode=mode)
+    if res["provider"] is not None:
+        return {"provider": res["provider"], "candles": res["result"]["candles"],
+                "ttfb_ms": res["ttfb_ms"], "failover_mode": res["mode"]}
     # All failed — combine errors
-    return {"provider": None, "error": {"twelvedata": r, "finnhub": r2, "alphavantage": r3}}
+    return {"provider": None, "error": res["errors"], "ttfb_ms": res["ttfb_ms"]}
 
 # ---------- Signal computation (simple ICT-style baseline) ----------
-def sma(values: List[float], period: int) -> Optional[float]:
-    if len(values) < period:
-        return None
-    return sum(values[-period:]) / period
+def _signal_bank() -> IndicatorBank:
+    return IndicatorBank({"sma_fast": SMA(9), "sma_slow": SMA(21), "rsi": RSI(14),
+                          "atr": ATR(14), "bollinger": Bollinger(20, 2.0)})
+
+# per (provider, symbol, interval) streaming state; only new closed bars are folded in per call
+SIGNAL_BANKS = BankStore("signals", _signal_bank)
 
 def compute_rsi(closes: List[float], period: int=14) -> Optional[float]:
-    if len(closes) < period+1:
+    """Wilder RSI of the whole list (batch form of app.indicators.RSI)."""
+    if len(closes) <= period:
         return None
-    gains = []
-    losses = []
-    for i in range(-period, 0):
-        change = closes[i] - closes[i-1]
-        if change > 0:
-            gains.append(change)
-            losses.append(0)
-        else:
-            gains.append(0)
-            losses.append(abs(change))
-    avg_gain = sum(gains) / period
-    avg_loss = sum(losses) / period
-    if avg_loss == 0:
-        return 100.0
-    rs = avg_gain / avg_loss
-    return 100 - (100 / (1 + rs))
-
-def compute_ict_signals(candles: List[Dict[str,Any]]) -> Dict[str,Any]:
+    return float(indicator_series.rsi(closes, period)[-1])
+
+def compute_ict_signals(candles, key: Optional[tuple]=None) -> Dict[str,Any]:
     """
     Simple signals:
       - SMA fast (9) / slow (21) crossover -> buy/sell
       - RSI(14) threshold (overbought/oversold)
+    candles: CandleSeries or list of {"t","o","h","l","c"} dicts.
+    key: (provider, symbol, interval) -> reuse that feed's streaming state (O(new bars));
+    without it the indicators are replayed over the window.
     """
-    closes = [c["c"] for c in candles]
-    latest = closes[-1] if closes else None
-    sma_fast = sma(closes, 9)
-    sma_slow = sma(closes, 21)
-    rsi = compute_rsi(closes, 14)
+    series = as_series(candles)
+    if key is not None:
+        bank = SIGNAL_BANKS.feed(key, series)
+    else:
+        bank = _signal_bank()
+        bank.feed(series)
+    # the last bar is the forming one: peeked, not committed; "prev" = as of the bar before it
+    cur = bank.values(series)
+    prev = bank.previous()
+    latest = float(series.c[-1]) if len(series) else None
+    sma_fast, sma_slow, rsi = cur["sma_fast"], cur["sma_slow"], cur["rsi"]
     signals = []
     if sma_fast and sma_slow:
         # check last two values for crossover
-        if len(closes) >= 22:
-            prev_fast = sma(closes[:-1], 9)
-            prev_slow = sma(closes[:-1], 21)
-            if prev_fast is not None and prev_slow is not None:
-                if prev_fast < prev_slow and sma_fast > sma_slow:
-                    signals.append({"type":"sma_cross", "side":"buy", "reason":"fast crossed above slow"})
-                elif prev_fast > prev_slow and sma_fast < sma_slow:
-                    signals.append({"type":"sma_cross", "side":"sell", "reason":"fast crossed below slow"})
+        prev_fast, prev_slow = prev["sma_fast"], prev["sma_slow"]
+        if prev_fast is not None and prev_slow is not None:
+            if prev_fast < prev_slow and sma_fast > sma_slow:
+                signals.append({"type":"sma_cross", "side":"buy", "reason":"fast crossed above slow"})
+            elif prev_fast > prev_slow and sma_fast < sma_slow:
+                signals.append({"type":"sma_cross", "side":"sell", "reason":"fast crossed below slow"})
     if rsi is not None:
         if rsi < 30:
             signals.append({"type":"rsi", "side":"buy", "value": rsi, "reason":"oversold"})
         elif rsi > 70:
             signals.append({"type":"rsi", "side":"sell", "value": rsi, "reason":"overbought"})
+    bb = cur["bollinger"]
     return {
         "latest_price": latest,
         "sma_fast": sma_fast,
         "sma_slow": sma_slow,
         "rsi": rsi,
+        "atr": cur["atr"],
+        "bollinger": {"middle": bb[0], "upper": bb[1], "lower": bb[2]} if bb else None,
         "signals": signals
     }
 
 # ---------- Telegram utility ----------
-def send_telegram_message(text: str) -> Dict[str,Any]:
+async def send_telegram_message(text: str) -> Dict[str,Any]:
     if not TELEGRAM_TOKEN or not TELEGRAM_CHAT:
         return {"_error":"telegram_not_configured"}
     url = f"https://api.telegram.org/bot{TELEGRAM_TOKEN}/sendMessage"
     data = {"chat_id": TELEGRAM_CHAT, "text": text}
     try:
-        r = requests.post(url, data=data, timeout=8)
+        r = await http_client.post(url, data=data, timeout=8)
         r.raise_for_status()
         return r.json()
     except Exception as e:
@@ -262,32 +306,119 @@ class CandlesRequest(BaseModel):
     symbol: str
     interval: Optional[str] = "1min"
     outputsize: Optional[int] = 150
+    failover_mode: Optional[str] = None   # sequential | hedged | parallel
 
 @app.post("/ict/candles")
-def api_candles(req: CandlesRequest):
-    res = fetch_candles_with_failover(req.symbol, interval=req.interval, outputsize=req.outputsize)
+async def api_candles(req: CandlesRequest):
+    res = await fetch_candles_with_failover(req.symbol, interval=req.interval, outputsize=req.outputsize,
+                                            mode=req.failover_mode)
     if res.get("provider") is None:
         raise HTTPException(status_code=502, detail=res.get("error"))
-    return res
+    return {**res, "candles": res["candles"].to_records("t")}
 
 class SignalsRequest(CandlesRequest):
     alert_telegram: Optional[bool] = False
     alert_text: Optional[str] = None
 
 @app.post("/ict/signals")
-def api_signals(req: SignalsRequest):
-    res = fetch_candles_with_failover(req.symbol, interval=req.interval, outputsize=req.outputsize)
+async def api_signals(req: SignalsRequest):
+    # alert path is latency-critical: race every provider unless the caller chose a mode,
+    # and jump the quota queue ahead of dashboard / backfill requests
+    mode = req.failover_mode or ("parallel" if req.alert_telegram else None)
+    if req.alert_telegram:
+        with priority(PRIORITY_LIVE):
+            res = await fetch_candles_with_failover(req.symbol, interval=req.interval, outputsize=req.outputsize, mode=mode)
+    else:
+        res = await fetch_candles_with_failover(req.symbol, interval=req.interval, outputsize=req.outputsize, mode=mode)
     if res.get("provider") is None:
         raise HTTPException(status_code=502, detail=res.get("error"))
     candles = res["candles"]
-    sig = compute_ict_signals(candles)
-    out = {"provider": res["provider"], "signals": sig}
+    sig = compute_ict_signals(candles, key=(res["provider"], req.symbol, req.interval))
+    out = {"provider": res["provider"], "ttfb_ms": res["ttfb_ms"], "signals": sig}
     if req.alert_telegram:
         text = req.alert_text or f"ICT signals for {req.symbol}: {sig['signals']}"
-        t = send_telegram_message(text)
+        t = await send_telegram_message(text)
         out["telegram"] = t
     return out
 
+class BatchSignalsRequest(BaseModel):
+    symbols: List[str]
+    intervals: List[str] = ["1min"]
+    outputsize: Optional[int] = 150
+
+async def _batch_candles(symbols: List[str], interval: str, outputsize: int) -> Dict[str,Dict[str,Any]]:
+    """Cached series first, then TwelveData batches, then per-symbol failover for the leftovers."""
+    out = {}
+    missing = []
+    for sym in symbols:
+        cached = CACHE.lookup("twelvedata", sym, interval, outputsize)
+        if cached is not None:
+            out[sym] = {"provider": "twelvedata", "candles": cached}
+        else:
+            missing.append(sym)
+
+    async def run_chunk(chunk):
+        try:
+            res = await guarded("twelvedata", lambda: fetch_twelvedata_batch(chunk, interval, outputsize),
+                                is_valid=lambda r: any(v.get("status") == "ok" for v in r.values()))
+        except Exception as e:
+            res = {s: {"_error": str(e)} for s in chunk}
+        for sym, r in res.items():
+            if r.get("status") == "ok":
+                if "shrunk_to" not in r:
+                    CACHE.store("twelvedata", sym, interval, outputsize, r["candles"])
+                out[sym] = {"provider": "twelvedata", "candles": r["candles"]}
+
+    n = QUOTA.batch_size("twelvedata", TWELVEDATA_KEY or "", TD_BATCH_MAX)
+    chunks = [missing[i:i + n] for i in range(0, len(missing), n)]
+    await asyncio.gather(*(run_chunk(ch) for ch in chunks))
+    fallback = [s for s in missing if s not in out]
+    res = await asyncio.gather(*(fetch_candles_with_failover(s, interval=interval, outputsize=outputsize) for s in fallback))
+    out.update(zip(fallback, res))
+    return out
+
+@app.post("/ict/signals/batch")
+async def api_signals_batch(req: BatchSignalsRequest):
+    """compute_ict_signals for every symbol x interval; one upstream call per interval per batch of symbols."""
+    symbols = list(dict.fromkeys(req.symbols))
+    per_interval = await asyncio.gather(*(_batch_candles(symbols, iv, req.outputsize) for iv in req.intervals))
+    results = {}
+    for sym in symbols:
+        results[sym] = {}
+        for iv, res in zip(req.intervals, per_interval):
+            r = res[sym]
+            if r.get("provider") is None:
+                results[sym][iv] = {"error": r.get("error")}
+            else:
+                results[sym][iv] = {"provider": r["provider"], "signals": compute_ict_signals(r["candles"], key=(r["provider"], sym, iv))}
+    return {"results": results}
+
+class IndicatorsRequest(CandlesRequest):
+    indicators: List[str] = ["sma:20", "ema:50", "rsi:14"]
+
+@app.post("/ict/indicators")
+async def api_indicators(req: IndicatorsRequest):
+    """Whole indicator arrays over the candle window (see app/indicator_series.py for the spec strings)."""
+    try:
+        for spec in req.indicators:
+            indicator_series.parse_spec(spec)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    res = await fetch_candles_with_failover(req.symbol, interval=req.interval, outputsize=req.outputsize,
+                                            mode=req.failover_mode)
+    if res.get("provider") is None:
+        raise HTTPException(status_code=502, detail=res.get("error"))
+    candles = res["candles"]
+    values = indicator_series.compute(candles, req.indicators)
+    return {"provider": res["provider"], "ttfb_ms": res["ttfb_ms"], "t": candles.t.tolist(),
+            "indicators": indicator_series.records(values)}
+
 @app.get("/health")
-def health():
-    return {"status":"ok", "providers": {"twelvedata": bool(TWELVEDATA_KEY), "finnhub": bool(FINNHUB_KEY), "alphavantage": bool(ALPHAVANTAGE_KEY)}}
+async def health():
+    for provider, key in (("twelvedata", TWELVEDATA_KEY), ("finnhub", FINNHUB_KEY), ("alphavantage", ALPHAVANTAGE_KEY)):
+        if key:
+            QUOTA.budget(provider, key)
+    return {"status":"ok", "providers": {"twelvedata": bool(TWELVEDATA_KEY), "finnhub": bool(FINNHUB_KEY), "alphavantage": bool(ALPHAVANTAGE_KEY)},
+            "provider_health": BREAKERS.snapshot(), "candle_cache": CACHE.stats(), "series_sync": SYNC.stats(),
+            "quota": QUOTA.snapshot(), "normalize": normalize.stats(), "resample": RESAMPLER.stats(),
+            "indicators": SIGNAL_BANKS.stats()}
@@ -7,6 +7,12 @@ from pydantic import BaseModel, Field
 import httpx
 import asyncio
 
+from app import http_client
+from app.candle_cache import CACHE
+from app.candle_series import CandleSeries
+from app.normalize import normalize_twelvedata
+from app.resample import RESAMPLER, BASE_INTERVAL, base_bars_for, can_resample
+
 router = APIRouter()
 
 TWELVEDATA_API_KEY = os.getenv("TWELVEDATA_API_KEY")  # make sure .env contains this
@@ -20,47 +26,50 @@ class FetchRequest(BaseModel):
 async def fetch_twelvedata_time_series(
     symbol: str, interval: str, limit: int, apikey: str
 ) -> Dict[str, Any]:
-    """Fetch time series from TwelveData asynchronously with httpx."""
+    """Fetch time series from TwelveData asynchronously through the shared httpx pool."""
     url = "https://api.twelvedata.com/time_series"
     params = {
         "symbol": symbol,
         "interval": interval,
         "outputsize": str(limit),
         "format": "JSON",
+        "timezone": "UTC",
         "apikey": apikey,
     }
 
-    async with httpx.AsyncClient(timeout=15.0) as client:
-        r = await client.get(url, params=params)
-        # raise_for_status will throw for 4xx/5xx
-        try:
-            r.raise_for_status()
-        except httpx.HTTPStatusError as exc:
-            raise HTTPException(status_code=502, detail=f"TwelveData error: {exc.response.text}")
+    # pooled app-lifetime client (keep-alive / HTTP2) instead of a client per request
+    r = await http_client.get(url, params=params, timeout=15.0)
+    # raise_for_status will throw for 4xx/5xx
+    try:
+        r.raise_for_status()
+    except httpx.HTTPStatusError as exc:
+        raise HTTPException(status_code=502, detail=f"TwelveData error: {exc.response.text}")
 
-        return r.json()
+    return r.json()
 
 
 def convert_twelvedata_values_to_candles(values: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-    """TwelveData returns values in reverse chronological order; convert to chrono and map fields."""
-    # values is a list of dictionaries like { "datetime": "...", "open": "...", "high": "...", ... }
-    # Convert strings to floats where appropriate and ensure chronological order
-    candles = []
-    for v in reversed(values):  # reverse to chronological (oldest -> newest)
-        try:
-            candle = {
-                "time": v.get("datetime") or v.get("timestamp"),
-                "open": float(v["open"]),
-                "high": float(v["high"]),
-                "low": float(v["low"]),
-                "close": float(v["close"]),
-                "volume": float(v.get("volume", 0) or 0),
-            }
-        except Exception:
-            # skip malformed candle
-            continue
-        candles.append(candle)
-    return candles
+    """TwelveData returns values in reverse chronological order; convert to chrono and map fields.
+
+    Malformed candles are skipped (see app.normalize for the reject counts).
+    """
+    return normalize_twelvedata(values, tz="UTC").series.to_records("time")
+
+
+async def _fetch_series(symbol: str, interval: str, limit: int) -> CandleSeries:
+    # fetch
+    data = await fetch_twelvedata_time_series(symbol, interval, limit, TWELVEDATA_API_KEY)
+
+    # check for API error in payload
+    if "status" in data and data.get("status") == "error":
+        msg = data.get("message", "unknown error from TwelveData")
+        raise HTTPException(status_code=502, detail=f"TwelveData error: {msg}")
+
+    values = data.get("values")
+    if not values:
+        raise HTTPException(status_code=502, detail="TwelveData returned no candle values")
+
+    return normalize_twelvedata(values, tz="UTC").series
 
 
 @router.post("/ict/fvg_auto")
@@ -79,19 +88,14 @@ async def ict_fvg_auto(req: FetchRequest):
     if not TWELVEDATA_API_KEY:
         raise HTTPException(status_code=500, detail="TWELVEDATA_API_KEY not set in env")
 
-    # fetch
-    data = await fetch_twelvedata_time_series(req.symbol, req.interval, req.limit, TWELVEDATA_API_KEY)
-
-    # check for API error in payload
-    if "status" in data and data.get("status") == "error":
-        msg = data.get("message", "unknown error from TwelveData")
-        raise HTTPException(status_code=502, detail=f"TwelveData error: {msg}")
-
-    values = data.get("values")
-    if not values:
-        raise HTTPException(status_code=502, detail="TwelveData returned no candle values")
-
-    candles = convert_twelvedata_values_to_candles(values)
+    if can_resample(req.interval, req.limit):
+        # higher timeframes are resampled from the cached 1min series shared with the other routes
+        size = base_bars_for(req.interval, req.limit)
+        base = await CACHE.aget_or_fetch("twelvedata", req.symbol, BASE_INTERVAL, size,
+                                         lambda: _fetch_series(req.symbol, BASE_INTERVAL, size))
+        candles = RESAMPLER.get("fvg_auto.twelvedata", req.symbol, req.interval, req.limit, base).to_records("time")
+    else:
+        candles = (await _fetch_series(req.symbol, req.interval, req.limit)).to_records("time")
 
     # TODO: Replace this placeholder with your real ICT signal detection routine.
     # For now, return an empty signals array and the candles for inspection/testing.
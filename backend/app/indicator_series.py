@@ -0,0 +1,251 @@
+# backend/app/indicator_series.py
+# Full-history indicator arrays for chart overlays, one NumPy pass per indicator.
+#
+# Batch counterpart of app/indicators.py (same definitions, same warm-up): every function
+# returns a float64 array aligned with the input bars, NaN while warming up.
+# - SMA: cumulative sum differences, re-anchored on the first value to keep sums small
+# - EMA / Wilder smoothing: the recurrence y = w*y[-1] + (1-w)*x is solved in blocks; inside a
+#   block it is a scaled cumsum, only the block carries (n / block of them) are sequential
+# - VWAP: resets at every session open (app/resample.py session alignment); anchored VWAP
+#   accumulates from the first bar at or after the anchor. Series without any volume
+#   (FX / metals from TwelveData) weigh every bar equally.
+# IndicatorFrame memoizes intermediates (closes diff, true range, EMAs, typical price * volume)
+# so several indicators on one request share them: MACD reuses EMA(12)/EMA(26), RSI and ATR
+# of different periods reuse one diff / true range, VWAPs share one cumulative pass.
+
+import math
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from app.candle_series import CandleSeries, parse_time
+from app.resample import bucket_starts
+
+# largest growth of the in-block scale factor; bounds the rounding error of a block to ~1e-8
+_BLOCK_SCALE = 1e8
+_BLOCK_MAX = 1 << 14
+
+def _nan(n: int) -> np.ndarray:
+    return np.full(n, np.nan)
+
+def smooth(x: np.ndarray, alpha: float, init: float) -> np.ndarray:
+    """y[i] = (1 - alpha) * y[i-1] + alpha * x[i] with y[-1] = init, vectorized."""
+    x = np.asarray(x, dtype=np.float64)
+    n = len(x)
+    if not n:
+        return x.copy()
+    w = 1.0 - alpha
+    if w <= 0.0:
+        return x.copy()
+    block = int(min(_BLOCK_MAX, max(1, math.log(_BLOCK_SCALE) // -math.log(w))))
+    nb = -(-n // block)
+    pad = np.zeros(nb * block)
+    pad[:n] = x
+    xb = pad.reshape(nb, block)
+    k = np.arange(block)
+    up = w ** -(k + 1.0)      # 1 / w^(k+1), at most _BLOCK_SCALE / w
+    down = w ** (k + 1.0)
+    # zero-start filter inside every block at once
+    part = alpha * np.cumsum(xb * up, axis=1) * down
+    # carry the block-end values forward (one scalar step per block)
+    wb = down[-1]
+    last = part[:, -1].tolist()
+    starts = np.empty(nb)
+    s = float(init)
+    for b in range(nb):
+        starts[b] = s
+        s = wb * s + last[b]
+    return (part + starts[:, None] * down).ravel()[:n]
+
+def sma(x: np.ndarray, period: int) -> np.ndarray:
+    x = np.asarray(x, dtype=np.float64)
+    n = len(x)
+    out = _nan(n)
+    if period < 1 or n < period:
+        return out
+    cs = np.cumsum(x - x[0])
+    out[period - 1] = cs[period - 1]
+    out[period:] = cs[period:] - cs[:-period]
+    out[period - 1:] = out[period - 1:] / period + x[0]
+    return out
+
+def _seeded(x: np.ndarray, period: int, alpha: float, first: int = 0) -> np.ndarray:
+    """Smoothing of x[first:] seeded with the mean of its first `period` values."""
+    n = len(x)
+    out = _nan(n)
+    seed_end = first + period
+    if period < 1 or n < seed_end:
+        return out
+    seed = float(np.mean(x[first:seed_end]))
+    out[seed_end - 1] = seed
+    out[seed_end:] = smooth(x[seed_end:], alpha, seed)
+    return out
+
+def ema(x: np.ndarray, period: int, first: int = 0) -> np.ndarray:
+    """EMA, alpha = 2 / (period + 1), seeded with the SMA of the first `period` values from `first`."""
+    return _seeded(np.asarray(x, dtype=np.float64), period, 2.0 / (period + 1), first)
+
+def wilder(x: np.ndarray, period: int, first: int = 0) -> np.ndarray:
+    """Wilder smoothing: plain mean of the first `period` values, then (avg*(p-1)+x)/p."""
+    return _seeded(np.asarray(x, dtype=np.float64), period, 1.0 / period, first)
+
+def rsi_from(avg_gain: np.ndarray, avg_loss: np.ndarray) -> np.ndarray:
+    with np.errstate(divide="ignore", invalid="ignore"):
+        out = 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+    out[avg_loss == 0] = 100.0
+    out[np.isnan(avg_gain)] = np.nan
+    return out
+
+def _rsi(gain: np.ndarray, loss: np.ndarray, period: int) -> np.ndarray:
+    out = _nan(len(gain) + 1)
+    if len(gain) >= period:
+        out[1:] = rsi_from(wilder(gain, period), wilder(loss, period))
+    return out
+
+def rsi(x: np.ndarray, period: int = 14) -> np.ndarray:
+    """Wilder RSI; the first value is at index `period`."""
+    ch = np.diff(np.asarray(x, dtype=np.float64))
+    return _rsi(np.maximum(ch, 0.0), np.maximum(-ch, 0.0), period)
+
+def true_range(h: np.ndarray, l: np.ndarray, c: np.ndarray) -> np.ndarray:
+    """True range; the first bar's is high - low."""
+    tr = h - l
+    if len(tr) > 1:
+        pc = c[:-1]
+        tr[1:] = np.maximum(tr[1:], np.maximum(np.abs(h[1:] - pc), np.abs(l[1:] - pc)))
+    return tr
+
+def _first_valid(x: np.ndarray) -> int:
+    ok = np.flatnonzero(~np.isnan(x))
+    return int(ok[0]) if len(ok) else len(x)
+
+class IndicatorFrame:
+    """Indicator arrays over one CandleSeries; shared intermediates are computed once."""
+    def __init__(self, series: CandleSeries):
+        self.series = series
+        self._memo: Dict[Tuple, Any] = {}
+
+    def _get(self, key: Tuple, build: Callable[[], Any]):
+        v = self._memo.get(key)
+        if v is None:
+            v = self._memo[key] = build()
+        return v
+
+    def __len__(self) -> int:
+        return len(self.series)
+
+    # ---------- shared intermediates ----------
+    def gains_losses(self) -> Tuple[np.ndarray, np.ndarray]:
+        def build():
+            ch = np.diff(self.series.c)
+            return np.maximum(ch, 0.0), np.maximum(-ch, 0.0)
+        return self._get(("gl",), build)
+
+    def true_range(self) -> np.ndarray:
+        s = self.series
+        return self._get(("tr",), lambda: true_range(s.h, s.l, s.c))
+
+    def volume(self) -> np.ndarray:
+        v = self.series.v
+        return self._get(("vol",), lambda: v if np.any(v > 0) else np.ones(len(v)))
+
+    def pv(self) -> np.ndarray:
+        s = self.series
+        return self._get(("pv",), lambda: (s.h + s.l + s.c) / 3.0 * self.volume())
+
+    # ---------- indicators ----------
+    def sma(self, period: int) -> np.ndarray:
+        return self._get(("sma", period), lambda: sma(self.series.c, period))
+
+    def ema(self, period: int) -> np.ndarray:
+        return self._get(("ema", period), lambda: ema(self.series.c, period))
+
+    def rsi(self, period: int = 14) -> np.ndarray:
+        if not len(self):
+            return _nan(0)
+        return self._get(("rsi", period), lambda: _rsi(*self.gains_losses(), period))
+
+    def atr(self, period: int = 14) -> np.ndarray:
+        return self._get(("atr", period), lambda: wilder(self.true_range(), period))
+
+    def macd(self, fast: int = 12, slow: int = 26, signal: int = 9) -> Dict[str, np.ndarray]:
+        def build():
+            line = self.ema(fast) - self.ema(slow)
+            sig = ema(line, signal, first=_first_valid(line))
+            return {"macd": line, "signal": sig, "hist": line - sig}
+        return self._get(("macd", fast, slow, signal), build)
+
+    def vwap(self) -> np.ndarray:
+        """Session VWAP (typical price), reset at every session open."""
+        def build():
+            s = self.series
+            if not len(s):
+                return _nan(0)
+            day = bucket_starts(s.t, "1day")
+            starts = np.flatnonzero(np.r_[True, day[1:] != day[:-1]])
+            seg = np.repeat(starts, np.diff(np.r_[starts, len(s)]))
+            cpv, cv = np.cumsum(self.pv()), np.cumsum(self.volume())
+            # cumulative sums restarted at each session: subtract the total before the session
+            base_pv = np.r_[0.0, cpv][seg]
+            base_v = np.r_[0.0, cv][seg]
+            with np.errstate(divide="ignore", invalid="ignore"):
+                return (cpv - base_pv) / (cv - base_v)
+        return self._get(("vwap",), build)
+
+    def anchored_vwap(self, anchor: int) -> np.ndarray:
+        """VWAP accumulated from the first bar at or after `anchor` (epoch s); NaN before it."""
+        def build():
+            i = int(np.searchsorted(self.series.t, anchor))
+            out = _nan(len(self))
+            with np.errstate(divide="ignore", invalid="ignore"):
+                out[i:] = np.cumsum(self.pv()[i:]) / np.cumsum(self.volume()[i:])
+            return out
+        return self._get(("avwap", int(anchor)), build)
+
+# ---------- request specs ----------
+# "sma:20", "ema:50", "rsi", "rsi:14", "atr:14", "macd", "macd:12:26:9", "vwap",
+# "avwap:<epoch | YYYY-MM-DD[THH:MM:SS]>"
+DEFAULTS = {"sma": (20,), "ema": (20,), "rsi": (14,), "atr": (14,), "macd": (12, 26, 9), "vwap": ()}
+MAX_PERIOD = 5000
+
+def parse_spec(spec: str) -> Tuple[str, tuple]:
+    """Spec string -> (name, params). Raises ValueError for anything unknown or out of range."""
+    name, _, rest = spec.strip().partition(":")
+    name = name.lower()
+    if name == "avwap":
+        anchor = parse_time(rest)
+        if anchor is None:
+            raise ValueError(f"{spec}: anchor must be epoch seconds or YYYY-MM-DD[THH:MM:SS]")
+        return name, (anchor,)
+    if name not in DEFAULTS:
+        raise ValueError(f"{spec}: unknown indicator (one of {', '.join(sorted(DEFAULTS))}, avwap)")
+    if not rest:
+        return name, DEFAULTS[name]
+    try:
+        params = tuple(int(p) for p in rest.split(":"))
+    except ValueError:
+        raise ValueError(f"{spec}: periods must be integers")
+    if len(params) != len(DEFAULTS[name]) or not all(1 <= p <= MAX_PERIOD for p in params):
+        raise ValueError(f"{spec}: expected {len(DEFAULTS[name])} period(s) in 1..{MAX_PERIOD}")
+    return name, params
+
+def compute(series: CandleSeries, specs: Iterable[str]) -> Dict[str, Any]:
+    """{spec: array or {part: array}} for every spec, sharing one IndicatorFrame."""
+    frame = IndicatorFrame(series)
+    parsed = [(s.strip(), parse_spec(s)) for s in specs if s.strip()]
+    methods = {"avwap": frame.anchored_vwap}
+    return {spec: (methods.get(name) or getattr(frame, name))(*params) for spec, (name, params) in parsed}
+
+def to_json(values: np.ndarray, digits: Optional[int] = None) -> List[Optional[float]]:
+    """NaN -> None (API edge only)."""
+    if digits is not None:
+        values = np.round(values, digits)
+    out = values.tolist()
+    nan = np.flatnonzero(np.isnan(values)).tolist()
+    for i in nan:
+        out[i] = None
+    return out
+
+def records(result: Dict[str, Any], digits: Optional[int] = None) -> Dict[str, Any]:
+    return {k: ({p: to_json(a, digits) for p, a in v.items()} if isinstance(v, dict) else to_json(v, digits))
+            for k, v in result.items()}
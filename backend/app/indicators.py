@@ -0,0 +1,380 @@
+# backend/app/indicators.py
+# Streaming indicators: O(1) work per new bar instead of recomputing over the whole window.
+#
+# - SMA (rolling sum), EMA (SMA seeded), RSI and ATR (Wilder smoothing), Bollinger bands
+# - update(x) commits a closed bar; peek(x) gives the value the forming bar would produce
+#   without committing it, so a revised forming bar never corrupts the state
+# - state() / Indicator.from_state() round-trip through plain JSON; BankStore keeps one
+#   IndicatorBank per (provider, symbol, interval) on disk so state survives restarts
+# Rolling sums are re-summed exactly once per `period` updates to bound float drift.
+
+import json
+import math
+import os
+import threading
+from collections import deque
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import numpy as np
+
+from app.candle_cache import normalize_symbol
+from app.candle_series import CandleSeries
+
+INDICATOR_STATE_DIR = os.getenv("INDICATOR_STATE_DIR", "data/indicators")
+
+KINDS: Dict[str, type] = {}
+
+def _register(cls):
+    KINDS[cls.kind] = cls
+    return cls
+
+class Indicator:
+    kind = ""
+    _params: Tuple[str, ...] = ("period",)
+    _vars: Tuple[str, ...] = ()
+
+    def __init__(self, period: int):
+        if period < 1:
+            raise ValueError("period must be >= 1")
+        self.period = int(period)
+
+    @property
+    def value(self):
+        raise NotImplementedError
+
+    def update(self, x: float):
+        """Commit one closed value; returns the new indicator value (None while warming up)."""
+        raise NotImplementedError
+
+    def peek(self, x: float):
+        """Value after `x` without committing it (the forming bar)."""
+        raise NotImplementedError
+
+    # bar inputs: close by default, ATR overrides
+    def update_bar(self, h: float, l: float, c: float):
+        return self.update(c)
+
+    def peek_bar(self, h: float, l: float, c: float):
+        return self.peek(c)
+
+    # ---------- serialization ----------
+    def state(self) -> Dict[str, Any]:
+        out = {}
+        for k in self._vars:
+            v = getattr(self, k)
+            out[k] = list(v) if isinstance(v, deque) else v
+        return {"kind": self.kind, "params": {k: getattr(self, k) for k in self._params}, "vars": out}
+
+    @staticmethod
+    def from_state(state: Dict[str, Any]) -> "Indicator":
+        ind = KINDS[state["kind"]](**state["params"])
+        for k, v in state["vars"].items():
+            cur = getattr(ind, k)
+            setattr(ind, k, deque(v, maxlen=cur.maxlen) if isinstance(cur, deque) else v)
+        return ind
+
+    def fresh(self) -> "Indicator":
+        return type(self)(**{k: getattr(self, k) for k in self._params})
+
+@_register
+class SMA(Indicator):
+    kind = "sma"
+    _vars = ("window", "total", "since_resum")
+
+    def __init__(self, period: int):
+        super().__init__(period)
+        self.window = deque(maxlen=self.period)
+        self.total = 0.0
+        self.since_resum = 0
+
+    @property
+    def value(self) -> Optional[float]:
+        return self.total / self.period if len(self.window) == self.period else None
+
+    def update(self, x: float) -> Optional[float]:
+        if len(self.window) == self.period:
+            self.total -= self.window[0]
+        self.window.append(x)
+        self.total += x
+        self.since_resum += 1
+        if self.since_resum >= self.period:
+            self.total = math.fsum(self.window)
+            self.since_resum = 0
+        return self.value
+
+    def peek(self, x: float) -> Optional[float]:
+        n = len(self.window)
+        if n + 1 < self.period:
+            return None
+        return (self.total - (self.window[0] if n == self.period else 0.0) + x) / self.period
+
+@_register
+class EMA(Indicator):
+    """Exponential MA, alpha = 2 / (period + 1), seeded with the SMA of the first `period` values."""
+    kind = "ema"
+    _vars = ("ema", "seed", "count")
+
+    def __init__(self, period: int):
+        super().__init__(period)
+        self.alpha = 2.0 / (self.period + 1)
+        self.ema: Optional[float] = None
+        self.seed = 0.0
+        self.count = 0
+
+    @property
+    def value(self) -> Optional[float]:
+        return self.ema
+
+    def _next(self, x: float):
+        if self.ema is not None:
+            return self.ema + self.alpha * (x - self.ema), self.seed, self.count
+        seed, count = self.seed + x, self.count + 1
+        return (seed / self.period if count == self.period else None), seed, count
+
+    def update(self, x: float) -> Optional[float]:
+        self.ema, self.seed, self.count = self._next(x)
+        return self.ema
+
+    def peek(self, x: float) -> Optional[float]:
+        return self._next(x)[0]
+
+def _wilder(avg: Optional[float], acc: float, count: int, x: float, period: int):
+    """One Wilder smoothing step: plain mean of the first `period` inputs, then (avg*(p-1)+x)/p."""
+    if avg is not None:
+        return (avg * (period - 1) + x) / period, acc, count
+    acc, count = acc + x, count + 1
+    return (acc / period if count == period else None), acc, count
+
+@_register
+class RSI(Indicator):
+    """Wilder RSI."""
+    kind = "rsi"
+    _vars = ("prev", "avg_gain", "avg_loss", "sum_gain", "sum_loss", "count")
+
+    def __init__(self, period: int = 14):
+        super().__init__(period)
+        self.prev: Optional[float] = None
+        self.avg_gain: Optional[float] = None
+        self.avg_loss: Optional[float] = None
+        self.sum_gain = 0.0
+        self.sum_loss = 0.0
+        self.count = 0
+
+    @staticmethod
+    def _rsi(avg_gain: Optional[float], avg_loss: Optional[float]) -> Optional[float]:
+        if avg_gain is None:
+            return None
+        if avg_loss == 0:
+            return 100.0
+        return 100 - (100 / (1 + avg_gain / avg_loss))
+
+    @property
+    def value(self) -> Optional[float]:
+        return self._rsi(self.avg_gain, self.avg_loss)
+
+    def _next(self, x: float):
+        if self.prev is None:
+            return None
+        ch = x - self.prev
+        gain, sum_gain, count = _wilder(self.avg_gain, self.sum_gain, self.count, max(ch, 0.0), self.period)
+        loss, sum_loss, _ = _wilder(self.avg_loss, self.sum_loss, self.count, max(-ch, 0.0), self.period)
+        return gain, loss, sum_gain, sum_loss, count
+
+    def update(self, x: float) -> Optional[float]:
+        nxt = self._next(x)
+        self.prev = x
+        if nxt is not None:
+            self.avg_gain, self.avg_loss, self.sum_gain, self.sum_loss, self.count = nxt
+        return self.value
+
+    def peek(self, x: float) -> Optional[float]:
+        nxt = self._next(x)
+        return self.value if nxt is None else self._rsi(nxt[0], nxt[1])
+
+@_register
+class ATR(Indicator):
+    """Wilder ATR over true range (the first bar's true range is high - low)."""
+    kind = "atr"
+    _vars = ("prev_close", "atr", "seed", "count")
+
+    def __init__(self, period: int = 14):
+        super().__init__(period)
+        self.prev_close: Optional[float] = None
+        self.atr: Optional[float] = None
+        self.seed = 0.0
+        self.count = 0
+
+    @property
+    def value(self) -> Optional[float]:
+        return self.atr
+
+    def _tr(self, h: float, l: float) -> float:
+        if self.prev_close is None:
+            return h - l
+        return max(h - l, abs(h - self.prev_close), abs(l - self.prev_close))
+
+    def update(self, x: float) -> Optional[float]:
+        return self.update_bar(x, x, x)
+
+    def peek(self, x: float) -> Optional[float]:
+        return self.peek_bar(x, x, x)
+
+    def update_bar(self, h: float, l: float, c: float) -> Optional[float]:
+        self.atr, self.seed, self.count = _wilder(self.atr, self.seed, self.count, self._tr(h, l), self.period)
+        self.prev_close = c
+        return self.atr
+
+    def peek_bar(self, h: float, l: float, c: float) -> Optional[float]:
+        return _wilder(self.atr, self.seed, self.count, self._tr(h, l), self.period)[0]
+
+@_register
+class Bollinger(Indicator):
+    """SMA(period) +/- k population standard deviations; value = (middle, upper, lower)."""
+    kind = "bollinger"
+    _params = ("period", "k")
+    _vars = ("window", "total", "total_sq", "since_resum")
+
+    def __init__(self, period: int = 20, k: float = 2.0):
+        super().__init__(period)
+        self.k = float(k)
+        self.window = deque(maxlen=self.period)
+        self.total = 0.0
+        self.total_sq = 0.0
+        self.since_resum = 0
+
+    def _bands(self, total: float, total_sq: float) -> Tuple[float, float, float]:
+        mid = total / self.period
+        sd = math.sqrt(max(total_sq / self.period - mid * mid, 0.0))
+        return mid, mid + self.k * sd, mid - self.k * sd
+
+    @property
+    def value(self) -> Optional[Tuple[float, float, float]]:
+        return self._bands(self.total, self.total_sq) if len(self.window) == self.period else None
+
+    def update(self, x: float):
+        if len(self.window) == self.period:
+            old = self.window[0]
+            self.total -= old
+            self.total_sq -= old * old
+        self.window.append(x)
+        self.total += x
+        self.total_sq += x * x
+        self.since_resum += 1
+        if self.since_resum >= self.period:
+            self.total = math.fsum(self.window)
+            self.total_sq = math.fsum(v * v for v in self.window)
+            self.since_resum = 0
+        return self.value
+
+    def peek(self, x: float):
+        n = len(self.window)
+        if n + 1 < self.period:
+            return None
+        old = self.window[0] if n == self.period else 0.0
+        return self._bands(self.total - old + x, self.total_sq - old * old + x * x)
+
+class IndicatorBank:
+    """Named indicators fed from one bar series; closed bars are committed once each."""
+    def __init__(self, indicators: Dict[str, Indicator]):
+        self.indicators = indicators
+        self.last_t: Optional[int] = None
+
+    def reset(self):
+        self.indicators = {k: ind.fresh() for k, ind in self.indicators.items()}
+        self.last_t = None
+
+    def feed(self, series: CandleSeries) -> int:
+        """
+        Commit the closed bars of `series` (all but the last, forming one) not seen yet.
+        A window that no longer overlaps what was committed (a gap) replays it from scratch.
+        Returns the number of bars committed.
+        """
+        closed = series[:-1]
+        if not len(closed):
+            return 0
+        if self.last_t is not None and int(closed.t[0]) > self.last_t:
+            self.reset()
+        i = 0 if self.last_t is None else int(np.searchsorted(closed.t, self.last_t, side="right"))
+        if i >= len(closed):
+            return 0
+        h, l, c = closed.h.tolist(), closed.l.tolist(), closed.c.tolist()
+        inds = list(self.indicators.values())
+        for j in range(i, len(closed)):
+            for ind in inds:
+                ind.update_bar(h[j], l[j], c[j])
+        self.last_t = int(closed.t[-1])
+        return len(closed) - i
+
+    def values(self, series: CandleSeries) -> Dict[str, Any]:
+        """
+        Values including the forming bar (the last bar of `series`). A last bar that is already
+        committed is not folded in a second time: the committed values are returned.
+        """
+        if not len(series) or (self.last_t is not None and int(series.t[-1]) <= self.last_t):
+            return self.previous()
+        b = series[-1]
+        return {k: ind.peek_bar(b["high"], b["low"], b["close"]) for k, ind in self.indicators.items()}
+
+    def previous(self) -> Dict[str, Any]:
+        """Values as of the last committed (closed) bar."""
+        return {k: ind.value for k, ind in self.indicators.items()}
+
+    def state(self) -> Dict[str, Any]:
+        return {"last_t": self.last_t, "indicators": {k: ind.state() for k, ind in self.indicators.items()}}
+
+    @classmethod
+    def from_state(cls, state: Dict[str, Any]) -> "IndicatorBank":
+        bank = cls({k: Indicator.from_state(s) for k, s in state["indicators"].items()})
+        bank.last_t = state.get("last_t")
+        return bank
+
+class BankStore:
+    """One IndicatorBank per key, persisted as JSON whenever new bars are committed."""
+    def __init__(self, name: str, factory: Callable[[], IndicatorBank], root: str = INDICATOR_STATE_DIR):
+        self.factory = factory
+        self.path = os.path.join(root, name)
+        self._banks: Dict[Tuple, IndicatorBank] = {}
+        self._lock = threading.Lock()
+
+    def _file(self, key: Tuple) -> str:
+        provider, symbol, interval = key
+        return os.path.join(self.path, f"{provider}_{normalize_symbol(symbol).replace('/', '-')}_{interval}.json")
+
+    @staticmethod
+    def _layout(bank: IndicatorBank) -> Dict[str, Tuple]:
+        return {k: (s["kind"], s["params"]) for k, s in bank.state()["indicators"].items()}
+
+    def _load(self, key: Tuple) -> IndicatorBank:
+        try:
+            with open(self._file(key)) as f:
+                bank = IndicatorBank.from_state(json.load(f))
+            # the layout changed (different indicators / params): start over
+            if self._layout(bank) == self._layout(self.factory()):
+                return bank
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+        return self.factory()
+
+    def save(self, key: Tuple, bank: IndicatorBank):
+        os.makedirs(self.path, exist_ok=True)
+        tmp = self._file(key) + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(bank.state(), f)
+        os.replace(tmp, self._file(key))
+
+    def feed(self, key: Tuple, series: CandleSeries) -> IndicatorBank:
+        """Bank for (provider, symbol, interval) brought up to date with `series`."""
+        with self._lock:
+            bank = self._banks.get(key)
+            if bank is None:
+                bank = self._banks[key] = self._load(key)
+            if bank.feed(series):
+                try:
+                    self.save(key, bank)
+                except OSError:
+                    pass   # read-only disk: state is rebuilt from the window after a restart
+            return bank
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"banks": len(self._banks), "dir": self.path}
@@ -0,0 +1,112 @@
+# backend/app/interval_index.py
+# Dynamic interval index over price ranges (open FVGs, order-block zones).
+#
+# - a treap keyed by (lo, item.id), every node carrying the highest hi of its subtree
+# - overlapping(lo, hi) prunes every subtree that ends below lo or starts above hi, so a query
+#   visits the O(log n) search path plus the items it returns
+# - items are identified by their `id`; an item whose range changes is removed with its old
+#   lo and re-inserted
+
+import random
+from typing import Any, Iterator, List, Optional, Tuple
+
+class _Node:
+    __slots__ = ("key", "hi", "max_hi", "prio", "item", "left", "right")
+
+    def __init__(self, item: Any, lo: float, hi: float):
+        self.key = (lo, item.id)
+        self.hi = self.max_hi = hi
+        self.prio = random.random()
+        self.item = item
+        self.left: Optional["_Node"] = None
+        self.right: Optional["_Node"] = None
+
+def _fix(n: _Node) -> _Node:
+    m = n.hi
+    if n.left is not None and n.left.max_hi > m:
+        m = n.left.max_hi
+    if n.right is not None and n.right.max_hi > m:
+        m = n.right.max_hi
+    n.max_hi = m
+    return n
+
+def _split(n: Optional[_Node], key) -> Tuple[Optional[_Node], Optional[_Node]]:
+    """(keys < key, keys >= key)"""
+    if n is None:
+        return None, None
+    if n.key < key:
+        n.right, right = _split(n.right, key)
+        return _fix(n), right
+    left, n.left = _split(n.left, key)
+    return left, _fix(n)
+
+def _merge(a: Optional[_Node], b: Optional[_Node]) -> Optional[_Node]:
+    """Every key of a is below every key of b."""
+    if a is None or b is None:
+        return a or b
+    if a.prio > b.prio:
+        a.right = _merge(a.right, b)
+        return _fix(a)
+    b.left = _merge(a, b.left)
+    return _fix(b)
+
+def _remove(n: Optional[_Node], key) -> Optional[_Node]:
+    if n is None:
+        return None
+    if key == n.key:
+        return _merge(n.left, n.right)
+    if key < n.key:
+        n.left = _remove(n.left, key)
+    else:
+        n.right = _remove(n.right, key)
+    return _fix(n)
+
+class IntervalIndex:
+    """Items by price range [lo, hi]: insert / remove O(log n), overlap queries output-sensitive."""
+    def __init__(self):
+        self.root: Optional[_Node] = None
+        self.size = 0
+
+    def __len__(self) -> int:
+        return self.size
+
+    def insert(self, item: Any, lo: float, hi: float):
+        node = _Node(item, lo, hi)
+        left, right = _split(self.root, node.key)
+        self.root = _merge(_merge(left, node), right)
+        self.size += 1
+
+    def remove(self, item: Any, lo: float):
+        """Remove `item`, inserted with this `lo`."""
+        self.root = _remove(self.root, (lo, item.id))
+        self.size -= 1
+
+    def overlapping(self, lo: float, hi: float) -> List[Any]:
+        """Items whose range meets [lo, hi], by lo."""
+        out: List[Any] = []
+        stack: List[Tuple[_Node, bool]] = [(self.root, False)] if self.root is not None else []
+        while stack:
+            n, visited = stack.pop()
+            if visited:
+                if n.hi >= lo:
+                    out.append(n.item)
+                if n.right is not None and n.key[0] <= hi and n.right.max_hi >= lo:
+                    stack.append((n.right, False))
+                continue
+            if n.max_hi < lo:
+                continue
+            if n.key[0] <= hi:
+                stack.append((n, True))
+            if n.left is not None and n.left.max_hi >= lo:
+                stack.append((n.left, False))
+        return out
+
+    def __iter__(self) -> Iterator[Any]:
+        stack, n = [], self.root
+        while stack or n is not None:
+            while n is not None:
+                stack.append(n)
+                n = n.left
+            n = stack.pop()
+            yield n.item
+            n = n.right
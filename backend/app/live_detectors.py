@@ -0,0 +1,344 @@
+# backend/app/live_detectors.py
+# Stateful, bar-by-bar versions of the ICT detectors.
+#
+# Each detector mirrors one batch function and gives the same signals when the same bars are
+# replayed through on_bar():
+#   OrderBlocks / FairValueGap / TurtleSoup / LiquiditySweep  -> main.detect_* (windowed)
+#   GapFVG / TurtleBreak                                      -> signals.detect_fvg / detect_turtle_soup
+#   BreakOfStructure                                          -> ict_models.detect_bos
+#   (swing BOS / CHoCH, the live counterpart of ict_models.detect_choch, is app/structure.py)
+# - on_bar(bar) appends a bar, or revises the last one when it has the same time (the forming
+#   bar), and returns (added, removed) signals; only the evaluation anchored at that bar is redone
+# - lookback extremes (over the bars before the breakout / sweep bar) come from
+#   app/rolling.RollingExtremes over the closed bars, so any lookback costs O(1) per bar
+# - signals anchored at a bar that has left a windowed detector's lookback are retracted, so
+#   per-bar work is amortized O(1) (a fixed number of trailing bars is read per bar)
+# - signals() is the current batch-equivalent output; DetectorSet.feed(series) folds in only
+#   the bars of a polled window that are new or revised; merged() merges the detectors'
+#   signals on integer bar time like pipeline.PipelineResult.merged
+
+import heapq
+from collections import deque
+from operator import itemgetter
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.candle_series import Bar, CandleSeries, format_time, parse_time
+from app.rolling import RollingExtremes
+
+Row = Tuple[int, float, float, float, float]   # t, o, h, l, c
+Signal = Dict[str, Any]
+
+def _row(bar: Any) -> Row:
+    """(t, o, h, l, c) from a Bar view or any candle dict shape."""
+    if isinstance(bar, Bar):
+        return bar["t"], bar["o"], bar["h"], bar["l"], bar["c"]
+    t = next(bar[k] for k in ("t", "time", "datetime", "ts", "timestamp") if k in bar)
+    pick = lambda a, b: float(bar[a] if a in bar else bar[b])
+    return parse_time(t), pick("o", "open"), pick("h", "high"), pick("l", "low"), pick("c", "close")
+
+class LiveDetector:
+    kind = ""
+    depth = 1               # trailing bars one evaluation reads
+    newest_first = False    # batch order of anchors in signals()
+    lag = 0                 # bars between a signal's own bar and the anchor that confirms it
+
+    def __init__(self):
+        self.bars: Deque[Row] = deque(maxlen=self.depth)
+        self.n = 0
+        # (anchor bar index, epoch time of the signals' bar, signals), ascending
+        self.active: Deque[Tuple[int, int, List[Signal]]] = deque()
+
+    def reset(self):
+        self.bars.clear()
+        self.n = 0
+        self.active.clear()
+
+    @property
+    def last_t(self) -> Optional[int]:
+        return self.bars[-1][0] if self.bars else None
+
+    def _evaluate(self) -> List[Signal]:
+        """Signals anchored at the newest bar (index n - 1)."""
+        raise NotImplementedError
+
+    def min_anchor(self) -> int:
+        """Oldest anchor the batch version still reports (windowed detectors override)."""
+        return 0
+
+    def _public(self, anchor: int, sig: Signal) -> Signal:
+        return sig
+
+    def _commit(self, row: Row):
+        """`row` stopped being the forming bar (a newer bar arrived)."""
+
+    def on_bar(self, bar: Any) -> Tuple[List[Signal], List[Signal]]:
+        row = _row(bar)
+        last = self.last_t
+        old: List[Signal] = []
+        if last is not None and row[0] < last:
+            return [], []   # older than what was already fed
+        if last is not None and row[0] == last:
+            self.bars[-1] = row
+            if self.active and self.active[-1][0] == self.n - 1:
+                old = self.active.pop()[2]
+        else:
+            if self.bars:
+                self._commit(self.bars[-1])
+            self.bars.append(row)
+            self.n += 1
+        new = self._evaluate()
+        if new:
+            self.active.append((self.n - 1, self.bars[-1 - self.lag][0], new))
+        expired = []
+        lo = self.min_anchor()
+        while self.active and self.active[0][0] < lo:
+            anchor, _, sigs = self.active.popleft()
+            expired.extend(self._public(anchor, s) for s in sigs)
+        a = self.n - 1
+        added = [self._public(a, s) for s in new if s not in old]
+        removed = [self._public(a, s) for s in old if s not in new] + expired
+        return added, removed
+
+    def signals(self) -> List[Signal]:
+        items = reversed(self.active) if self.newest_first else self.active
+        return [self._public(a, s) for a, _, sigs in items for s in sigs]
+
+    def timed(self) -> List[Tuple[int, Signal]]:
+        """(epoch time of the signal's bar, signal), ascending in time."""
+        return [(t, self._public(a, s)) for a, t, sigs in self.active for s in sigs]
+
+# ---------- main.py family (windowed; times as "YYYY-MM-DD HH:MM:SS") ----------
+class OrderBlocks(LiveDetector):
+    """main.detect_order_blocks: strong candle whose body open is retested by the next bar."""
+    kind = "order_blocks"
+    depth = 2
+    newest_first = True
+    lag = 1
+
+    def __init__(self, lookback: int = 30):
+        super().__init__()
+        self.lookback = lookback
+
+    def min_anchor(self) -> int:
+        # batch checks bars n-i for 2 <= i < min(n, lookback); the anchor is the retest bar after it
+        return max(2, self.n - self.lookback + 2)
+
+    def _evaluate(self) -> List[Signal]:
+        if self.n < 3 or self.lookback < 3:
+            return []
+        (t, o, _, _, c), (_, _, nh, nl, _) = self.bars
+        out = []
+        if c - o > 0 and abs(c - o) / o > 0.0025 and abs(nl - o) / o < 0.0035:
+            out.append({"type": "order_block_buy", "price": o, "time": format_time(t),
+                        "note": "Bullish order block (demand) detected"})
+        if o - c > 0 and abs(o - c) / o > 0.0025 and abs(nh - o) / o < 0.0035:
+            out.append({"type": "order_block_sell", "price": o, "time": format_time(t),
+                        "note": "Bearish order block (supply) detected"})
+        return out
+
+    def _public(self, anchor: int, sig: Signal) -> Signal:
+        return {"type": sig["type"], "index_from_end": self.n - anchor + 1, "price": sig["price"],
+                "time": sig["time"], "note": sig["note"]}
+
+class _LastBarOnly(LiveDetector):
+    """Batch version only looks at the window ending at the last bar."""
+    def min_anchor(self) -> int:
+        return self.n - 1
+
+class FairValueGap(_LastBarOnly):
+    """main.detect_fvg: gap between the first and third of the last three bars."""
+    kind = "fvg"
+    depth = 3
+
+    def _evaluate(self) -> List[Signal]:
+        if self.n < 3:
+            return []
+        (_, _, ah, al, _), _, (t, _, ch, cl, _) = self.bars
+        out = []
+        if ah < cl:
+            out.append({"type": "fvg_bull", "time": format_time(t), "gap_top": cl, "gap_bottom": ah,
+                        "note": "Bullish FVG (gap up) - possible buy on fill"})
+        if al > ch:
+            out.append({"type": "fvg_bear", "time": format_time(t), "gap_top": al, "gap_bottom": ch,
+                        "note": "Bearish FVG (gap down) - possible sell on fill"})
+        return out
+
+class _Lookback(_LastBarOnly):
+    """
+    Highest high / lowest low of the `lookback` bars ending `gap` bars before the forming one,
+    in O(1): the newest gap - 1 closed bars wait in `held` before entering the window.
+    """
+    depth = 2
+    gap = 1
+
+    def __init__(self, lookback: int = 10):
+        if lookback < 1:
+            raise ValueError("lookback must be >= 1")
+        super().__init__()
+        self.lookback = lookback
+        self.closed = RollingExtremes(lookback)
+        self.held: Deque[Row] = deque()
+
+    def reset(self):
+        super().reset()
+        self.closed.reset()
+        self.held.clear()
+
+    def _commit(self, row: Row):
+        self.held.append(row)
+        if len(self.held) >= self.gap:
+            old = self.held.popleft()
+            self.closed.push(old[2], old[3])
+
+    def _extremes(self) -> Tuple[float, float]:
+        return self.closed.max(), self.closed.min()
+
+class TurtleSoup(_Lookback):
+    """main.detect_turtle_soup: previous bar broke the extreme of the bars before it, last bar closed back inside."""
+    kind = "turtle_soup"
+    gap = 2
+
+    def _evaluate(self) -> List[Signal]:
+        if self.n < max(6, self.lookback + 2):
+            return []
+        recent_high, recent_low = self._extremes()
+        t, _, _, _, c = self.bars[-1]
+        _, _, ph, pl, _ = self.bars[-2]
+        out = []
+        if ph > recent_high and c < recent_high:
+            out.append({"type": "turtle_short_fail", "time": format_time(t), "price": c,
+                        "note": "Failed breakout above high - contrarian short signal"})
+        if pl < recent_low and c > recent_low:
+            out.append({"type": "turtle_long_fail", "time": format_time(t), "price": c,
+                        "note": "Failed breakdown below low - contrarian long signal"})
+        return out
+
+class LiquiditySweep(_Lookback):
+    """main.detect_liq_sweep: last bar's wick cleared the extreme of the bars before it and closed back inside."""
+    kind = "liq_sweep"
+
+    def _evaluate(self) -> List[Signal]:
+        if self.n < max(6, self.lookback + 1):
+            return []
+        recent_high, recent_low = self._extremes()
+        t, _, h, l, c = self.bars[-1]
+        out = []
+        if h > recent_high and c < recent_high:
+            out.append({"type": "liquidity_sweep_high", "time": format_time(t), "sweep_price": h,
+                        "note": "Liquidity sweep above recent high (sell liquidity) detected"})
+        if l < recent_low and c > recent_low:
+            out.append({"type": "liquidity_sweep_low", "time": format_time(t), "sweep_price": l,
+                        "note": "Liquidity sweep below recent low (buy liquidity) detected"})
+        return out
+
+# ---------- signals.py / ict_models.py family (whole history; epoch times) ----------
+class GapFVG(LiveDetector):
+    """signals.detect_fvg: bar i gaps over bar i-1; reported once bar i+1 exists."""
+    kind = "fvg"
+    depth = 3
+    lag = 1
+
+    def _evaluate(self) -> List[Signal]:
+        if self.n < 3:
+            return []
+        (_, _, ph, pl, _), (t, _, h, l, _), _ = self.bars
+        out = []
+        if l > ph:
+            out.append({"time": t, "type": "fvg_up"})
+        if h < pl:
+            out.append({"time": t, "type": "fvg_down"})
+        return out
+
+class TurtleBreak(LiveDetector):
+    """signals.detect_turtle_soup: bar i-1 takes bar i-2's extreme, bar i closes past i-1's open."""
+    kind = "turtle"
+    depth = 3
+
+    def _evaluate(self) -> List[Signal]:
+        if self.n < 3:
+            return []
+        (_, _, ah, al, _), (_, bo, bh, bl, _), (t, _, _, _, c) = self.bars
+        out = []
+        if bl < al and c > bo:
+            out.append({"time": t, "type": "turtle_bull", "price": c})
+        if bh > ah and c < bo:
+            out.append({"time": t, "type": "turtle_bear", "price": c})
+        return out
+
+class BreakOfStructure(LiveDetector):
+    """ict_models.detect_bos: bar takes out the previous bar's extreme and closes beyond it."""
+    kind = "bos"
+    depth = 2
+
+    def _evaluate(self) -> List[Signal]:
+        if self.n < 3:
+            return []
+        (_, _, ph, pl, _), (t, _, h, l, c) = self.bars
+        out = []
+        if h > ph and c > ph:
+            out.append({"time": t, "type": "bos_bull", "price": c})
+        if l < pl and c < pl:
+            out.append({"time": t, "type": "bos_bear", "price": c})
+        return out
+
+class DetectorSet:
+    """Named live detectors fed from one bar stream."""
+    def __init__(self, detectors: Dict[str, LiveDetector]):
+        self.detectors = detectors
+
+    def reset(self):
+        for d in self.detectors.values():
+            d.reset()
+
+    @property
+    def last_t(self) -> Optional[int]:
+        return next(iter(self.detectors.values())).last_t if self.detectors else None
+
+    def on_bar(self, bar: Any) -> Tuple[List[Signal], List[Signal]]:
+        added, removed = [], []
+        for d in self.detectors.values():
+            a, r = d.on_bar(bar)
+            added.extend(a)
+            removed.extend(r)
+        return added, removed
+
+    def feed(self, series: CandleSeries) -> Tuple[List[Signal], List[Signal]]:
+        """
+        Fold in the bars of a polled window from the last one fed (revised) onwards.
+        A window that starts after that bar (a gap) replays the window from scratch.
+        """
+        last = self.last_t
+        if last is not None and len(series) and int(series.t[0]) > last:
+            self.reset()
+            last = None
+        i = 0 if last is None else int(np.searchsorted(series.t, last))
+        added, removed = [], []
+        for j in range(i, len(series)):
+            a, r = self.on_bar(series[j])
+            added.extend(a)
+            removed.extend(r)
+        return added, removed
+
+    def signals(self) -> Dict[str, List[Signal]]:
+        return {k: d.signals() for k, d in self.detectors.items()}
+
+    def merged(self) -> List[Signal]:
+        """All signals merged by integer bar time; ties keep detector order (like main.detect_all)."""
+        streams = [d.timed() for d in self.detectors.values()]
+        return [sig for _, sig in heapq.merge(*streams, key=itemgetter(0))]
+
+def main_detectors() -> DetectorSet:
+    """Live counterpart of main.detect_all."""
+    return DetectorSet({"order_blocks": OrderBlocks(), "fvg": FairValueGap(),
+                        "turtle_soup": TurtleSoup(), "liq_sweep": LiquiditySweep()})
+
+def signal_detectors() -> DetectorSet:
+    """Live counterpart of signals.compute_all_signals minus order blocks (see app/structure.py)."""
+    return DetectorSet({"turtle": TurtleBreak(), "fvg": GapFVG()})
+
+def ict_model_detectors() -> DetectorSet:
+    """Live counterpart of ict_models.compute_all_ict_models' "bos" / "choch" (swing structure)."""
+    from app.structure import StructureTracker
+    return DetectorSet({"structure": StructureTracker()})
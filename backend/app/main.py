@@ -1,19 +1,46 @@
 # backend/app/main.py
 # FastAPI server providing candle fetch + ICT signal endpoints + AI mentor
-# Quick-start: pip install fastapi uvicorn requests python-multipart
-# Run: uvicorn main:app --host 0.0.0.0 --port 8000 --reload
+# Quick-start: pip install -r ../requirements.txt
+# Run (from backend/): uvicorn app.main:app --host 0.0.0.0 --port 8000 --reload
 
 import os
 import time
 import math
-import requests
+import asyncio
+import numpy as np
+from collections import OrderedDict
 from datetime import datetime, timedelta
-from typing import List, Dict, Any
-from fastapi import FastAPI, Query
+from typing import List, Dict, Any, Optional, Tuple
+from fastapi import FastAPI, Query, WebSocket
 from pydantic import BaseModel
+from app.candle_cache import CACHE
+from app.candle_sync import SYNC
+from app import http_client
+from app.failover import race
+from app.circuit_breaker import BREAKERS, guarded
+from app.quota import QUOTA, PRIORITY_BACKFILL, Shrunk, priority, unshrunk
+from app.candle_series import CandleSeries, format_time, parse_time
+from app.candle_cache import interval_seconds
+from app.candle_store import STORE
+from app.resample import RESAMPLER, BASE_INTERVAL, BASE_STEP, base_bars_for, can_resample
+from app.normalize import normalize_twelvedata, normalize_alphavantage
+from app import normalize
+from app.stream import StreamHub, STREAM_MAX_SYMBOLS
+from app import indicator_series
+from app.live_detectors import main_detectors
+from app import pipeline, mtf, backtest
+from app.fvg_tracker import FVG_BOOK
+from app.signal_journal import JOURNAL, decode_cursor
+from app import sessions
+from app.sessions import SESSIONS
 
 app = FastAPI(title="ICT Charting Backend (prototype)")
 
+@app.on_event("shutdown")
+async def _close_http_clients():
+    await http_client.aclose()
+    JOURNAL.close()
+
 # =======================
 # ==== API KEYS ========
 # =======================
@@ -40,34 +67,75 @@ def now_utc_iso():
 # =======================
 # ==== Candle fetcher ===
 # =======================
-def fetch_candles_twelvedata(symbol: str, interval: str = "1min", outputsize: int = 100):
+async def fetch_candles_twelvedata(symbol: str, interval: str = "1min", outputsize: int = 100, start_date: Optional[str] = None,
+                                   end_date: Optional[str] = None, shrink: bool = True):
+    """
+    CandleSeries, or {"error": ...}. With `shrink`, outputsize is cut while credits are low and
+    the bars come back wrapped in quota.Shrunk.
+    """
     key = KEYS.get("TWELVEDATA")
     if not key:
         return {"error": "No TwelveData key"}
     url = "https://api.twelvedata.com/time_series"
-    params = {"symbol": symbol, "interval": interval, "outputsize": outputsize, "apikey": key, "format":"JSON"}
-    r = requests.get(url, params=params, timeout=15)
+    sent = QUOTA.shrink_outputsize("twelvedata", key, outputsize) if shrink else outputsize
+    params = {"symbol": symbol, "interval": interval, "outputsize": sent, "apikey": key, "format":"JSON", "timezone": "UTC"}
+    if start_date:
+        # incremental sync: only bars from start_date (inclusive) onwards
+        params["start_date"] = start_date
+    if end_date:
+        params["end_date"] = end_date
+    r = await http_client.get(url, params=params, timeout=15)
     if r.status_code != 200:
         return {"error": f"td status {r.status_code}"}
     data = r.json()
     if "values" not in data:
         return {"error": "no values", "raw": data}
-    # convert to list ascending
-    vals = list(reversed(data["values"]))
-    # normalize
-    entries = []
-    for v in vals:
-        entries.append({
-            "time": v.get("datetime"),
-            "open": float(v["open"]),
-            "high": float(v["high"]),
-            "low": float(v["low"]),
-            "close": float(v["close"]),
-            "volume": float(v.get("volume", 0))
-        })
-    return entries
-
-def fetch_candles_alpha(symbol: str, interval: str = "1min", outputsize: int = 100):
+    bars = _td_entries(data["values"])
+    return Shrunk(bars, outputsize, sent) if sent < outputsize else bars
+
+def _td_entries(values):
+    # requested with timezone=UTC; the series comes back ascending
+    return normalize_twelvedata(values, tz="UTC").series
+
+def is_series(r):
+    return isinstance(r, CandleSeries)
+
+def is_bars(r):
+    """A series, whole or cut short on low credits (quota.Shrunk)."""
+    return is_series(unshrunk(r))
+
+# TwelveData accepts up to 120 comma-separated symbols per time_series call; each costs one
+# credit, so chunks are further capped at the key's per-minute credits (QUOTA.batch_size)
+TD_BATCH_MAX = int(os.getenv("TWELVEDATA_BATCH_MAX", "120"))
+
+async def fetch_candles_twelvedata_batch(symbols: List[str], interval: str = "1min", outputsize: int = 100):
+    """
+    One time_series call for many symbols. Returns {symbol: CandleSeries | Shrunk | {"error": ...}}.
+    """
+    key = KEYS.get("TWELVEDATA")
+    if not key:
+        return {s: {"error": "No TwelveData key"} for s in symbols}
+    url = "https://api.twelvedata.com/time_series"
+    sent = QUOTA.shrink_outputsize("twelvedata", key, outputsize)
+    params = {"symbol": ",".join(symbols), "interval": interval, "outputsize": sent, "apikey": key, "format":"JSON", "timezone": "UTC"}
+    r = await http_client.get(url, params=params, timeout=15)
+    if r.status_code != 200:
+        return {s: {"error": f"td status {r.status_code}"} for s in symbols}
+    data = r.json()
+    # a single symbol comes back un-nested
+    if len(symbols) == 1:
+        data = {symbols[0]: data}
+    out = {}
+    for s in symbols:
+        d = data.get(s) or {}
+        if "values" not in d:
+            out[s] = {"error": "no values", "raw": d}
+            continue
+        bars = _td_entries(d["values"])
+        out[s] = Shrunk(bars, outputsize, sent) if sent < outputsize else bars
+    return out
+
+async def fetch_candles_alpha(symbol: str, interval: str = "1min", outputsize: int = 100):
     # AlphaVantage has daily/time series; for quick prototyping use intraday
     key = KEYS.get("ALPHAVANTAGE")
     if not key:
@@ -75,7 +143,7 @@ def fetch_candles_alpha(symbol: str, interval: str = "1min", outputsize: int = 1
     # try function=TIME_SERIES_INTRADAY
     url = "https://www.alphavantage.co/query"
     params = {"function":"TIME_SERIES_INTRADAY", "symbol":symbol, "interval":interval, "outputsize":"compact", "apikey":key}
-    r = requests.get(url, params=params, timeout=15)
+    r = await http_client.get(url, params=params, timeout=15)
     if r.status_code != 200:
         return {"error": f"alpha {r.status_code}"}
     resp = r.json()
@@ -83,41 +151,220 @@ def fetch_candles_alpha(symbol: str, interval: str = "1min", outputsize: int = 1
     k = next((kk for kk in resp.keys() if "Time Series" in kk), None)
     if not k:
         return {"error": "alpha no timeseries", "raw": resp}
-    series = resp[k]
-    # series keys descending; we want ascending
-    entries = []
-    for t in sorted(series.keys()):
-        v = series[t]
-        entries.append({
-            "time": t,
-            "open": float(v["1. open"]),
-            "high": float(v["2. high"]),
-            "low": float(v["3. low"]),
-            "close": float(v["4. close"]),
-            "volume": float(v.get("5. volume", 0))
-        })
-    return entries
-
-def get_candles(symbol: str, source="twelvedata", interval="1min", outputsize=200):
+    # timestamps are in the meta "Time Zone" (US/Eastern), converted to UTC here
+    return normalize_alphavantage(resp).series
+
+async def _synced_twelvedata(symbol, interval, outputsize):
+    # only new bars are requested once the series is held locally; after a restart the
+    # series is primed from the on-disk store, and closed bars are persisted back to it
+    if not len(SYNC.state("main.twelvedata", symbol, interval).candles):
+        SYNC.seed("main.twelvedata", symbol, interval, STORE.tail(symbol, interval, outputsize))
+    res = await SYNC.async_sync("main.twelvedata", symbol, interval, outputsize,
+                                lambda size, start: fetch_candles_twelvedata(symbol, interval, size, start_date=start),
+                                time_of=lambda c: c["t"], start_of=lambda c: c["time"])
+    if is_bars(res):
+        STORE.append(symbol, interval, unshrunk(res))
+    return res
+
+async def _cached_twelvedata(symbol, interval, outputsize):
+    # a window cut short on low credits is served but not cached under the full outputsize
+    res = await CACHE.aget_or_fetch("twelvedata", symbol, interval, outputsize,
+                                    lambda: guarded("twelvedata", lambda: _synced_twelvedata(symbol, interval, outputsize),
+                                                    is_valid=is_bars),
+                                    is_valid=is_series)
+    return unshrunk(res)
+
+async def _cached_alpha(symbol, interval, outputsize):
+    return await CACHE.aget_or_fetch("alphavantage", symbol, interval, outputsize,
+                                     lambda: guarded("alphavantage", lambda: fetch_candles_alpha(symbol, interval, outputsize),
+                                                     is_valid=is_series),
+                                     is_valid=is_series)
+
+async def get_candles_meta(symbol: str, source="twelvedata", interval="1min", outputsize=200, mode=None):
+    """
+    Fetch candles and report which provider won and how long it took.
+    Returns {"provider", "candles", "ttfb_ms"} or {"error", ...}.
+    mode: sequential | hedged | parallel (see app/failover.py); default from FAILOVER_MODE.
+    """
     # symbol examples: BTC/USD or EUR/USD or XAU/USD etc.
-    # Try prioritized sources
-    if source == "twelvedata":
-        res = fetch_candles_twelvedata(symbol, interval, outputsize)
-        if isinstance(res, list):
-            return res
-        # fallback alpha
-        res2 = fetch_candles_alpha(symbol.replace("/",""), interval, outputsize)
-        if isinstance(res2, list):
-            return res2
-        return {"error": "no data", "td": res, "alpha": res2}
-    elif source == "alpha":
-        res = fetch_candles_alpha(symbol.replace("/",""), interval, outputsize)
-        if isinstance(res, list):
-            return res
-        return {"error": res}
-    else:
-        # default try twelvedata
-        return get_candles(symbol, "twelvedata", interval, outputsize)
+    if can_resample(interval, outputsize):
+        # higher timeframes are built from the shared 1min series: one upstream feed per symbol
+        base = await get_candles_meta(symbol, source, BASE_INTERVAL, base_bars_for(interval, outputsize), mode)
+        if "candles" not in base:
+            return base
+        bars = RESAMPLER.get(f"main.{base['provider']}", symbol, interval, outputsize, base["candles"])
+        return {**base, "candles": bars, "resampled_from": BASE_INTERVAL}
+    # Try prioritized sources (each goes through the shared candle cache)
+    td = ("twelvedata", lambda: _cached_twelvedata(symbol, interval, outputsize))
+    alpha = ("alphavantage", lambda: _cached_alpha(symbol.replace("/",""), interval, outputsize))
+    attempts = [alpha] if source == "alpha" else [td, alpha]
+    res = await race(attempts, is_valid=is_series, mode=mode)
+    if res["provider"] is None:
+        return {"error": "no data", "providers": res["errors"], "ttfb_ms": res["ttfb_ms"]}
+    return {"provider": res["provider"], "candles": res["result"], "ttfb_ms": res["ttfb_ms"]}
+
+async def get_candles_mtf(symbol: str, intervals: List[str], outputsize=300, source="twelvedata",
+                          mode=None) -> Dict[str, Any]:
+    """
+    Candles for several timeframes of one symbol: every interval that can be built from 1min bars
+    is resampled from a single 1min pull sized for the largest of them; the rest (or all, when the
+    pull fails) are fetched per interval in parallel. Returns {interval: meta} like get_candles_meta.
+    """
+    local = [iv for iv in intervals if interval_seconds(iv) == BASE_STEP or can_resample(iv, outputsize)]
+    out: Dict[str, Any] = {}
+    if local:
+        n = max(base_bars_for(iv, outputsize) if interval_seconds(iv) > BASE_STEP else outputsize for iv in local)
+        base = await get_candles_meta(symbol, source, BASE_INTERVAL, n, mode)
+        if "candles" in base:
+            for iv in local:
+                if interval_seconds(iv) == BASE_STEP:
+                    out[iv] = {**base, "candles": base["candles"].tail(outputsize)}
+                else:
+                    bars = RESAMPLER.get(f"main.{base['provider']}", symbol, iv, outputsize, base["candles"])
+                    out[iv] = {**base, "candles": bars, "resampled_from": BASE_INTERVAL}
+    rest = [iv for iv in intervals if iv not in out]
+    fetched = await asyncio.gather(*(get_candles_meta(symbol, source, iv, outputsize, mode) for iv in rest))
+    out.update(zip(rest, fetched))
+    return out
+
+async def get_candles(symbol: str, source="twelvedata", interval="1min", outputsize=200, mode=None):
+    res = await get_candles_meta(symbol, source, interval, outputsize, mode)
+    if "candles" in res:
+        return res["candles"]
+    return res
+
+async def get_candles_batch(symbols: List[str], interval="1min", outputsize=200) -> Dict[str, Any]:
+    """
+    Candles for many symbols with as few upstream calls as possible:
+    cached series are reused, the rest go out in TwelveData batches sized to the key's
+    per-minute credits (at most TD_BATCH_MAX),
+    and symbols the batch could not serve fall back to the per-symbol failover.
+    Returns {symbol: meta} where meta is shaped like get_candles_meta().
+    """
+    out: Dict[str, Any] = {}
+    missing = []
+    for sym in symbols:
+        cached = CACHE.lookup("twelvedata", sym, interval, outputsize)
+        if cached is not None:
+            out[sym] = {"provider": "twelvedata", "candles": cached, "cached": True}
+        else:
+            missing.append(sym)
+
+    async def run_chunk(chunk):
+        t0 = time.perf_counter()
+        try:
+            res = await guarded("twelvedata", lambda: fetch_candles_twelvedata_batch(chunk, interval, outputsize),
+                                is_valid=lambda r: any(is_bars(v) for v in r.values()))
+        except Exception as e:
+            res = {s: {"error": str(e)} for s in chunk}
+        ms = round((time.perf_counter() - t0) * 1000.0, 1)
+        for sym in chunk:
+            c = res.get(sym)
+            if is_series(c):
+                CACHE.store("twelvedata", sym, interval, outputsize, c)
+                out[sym] = {"provider": "twelvedata", "candles": c, "ttfb_ms": ms}
+            elif isinstance(c, Shrunk):
+                out[sym] = {"provider": "twelvedata", "candles": c.bars, "ttfb_ms": ms, "shrunk_to": c.sent}
+
+    n = QUOTA.batch_size("twelvedata", KEYS.get("TWELVEDATA") or "", TD_BATCH_MAX)
+    chunks = [missing[i:i + n] for i in range(0, len(missing), n)]
+    await asyncio.gather(*(run_chunk(ch) for ch in chunks))
+    fallback = [s for s in missing if s not in out]
+    metas = await asyncio.gather(*(get_candles_meta(s, "twelvedata", interval, outputsize) for s in fallback))
+    out.update(zip(fallback, metas))
+    return out
+
+# ==== Local history (app/candle_store.py) ====
+TD_MAX_OUTPUTSIZE = 5000
+RANGE_MAX_BARS = int(os.getenv("CANDLE_RANGE_MAX_BARS", "50000"))
+BACKFILL_MAX_PAGES = int(os.getenv("CANDLE_BACKFILL_MAX_PAGES", "10"))
+# stored bars further apart than this (and 50 bars) count as a hole worth backfilling;
+# shorter gaps are weekends / session breaks
+BACKFILL_HOLE_S = 4 * 86400
+BACKFILL_TRACK_MAX = int(os.getenv("CANDLE_BACKFILL_TRACK_MAX", "1000"))
+# per (symbol, interval seconds): closed ranges already requested from the provider,
+# least recently queried evicted (an evicted series is at worst re-requested once)
+_backfilled: "OrderedDict[tuple, List[tuple]]" = OrderedDict()
+
+def _tried_ranges(symbol: str, step: int) -> List[tuple]:
+    key = (symbol, step)
+    tried = _backfilled.get(key)
+    if tried is None:
+        tried = _backfilled[key] = []
+        while len(_backfilled) > BACKFILL_TRACK_MAX:
+            _backfilled.popitem(last=False)
+    _backfilled.move_to_end(key)
+    return tried
+
+def _missing_ranges(bars: CandleSeries, start: int, end: int, step: int) -> List[tuple]:
+    if not len(bars):
+        return [(start, end)]
+    t = bars.t
+    out = []
+    if int(t[0]) - start > step:
+        out.append((start, int(t[0]) - step))
+    for i in np.flatnonzero(np.diff(t) > max(BACKFILL_HOLE_S, 50 * step)):
+        out.append((int(t[i]) + step, int(t[i + 1]) - step))
+    if end - int(t[-1]) > step:
+        out.append((int(t[-1]) + step, end))
+    return out
+
+async def backfill_twelvedata(symbol: str, interval: str, start: int, end: int) -> Tuple[int, Optional[int]]:
+    """
+    Page [start, end] (epoch s) from TwelveData into the store, newest page first.
+    Returns (bars stored, lo) where [lo, end] is the span the provider has fully answered for,
+    or lo=None when not even the newest page came back.
+    """
+    stored = 0
+    hi = end
+    covered = None
+    for _ in range(BACKFILL_MAX_PAGES):
+        # full pages: a page costs one credit whatever its size
+        sent = TD_MAX_OUTPUTSIZE
+        res = await guarded("twelvedata", lambda: fetch_candles_twelvedata(symbol, interval, sent,
+                                                                           start_date=format_time(start),
+                                                                           end_date=format_time(hi), shrink=False),
+                            is_valid=is_series)
+        if not is_series(res):
+            break
+        if not len(res):
+            covered = start
+            break
+        stored += STORE.append(symbol, interval, res)
+        # a page short of what was sent means the provider has nothing older in range
+        if res.t[0] <= start or len(res) < sent:
+            covered = start
+            break
+        covered = int(res.t[0])
+        hi = covered - 1
+    return stored, covered
+
+async def get_candles_range(symbol: str, interval: str, start: int, end: int, source="twelvedata") -> Dict[str, Any]:
+    """
+    Closed bars with start <= t <= end from the local store. Holes in [start, end] are fetched
+    from the provider once (backfill priority) and persisted; repeated queries only hit disk.
+    """
+    step = interval_seconds(interval)
+    tried = _tried_ranges(symbol, step)
+    gaps = [(lo, hi) for lo, hi in _missing_ranges(STORE.read(symbol, interval, start, end), start, end, step)
+            if not any(a <= lo and hi <= b for a, b in tried)]
+    errors = {}
+    stored = 0
+    if gaps and source != "alpha":
+        with priority(PRIORITY_BACKFILL):
+            for lo, hi in gaps:
+                try:
+                    n, done = await backfill_twelvedata(symbol, interval, lo, hi)
+                except Exception as e:
+                    errors[f"{format_time(lo)}..{format_time(hi)}"] = str(e)
+                    continue
+                stored += n
+                # only the span the pages reached, and only its closed part, counts as done;
+                # the tail keeps growing and the rest is retried on the next query
+                if done is not None:
+                    tried.append((done, min(hi, int(time.time()) - step)))
+    return {"provider": "store", "candles": STORE.read(symbol, interval, start, end, limit=RANGE_MAX_BARS),
+            "backfilled": stored, "errors": errors, "coverage": STORE.coverage(symbol, interval)}
 
 # =======================
 # ==== ICT Models  ======
@@ -176,13 +423,19 @@ def detect_fvg(candles: List[Dict[str,Any]], lookback=60):
             signals.append({"type":"fvg_bear", "time":C["time"], "gap_top":A["low"], "gap_bottom":C["high"], "note":"Bearish FVG (gap down) - possible sell on fill"})
     return signals
 
-def detect_turtle_soup(candles: List[Dict[str,Any]], lookback=50):
+def detect_turtle_soup(candles: List[Dict[str,Any]], lookback=10):
     # Simple false-breakout pattern: price briefly exceeds recent high/low but returns inside
+    # (reference loop; app/detector_arrays.py and app/live_detectors.py answer the lookback in O(1) per bar)
+    if lookback < 1:
+        raise ValueError("lookback must be >= 1")
     signals=[]
     n=len(candles)
-    if n < 6: return signals
-    recent_high = max(c["high"] for c in candles[-10:])
-    recent_low = min(c["low"] for c in candles[-10:])
+    # the breakout bar, the bar closing back inside and a full window before them
+    if n < max(6, lookback + 2): return signals
+    # the extremes the breakout bar (prev) is measured against: the `lookback` bars before it
+    before = candles[-lookback-2:-2]
+    recent_high = max(c["high"] for c in before)
+    recent_low = min(c["low"] for c in before)
     last = candles[-1]
     prev = candles[-2]
     # breakout above recent_high then close back below recent_high
@@ -192,13 +445,17 @@ def detect_turtle_soup(candles: List[Dict[str,Any]], lookback=50):
         signals.append({"type":"turtle_long_fail","time":last["time"], "price":last["close"], "note":"Failed breakdown below low - contrarian long signal"})
     return signals
 
-def detect_liq_sweep(candles: List[Dict[str,Any]], lookback=30):
+def detect_liq_sweep(candles: List[Dict[str,Any]], lookback=10):
     # wick that clears a cluster of highs / lows
+    if lookback < 1:
+        raise ValueError("lookback must be >= 1")
     signals=[]
     n=len(candles)
-    if n < 6: return signals
-    highs = [c["high"] for c in candles[-10:]]
-    lows = [c["low"] for c in candles[-10:]]
+    # the sweeping bar and a full window before it
+    if n < max(6, lookback + 1): return signals
+    # the `lookback` bars before the sweeping bar
+    highs = [c["high"] for c in candles[-lookback-1:-1]]
+    lows = [c["low"] for c in candles[-lookback-1:-1]]
     recent_high = max(highs)
     recent_low = min(lows)
     last = candles[-1]
@@ -208,19 +465,15 @@ def detect_liq_sweep(candles: List[Dict[str,Any]], lookback=30):
         signals.append({"type":"liquidity_sweep_low","time":last["time"], "sweep_price": last["low"], "note":"Liquidity sweep below recent low (buy liquidity) detected"})
     return signals
 
-# Integrate all detectors
+# Integrate all detectors: one pass over shared features (app/pipeline.py); the loops above
+# are the reference implementation the pipeline is tested against
 def detect_all(candles):
-    res = []
-    res.extend(detect_order_blocks(candles))
-    res.extend(detect_fvg(candles))
-    res.extend(detect_turtle_soup(candles))
-    res.extend(detect_liq_sweep(candles))
-    # sort by time if possible
-    try:
-        res_sorted = sorted(res, key=lambda x: x.get("time",""))
-    except:
-        res_sorted = res
-    return res_sorted
+    return pipeline.detect_all(candles)
+
+# live /ws/stream: one shared producer per symbol, polling through the candle cache;
+# detection is incremental per producer (app/live_detectors.py mirrors the detectors above)
+STREAM = StreamHub(lambda symbol, interval, n: get_candles_meta(symbol, "twelvedata", interval, n), detect_all,
+                   live=main_detectors)
 
 # =======================
 # ==== API Models =======
@@ -231,44 +484,299 @@ class CandlesQuery(BaseModel):
     interval: str = "1min"
     outputsize: int = 200
 
+class BatchQuery(BaseModel):
+    symbols: List[str]
+    intervals: List[str] = ["1min"]
+    outputsize: int = 200
+
 # =======================
 # ==== Routes ===========
 # =======================
 @app.get("/health")
-def health():
-    return {"status":"ok", "time": now_utc_iso()}
+async def health():
+    for provider, name in (("twelvedata", "TWELVEDATA"), ("alphavantage", "ALPHAVANTAGE"), ("finnhub", "FINNHUB")):
+        if KEYS.get(name):
+            QUOTA.budget(provider, KEYS[name])
+    return {"status":"ok", "time": now_utc_iso(), "candle_cache": CACHE.stats(), "series_sync": SYNC.stats(),
+            "providers": BREAKERS.snapshot(), "quota": QUOTA.snapshot(), "normalize": normalize.stats(),
+            "candle_store": STORE.stats(), "resample": RESAMPLER.stats(),
+            "stream": STREAM.stats(), "detectors": pipeline.PIPELINE.stats(), "fvg": FVG_BOOK.stats(),
+            "journal": JOURNAL.stats(), "sessions": SESSIONS.stats(), "backtest": backtest.stats()}
+
+RANGE_ERROR = "start/end must be epoch seconds or YYYY-MM-DD[ HH:MM:SS]"
+
+def _time_range(start: Optional[str], end: Optional[str], interval: str, outputsize: int) -> Optional[tuple]:
+    """(start, end) epoch seconds for a range query; end defaults to now, start to `outputsize` bars before end."""
+    t_end = parse_time(end) if end is not None else int(time.time())
+    t_start = parse_time(start) if start is not None else None
+    if t_end is None or (start is not None and t_start is None):
+        return None
+    if t_start is None:
+        t_start = t_end - outputsize * interval_seconds(interval)
+    return t_start, t_end
 
 @app.get("/candles")
-def api_candles(symbol: str = Query(...), source: str = "twelvedata", interval: str = "1min", outputsize: int = 200):
+async def api_candles(symbol: str = Query(...), source: str = "twelvedata", interval: str = "1min", outputsize: int = 200,
+                      failover_mode: Optional[str] = None, start: Optional[str] = None, end: Optional[str] = None):
     """
     Fetch candles for symbol. Returns list of candle objects ascending (oldest->newest).
+    Candles are held as a CandleSeries internally and only expanded to dicts here.
+    start / end (epoch seconds or UTC "YYYY-MM-DD[ HH:MM:SS]") query closed bars from the
+    local store instead of the provider's latest `outputsize` bars.
     """
+    if start is not None or end is not None:
+        span = _time_range(start, end, interval, outputsize)
+        if span is None:
+            return {"status":"error", "error": RANGE_ERROR}
+        t_start, t_end = span
+        m = await get_candles_range(symbol, interval, t_start, t_end, source)
+        c = m["candles"]
+        return {"status":"ok", "symbol":symbol, "source":source, "provider": "store", "interval":interval,
+                "start": format_time(t_start), "end": format_time(t_end), "count": len(c),
+                "truncated": len(c) >= RANGE_MAX_BARS, "backfilled": m["backfilled"], "errors": m["errors"],
+                "coverage": m["coverage"], "data": c.to_records()}
     try:
-        c = get_candles(symbol, source, interval, outputsize)
-        return {"status":"ok", "symbol":symbol, "source":source, "interval":interval, "count": len(c) if isinstance(c,list) else 0, "data": c}
+        m = await get_candles_meta(symbol, source, interval, outputsize, failover_mode)
+        c = m.get("candles", m)
+        return {"status":"ok", "symbol":symbol, "source":source, "provider": m.get("provider"), "ttfb_ms": m.get("ttfb_ms"),
+                "interval":interval, "count": len(c) if is_series(c) else 0, "data": c.to_records() if is_series(c) else c}
     except Exception as e:
         return {"status":"error", "error": str(e)}
 
+@app.websocket("/ws/stream")
+async def ws_stream(ws: WebSocket, symbols: str = Query(...), interval: str = "1min"):
+    """
+    Live candles + signals for comma separated `symbols`: one {"type":"snapshot"} per symbol,
+    then {"type":"delta", "bars": [changed bars, "closed" flag], "signals": {"added", "removed"}}.
+    A client that falls behind is re-sent a snapshot instead of the deltas it missed.
+    """
+    syms = list(dict.fromkeys(s.strip() for s in symbols.split(",") if s.strip()))[:STREAM_MAX_SYMBOLS]
+    await ws.accept()
+    if not syms:
+        await ws.send_json({"type": "error", "error": "no symbols"})
+        await ws.close()
+        return
+    await STREAM.serve(ws.send_json, ws.receive_text, syms, interval)
+
 @app.get("/ict/signals")
-def api_ict_signals(symbol: str = Query(...), source: str = "twelvedata", interval: str = "1min", outputsize: int = 300):
+async def api_ict_signals(symbol: str = Query(...), source: str = "twelvedata", interval: str = "1min", outputsize: int = 300,
+                          failover_mode: Optional[str] = None):
     """
     Get combined ICT signals for the provided symbol.
     """
-    candles = get_candles(symbol, source, interval, outputsize)
-    if isinstance(candles, dict) and candles.get("error"):
-        return {"status":"error", "error":candles}
+    m = await get_candles_meta(symbol, source, interval, outputsize, failover_mode)
+    if m.get("error"):
+        return {"status":"error", "error":m}
+    candles = m["candles"]
     signals = detect_all(candles)
-    return {"status":"ok", "symbol":symbol, "count_candles": len(candles), "signals": signals, "last_candle": candles[-1] if candles else None}
+    JOURNAL.record(symbol, interval, "ict_signals", signals)
+    return {"status":"ok", "symbol":symbol, "provider": m["provider"], "ttfb_ms": m["ttfb_ms"], "count_candles": len(candles),
+            "signals": signals, "last_candle": candles[-1].to_dict() if candles else None}
+
+@app.get("/ict/indicators")
+async def api_ict_indicators(symbol: str = Query(...), indicators: str = "sma:20,ema:50,rsi:14", source: str = "twelvedata",
+                             interval: str = "1min", outputsize: int = 300, start: Optional[str] = None,
+                             end: Optional[str] = None, failover_mode: Optional[str] = None):
+    """
+    Whole indicator arrays aligned with the returned bar times (null while warming up), e.g.
+    indicators=sma:20,ema:50,rsi:14,atr:14,macd:12:26:9,vwap,avwap:2024-01-02T13:30:00
+    start / end read the history from the local store like /candles.
+    """
+    specs = [x for x in indicators.split(",") if x.strip()]
+    try:
+        for x in specs:
+            indicator_series.parse_spec(x)
+    except ValueError as e:
+        return {"status":"error", "error": str(e)}
+    if start is not None or end is not None:
+        span = _time_range(start, end, interval, outputsize)
+        if span is None:
+            return {"status":"error", "error": RANGE_ERROR}
+        m = await get_candles_range(symbol, interval, span[0], span[1], source)
+    else:
+        m = await get_candles_meta(symbol, source, interval, outputsize, failover_mode)
+        if m.get("error"):
+            return {"status":"error", "error": m}
+    c = m["candles"]
+    values = indicator_series.compute(c, specs)
+    return {"status":"ok", "symbol":symbol, "provider": m["provider"], "interval":interval, "count": len(c),
+            "time": c.t.tolist(), "indicators": indicator_series.records(values)}
+
+@app.get("/ict/fvg/open")
+async def api_fvg_open(symbols: str = Query(...), interval: str = "1min", price: Optional[float] = None,
+                       distance: Optional[float] = None, outputsize: int = 500, limit: int = 100):
+    """
+    Unfilled fair value gaps for comma separated `symbols`, nearest to `price` first (default: each
+    symbol's last close). `distance` keeps gaps whose open part lies within that many price units.
+    Gaps are tracked across calls (app/fvg_tracker.py), so fills seen in earlier windows persist.
+    """
+    syms = list(dict.fromkeys(s.strip() for s in symbols.split(",") if s.strip()))
+    if not syms:
+        return {"status":"error", "error": "no symbols"}
+    metas = await get_candles_batch(syms, interval, outputsize)
+    results = {}
+    for sym in syms:
+        m = metas.get(sym) or {}
+        c = m.get("candles")
+        if not is_series(c) or not len(c):
+            results[sym] = {"status":"error", "error": m}
+            continue
+        tracker = FVG_BOOK.feed(sym, interval, c)
+        p = price if price is not None else float(c.c[-1])
+        gaps = tracker.near(p, distance)
+        results[sym] = {"status":"ok", "provider": m.get("provider"), "price": p, "open_count": len(tracker),
+                        "gaps": [g.record(p) for g in gaps[:max(limit, 0)]]}
+    return {"status":"ok", "interval": interval, "results": results}
+
+@app.get("/signals/history")
+async def api_signals_history(symbol: str = Query(...), interval: str = "1min", types: Optional[str] = None,
+                              start: Optional[str] = None, end: Optional[str] = None, limit: int = 100,
+                              cursor: Optional[str] = None):
+    """
+    Journaled signals (app/signal_journal.py) newest first. `types` is comma separated;
+    pass the returned next_cursor back as `cursor` for the following page.
+    """
+    t_start = parse_time(start) if start is not None else None
+    t_end = parse_time(end) if end is not None else None
+    if (start is not None and t_start is None) or (end is not None and t_end is None):
+        return {"status":"error", "error": RANGE_ERROR}
+    after = decode_cursor(cursor) if cursor else None
+    if cursor and after is None:
+        return {"status":"error", "error": "bad cursor"}
+    type_list = [x.strip() for x in types.split(",") if x.strip()] if types else None
+    rows, nxt = JOURNAL.history(symbol, interval, type_list, t_start, t_end, limit, after)
+    return {"status":"ok", "symbol":symbol, "interval":interval, "count": len(rows), "signals": rows,
+            "next_cursor": nxt}
+
+@app.get("/ict/sessions")
+async def api_ict_sessions(symbol: str = Query(...), source: str = "twelvedata", interval: str = "1min",
+                           outputsize: int = 1000, days: int = 5, failover_mode: Optional[str] = None):
+    """
+    Session / killzone label of the returned bars and per-day session levels (open / high / low
+    / close of Asia, London, New York and the killzones). Levels of completed days are kept per
+    symbol (app/sessions.py), so `days` can reach back further than one fetched window.
+    """
+    m = await get_candles_meta(symbol, source, interval, outputsize, failover_mode)
+    if m.get("error"):
+        return {"status":"error", "error": m}
+    c = m["candles"]
+    book = SESSIONS.update(symbol, interval, c)
+    lab = sessions.labels(c)
+    names = [sessions.label_names(a, b) for a, b in zip(lab["sessions"].tolist(), lab["killzone"].tolist())]
+    return {"status":"ok", "symbol":symbol, "provider": m["provider"], "interval":interval, "count": len(c),
+            "time": c.t.tolist(), "labels": names, "levels": book.snapshot(days)}
+
+@app.get("/ict/mtf")
+async def api_ict_mtf(symbol: str = Query(...), timeframes: str = "1min,5min,1h,4h", source: str = "twelvedata",
+                      outputsize: int = 300, limit: int = 200, aligned_only: bool = False,
+                      failover_mode: Optional[str] = None):
+    """
+    Multi-timeframe confluence (app/mtf.py): every timeframe from one 1min pull where possible,
+    the detector pipeline once per timeframe, and each timeframe's FVG / order-block entries
+    tagged with the structure bias of every higher timeframe at the time they were confirmed.
+    """
+    tfs = list(dict.fromkeys(x.strip() for x in timeframes.split(",") if x.strip()))
+    if not tfs:
+        return {"status":"error", "error": "no timeframes"}
+    metas = await get_candles_mtf(symbol, tfs, outputsize, source, failover_mode)
+    errors = {iv: m for iv, m in metas.items() if not is_series(m.get("candles"))}
+    series = {iv: m["candles"] for iv, m in metas.items() if iv not in errors}
+    # detectors and confluence are numpy work: keep them off the event loop
+    frames = await asyncio.to_thread(mtf.run, series)
+    sigs = await asyncio.to_thread(mtf.confluence, frames, limit=limit, aligned_only=aligned_only)
+    summary = {iv: {**frames[iv].summary(), "provider": metas[iv].get("provider"),
+                    "resampled_from": metas[iv].get("resampled_from")} for iv in series}
+    return {"status":"ok" if series else "error", "symbol":symbol, "frames": summary, "errors": errors,
+            "signals": sigs}
+
+@app.get("/backtest")
+async def api_backtest(symbol: str = Query(...), interval: str = "1min", start: Optional[str] = None,
+                       end: Optional[str] = None, sources: str = ",".join(backtest.SOURCES), entry: str = "next_open",
+                       stop_atr: float = 1.5, stop_pct: Optional[float] = None, target_r: float = 2.0,
+                       max_bars: int = 60, cost_bps: float = 0.0, overlap: bool = True, trades: int = 100):
+    """
+    Backtest of the detector signals over the local store (app/backtest.py): every signal of
+    `sources` becomes a trade entered after its confirming bar, with an ATR (or %) stop, an
+    R-multiple target and a time exit. Only stored bars are used; GET /candles with start / end
+    backfills the store first.
+    """
+    t_start = parse_time(start) if start is not None else None
+    t_end = parse_time(end) if end is not None else None
+    if (start is not None and t_start is None) or (end is not None and t_end is None):
+        return {"status":"error", "error": RANGE_ERROR}
+    try:
+        rules = backtest.Rules(entry, stop_atr, stop_pct, target_r, max_bars, cost_bps, overlap)
+        src = [x.strip() for x in sources.split(",") if x.strip()]
+        bars = STORE.read(symbol, interval, t_start, t_end)
+        if not len(bars):
+            return {"status":"error", "error": "no stored bars in range", "coverage": STORE.coverage(symbol, interval)}
+        # seconds of numpy on a year of 1min bars: keep it off the event loop
+        res = await asyncio.to_thread(backtest.run, bars, src, rules)
+    except ValueError as e:
+        return {"status":"error", "error": str(e)}
+    return {"status":"ok", "symbol":symbol, "interval":interval, **res.report(trades)}
+
+async def _batch_series(q: BatchQuery) -> Dict[str, Dict[str, Any]]:
+    symbols = list(dict.fromkeys(q.symbols))
+    per_interval = await asyncio.gather(*(get_candles_batch(symbols, iv, q.outputsize) for iv in q.intervals))
+    return {s: {iv: res[s] for iv, res in zip(q.intervals, per_interval)} for s in symbols}
+
+@app.post("/candles/batch")
+async def api_candles_batch(q: BatchQuery):
+    """
+    Candles for many symbols x intervals; one TwelveData call per interval per batch of symbols
+    (see get_candles_batch).
+    Returns {"results": {symbol: {interval: {...}}}}.
+    """
+    series = await _batch_series(q)
+    results = {}
+    for sym, by_iv in series.items():
+        results[sym] = {}
+        for iv, m in by_iv.items():
+            c = m.get("candles")
+            if is_series(c):
+                results[sym][iv] = {"status":"ok", "provider": m.get("provider"), "count": len(c), "data": c.to_records()}
+            else:
+                results[sym][iv] = {"status":"error", "error": m}
+    return {"status":"ok", "interval_count": len(q.intervals), "symbol_count": len(series), "results": results}
+
+@app.post("/ict/signals/batch")
+async def api_ict_signals_batch(q: BatchQuery):
+    """
+    detect_all() over every symbol x interval, fetched with batched upstream calls.
+    """
+    series = await _batch_series(q)
+    results = {}
+    for sym, by_iv in series.items():
+        results[sym] = {}
+        for iv, m in by_iv.items():
+            c = m.get("candles")
+            if is_series(c):
+                signals = detect_all(c)
+                JOURNAL.record(sym, iv, "ict_signals", signals)
+                results[sym][iv] = {"status":"ok", "provider": m.get("provider"), "count_candles": len(c),
+                                    "signals": signals, "last_candle": c[-1].to_dict() if c else None}
+            else:
+                results[sym][iv] = {"status":"error", "error": m}
+    return {"status":"ok", "results": results}
+
+MENTOR_FVGS = 3   # nearest open gaps in the mentor report
 
 @app.get("/mentor")
-def api_mentor(symbol: str = Query(...), source: str = "twelvedata", interval: str = "1min"):
+async def api_mentor(symbol: str = Query(...), source: str = "twelvedata", interval: str = "1min"):
     """
     Simple AI mentor summary: summarise latest signals and provide narrative lines.
     """
-    sc = get_candles(symbol, source, interval, 300)
-    if isinstance(sc, dict) and sc.get("error"):
-        return {"status":"error", "error": sc}
+    m = await get_candles_meta(symbol, source, interval, 300)
+    if m.get("error"):
+        return {"status":"error", "error": m}
+    sc = m["candles"]
     signals = detect_all(sc)
+    JOURNAL.record(symbol, interval, "mentor", signals)
+    open_fvgs = []
+    if len(sc):
+        last = float(sc.c[-1])
+        open_fvgs = [g.record(last) for g in FVG_BOOK.feed(symbol, interval, sc).near(last)[:MENTOR_FVGS]]
     narrative_lines = []
     now = now_utc_iso()
     narrative_lines.append(f"Mentor report for {symbol} at {now}.")
@@ -281,13 +789,17 @@ def api_mentor(symbol: str = Query(...), source: str = "twelvedata", interval: s
             note = s.get("note","")
             price = s.get("price") or s.get("sweep_price") or s.get("gap_top") or ""
             narrative_lines.append(f"- {s['type']} at {price} time {t}. {note}")
+    for g in open_fvgs:
+        narrative_lines.append(f"- open {g['type']} {g['open_bottom']}-{g['open_top']} from {g['time']} "
+                               f"({g['mitigated']:.0%} mitigated, {g['distance']:.5g} away)")
     # suggested actions (very basic)
     narrative_lines.append("Suggested approach: wait for retest of the setup area, confirm with volume and a rejection candle, then enter with tight stoploss. Use risk management.")
-    return {"status":"ok", "symbol":symbol, "signals":signals, "narrative": narrative_lines}
+    return {"status":"ok", "symbol":symbol, "provider": m["provider"], "ttfb_ms": m["ttfb_ms"], "signals":signals,
+            "open_fvgs": open_fvgs, "narrative": narrative_lines}
 
 # =======================
 # ==== Root ============
 # =======================
 @app.get("/")
-def root():
+async def root():
     return {"message":"ICT Backend up", "time": now_utc_iso()}
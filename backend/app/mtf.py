@@ -0,0 +1,128 @@
+# backend/app/mtf.py
+# Multi-timeframe confluence: higher-timeframe structure bias attached to lower-timeframe entries.
+#
+# - the caller loads every timeframe from one 1min pull where it can (app/resample.py); run()
+#   then runs the detector pipeline once per timeframe, timeframes in parallel on a small
+#   thread pool (the array detectors spend their time in numpy)
+# - the bias of a timeframe at each of its bars is the side of the last BOS / CHoCH up to that
+#   bar (app/structure.py, computed once per run on the pipeline's shared BarFeatures)
+# - confluence() tags every entry signal of a timeframe with the context of each higher one as
+#   of the entry's close: the last higher bar that had closed by then (bar open + interval),
+#   never the forming one. Lookups are one searchsorted per (entry timeframe, higher timeframe)
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+
+from app import detector_arrays as da
+from app.candle_cache import interval_seconds
+from app.candle_series import CandleSeries, format_time
+from app.pipeline import PIPELINE, STRUCTURE_STRENGTH, PipelineResult
+from app.structure import BULL
+
+MTF_WORKERS = int(os.getenv("MTF_WORKERS", "4"))
+# lower-timeframe entries: full-history hits of these pipeline detectors, with how many bars
+# after the hit bar the signal is confirmed (an order block needs the next bar's retest)
+ENTRY_DETECTORS = {"fvg": 0, "order_blocks": 1}
+FAMILIES = ("main", "ict_models")
+
+_POOL = ThreadPoolExecutor(max_workers=MTF_WORKERS, thread_name_prefix="mtf")
+
+_BULLISH = ("_bull", "_buy", "_up", "_low", "_long_fail")
+_BEARISH = ("_bear", "_sell", "_down", "_high", "_short_fail")
+
+def side(signal_type: str) -> int:
+    """+1 for long setups (liquidity_sweep_low: sell-side taken), -1 for short ones, 0 unknown."""
+    if signal_type.endswith(_BULLISH):
+        return 1
+    if signal_type.endswith(_BEARISH):
+        return -1
+    return 0
+
+def _bias(v: int) -> Optional[str]:
+    return "bull" if v > 0 else "bear" if v < 0 else None
+
+class Frame:
+    """One timeframe's bars, pipeline result and per-bar structure bias."""
+    def __init__(self, interval: str, series: CandleSeries, result: PipelineResult):
+        self.interval = interval
+        self.step = interval_seconds(interval)
+        self.series = series
+        self.result = result
+        st = result.features.structure(STRUCTURE_STRENGTH)
+        self.events = st.records()
+        ev_idx = np.asarray([e[2] for e in st.events], dtype=np.int64)
+        ev_side = np.asarray([1 if e[1] == BULL else -1 for e in st.events], dtype=np.int64)
+        # last event at or before every bar, and the trend it left
+        self.last_event = np.searchsorted(ev_idx, np.arange(len(series)), side="right") - 1
+        self.trend = np.zeros(len(series), dtype=np.int64)
+        if len(ev_side):
+            self.trend = np.where(self.last_event >= 0, ev_side[np.maximum(self.last_event, 0)], 0)
+        self.close_t = series.t + self.step
+
+    def closed_by(self, at: np.ndarray) -> np.ndarray:
+        """Index of the last bar closed by each time in `at` (-1 before the first close)."""
+        return np.searchsorted(self.close_t, at, side="right") - 1
+
+    def context(self, i: int) -> Optional[Dict[str, Any]]:
+        if i < 0:
+            return None
+        ev = int(self.last_event[i])
+        return {"bias": _bias(int(self.trend[i])), "bar_time": format_time(self.series.t[i]),
+                "event": self.events[ev]["type"] if ev >= 0 else None,
+                "event_time": format_time(self.events[ev]["time"]) if ev >= 0 else None}
+
+    def summary(self) -> Dict[str, Any]:
+        n = len(self.series)
+        last = self.events[-1] if self.events else None
+        return {"count": n, "bias": _bias(int(self.trend[-1])) if n else None,
+                "last_event": {**last, "time": format_time(last["time"])} if last else None,
+                "timing_ms": {k: round(v, 3) for k, v in self.result.timing_ms.items()}}
+
+def run(frames: Dict[str, CandleSeries], families: Iterable[str] = FAMILIES) -> Dict[str, Frame]:
+    """The detector pipeline over every timeframe, timeframes in parallel."""
+    fams = tuple(families)
+    items = list(frames.items())
+    results = _POOL.map(lambda kv: Frame(kv[0], kv[1], PIPELINE.run(kv[1], fams)), items)
+    return {f.interval: f for f in results}
+
+def confluence(frames: Dict[str, Frame], entries: Dict[str, int] = ENTRY_DETECTORS, limit: int = 200,
+               aligned_only: bool = False) -> List[Dict[str, Any]]:
+    """
+    Entry signals of every timeframe with the context of each higher one as of the close of
+    their confirming bar, newest first.
+    "aligned" when every higher timeframe with a bias agrees with the entry's side; "score"
+    counts the agreeing ones. Scores are computed on arrays for all entries; context dicts
+    only for the `limit` returned.
+    """
+    by_step = sorted(frames.values(), key=lambda f: f.step)
+    rows = []   # (epoch, step, frame, bar index, type, side, score, aligned, higher bar indices)
+    for k, f in enumerate(by_step):
+        higher = by_step[k + 1:]
+        hits = {typ: idx for name in entries for typ, idx in f.result.hits.get(name, {}).items()}
+        lag = {typ: lag for name, lag in entries.items() for typ in f.result.hits.get(name, {})}
+        idx, types = da.order(hits)
+        if not len(idx):
+            continue
+        t = f.series.t[idx]
+        sides = np.asarray([side(x) for x in types], dtype=np.int64)
+        confirmed = f.series.t[idx + np.asarray([lag[x] for x in types], dtype=np.int64)]
+        at = [h.closed_by(confirmed + f.step) for h in higher]
+        score = np.zeros(len(idx), dtype=np.int64)
+        biased = np.zeros(len(idx), dtype=np.int64)
+        for h, hi in zip(higher, at):
+            bias = np.where(hi >= 0, h.trend[np.maximum(hi, 0)], 0) if len(h.trend) else np.zeros_like(hi)
+            score += (bias != 0) & (bias == sides)
+            biased += bias != 0
+        aligned = (sides != 0) & (biased > 0) & (score == biased)
+        keep = np.flatnonzero(aligned) if aligned_only else np.arange(len(idx))
+        for n in keep.tolist():
+            rows.append((int(t[n]), f.step, f, int(idx[n]), types[n], int(sides[n]), int(score[n]),
+                         bool(aligned[n]), [(h, int(hi[n])) for h, hi in zip(higher, at)]))
+    rows.sort(key=lambda r: (-r[0], -r[1]))
+    return [{"tf": f.interval, "time": format_time(tt), "epoch": tt, "type": typ, "side": sd,
+             "price": float(f.series.c[j]), "context": {h.interval: h.context(i) for h, i in ctx},
+             "score": sc, "aligned": al}
+            for tt, _, f, j, typ, sd, sc, al, ctx in rows[:max(limit, 0)]]
@@ -0,0 +1,247 @@
+# backend/app/normalize.py
+# One normalization stage for raw provider payloads -> CandleSeries.
+#
+# Each provider response is split into columns once and converted in bulk with NumPy:
+# - timestamps: numeric strings / epoch ints, or "YYYY-MM-DD[ HH:MM[:SS]]" strings parsed as
+#   datetime64 in one call; naive strings are read in an explicit zone (UTC unless the
+#   payload says otherwise, e.g. AlphaVantage's "Time Zone" meta field)
+# - prices: one float64 conversion per column
+# Rows with an unusable time, a non-finite price or high < low are dropped and counted
+# in Normalized.rejected / .reasons instead of being silently mapped to 0.
+# A malformed entry only costs a few extra bulk parses (bisection), not a per-row loop.
+
+import math
+import threading
+from operator import itemgetter
+from datetime import datetime, timezone as dt_timezone
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+from app.candle_series import CandleSeries, parse_time
+
+try:
+    from zoneinfo import ZoneInfo
+except ImportError:  # pragma: no cover - Python < 3.9
+    ZoneInfo = None
+
+UTC_NAMES = ("UTC", "Z", "GMT", "Etc/UTC", "Etc/GMT")
+
+class Normalized:
+    """Result of one normalization pass."""
+    __slots__ = ("series", "rejected", "reasons", "timezone")
+
+    def __init__(self, series: CandleSeries, reasons: Dict[str, int], timezone: str):
+        self.series = series
+        self.reasons = {k: v for k, v in reasons.items() if v}
+        self.rejected = sum(self.reasons.values())
+        self.timezone = timezone
+
+    def __repr__(self):
+        return f"Normalized({self.series!r}, rejected={self.rejected}, timezone={self.timezone!r})"
+
+# ---------- counters (reported on /health) ----------
+_lock = threading.Lock()
+_totals = {"payloads": 0, "rows": 0, "rejected": 0}
+
+def stats() -> Dict[str, int]:
+    with _lock:
+        return dict(_totals)
+
+def _count(rows: int, rejected: int):
+    with _lock:
+        _totals["payloads"] += 1
+        _totals["rows"] += rows
+        _totals["rejected"] += rejected
+
+# ---------- column converters ----------
+def to_float(col: Sequence[Any]) -> np.ndarray:
+    """float64 column; None / "" / junk become NaN."""
+    try:
+        return np.array(col, dtype=np.float64)
+    except (TypeError, ValueError):
+        out = np.empty(len(col), dtype=np.float64)
+        for i, v in enumerate(col):
+            try:
+                out[i] = float(v)
+            except (TypeError, ValueError):
+                out[i] = math.nan
+        return out
+
+def _zone_offsets(naive: np.ndarray, tz: str) -> np.ndarray:
+    """UTC offset in seconds of each naive wall-clock epoch in `tz` (DST aware)."""
+    zone = ZoneInfo(tz)
+    # offsets only change on the hour; resolve each distinct hour once
+    hours, inverse = np.unique(naive // 3600, return_inverse=True)
+    offs = np.array([
+        int(datetime.fromtimestamp(int(h) * 3600, dt_timezone.utc).replace(tzinfo=zone).utcoffset().total_seconds())
+        for h in hours], dtype=np.int64)
+    return offs[inverse]
+
+def _parse_naive(s: np.ndarray) -> np.ndarray:
+    """datetime64 parse of a string column; bad entries are isolated by bisection (-1)."""
+    try:
+        return s.astype("datetime64[s]").astype(np.int64)
+    except ValueError:
+        if len(s) == 1:
+            return np.full(1, -1, dtype=np.int64)
+        mid = len(s) // 2
+        return np.concatenate([_parse_naive(s[:mid]), _parse_naive(s[mid:])])
+
+def to_epoch(col: Sequence[Any], tz: str = "UTC") -> np.ndarray:
+    """
+    int64 epoch seconds column; unparseable entries become -1 (rejected by the caller).
+    Naive datetime strings are wall-clock time in `tz`; strings with an offset keep it.
+    """
+    n = len(col)
+    if n == 0:
+        return np.zeros(0, dtype=np.int64)
+    first = col[0]
+    if isinstance(first, (int, float, np.integer, np.floating)) and not isinstance(first, bool):
+        arr = to_float(col)
+        ok = np.isfinite(arr)
+        out = np.where(ok, arr, -1).astype(np.int64)
+        # mixed column: entries that are not numbers (e.g. ISO strings) take the string path
+        rest = [i for i in np.flatnonzero(~ok).tolist() if isinstance(col[i], str)]
+        if rest:
+            out[rest] = to_epoch([col[i] for i in rest], tz)
+        return out
+    s = np.array(col)
+    if s.dtype.kind != "U":
+        # None / mixed types in the column
+        s = np.array([("" if v is None else str(v)) for v in col], dtype=str)
+    s = np.char.strip(s)
+    numeric = np.char.isdigit(s)
+    # an offset / Z suffix after the date part -> per-row parse
+    aware = np.char.endswith(s, "Z") | (np.char.rfind(s, "+") > 9) | (np.char.rfind(s, "-") > 9)
+    out = np.full(n, -1, dtype=np.int64)
+    if numeric.any():
+        out[numeric] = s[numeric].astype(np.int64)
+    naive_mask = ~numeric & ~aware & (s != "")
+    if naive_mask.any():
+        parsed = _parse_naive(s[naive_mask])
+        ok = parsed >= 0
+        if tz not in UTC_NAMES and ok.any():
+            parsed[ok] -= _zone_offsets(parsed[ok], tz)
+        out[naive_mask] = parsed
+    if aware.any():
+        for i in np.flatnonzero(aware):
+            v = parse_time(s[i])
+            out[i] = -1 if v is None else v
+    return out
+
+# ---------- core ----------
+def resolve_tz(tz: Optional[str]) -> str:
+    """`tz` if it can be applied here, else "UTC" (no zone database available)."""
+    if not tz or tz in UTC_NAMES or ZoneInfo is None:
+        return "UTC"
+    try:
+        ZoneInfo(tz)
+    except Exception:
+        return "UTC"
+    return tz
+
+def _build(t: np.ndarray, o, h, l, c, v, tz: str, dropped: Optional[Dict[str, int]] = None) -> Normalized:
+    o, h, l, c = to_float(o), to_float(h), to_float(l), to_float(c)
+    v = np.zeros(len(t), dtype=np.float64) if v is None else np.nan_to_num(to_float(v))
+    bad_time = t < 0
+    bad_price = ~(np.isfinite(o) & np.isfinite(h) & np.isfinite(l) & np.isfinite(c))
+    bad_range = ~bad_price & (h < l)
+    keep = ~(bad_time | bad_price | bad_range)
+    reasons = {"time": int(bad_time.sum()),
+               "price": int((bad_price & ~bad_time).sum()),
+               "range": int((bad_range & ~bad_time).sum()),
+               **(dropped or {})}
+    series = CandleSeries(t[keep], o[keep], h[keep], l[keep], c[keep], v[keep]).sorted()
+    res = Normalized(series, reasons, tz)
+    _count(len(t) + sum((dropped or {}).values()), res.rejected)
+    return res
+
+def _column(rows: List[Dict[str, Any]], *keys: str) -> List[Any]:
+    k0 = keys[0]
+    if len(keys) == 1:
+        return [r.get(k0) for r in rows]
+    out = []
+    for r in rows:
+        val = None
+        for k in keys:
+            val = r.get(k)
+            if val is not None:
+                break
+        out.append(val)
+    return out
+
+def _columns(rows: List[Dict[str, Any]], keys: Sequence[str]) -> List[Sequence[Any]]:
+    """Transpose rows into one column per key in a single pass (C-level itemgetter/zip)."""
+    try:
+        return list(zip(*map(itemgetter(*keys), rows)))
+    except KeyError:
+        return [_column(rows, k) for k in keys]
+
+def normalize_records(records: Iterable[Dict[str, Any]], tz: str = "UTC") -> Normalized:
+    """Any per-bar dict shape ({"time","open",...}, {"t","o",...}, {"datetime",...}, {"ts",...})."""
+    tz = resolve_tz(tz)
+    rows = records if isinstance(records, list) else list(records)
+    if not rows:
+        return _build(np.zeros(0, dtype=np.int64), [], [], [], [], None, tz)
+    t = to_epoch(_column(rows, "t", "time", "datetime", "ts", "timestamp"), tz)
+    has_volume = "volume" in rows[0] or "v" in rows[0]
+    return _build(t, _column(rows, "open", "o"), _column(rows, "high", "h"), _column(rows, "low", "l"),
+                  _column(rows, "close", "c"), _column(rows, "volume", "v") if has_volume else None, tz)
+
+def normalize_twelvedata(payload: Any, tz: Optional[str] = None) -> Normalized:
+    """
+    TwelveData time_series: the full response or its "values" list (newest first).
+    Our fetchers request timezone=UTC and pass the values list. For a full response without
+    `tz`, naive datetimes are read in meta.exchange_timezone (TwelveData's default).
+    """
+    if isinstance(payload, dict):
+        meta = payload.get("meta") or {}
+        tz = tz or meta.get("exchange_timezone")
+        values = payload.get("values") or []
+    else:
+        values = payload
+    tz = resolve_tz(tz)
+    if not values:
+        return _build(np.zeros(0, dtype=np.int64), [], [], [], [], None, tz)
+    has_volume = "volume" in values[0]
+    keys = ("open", "high", "low", "close") + (("volume",) if has_volume else ())
+    cols = _columns(values, keys)
+    t = to_epoch(_column(values, "datetime", "timestamp"), tz)
+    return _build(t, *cols[:4], cols[4] if has_volume else None, tz)
+
+def normalize_finnhub(payload: Dict[str, Any]) -> Normalized:
+    """Finnhub candle response: parallel t/o/h/l/c(/v) arrays, epoch seconds (UTC)."""
+    t = payload.get("t") or []
+    cols = [payload.get(k) or [] for k in ("o", "h", "l", "c")]
+    # ragged arrays: keep the common prefix, count the rest as rejected
+    m = min([len(t)] + [len(col) for col in cols])
+    vol = payload.get("v")
+    return _build(to_epoch(t[:m]), *(col[:m] for col in cols), vol[:m] if vol and len(vol) >= m else None,
+                  "UTC", {"ragged": len(t) - m})
+
+def _alpha_series_key(payload: Dict[str, Any]) -> Optional[str]:
+    return next((k for k in payload if "Time Series" in k), None)
+
+def normalize_alphavantage(payload: Dict[str, Any], tz: Optional[str] = None) -> Normalized:
+    """
+    AlphaVantage TIME_SERIES_* / FX_* / CRYPTO_* payload ({"Meta Data", "Time Series (...)"}).
+    Timestamps are wall-clock in the meta "Time Zone" (US/Eastern for equities).
+    """
+    key = _alpha_series_key(payload)
+    if key is None:
+        return _build(np.zeros(0, dtype=np.int64), [], [], [], [], None, resolve_tz(tz))
+    meta = payload.get("Meta Data") or {}
+    tz = resolve_tz(tz or next((v for k, v in meta.items() if "Time Zone" in k), None))
+    items = payload[key]
+    stamps = list(items)
+    rows = list(items.values())
+    # field names are numbered ("1. open"); match on the suffix
+    names = {}
+    if rows:
+        for k in rows[0]:
+            names.setdefault(k.split(". ", 1)[-1].split(" (")[0], k)
+    t = to_epoch(stamps, tz)
+    vol = _column(rows, names["volume"]) if "volume" in names else None
+    return _build(t, _column(rows, names.get("open", "1. open")), _column(rows, names.get("high", "2. high")),
+                  _column(rows, names.get("low", "3. low")), _column(rows, names.get("close", "4. close")), vol, tz)
@@ -0,0 +1,151 @@
+# backend/app/pipeline.py
+# One-pass detector pipeline over a candle series.
+#
+# - detectors are registered once (name, family, hits, select, records, needs); main.detect_all,
+#   signals.compute_all_signals and ict_models.compute_all_ict_models all run through here
+# - shared per-bar features (body, range, wicks, lookback extremes, swing structure, session
+#   levels; app/detector_arrays.BarFeatures) are built once per run from the declared `needs` and every detector reads the same buffers
+# - merged() combines the per-detector signal lists, each already ascending, by integer bar
+#   time with a k-way merge (ties keep registration order) instead of sorting string times
+# - per-detector wall time is reported per run and accumulated for /health
+
+import heapq
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from app import detector_arrays as da
+from app.detector_arrays import BarFeatures, Hits, features
+from app.structure import DEFAULT_STRENGTH as STRUCTURE_STRENGTH
+
+Select = Callable[[Hits, int], Hits]
+Records = Callable[[BarFeatures, Hits], List[Dict[str, Any]]]
+
+def _all(hits: Hits, n: int) -> Hits:
+    return hits
+
+class Detector:
+    __slots__ = ("name", "family", "hits", "select", "records", "needs")
+
+    def __init__(self, name: str, family: str, hits: Callable[[BarFeatures], Hits], records: Records,
+                 select: Select = _all, needs: Iterable[str] = ()):
+        self.name = name
+        self.family = family
+        self.hits = hits
+        self.select = select
+        self.records = records
+        self.needs = tuple(needs)
+
+REGISTRY: Dict[str, Detector] = {}
+
+def register(name: str, family: str, hits, records: Records, select: Select = _all, needs: Iterable[str] = ()):
+    """Add (or replace) a detector; run order is registration order."""
+    REGISTRY[name] = Detector(name, family, hits, records, select, needs)
+
+def _prepare(f: BarFeatures, needs: Iterable[str]):
+    for need in needs:
+        name, _, arg = need.partition(":")
+        if name == "extremes":
+            f.extremes(int(arg))
+        elif name == "session":
+            f.session_levels(arg)
+        else:
+            getattr(f, name)
+
+class PipelineResult:
+    def __init__(self, f: BarFeatures):
+        self.features = f
+        self.hits: Dict[str, Hits] = {}
+        self.selected: Dict[str, Hits] = {}
+        self.signals: Dict[str, List[Dict[str, Any]]] = {}
+        self.timing_ms: Dict[str, float] = {}
+
+    def merged(self, names: Optional[Iterable[str]] = None) -> List[Dict[str, Any]]:
+        """Signals of `names` (default: every detector run) merged by integer bar time."""
+        t = self.features.t
+        streams = []
+        for name in (names or self.signals):
+            idx, _ = da.order(self.selected[name])
+            streams.append(zip(t[idx].tolist(), self.signals[name]))
+        return [sig for _, sig in heapq.merge(*streams, key=lambda x: x[0])]
+
+class Pipeline:
+    def __init__(self, registry: Dict[str, Detector] = REGISTRY):
+        self.registry = registry
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, float]] = {}
+
+    def run(self, candles, families: Optional[Iterable[str]] = None) -> PipelineResult:
+        f = features(candles)
+        fams = set(families) if families is not None else None
+        specs = [d for d in self.registry.values() if fams is None or d.family in fams]
+        res = PipelineResult(f)
+        t0 = time.perf_counter()
+        _prepare(f, dict.fromkeys(n for d in specs for n in d.needs))
+        res.timing_ms["features"] = (time.perf_counter() - t0) * 1000.0
+        n = len(f)
+        for d in specs:
+            t0 = time.perf_counter()
+            hits = d.hits(f)
+            sel = d.select(hits, n)
+            res.hits[d.name], res.selected[d.name] = hits, sel
+            res.signals[d.name] = d.records(f, sel)
+            res.timing_ms[d.name] = (time.perf_counter() - t0) * 1000.0
+        self._record(n, res.timing_ms)
+        return res
+
+    def _record(self, bars: int, timing: Dict[str, float]):
+        with self._lock:
+            for name, ms in timing.items():
+                s = self._stats.setdefault(name, {"runs": 0, "bars": 0, "total_ms": 0.0, "last_ms": 0.0})
+                s["runs"] += 1
+                s["bars"] += bars
+                s["total_ms"] += ms
+                s["last_ms"] = ms
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {k: {**v, "total_ms": round(v["total_ms"], 3), "last_ms": round(v["last_ms"], 3)}
+                    for k, v in self._stats.items()}
+
+# ---------- registry ----------
+_ob_select = lambda hits, n: da.order_block_window(hits, n)
+_ob_records = lambda f, hits: da.order_block_records(f, hits, descending=False)
+
+register("order_blocks", "main", da.order_block_hits, _ob_records, _ob_select, needs=("body", "abs_body"))
+register("fvg", "main", da.fvg3_hits, da.fvg3_records, da.last_bar)
+register("turtle_soup", "main", da.turtle_soup_hits, da.turtle_soup_records, da.last_bar,
+         needs=(f"extremes:{da.EXTREME_LOOKBACK}",))
+register("liq_sweep", "main", da.liq_sweep_hits, da.liq_sweep_records, da.last_bar,
+         needs=(f"extremes:{da.EXTREME_LOOKBACK}",))
+register("turtle", "signals", da.turtle_break_hits, da.simple_records)
+register("fvg_gap", "signals", da.gap_hits, lambda f, hits: da.simple_records(f, hits, price=False))
+# blocks anchored by swing breaks, at their break bar; shares the structure pass with "structure"
+register("structure_ob", "signals", lambda f: f.structure(STRUCTURE_STRENGTH).order_block_hits(),
+         lambda f, hits: f.structure(STRUCTURE_STRENGTH).order_blocks())
+# bar-to-bar breaks (ict_models.detect_bos); swing-based structure below replaced it in the models
+register("bos", "bars", da.bos_hits, da.simple_records)
+register("structure", "ict_models", lambda f: f.structure(STRUCTURE_STRENGTH).hits(),
+         lambda f, hits: f.structure(STRUCTURE_STRENGTH).records())
+
+_SESSION_NEEDS = tuple(f"session:{name}" for name in ("asia", "london", "newyork"))
+register("session_sweep", "sessions", da.session_sweep_hits, da.simple_records, needs=_SESSION_NEEDS)
+register("session_turtle", "sessions", da.session_turtle_hits, da.simple_records, needs=_SESSION_NEEDS)
+
+# process-wide instance
+PIPELINE = Pipeline()
+
+def detect_all(candles) -> List[Dict[str, Any]]:
+    """main.detect_all: the main-family signals merged by time."""
+    return PIPELINE.run(candles, ("main",)).merged()
+
+def signal_family(candles) -> Dict[str, List[Dict[str, Any]]]:
+    """signals.compute_all_signals."""
+    res = PIPELINE.run(candles, ("signals",))
+    return {"turtle": res.signals["turtle"], "fvg": res.signals["fvg_gap"], "order_blocks": res.signals["structure_ob"]}
+
+def ict_model_family(candles) -> Dict[str, List[Dict[str, Any]]]:
+    """The bar-driven part of ict_models.compute_all_ict_models: swing-based BOS and CHoCH."""
+    events = PIPELINE.run(candles, ("ict_models",)).signals["structure"]
+    return {"bos": [e for e in events if e["type"].startswith("bos")],
+            "choch": [e for e in events if e["type"].startswith("choch")]}
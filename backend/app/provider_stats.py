@@ -0,0 +1,47 @@
+# backend/app/provider_stats.py
+# Rolling per-provider latency samples (used for hedge delays and /health reporting).
+
+import threading
+from collections import deque
+from typing import Any, Deque, Dict, Optional
+
+LATENCY_WINDOW = 200
+
+class LatencyTracker:
+    def __init__(self, window: int = LATENCY_WINDOW):
+        self.window = window
+        self._samples: Dict[str, Deque[float]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, provider: str, ms: float):
+        with self._lock:
+            buf = self._samples.get(provider)
+            if buf is None:
+                buf = self._samples[provider] = deque(maxlen=self.window)
+            buf.append(float(ms))
+
+    def percentile(self, provider: str, q: float) -> Optional[float]:
+        """q in [0, 100]; None until the provider has samples."""
+        with self._lock:
+            buf = self._samples.get(provider)
+            if not buf:
+                return None
+            vals = sorted(buf)
+        idx = min(len(vals) - 1, max(0, int(round(q / 100.0 * (len(vals) - 1)))))
+        return vals[idx]
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            names = list(self._samples)
+        out = {}
+        for name in names:
+            out[name] = {
+                "samples": len(self._samples[name]),
+                "p50_ms": self.percentile(name, 50),
+                "p95_ms": self.percentile(name, 95),
+                "p99_ms": self.percentile(name, 99),
+            }
+        return out
+
+# process-wide instance
+LATENCY = LatencyTracker()
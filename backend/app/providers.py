@@ -1,5 +1,12 @@
 import os
-import requests
+import time
+
+from app.candle_cache import CACHE
+from app import http_client
+from app.circuit_breaker import guarded
+from app.failover import race
+from app.candle_series import CandleSeries
+from app.normalize import normalize_twelvedata, normalize_alphavantage
 
 ALPHAVANTAGE_KEY = os.getenv("ALPHAVANTAGE_API_KEY")
 TWELVEDATA_KEY = os.getenv("TWELVEDATA_API_KEY")
@@ -31,7 +38,7 @@ def normalize_symbol(symbol: str, provider: str) -> str:
     return symbol
 
 
-def fetch_from_alphavantage(symbol="BTC/USD", interval="1min", limit=50):
+async def fetch_from_alphavantage(symbol="BTC/USD", interval="1min", limit=50):
     try:
         norm = normalize_symbol(symbol, "alphavantage")
         if isinstance(norm, dict) and norm["from"] == "BTC":
@@ -49,83 +56,69 @@ def fetch_from_alphavantage(symbol="BTC/USD", interval="1min", limit=50):
         else:
             return None
 
-        r = requests.get(url, timeout=10)
+        r = await http_client.get(url, timeout=10)
         data = r.json()
         for k in data.keys():
             if "Time Series" in k:
-                candles = []
-                for ts, v in list(data[k].items())[:limit]:
-                    candles.append({
-                        "datetime": ts,
-                        "open": float(v.get("1. open", 0)),
-                        "high": float(v.get("2. high", 0)),
-                        "low": float(v.get("3. low", 0)),
-                        "close": float(v.get("4. close", 0)),
-                    })
-                return candles
+                return normalize_alphavantage(data).series.tail(limit)
     except Exception as e:
         print("AlphaVantage error:", e)
     return None
 
 
-def fetch_from_twelvedata(symbol="BTC/USD", interval="1min", limit=50):
+async def fetch_from_twelvedata(symbol="BTC/USD", interval="1min", limit=50):
     try:
         norm = normalize_symbol(symbol, "twelvedata")
         url = (
             f"https://api.twelvedata.com/time_series?"
-            f"symbol={norm}&interval={interval}&outputsize={limit}&apikey={TWELVEDATA_KEY}"
+            f"symbol={norm}&interval={interval}&outputsize={limit}&timezone=UTC&apikey={TWELVEDATA_KEY}"
         )
-        r = requests.get(url, timeout=10)
+        r = await http_client.get(url, timeout=10)
         data = r.json()
         if "values" in data:
-            candles = []
-            for v in data["values"]:
-                candles.append({
-                    "datetime": v["datetime"],
-                    "open": float(v["open"]),
-                    "high": float(v["high"]),
-                    "low": float(v["low"]),
-                    "close": float(v["close"]),
-                })
-            return candles
+            return normalize_twelvedata(data["values"], tz="UTC").series
     except Exception as e:
         print("TwelveData error:", e)
     return None
 
 
-def fetch_from_finnhub(symbol="BTC/USD", limit=50):
+async def fetch_from_finnhub(symbol="BTC/USD", limit=50):
     try:
         norm = normalize_symbol(symbol, "finnhub")
         url = f"https://finnhub.io/api/v1/quote?symbol={norm}&token={FINNHUB_KEY}"
-        r = requests.get(url, timeout=10)
+        r = await http_client.get(url, timeout=10)
         data = r.json()
         if "c" in data and data["c"] is not None:
-            return [{
-                "datetime": "latest",
-                "open": data["o"],
-                "high": data["h"],
-                "low": data["l"],
-                "close": data["c"],
-            }]
+            # single "latest" bar, stamped with the quote time
+            return CandleSeries([data.get("t") or int(time.time())], [data["o"]], [data["h"]],
+                                [data["l"]], [data["c"]])
     except Exception as e:
         print("Finnhub error:", e)
     return None
 
 
-def get_candles(symbol="BTC/USD", interval="1min", limit=50):
-    # Try AlphaVantage first
-    candles = fetch_from_alphavantage(symbol, interval, limit)
-    if candles:
-        return {"provider": "AlphaVantage", "candles": candles}
-
-    # Fallback to TwelveData
-    candles = fetch_from_twelvedata(symbol, interval, limit)
-    if candles:
-        return {"provider": "TwelveData", "candles": candles}
-
-    # Fallback to Finnhub
-    candles = fetch_from_finnhub(symbol, limit)
-    if candles:
-        return {"provider": "Finnhub", "candles": candles}
+async def get_candles(symbol="BTC/USD", interval="1min", limit=50):
+    # Preferred order AlphaVantage -> TwelveData -> Finnhub; the failover reorders it by
+    # provider health and skips providers whose circuit is open. All lookups go through
+    # the shared candle cache.
+    attempts = [
+        ("alphavantage", lambda: CACHE.aget_or_fetch(
+            "alphavantage", symbol, interval, limit,
+            lambda: guarded("alphavantage", lambda: fetch_from_alphavantage(symbol, interval, limit), bool),
+            is_valid=bool)),
+        ("twelvedata", lambda: CACHE.aget_or_fetch(
+            "twelvedata", symbol, interval, limit,
+            lambda: guarded("twelvedata", lambda: fetch_from_twelvedata(symbol, interval, limit), bool),
+            is_valid=bool)),
+        # Finnhub quote endpoint is interval-independent
+        ("finnhub", lambda: CACHE.aget_or_fetch(
+            "finnhub", symbol, "quote", limit,
+            lambda: guarded("finnhub", lambda: fetch_from_finnhub(symbol, limit), bool),
+            is_valid=bool)),
+    ]
+    res = await race(attempts, is_valid=bool)
+    if res["provider"] is not None:
+        name = {"alphavantage": "AlphaVantage", "twelvedata": "TwelveData", "finnhub": "Finnhub"}[res["provider"]]
+        return {"provider": name, "candles": res["result"]}
 
     return {"error": "All providers failed"}
@@ -0,0 +1,251 @@
+# backend/app/quota.py
+# Quota-aware request scheduler with per-API-key token buckets.
+#
+# Every provider request goes through http_client, which asks QUOTA for a ticket first:
+# - per key: a per-minute token bucket plus a per-day credit counter (reset at UTC midnight)
+# - waiting requests are served by priority (live alerts before interactive before backfill)
+# - when the day budget is gone, the call costs more than the minute bucket holds, or the
+#   bucket would not refill within the priority's max wait, QuotaExhausted is raised at once
+#   instead of making a doomed call
+# - batch calls cost one credit per symbol, so batches are sized by batch_size() to fit the
+#   minute bucket
+# - when credits run low, candle fetchers shrink `outputsize` so the remaining calls stay cheap;
+#   they return the bars wrapped in Shrunk so the sync / cache / backfill layers know the window
+#   is shorter than the one asked for
+# TwelveData's api-credits-left response header re-syncs the minute bucket with the server.
+
+import asyncio
+import contextvars
+import heapq
+import itertools
+import os
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional, Tuple
+
+PRIORITY_LIVE = 0          # alert / streaming paths
+PRIORITY_INTERACTIVE = 1   # dashboard requests
+PRIORITY_BACKFILL = 2      # history loads, scanners
+
+# how long a request of each priority may queue for a minute-bucket token (seconds)
+MAX_WAIT = {PRIORITY_LIVE: 5.0, PRIORITY_INTERACTIVE: 15.0, PRIORITY_BACKFILL: 60.0}
+
+def _limit(env: str, default: Optional[int]) -> Optional[int]:
+    v = os.getenv(env)
+    if v is None:
+        return default
+    return int(v) if v.strip() else None
+
+# free-plan defaults, override per deployment; None = unlimited
+PROVIDER_LIMITS: Dict[str, Dict[str, Optional[int]]] = {
+    "twelvedata": {"per_minute": _limit("TWELVEDATA_CREDITS_PER_MINUTE", 8),
+                   "per_day": _limit("TWELVEDATA_CREDITS_PER_DAY", 800)},
+    "alphavantage": {"per_minute": _limit("ALPHAVANTAGE_CREDITS_PER_MINUTE", 5),
+                     "per_day": _limit("ALPHAVANTAGE_CREDITS_PER_DAY", 25)},
+    "finnhub": {"per_minute": _limit("FINNHUB_CREDITS_PER_MINUTE", 60), "per_day": None},
+}
+# below this fraction of remaining credits, outputsize is capped at LOW_CREDIT_OUTPUTSIZE
+LOW_CREDIT_FRACTION = 0.25
+LOW_CREDIT_OUTPUTSIZE = 100
+
+REQUEST_PRIORITY: contextvars.ContextVar = contextvars.ContextVar("request_priority", default=PRIORITY_INTERACTIVE)
+
+@contextmanager
+def priority(level: int):
+    """Run provider calls made inside the block (and tasks spawned from it) at `level`."""
+    token = REQUEST_PRIORITY.set(level)
+    try:
+        yield
+    finally:
+        REQUEST_PRIORITY.reset(token)
+
+class QuotaExhausted(Exception):
+    def __init__(self, provider: str, scope: str, retry_after: float, detail: Optional[str] = None):
+        super().__init__(detail or f"{provider} {scope} quota exhausted, retry after {retry_after:.0f}s")
+        self.provider = provider
+        self.scope = scope
+        self.retry_after = retry_after
+
+class Shrunk:
+    """Bars of a call whose outputsize was cut to `sent` (< `requested`) because credits ran low."""
+    __slots__ = ("bars", "requested", "sent")
+
+    def __init__(self, bars: Any, requested: int, sent: int):
+        self.bars = bars
+        self.requested = requested
+        self.sent = sent
+
+    def __len__(self) -> int:
+        return len(self.bars)
+
+def unshrunk(res: Any) -> Any:
+    """The bars of a Shrunk result; anything else unchanged."""
+    return res.bars if isinstance(res, Shrunk) else res
+
+class TokenBucket:
+    def __init__(self, capacity: float, per_seconds: float):
+        self.capacity = float(capacity)
+        self.rate = self.capacity / per_seconds
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def available(self) -> float:
+        self._refill()
+        return self.tokens
+
+    def wait_time(self, n: float) -> float:
+        self._refill()
+        return 0.0 if self.tokens >= n else (n - self.tokens) / self.rate
+
+    def take(self, n: float):
+        self._refill()
+        self.tokens -= n
+
+    def set_available(self, n: float):
+        self._refill()
+        self.tokens = max(0.0, min(self.capacity, float(n)))
+
+def _utc_day() -> int:
+    return int(time.time() // 86400)
+
+class KeyBudget:
+    """Credits for one (provider, api key)."""
+    def __init__(self, provider: str, key: str, per_minute: Optional[int], per_day: Optional[int]):
+        self.provider = provider
+        self.key = key
+        self.minute = TokenBucket(per_minute, 60.0) if per_minute else None
+        self.per_day = per_day
+        self.day = _utc_day()
+        self.used_today = 0
+        self.rejected = 0
+        self._waiters: List[Tuple[int, int, asyncio.Event]] = []
+        self._seq = itertools.count()
+
+    def day_remaining(self) -> Optional[int]:
+        if self.per_day is None:
+            return None
+        if _utc_day() != self.day:
+            self.day, self.used_today = _utc_day(), 0
+        return max(0, self.per_day - self.used_today)
+
+    def low_on_credits(self) -> bool:
+        if self.minute and self.minute.available() < self.minute.capacity * LOW_CREDIT_FRACTION:
+            return True
+        left = self.day_remaining()
+        return left is not None and left < self.per_day * LOW_CREDIT_FRACTION
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "provider": self.provider,
+            "key": ("…" + self.key[-4:]) if self.key else None,
+            "minute_credits_left": round(self.minute.available(), 2) if self.minute else None,
+            "minute_capacity": int(self.minute.capacity) if self.minute else None,
+            "day_credits_left": self.day_remaining(),
+            "day_capacity": self.per_day,
+            "queued": len(self._waiters),
+            "rejected": self.rejected,
+        }
+
+class QuotaScheduler:
+    def __init__(self, limits: Dict[str, Dict[str, Optional[int]]] = PROVIDER_LIMITS):
+        self.limits = limits
+        self._budgets: Dict[Tuple[str, str], KeyBudget] = {}
+
+    def budget(self, provider: str, key: str) -> Optional[KeyBudget]:
+        lim = self.limits.get(provider)
+        if lim is None:
+            return None
+        b = self._budgets.get((provider, key))
+        if b is None:
+            b = self._budgets[(provider, key)] = KeyBudget(provider, key, lim.get("per_minute"), lim.get("per_day"))
+        return b
+
+    async def acquire(self, provider: str, key: str, cost: int = 1, level: Optional[int] = None):
+        """
+        Wait for `cost` credits on (provider, key) in priority order.
+        Raises QuotaExhausted immediately when the call cannot be made in time.
+        """
+        b = self.budget(provider, key)
+        if b is None:
+            return
+        level = REQUEST_PRIORITY.get() if level is None else level
+        left = b.day_remaining()
+        if left is not None and left < cost:
+            b.rejected += 1
+            raise QuotaExhausted(provider, "daily", 86400 - time.time() % 86400)
+        if b.minute is None:
+            b.used_today += cost
+            return
+        if cost > b.minute.capacity:
+            # the bucket never holds that many credits: the wait below would never end
+            b.rejected += 1
+            raise QuotaExhausted(provider, "per-minute", float("inf"),
+                                 f"{provider} call costs {cost} credits, more than the {b.minute.capacity:.0f}/min bucket holds")
+        # credits already promised to callers queued at the same or a higher priority come first
+        ahead = sum(1 for w in b._waiters if w[0] <= level)
+        wait = b.minute.wait_time(cost * (ahead + 1))
+        max_wait = MAX_WAIT.get(level, MAX_WAIT[PRIORITY_BACKFILL])
+        if wait > max_wait:
+            b.rejected += 1
+            raise QuotaExhausted(provider, "per-minute", wait)
+        wake = asyncio.Event()
+        entry = (level, next(b._seq), wake)
+        heapq.heappush(b._waiters, entry)
+        try:
+            while not (b._waiters[0] is entry and b.minute.available() >= cost):
+                wake.clear()
+                try:
+                    await asyncio.wait_for(wake.wait(), timeout=max(0.05, b.minute.wait_time(cost)))
+                except asyncio.TimeoutError:
+                    pass
+            heapq.heappop(b._waiters)
+            b.minute.take(cost)
+            b.used_today += cost
+        except BaseException:
+            if entry in b._waiters:
+                b._waiters.remove(entry)
+                heapq.heapify(b._waiters)
+            raise
+        finally:
+            # let the new head of the queue re-check the bucket
+            if b._waiters:
+                b._waiters[0][2].set()
+
+    def batch_size(self, provider: str, key: str, limit: int) -> int:
+        """Symbols per batch call: one credit each, so never more than the minute bucket holds."""
+        b = self.budget(provider, key)
+        if b is not None and b.minute is not None:
+            limit = min(limit, int(b.minute.capacity))
+        return max(1, limit)
+
+    def shrink_outputsize(self, provider: str, key: str, outputsize: int) -> int:
+        """The outputsize to send: capped at LOW_CREDIT_OUTPUTSIZE while credits are low."""
+        b = self.budget(provider, key)
+        if b is not None and b.low_on_credits():
+            return min(outputsize, LOW_CREDIT_OUTPUTSIZE)
+        return outputsize
+
+    def observe(self, provider: str, key: str, headers: Dict[str, str], status_code: int):
+        """Sync buckets with what the provider reports (credit headers, 429s)."""
+        b = self.budget(provider, key)
+        if b is None or b.minute is None:
+            return
+        left = headers.get("api-credits-left")
+        if left is not None:
+            try:
+                b.minute.set_available(float(left))
+            except ValueError:
+                pass
+        if status_code == 429:
+            b.minute.set_available(0)
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        return [b.snapshot() for b in self._budgets.values()]
+
+# process-wide instance
+QUOTA = QuotaScheduler()
@@ -0,0 +1,179 @@
+# backend/app/resample.py
+# Build higher timeframes locally from 1min bars instead of separate upstream calls.
+#
+# - resample(): vectorized over CandleSeries columns (np.*.reduceat over bucket boundaries)
+#   open = first, high = max, low = min, close = last, volume = sum
+# - buckets are session aligned: intraday buckets restart at each session open
+#   (UTC midnight + RESAMPLE_SESSION_OFFSET), days start at the session open, weeks on Monday,
+#   months on the calendar month
+# - partial bars: a leading bucket whose first minutes are missing is dropped; the trailing
+#   bucket is the forming bar, exactly like a provider's last bar
+# - ResampleBook keeps one (feed, symbol, interval) up to date incrementally: only the 1min
+#   bars of the forming bucket are kept and re-aggregated as new / revised bars arrive; a window
+#   that no longer connects to the held forming bucket rebuilds the book from scratch
+
+import os
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+from app.candle_cache import interval_seconds, normalize_symbol
+from app.candle_series import CandleSeries
+
+BASE_INTERVAL = "1min"
+BASE_STEP = 60
+# session open as seconds after UTC midnight (e.g. 79200 = 22:00 UTC for FX days)
+SESSION_OFFSET = int(os.getenv("RESAMPLE_SESSION_OFFSET", "0"))
+# largest 1min window fetched to serve one resampled request (TwelveData max outputsize)
+RESAMPLE_MAX_BASE_BARS = int(os.getenv("RESAMPLE_MAX_BASE_BARS", "5000"))
+# 1min windows are rounded up to this many bars so callers asking for different
+# outputsizes share one cached / synced base series
+BASE_WINDOW_STEP = 500
+# closed bars kept per book
+BOOK_CAPACITY = 5000
+
+DAY = 86400
+WEEK = 7 * DAY
+MONDAY = 4 * DAY   # 1970-01-05 00:00 UTC, the first Monday after the epoch
+
+def is_monthly(interval: str) -> bool:
+    s = str(interval).strip().lower()
+    return s in ("m", "1month", "1mo", "month")
+
+def bucket_starts(t: np.ndarray, interval: str, offset: int = SESSION_OFFSET) -> np.ndarray:
+    """Session-aligned bucket open time for every timestamp in `t`."""
+    if is_monthly(interval):
+        shifted = (t - offset).astype("datetime64[s]")
+        return shifted.astype("datetime64[M]").astype("datetime64[s]").astype(np.int64) + offset
+    step = interval_seconds(interval)
+    if step >= WEEK:
+        anchor = MONDAY + offset
+        return (t - anchor) // step * step + anchor
+    session = (t - offset) // DAY * DAY + offset
+    if step >= DAY:
+        return session if step == DAY else (t - offset) // step * step + offset
+    return session + (t - session) // step * step
+
+def resample(base: CandleSeries, interval: str, offset: int = SESSION_OFFSET,
+             drop_partial_head: bool = True) -> CandleSeries:
+    """Aggregate ascending `base` bars into `interval` bars (vectorized, one pass per column)."""
+    if not len(base):
+        return base
+    b = bucket_starts(base.t, interval, offset)
+    starts = np.flatnonzero(np.r_[True, b[1:] != b[:-1]])
+    ends = np.r_[starts[1:], len(b)] - 1
+    out = CandleSeries(b[starts], base.o[starts],
+                       np.maximum.reduceat(base.h, starts), np.minimum.reduceat(base.l, starts),
+                       base.c[ends], np.add.reduceat(base.v, starts))
+    if drop_partial_head and len(out) > 1 and base.t[0] > out.t[0]:
+        out = out[1:]
+    return out
+
+def _needed(interval: str, outputsize: int) -> int:
+    # +1 bucket: the oldest one may be dropped as a partial head
+    return (int(outputsize) + 1) * (interval_seconds(interval) // BASE_STEP)
+
+def can_resample(interval: str, outputsize: int) -> bool:
+    """True when `interval` is a whole multiple of 1min and the 1min window fits one fetch."""
+    step = interval_seconds(interval)
+    if is_monthly(interval) or step <= BASE_STEP or step % BASE_STEP:
+        return False
+    return _needed(interval, outputsize) <= RESAMPLE_MAX_BASE_BARS
+
+def base_bars_for(interval: str, outputsize: int) -> int:
+    """Size of the 1min window fetched to serve `outputsize` bars of `interval`."""
+    n = -(-_needed(interval, outputsize) // BASE_WINDOW_STEP) * BASE_WINDOW_STEP
+    return min(n, RESAMPLE_MAX_BASE_BARS)
+
+class ResampleBook:
+    """Incrementally maintained higher-timeframe series for one feed/symbol/interval."""
+    def __init__(self, interval: str, offset: int = SESSION_OFFSET, capacity: int = BOOK_CAPACITY):
+        self.interval = interval
+        self.offset = offset
+        self.capacity = capacity
+        self.closed = CandleSeries.empty()
+        self.members = CandleSeries.empty()    # 1min bars of the forming bucket
+        self.forming_start: Optional[int] = None
+        self.lock = threading.Lock()
+
+    def update(self, base: CandleSeries) -> int:
+        """
+        Feed ascending 1min bars: a full window or just the newest ones (contiguous with what
+        was fed before). A revised bar of the forming bucket replaces the held one.
+        Returns the number of higher-timeframe bars changed.
+        """
+        if not len(base):
+            return 0
+        with self.lock:
+            if self._needs_warm_start(base):
+                # one vectorized pass over the whole window
+                res = resample(base, self.interval, self.offset)
+                if not len(res):
+                    return 0
+                self.closed = res[:-1].tail(self.capacity)
+                self.forming_start = int(res.t[-1])
+                self.members = base[int(np.searchsorted(base.t, self.forming_start)):]
+                return len(res)
+            new = base[int(np.searchsorted(base.t, self.forming_start)):]
+            if not len(new):
+                return 0
+            # later duplicates win: a revised 1min bar replaces the one held
+            pending = CandleSeries.concat([self.members, new]).sorted()
+            res = resample(pending, self.interval, self.offset, drop_partial_head=False)
+            if len(res) > 1:
+                self.closed = CandleSeries.concat([self.closed, res[:-1]]).tail(self.capacity)
+            self.forming_start = int(res.t[-1])
+            self.members = pending[int(np.searchsorted(pending.t, self.forming_start)):]
+            return len(res)
+
+    def _needs_warm_start(self, base: CandleSeries) -> bool:
+        if self.forming_start is None:
+            return True
+        # the window starts past the forming bucket's open without picking up where its held
+        # 1min bars end (a gap): the held bucket cannot be completed, so start over
+        if base.t[0] > self.forming_start and (not len(self.members) or
+                                               base.t[0] > self.members.t[-1] + BASE_STEP):
+            return True
+        # the window reaches at least one whole bucket further back than the bars held
+        first = self.closed.t[0] if len(self.closed) else self.forming_start
+        return len(self.closed) < self.capacity and base.t[0] <= first - interval_seconds(self.interval)
+
+    def forming(self) -> CandleSeries:
+        if not len(self.members):
+            return CandleSeries.empty()
+        return resample(self.members, self.interval, self.offset, drop_partial_head=False)
+
+    def series(self, n: int) -> CandleSeries:
+        """Last `n` bars: closed bars plus the forming one."""
+        with self.lock:
+            return CandleSeries.concat([self.closed, self.forming()]).tail(n)
+
+class Resampler:
+    def __init__(self):
+        self._books: Dict[Tuple[str, str, int], ResampleBook] = {}
+        self._lock = threading.Lock()
+        self.served = 0
+
+    def book(self, feed: str, symbol: str, interval: str) -> ResampleBook:
+        key = (feed, normalize_symbol(symbol), interval_seconds(interval))
+        with self._lock:
+            b = self._books.get(key)
+            if b is None:
+                b = self._books[key] = ResampleBook(interval)
+            return b
+
+    def get(self, feed: str, symbol: str, interval: str, outputsize: int, base: CandleSeries) -> CandleSeries:
+        """Update the book from the latest 1min window and return its last `outputsize` bars."""
+        b = self.book(feed, symbol, interval)
+        b.update(base)
+        self.served += 1
+        return b.series(outputsize)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            books = len(self._books)
+        return {"books": books, "served": self.served, "session_offset_s": SESSION_OFFSET}
+
+# process-wide instance
+RESAMPLER = Resampler()
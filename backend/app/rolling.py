@@ -0,0 +1,100 @@
+# backend/app/rolling.py
+# Rolling highs / lows for the lookback-based detectors (turtle soup, liquidity sweep).
+#
+# Two backends for the same question, "highest high / lowest low of the last k bars":
+# - RollingExtremes: monotonic deques for streaming; push() is amortized O(1), max()/min()
+#   are O(1) and can fold in the forming bar without committing it
+# - SparseTable: O(n log k) build over stored history, then O(1) range max/min queries,
+#   vectorized over arrays of (lo, hi) ranges (trailing() = every bar's last-k window)
+
+from collections import deque
+from typing import Deque, List, Optional, Tuple
+
+import numpy as np
+
+class RollingExtremes:
+    """Max and min of the last `window` pushed values."""
+    def __init__(self, window: int):
+        self.window = max(int(window), 0)
+        self.count = 0
+        self._hi: Deque[Tuple[int, float]] = deque()   # (index, value), values decreasing
+        self._lo: Deque[Tuple[int, float]] = deque()   # values increasing
+
+    def reset(self):
+        self.count = 0
+        self._hi.clear()
+        self._lo.clear()
+
+    def push(self, high: float, low: Optional[float] = None):
+        """Commit one value (or a bar's high / low)."""
+        low = high if low is None else low
+        i = self.count
+        self.count += 1
+        if not self.window:
+            return
+        while self._hi and self._hi[-1][1] <= high:
+            self._hi.pop()
+        self._hi.append((i, high))
+        while self._lo and self._lo[-1][1] >= low:
+            self._lo.pop()
+        self._lo.append((i, low))
+        cut = i - self.window
+        while self._hi[0][0] <= cut:
+            self._hi.popleft()
+        while self._lo[0][0] <= cut:
+            self._lo.popleft()
+
+    def max(self, extra: Optional[float] = None) -> Optional[float]:
+        """Highest of the window (and `extra`, e.g. the forming bar); None when both are empty."""
+        best = self._hi[0][1] if self._hi else None
+        if extra is not None and (best is None or extra > best):
+            return extra
+        return best
+
+    def min(self, extra: Optional[float] = None) -> Optional[float]:
+        best = self._lo[0][1] if self._lo else None
+        if extra is not None and (best is None or extra < best):
+            return extra
+        return best
+
+class SparseTable:
+    """Idempotent range queries (max or min) over a fixed array."""
+    def __init__(self, values: np.ndarray, op=np.maximum, max_len: Optional[int] = None):
+        values = np.asarray(values, dtype=np.float64)
+        self.op = op
+        self.n = len(values)
+        top = max(int(max_len or self.n), 1)
+        self.levels: List[np.ndarray] = [values]
+        k = 1
+        while 2 * k <= min(top, self.n):
+            prev = self.levels[-1]
+            self.levels.append(op(prev[:-k], prev[k:]))
+            k *= 2
+
+    def query(self, lo, hi) -> np.ndarray:
+        """op over values[lo..hi] (inclusive) for arrays (or scalars) of ranges; ranges must be non-empty."""
+        lo = np.asarray(lo, dtype=np.int64)
+        hi = np.asarray(hi, dtype=np.int64)
+        length = hi - lo + 1
+        if np.any(length < 1):
+            raise ValueError("empty range")
+        lvl = np.floor(np.log2(length)).astype(np.int64)
+        if lvl.size and int(lvl.max()) >= len(self.levels):
+            raise ValueError("range longer than the table was built for")
+        out = np.empty(lo.shape)
+        for k in np.unique(lvl).tolist():
+            sel = lvl == k
+            table = self.levels[k]
+            out[sel] = self.op(table[lo[sel]], table[hi[sel] - (1 << k) + 1])
+        return out
+
+    def trailing(self, window: int) -> np.ndarray:
+        """out[i] = op over values[max(0, i - window + 1) .. i]."""
+        hi = np.arange(self.n)
+        return self.query(np.maximum(hi - window + 1, 0), hi) if self.n else np.zeros(0)
+
+def trailing_max(x: np.ndarray, window: int) -> np.ndarray:
+    return SparseTable(x, np.maximum, max_len=window).trailing(window)
+
+def trailing_min(x: np.ndarray, window: int) -> np.ndarray:
+    return SparseTable(x, np.minimum, max_len=window).trailing(window)
@@ -0,0 +1,267 @@
+# backend/app/sessions.py
+# Trading sessions and ICT killzones: per-bar labels and per-day session levels.
+#
+# - every window is defined in its own market's local time (zoneinfo), so DST moves it in UTC
+#   exactly like the real session; UTC offsets come from a small per (zone, year) transition
+#   table, then a searchsorted labels any number of bars at once
+# - a window is handled in window-relative local time: shifted = local - window open, so
+#   day = shifted // 86400 is the session day and shifted % 86400 < duration means "inside";
+#   windows that cross local midnight need no special case
+# - labels(): per-bar session bitmask (sessions overlap) and killzone index (-1: none)
+# - levels(): open / high / low / close of every session day (np.*.reduceat over the runs)
+# - prior_levels(): as of each bar, the high / low of the last completed session day; this is
+#   what the session sweep / turtle-soup detectors read (app/detector_arrays.py)
+# - SessionBook keeps the levels of completed days and only re-aggregates the bars of the
+#   still-open ones as new / revised bars arrive; SESSIONS holds one per (symbol, interval),
+#   least recently used evicted
+
+import datetime as dt
+import os
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+from zoneinfo import ZoneInfo
+
+import numpy as np
+
+from app.candle_cache import normalize_symbol
+from app.candle_series import CandleSeries, as_series, format_time
+
+DAY = 86400
+# session days kept per book
+SESSION_BOOK_DAYS = int(os.getenv("SESSION_BOOK_DAYS", "400"))
+SESSION_MAX_BOOKS = int(os.getenv("SESSION_MAX_BOOKS", "500"))   # (symbol, interval) pairs
+
+class Window:
+    """A daily window [start, end) in local time of `tz`; end <= start crosses midnight."""
+    def __init__(self, name: str, tz: str, start: str, end: str):
+        self.name = name
+        self.tz = tz
+        self.start_s = _hhmm(start)
+        self.duration = (_hhmm(end) - self.start_s) % DAY or DAY
+        self.label = f"{start}-{end} {tz}"
+
+def _hhmm(s: str) -> int:
+    h, m = s.split(":")
+    return int(h) * 3600 + int(m) * 60
+
+SESSION_WINDOWS = [
+    Window("asia", "Asia/Tokyo", "09:00", "15:00"),
+    Window("london", "Europe/London", "08:00", "16:30"),
+    Window("newyork", "America/New_York", "08:00", "17:00"),
+]
+KILLZONE_WINDOWS = [
+    Window("asia_kz", "America/New_York", "20:00", "00:00"),
+    Window("london_kz", "America/New_York", "02:00", "05:00"),
+    Window("newyork_kz", "America/New_York", "07:00", "10:00"),
+    Window("london_close_kz", "America/New_York", "10:00", "12:00"),
+]
+WINDOWS = {w.name: w for w in SESSION_WINDOWS + KILLZONE_WINDOWS}
+
+# ---------- UTC offsets ----------
+def _offset(tz: ZoneInfo, t: int) -> int:
+    return int(dt.datetime.fromtimestamp(t, tz).utcoffset().total_seconds())
+
+@lru_cache(maxsize=256)
+def _transitions(tz_name: str, year: int) -> Tuple[Tuple[int, ...], Tuple[int, ...]]:
+    """(instants, offsets): the offset in force from each instant on, within `year`."""
+    tz = ZoneInfo(tz_name)
+    t0 = int(dt.datetime(year, 1, 1, tzinfo=dt.timezone.utc).timestamp())
+    t1 = int(dt.datetime(year + 1, 1, 1, tzinfo=dt.timezone.utc).timestamp())
+    instants, offsets = [t0], [_offset(tz, t0)]
+    for d in range(t0 + DAY, t1 + DAY, DAY):
+        d = min(d, t1)
+        off = _offset(tz, d)
+        if off != offsets[-1]:
+            lo, hi = d - DAY, d    # offset changes in (lo, hi]: bisect to the second
+            while hi - lo > 1:
+                mid = (lo + hi) // 2
+                if _offset(tz, mid) == off:
+                    hi = mid
+                else:
+                    lo = mid
+            instants.append(hi)
+            offsets.append(off)
+    return tuple(instants), tuple(offsets)
+
+def utc_offsets(t: np.ndarray, tz_name: str) -> np.ndarray:
+    """UTC offset in seconds of `tz_name` at every epoch second in `t`."""
+    if not len(t):
+        return np.zeros(0, dtype=np.int64)
+    y0 = dt.datetime.fromtimestamp(int(t.min()), dt.timezone.utc).year
+    y1 = dt.datetime.fromtimestamp(int(t.max()), dt.timezone.utc).year
+    instants, offsets = [], []
+    for y in range(y0, y1 + 1):
+        i, o = _transitions(tz_name, y)
+        instants.extend(i)
+        offsets.extend(o)
+    pos = np.searchsorted(np.asarray(instants, dtype=np.int64), t, side="right") - 1
+    return np.asarray(offsets, dtype=np.int64)[np.maximum(pos, 0)]
+
+def window_position(t: np.ndarray, w: Window) -> Tuple[np.ndarray, np.ndarray]:
+    """(session day, seconds since that day's open) of every bar, in window-relative local time."""
+    shifted = t.astype(np.int64) + utc_offsets(t, w.tz) - w.start_s
+    return shifted // DAY, shifted % DAY
+
+# ---------- labels ----------
+def labels(candles) -> Dict[str, Any]:
+    """Session bitmask (bit i = SESSION_WINDOWS[i]) and killzone index per bar."""
+    s = as_series(candles)
+    mask = np.zeros(len(s), dtype=np.uint8)
+    for i, w in enumerate(SESSION_WINDOWS):
+        _, pos = window_position(s.t, w)
+        mask |= (pos < w.duration).astype(np.uint8) << i
+    kz = np.full(len(s), -1, dtype=np.int8)
+    for i, w in enumerate(KILLZONE_WINDOWS):
+        _, pos = window_position(s.t, w)
+        kz[(pos < w.duration) & (kz < 0)] = i
+    return {"sessions": mask, "killzone": kz}
+
+def label_names(mask: int, kz: int) -> Dict[str, Any]:
+    return {"sessions": [w.name for i, w in enumerate(SESSION_WINDOWS) if mask >> i & 1],
+            "killzone": KILLZONE_WINDOWS[kz].name if kz >= 0 else None}
+
+# ---------- levels ----------
+class Levels:
+    """One row per session day of one window: columns day, start, end (first / last bar time), o, h, l, c, bars."""
+    COLUMNS = ("day", "start", "end", "o", "h", "l", "c", "bars")
+
+    def __init__(self, day, start, end, o, h, l, c, bars):
+        self.day, self.start, self.end = day, start, end
+        self.o, self.h, self.l, self.c, self.bars = o, h, l, c, bars
+
+    @classmethod
+    def empty(cls) -> "Levels":
+        z = np.zeros(0, dtype=np.int64)
+        f = np.zeros(0, dtype=np.float64)
+        return cls(z, z, z, f, f, f, f, z)
+
+    def __len__(self) -> int:
+        return len(self.day)
+
+    def take(self, sel) -> "Levels":
+        return Levels(*(getattr(self, k)[sel] for k in self.COLUMNS))
+
+    @classmethod
+    def concat(cls, parts: List["Levels"]) -> "Levels":
+        parts = [p for p in parts if len(p)]
+        if not parts:
+            return cls.empty()
+        return cls(*(np.concatenate([getattr(p, k) for p in parts]) for k in cls.COLUMNS))
+
+    def records(self, w: Window) -> List[Dict[str, Any]]:
+        return [{"session": w.name, "day": format_time(d * DAY)[:10], "start": format_time(a), "end": format_time(b),
+                 "open": o, "high": h, "low": l, "close": c, "bars": n}
+                for d, a, b, o, h, l, c, n in zip(self.day.tolist(), self.start.tolist(), self.end.tolist(),
+                                                  self.o.tolist(), self.h.tolist(), self.l.tolist(),
+                                                  self.c.tolist(), self.bars.tolist())]
+
+def levels(candles, w: Window) -> Levels:
+    """Open / high / low / close of every session day of `w` present in the bars."""
+    s = as_series(candles)
+    day, pos = window_position(s.t, w)
+    inside = np.flatnonzero(pos < w.duration)
+    if not len(inside):
+        return Levels.empty()
+    d = day[inside]
+    starts = np.flatnonzero(np.r_[True, d[1:] != d[:-1]])
+    ends = np.r_[starts[1:], len(d)] - 1
+    return Levels(d[starts], s.t[inside[starts]], s.t[inside[ends]], s.o[inside[starts]],
+                  np.maximum.reduceat(s.h[inside], starts), np.minimum.reduceat(s.l[inside], starts),
+                  s.c[inside[ends]], np.diff(np.r_[starts, len(d)]))
+
+def completed(lv: Levels, last_day: int, last_pos: int, w: Window) -> np.ndarray:
+    """Rows of `lv` whose session day had ended by a bar at (last_day, last_pos)."""
+    return (lv.day < last_day) | ((lv.day == last_day) & (last_pos >= w.duration))
+
+def prior_levels(candles, w: Window) -> Tuple[np.ndarray, np.ndarray]:
+    """High / low of the last session day of `w` completed by each bar (NaN before the first)."""
+    s = as_series(candles)
+    day, pos = window_position(s.t, w)
+    lv = levels(s, w)
+    # session day k is complete at bars with (day > k) or (day == k and past the close)
+    done = np.where(pos >= w.duration, day, day - 1)
+    i = np.searchsorted(lv.day, done, side="right") - 1
+    hi = np.where(i >= 0, lv.h[np.maximum(i, 0)] if len(lv) else np.nan, np.nan)
+    lo = np.where(i >= 0, lv.l[np.maximum(i, 0)] if len(lv) else np.nan, np.nan)
+    return hi, lo
+
+# ---------- incremental ----------
+class SessionBook:
+    """Session-day levels of one symbol / interval for every window, kept up to date incrementally."""
+    def __init__(self, max_days: int = SESSION_BOOK_DAYS):
+        self.max_days = max_days
+        self.closed: Dict[str, Levels] = {name: Levels.empty() for name in WINDOWS}
+        self.tail = CandleSeries.empty()    # bars of session days not yet complete
+        self.lock = threading.Lock()
+
+    def update(self, candles) -> None:
+        """Fold in an ascending window of bars; bars at or after the held tail replace it."""
+        s = as_series(candles)
+        if not len(s):
+            return
+        with self.lock:
+            last_closed = max((int(lv.end[-1]) for lv in self.closed.values() if len(lv)), default=None)
+            if len(self.tail):
+                s = CandleSeries.concat([self.tail[:int(np.searchsorted(self.tail.t, s.t[0]))], s])
+            elif last_closed is not None:
+                s = s[int(np.searchsorted(s.t, last_closed, side="right")):]
+            keep_from = int(s.t[-1]) + 1 if len(s) else None
+            for name, w in WINDOWS.items():
+                lv = levels(s, w)
+                if len(self.closed[name]):
+                    lv = lv.take(lv.day > self.closed[name].day[-1])
+                day, pos = window_position(s.t[-1:], w)
+                done = completed(lv, int(day[0]), int(pos[0]), w)
+                self.closed[name] = Levels.concat([self.closed[name], lv.take(done)])
+                if len(self.closed[name]) > self.max_days:
+                    self.closed[name] = self.closed[name].take(slice(-self.max_days, None))
+                if (~done).any():
+                    keep_from = min(keep_from, int(lv.start[~done][0]))
+            self.tail = s[int(np.searchsorted(s.t, keep_from)):]
+
+    def current(self) -> Dict[str, Levels]:
+        """Levels of the session days still open (from the held tail)."""
+        with self.lock:
+            return {name: levels(self.tail, w) for name, w in WINDOWS.items()}
+
+    def snapshot(self, n: int = 1) -> Dict[str, Any]:
+        """The last `n` completed days and the open one of every window."""
+        cur = self.current()
+        with self.lock:
+            return {name: {"window": w.label, "completed": self.closed[name].take(slice(-n, None)).records(w),
+                           "current": cur[name].records(w)} for name, w in WINDOWS.items()}
+
+class SessionBooks:
+    def __init__(self, max_books: int = SESSION_MAX_BOOKS):
+        self.max_books = max_books
+        self._books: "OrderedDict[Tuple[str, str], SessionBook]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.updates = 0
+        self.evicted = 0
+
+    def book(self, symbol: str, interval: str) -> SessionBook:
+        key = (normalize_symbol(symbol), interval)
+        with self._lock:
+            b = self._books.get(key)
+            if b is None:
+                b = self._books[key] = SessionBook()
+                while len(self._books) > self.max_books:
+                    self._books.popitem(last=False)
+                    self.evicted += 1
+            self._books.move_to_end(key)
+            return b
+
+    def update(self, symbol: str, interval: str, candles) -> SessionBook:
+        b = self.book(symbol, interval)
+        b.update(candles)
+        self.updates += 1
+        return b
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"books": len(self._books), "updates": self.updates, "evicted_books": self.evicted}
+
+# process-wide instance
+SESSIONS = SessionBooks()
@@ -0,0 +1,241 @@
+# backend/app/signal_journal.py
+# Durable journal of emitted signals (local SQLite in WAL mode).
+#
+# - append-only: a signal is keyed by (symbol, interval, type, time); the same signal detected
+#   again (an overlapping window, another endpoint) is ignored, nothing is updated in place
+# - record() only enqueues, so request handlers never wait on disk; one background writer
+#   drains the queue and commits up to JOURNAL_BATCH_MAX rows per transaction. A full queue
+#   drops (and counts) instead of blocking
+# - indexes (symbol, interval, type, time) and (symbol, interval, time); history() pages newest
+#   first with a (time, id) keyset cursor compared as a row value, so every page is one index
+#   range scan (one per requested type, merged) however deep the journal or the page is
+# - WAL lets readers (one connection per thread) run alongside the writer
+
+import heapq
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+from itertools import islice
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from app.candle_cache import normalize_symbol
+from app.candle_series import format_time, parse_time
+
+JOURNAL_PATH = os.getenv("SIGNAL_JOURNAL_PATH", "data/signals.db")
+JOURNAL_BATCH_MAX = int(os.getenv("SIGNAL_JOURNAL_BATCH_MAX", "2000"))
+JOURNAL_FLUSH_MS = float(os.getenv("SIGNAL_JOURNAL_FLUSH_MS", "200"))   # longest a queued row waits
+JOURNAL_QUEUE_MAX = int(os.getenv("SIGNAL_JOURNAL_QUEUE_MAX", "100000"))
+HISTORY_MAX_LIMIT = 1000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS signals (
+    id INTEGER PRIMARY KEY,
+    symbol TEXT NOT NULL,
+    interval TEXT NOT NULL,
+    source TEXT NOT NULL,
+    type TEXT NOT NULL,
+    time INTEGER NOT NULL,
+    price REAL,
+    recorded INTEGER NOT NULL,
+    payload TEXT NOT NULL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS signals_key ON signals (symbol, interval, type, time);
+CREATE INDEX IF NOT EXISTS signals_time ON signals (symbol, interval, time);
+"""
+
+INSERT = ("INSERT OR IGNORE INTO signals (symbol, interval, source, type, time, price, recorded, payload) "
+          "VALUES (?, ?, ?, ?, ?, ?, ?, ?)")
+
+Row = Tuple[str, str, str, str, int, Optional[float], int, str]
+
+def _price(sig: Dict[str, Any]) -> Optional[float]:
+    for k in ("price", "sweep_price", "gap_top", "top"):
+        v = sig.get(k)
+        if isinstance(v, (int, float)):
+            return float(v)
+    return None
+
+def encode_cursor(t: int, rowid: int) -> str:
+    return f"{t}.{rowid}"
+
+def decode_cursor(cursor: str) -> Optional[Tuple[int, int]]:
+    try:
+        t, rowid = cursor.split(".", 1)
+        return int(t), int(rowid)
+    except (AttributeError, ValueError):
+        return None
+
+class SignalJournal:
+    def __init__(self, path: str = JOURNAL_PATH, batch_max: int = JOURNAL_BATCH_MAX,
+                 flush_ms: float = JOURNAL_FLUSH_MS, queue_max: int = JOURNAL_QUEUE_MAX):
+        self.path = path
+        self.batch_max = batch_max
+        self.flush_s = flush_ms / 1000.0
+        self._queue: "queue.Queue[Optional[Row]]" = queue.Queue(maxsize=queue_max)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._writer: Optional[threading.Thread] = None
+        self._idle = threading.Condition(self._lock)
+        self._pending = 0
+        self.queued = self.written = self.ignored = self.dropped = self.batches = self.errors = 0
+        self.last_batch_ms = 0.0
+
+    # ---------- connections ----------
+    def _connect(self) -> sqlite3.Connection:
+        d = os.path.dirname(self.path)
+        if d:
+            os.makedirs(d, exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(SCHEMA)
+        return conn
+
+    def _reader(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = self._connect()
+        return conn
+
+    # ---------- write side ----------
+    def record(self, symbol: str, interval: str, source: str, signals: Iterable[Dict[str, Any]]) -> int:
+        """Queue signals for the writer; returns how many were queued (never blocks)."""
+        now = int(time.time())
+        sym = normalize_symbol(symbol)
+        n = 0
+        for sig in signals:
+            t = parse_time(sig.get("time"))
+            if t is None or not sig.get("type"):
+                continue
+            row = (sym, interval, source, str(sig["type"]), t, _price(sig), now, json.dumps(sig, default=str))
+            with self._lock:
+                try:
+                    self._queue.put_nowait(row)
+                except queue.Full:
+                    self.dropped += 1
+                    continue
+                self._pending += 1
+                self.queued += 1
+            n += 1
+        if n:
+            self._ensure_writer()
+        return n
+
+    def _ensure_writer(self):
+        with self._lock:
+            if self._writer is None or not self._writer.is_alive():
+                self._writer = threading.Thread(target=self._run, name="signal-journal", daemon=True)
+                self._writer.start()
+
+    def _run(self):
+        conn = self._connect()
+        while True:
+            first = self._queue.get()
+            if first is None:
+                break
+            batch = [first]
+            deadline = time.monotonic() + self.flush_s
+            stop = False
+            while len(batch) < self.batch_max:
+                try:
+                    row = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if row is None:
+                    stop = True
+                    break
+                batch.append(row)
+            self._write(conn, batch)
+            if stop:
+                break
+        conn.close()
+
+    def _write(self, conn: sqlite3.Connection, batch: List[Row]):
+        t0 = time.perf_counter()
+        try:
+            conn.execute("BEGIN")
+            before = conn.total_changes
+            conn.executemany(INSERT, batch)
+            inserted = conn.total_changes - before
+            conn.execute("COMMIT")
+        except sqlite3.Error:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            inserted = 0
+            with self._lock:
+                self.errors += 1
+        with self._idle:
+            self.batches += 1
+            self.written += inserted
+            self.ignored += len(batch) - inserted
+            self.last_batch_ms = (time.perf_counter() - t0) * 1000.0
+            self._pending -= len(batch)
+            self._idle.notify_all()
+
+    def flush(self, timeout: float = 10.0) -> bool:
+        """Wait until everything queued so far is committed."""
+        end = time.monotonic() + timeout
+        with self._idle:
+            while self._pending > 0:
+                left = end - time.monotonic()
+                if left <= 0:
+                    return False
+                self._idle.wait(left)
+        return True
+
+    def close(self, timeout: float = 10.0):
+        """Commit what is queued and stop the writer."""
+        w = self._writer
+        if w is not None and w.is_alive():
+            self._queue.put(None)
+            w.join(timeout)
+        self._writer = None
+
+    # ---------- read side ----------
+    def _select(self, where: List[str], args: List[Any], limit: int) -> List[tuple]:
+        sql = (f"SELECT id, symbol, interval, source, type, time, price, recorded, payload FROM signals "
+               f"WHERE {' AND '.join(where)} ORDER BY time DESC, id DESC LIMIT ?")
+        return self._reader().execute(sql, (*args, limit)).fetchall()
+
+    def history(self, symbol: str, interval: str, types: Optional[List[str]] = None,
+                start: Optional[int] = None, end: Optional[int] = None, limit: int = 100,
+                cursor: Optional[Tuple[int, int]] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Signals newest first and the cursor of the next page (None on the last one)."""
+        where, args = [], []
+        if start is not None:
+            where.append("time >= ?")
+            args.append(start)
+        if end is not None:
+            where.append("time <= ?")
+            args.append(end)
+        if cursor is not None:
+            where.append("(time, id) < (?, ?)")
+            args.extend(cursor)
+        limit = max(1, min(int(limit), HISTORY_MAX_LIMIT))
+        sym = normalize_symbol(symbol)
+        if types:
+            # one range scan of signals_key per type (it orders by time, then rowid, within a
+            # type), merged newest first; a single `type IN (...)` would walk signals_time
+            # and filter every row
+            pages = [self._select(["symbol = ?", "interval = ?", "type = ?", *where], [sym, interval, ty, *args],
+                                  limit + 1) for ty in dict.fromkeys(types)]
+            rows = list(islice(heapq.merge(*pages, key=lambda r: (r[5], r[0]), reverse=True), limit + 1))
+        else:
+            rows = self._select(["symbol = ?", "interval = ?", *where], [sym, interval, *args], limit + 1)
+        out = [{"id": r[0], "symbol": r[1], "interval": r[2], "source": r[3], "type": r[4], "time": format_time(r[5]),
+                "epoch": r[5], "price": r[6], "recorded": r[7], "signal": json.loads(r[8])} for r in rows[:limit]]
+        nxt = encode_cursor(rows[limit - 1][5], rows[limit - 1][0]) if len(rows) > limit else None
+        return out, nxt
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"path": self.path, "queued": self.queued, "pending": self._pending, "written": self.written,
+                    "duplicates": self.ignored, "dropped": self.dropped, "batches": self.batches,
+                    "errors": self.errors, "last_batch_ms": round(self.last_batch_ms, 3),
+                    "writer_alive": bool(self._writer and self._writer.is_alive())}
+
+# process-wide instance
+JOURNAL = SignalJournal()
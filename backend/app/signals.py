@@ -1,3 +1,5 @@
+from app import pipeline, structure
+
 def detect_turtle_soup(candles):
     signals = []
     for i in range(2, len(candles)):
@@ -18,13 +20,11 @@ def detect_fvg(candles):
             signals.append({"time": cur['t'], "type": "fvg_down"})
     return signals
 
-def detect_order_blocks(candles):
-    signals = []
-    return signals  # stub for now
+def detect_order_blocks(candles, strength=structure.DEFAULT_STRENGTH):
+    # last opposing candle before each swing break (BOS / CHoCH)
+    return structure.order_blocks(structure.analyze(candles, strength).records())
 
 def compute_all_signals(candles):
-    return {
-        "turtle": detect_turtle_soup(candles),
-        "fvg": detect_fvg(candles),
-        "order_blocks": detect_order_blocks(candles),
-    }
+    # array versions of the detectors above, run in one pipeline pass (order blocks read the
+    # pass's shared swing structure)
+    return pipeline.signal_family(candles)
@@ -0,0 +1,218 @@
+# backend/app/stream.py
+# Live candle / signal streaming for /ws/stream.
+#
+# - one producer task per (symbol, interval), shared by every subscriber; it polls through
+#   the shared candle cache (so N viewers cost one upstream series) and starts / stops with
+#   its first / last subscriber
+# - a subscriber gets one snapshot, then only deltas: changed bars (the updated forming bar,
+#   newly closed bars) and signals added / removed since the previous poll
+# - detection is incremental when the hub has a live detector factory (app/live_detectors.py):
+#   only the revised forming bar and newly closed bars are folded in per poll
+# - each client has a bounded queue; when a slow client falls behind, its pending deltas are
+#   dropped and it is re-sent a fresh snapshot instead (a delta is never applied out of order)
+
+import asyncio
+import os
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+from app.candle_cache import normalize_symbol, ttl_for_interval
+from app.candle_series import CandleSeries
+
+STREAM_WINDOW = int(os.getenv("STREAM_WINDOW", "200"))
+STREAM_QUEUE_MAX = int(os.getenv("STREAM_QUEUE_MAX", "64"))
+STREAM_MAX_SYMBOLS = 20
+
+Fetch = Callable[[str, str, int], Awaitable[Dict[str, Any]]]
+Detect = Callable[[CandleSeries], List[Dict[str, Any]]]
+LiveFactory = Callable[[], Any]   # -> app.live_detectors.DetectorSet
+
+def signal_id(sig: Dict[str, Any]) -> str:
+    """Stable identity of a signal across polls (index_from_end etc. shift with every bar)."""
+    price = next((sig[k] for k in ("price", "sweep_price", "gap_top") if sig.get(k) is not None), "")
+    return f"{sig.get('type')}:{sig.get('time', '')}:{price}"
+
+def bar_deltas(prev: CandleSeries, cur: CandleSeries) -> Optional[List[Dict[str, Any]]]:
+    """
+    Bars of `cur` that differ from `prev`: the revised last bar and everything after it.
+    None when `cur` does not continue `prev` (history rewritten) -> send a snapshot.
+    """
+    if not len(prev) or not len(cur):
+        return None
+    last_t = int(prev.t[-1])
+    i = int(np.searchsorted(cur.t, last_t))
+    if i >= len(cur) or int(cur.t[i]) != last_t:
+        return None
+    same = (cur.o[i] == prev.o[-1] and cur.h[i] == prev.h[-1] and cur.l[i] == prev.l[-1]
+            and cur.c[i] == prev.c[-1] and cur.v[i] == prev.v[-1])
+    start = i + 1 if same else i
+    n = len(cur)
+    return [{**cur[j].to_dict(), "closed": j < n - 1} for j in range(start, n)]
+
+class _Client:
+    def __init__(self, send: Callable[[Dict[str, Any]], Awaitable[None]], maxsize: int = STREAM_QUEUE_MAX):
+        self.send = send
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        self.stale: Set[Tuple[str, str]] = set()
+        self.dropped = 0
+
+    def offer(self, key: Tuple[str, str], msg: Dict[str, Any]):
+        if key in self.stale:
+            return   # a snapshot is already owed; it will include this change
+        try:
+            self.queue.put_nowait((key, msg))
+        except asyncio.QueueFull:
+            # backpressure: drop what is queued and owe the client snapshots instead
+            while not self.queue.empty():
+                k, _ = self.queue.get_nowait()
+                self.stale.add(k)
+                self.dropped += 1
+            self.stale.add(key)
+            self.queue.put_nowait((None, None))   # wake the writer
+
+class _Producer:
+    def __init__(self, hub: "StreamHub", symbol: str, interval: str):
+        self.hub = hub
+        self.symbol = symbol
+        self.interval = interval
+        self.key = (normalize_symbol(symbol), interval)
+        self.clients: Set[_Client] = set()
+        self.candles = CandleSeries.empty()
+        self.signals: Dict[str, Dict[str, Any]] = {}
+        self.provider: Optional[str] = None
+        self.error: Optional[Any] = None
+        self.polls = 0
+        self.deltas = 0
+        self.task: Optional[asyncio.Task] = None
+        self.live = hub.live() if hub.live is not None else None
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {"type": "snapshot", "symbol": self.symbol, "interval": self.interval, "provider": self.provider,
+                "candles": self.candles.to_records(), "signals": list(self.signals.values())}
+
+    def _broadcast(self, msg: Dict[str, Any]):
+        for c in list(self.clients):
+            c.offer(self.key, msg)
+
+    async def run(self):
+        period = ttl_for_interval(self.interval)
+        while self.clients:
+            started = time.monotonic()
+            try:
+                await self.poll()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self._fail(str(e))
+            await asyncio.sleep(max(0.0, period - (time.monotonic() - started)))
+
+    def _fail(self, error: Any):
+        if error != self.error:
+            self.error = error
+            self._broadcast({"type": "error", "symbol": self.symbol, "interval": self.interval, "error": error})
+
+    def _detect(self, cur: CandleSeries, rewritten: bool) -> List[Dict[str, Any]]:
+        if self.live is None:
+            return self.hub.detect(cur)
+        if rewritten:
+            self.live.reset()
+        self.live.feed(cur)
+        return self.live.merged()
+
+    async def poll(self):
+        self.polls += 1
+        m = await self.hub.fetch(self.symbol, self.interval, self.hub.window)
+        cur = m.get("candles")
+        if not isinstance(cur, CandleSeries) or not len(cur):
+            self._fail(m.get("error", m))
+            return
+        self.error = None
+        self.provider = m.get("provider")
+        bars = bar_deltas(self.candles, cur)
+        if bars is not None and not bars:
+            return   # nothing changed since the last poll: no detection, no message
+        sigs = {signal_id(s): {**s, "id": signal_id(s)} for s in self._detect(cur, bars is None)}
+        prev_sigs = self.signals
+        self.candles, self.signals = cur, sigs
+        if bars is None:
+            self._broadcast(self.snapshot())
+            return
+        self.deltas += 1
+        self._broadcast({"type": "delta", "symbol": self.symbol, "interval": self.interval, "bars": bars,
+                         "signals": {"added": [s for k, s in sigs.items() if k not in prev_sigs],
+                                     "removed": [k for k in prev_sigs if k not in sigs]}})
+
+class StreamHub:
+    def __init__(self, fetch: Fetch, detect: Detect, window: int = STREAM_WINDOW, live: Optional[LiveFactory] = None):
+        self.fetch = fetch
+        self.detect = detect
+        self.live = live
+        self.window = window
+        self._producers: Dict[Tuple[str, str], _Producer] = {}
+        self.clients = 0
+
+    def _subscribe(self, client: _Client, symbol: str, interval: str) -> _Producer:
+        key = (normalize_symbol(symbol), interval)
+        p = self._producers.get(key)
+        if p is None:
+            p = self._producers[key] = _Producer(self, symbol, interval)
+        p.clients.add(client)
+        if len(p.candles):
+            client.offer(key, p.snapshot())   # late joiner: current state right away
+        if p.task is None or p.task.done():
+            p.task = asyncio.ensure_future(p.run())
+        return p
+
+    def _unsubscribe(self, client: _Client, p: _Producer):
+        p.clients.discard(client)
+        if not p.clients:
+            if p.task is not None:
+                p.task.cancel()
+            self._producers.pop(p.key, None)
+
+    async def serve(self, send: Callable[[Dict[str, Any]], Awaitable[None]], receive: Callable[[], Awaitable[Any]],
+                    symbols: List[str], interval: str):
+        """
+        Pump snapshots / deltas for `symbols` to one connection until `receive()` raises
+        (client gone). `send` is awaited for every message, so a slow socket fills the queue.
+        """
+        client = _Client(send)
+        producers = {p.key: p for p in (self._subscribe(client, s, interval) for s in symbols)}
+        self.clients += 1
+
+        async def writer():
+            try:
+                while True:
+                    if client.stale:
+                        await send(producers[client.stale.pop()].snapshot())
+                        continue
+                    key, msg = await client.queue.get()
+                    if msg is not None:
+                        await send(msg)
+            except Exception:
+                return   # socket closed under us
+
+        async def reader():
+            try:
+                while True:
+                    await receive()   # nothing is expected from the client; raises on close
+            except Exception:
+                return
+
+        tasks = [asyncio.ensure_future(writer()), asyncio.ensure_future(reader())]
+        try:
+            await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for t in tasks:
+                t.cancel()
+            for p in producers.values():
+                self._unsubscribe(client, p)
+            self.clients -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {"clients": self.clients,
+                "producers": {f"{p.symbol}@{p.interval}": {"subscribers": len(p.clients), "polls": p.polls,
+                                                           "deltas": p.deltas, "bars": len(p.candles)}
+                              for p in self._producers.values()}}
@@ -0,0 +1,226 @@
+# backend/app/structure.py
+# Market structure: fractal swing points, then BOS / CHoCH from a trend state machine.
+#
+# - a swing high at bar i has a high strictly above the `strength` bars on either side
+#   (swing lows mirror it); it is confirmed, and usable, once bar i + strength has closed
+# - one pass over the bars: a close beyond the latest unbroken swing high / low is a break;
+#   in the direction of the current trend (or with no trend yet) it is a BOS, against it a
+#   CHoCH, and the trend flips to the break's side. Each swing breaks at most once.
+# - every event carries the last opposing candle before the break (the last bearish candle
+#   for a bullish break and vice versa) so order blocks can be anchored on it
+# - analyze() finds the swings vectorized (app/rolling sparse table) and runs the machine
+#   once, O(n); StructureTracker runs the same machine bar by bar for live feeds, where a
+#   revised forming bar rolls back only that bar's step
+
+import copy
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.candle_series import CandleSeries, as_series
+from app.live_detectors import _row
+from app.rolling import trailing_max, trailing_min
+
+DEFAULT_STRENGTH = 2
+
+BULL, BEAR = 1, -1
+BOS, CHOCH = "bos", "choch"
+
+# (kind, side, break bar, swing bar, swing level, last opposing candle or None); "bar" is
+# whatever reference the caller steps with: an index in analyze(), the bar itself when live
+Event = Tuple[str, int, Any, Any, float, Any]
+
+class _Machine:
+    """Trend state + the latest swing on each side; step() is O(1)."""
+    __slots__ = ("trend", "sh", "sh_broken", "sl", "sl_broken", "last_bull", "last_bear")
+
+    def __init__(self):
+        self.trend = 0
+        self.sh: Optional[Tuple[Any, float]] = None   # (bar, price)
+        self.sh_broken = False
+        self.sl: Optional[Tuple[Any, float]] = None
+        self.sl_broken = False
+        self.last_bull: Any = None   # latest bullish / bearish candle
+        self.last_bear: Any = None
+
+    def step(self, bar: Any, o: float, c: float, new_sh: Optional[Tuple[Any, float]],
+             new_sl: Optional[Tuple[Any, float]], out: List[Event]):
+        if self.sh is not None and not self.sh_broken and c > self.sh[1]:
+            out.append((CHOCH if self.trend == BEAR else BOS, BULL, bar, self.sh[0], self.sh[1], self.last_bear))
+            self.trend = BULL
+            self.sh_broken = True
+        if self.sl is not None and not self.sl_broken and c < self.sl[1]:
+            out.append((CHOCH if self.trend == BULL else BOS, BEAR, bar, self.sl[0], self.sl[1], self.last_bull))
+            self.trend = BEAR
+            self.sl_broken = True
+        if c > o:
+            self.last_bull = bar
+        elif c < o:
+            self.last_bear = bar
+        if new_sh is not None:
+            self.sh, self.sh_broken = new_sh, False
+        if new_sl is not None:
+            self.sl, self.sl_broken = new_sl, False
+
+def swing_points(s: CandleSeries, strength: int = DEFAULT_STRENGTH) -> Tuple[np.ndarray, np.ndarray]:
+    """Indices of fractal swing highs and lows (strictly beyond `strength` bars each side)."""
+    n, k = len(s), int(strength)
+    if k < 1 or n < 2 * k + 1:
+        return np.zeros(0, np.int64), np.zeros(0, np.int64)
+    i = np.arange(k, n - k)
+    hmax, lmin = trailing_max(s.h, k), trailing_min(s.l, k)
+    hi = (s.h[i] > hmax[i - 1]) & (s.h[i] > hmax[i + k])
+    lo = (s.l[i] < lmin[i - 1]) & (s.l[i] < lmin[i + k])
+    return i[hi].astype(np.int64), i[lo].astype(np.int64)
+
+class Structure:
+    """Swings and BOS / CHoCH events of one series (index arrays + records)."""
+    def __init__(self, series: CandleSeries, strength: int, swing_highs: np.ndarray, swing_lows: np.ndarray,
+                 events: List[Event], trend: int):
+        self.series = series
+        self.strength = strength
+        self.swing_highs = swing_highs
+        self.swing_lows = swing_lows
+        self.events = events
+        self.trend = trend
+
+    def hits(self) -> Dict[str, np.ndarray]:
+        """{"bos_bull" | "bos_bear" | "choch_bull" | "choch_bear": break bar indices}."""
+        out = {f"{kind}_{side}": [] for kind in (BOS, CHOCH) for side in ("bull", "bear")}
+        for kind, side, j, *_ in self.events:
+            out[f"{kind}_{'bull' if side == BULL else 'bear'}"].append(j)
+        return {k: np.asarray(v, dtype=np.int64) for k, v in out.items()}
+
+    def records(self) -> List[Dict[str, Any]]:
+        return [event_record(self.series, e) for e in self.events]
+
+    def order_block_hits(self) -> Dict[str, np.ndarray]:
+        """{"order_block_bull" | "order_block_bear": break bar of every block order_blocks() reports}."""
+        out: Dict[str, List[int]] = {"order_block_bull": [], "order_block_bear": []}
+        seen = set()
+        for _, side, j, _, _, ob in self.events:
+            if ob is None or (ob, side) in seen:
+                continue
+            seen.add((ob, side))
+            out["order_block_bull" if side == BULL else "order_block_bear"].append(j)
+        return {k: np.asarray(v, dtype=np.int64) for k, v in out.items()}
+
+    def order_blocks(self) -> List[Dict[str, Any]]:
+        return order_blocks(self.records())
+
+    def swings(self) -> List[Dict[str, Any]]:
+        s = self.series
+        out = [{"time": int(s.t[i]), "type": "swing_high", "price": float(s.h[i])} for i in self.swing_highs.tolist()]
+        out += [{"time": int(s.t[i]), "type": "swing_low", "price": float(s.l[i])} for i in self.swing_lows.tolist()]
+        return sorted(out, key=lambda x: x["time"])
+
+def order_blocks(records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Zones anchored on the last opposing candle before each break: a bullish break anchors a
+    demand block on the last bearish candle, a bearish break a supply block on the last
+    bullish one. A candle anchoring several breaks of the same side is reported once.
+    """
+    out, seen = [], set()
+    for r in records:
+        ob = r.get("ob")
+        if ob is None:
+            continue
+        side = r["type"].rsplit("_", 1)[1]
+        if (ob["time"], side) in seen:
+            continue
+        seen.add((ob["time"], side))
+        out.append({"time": ob["time"], "type": f"order_block_{side}", "price": ob["open"],
+                    "top": ob["high"], "bottom": ob["low"], "break_time": r["time"], "break_type": r["type"]})
+    return out
+
+def _record(kind: str, side: int, t: int, close: float, level: float, swing_t: int,
+            ob: Optional[Tuple[int, float, float, float, float]]) -> Dict[str, Any]:
+    rec = {"time": t, "type": f"{kind}_{'bull' if side == BULL else 'bear'}", "price": close,
+           "level": level, "swing_time": swing_t}
+    if ob is not None:
+        rec["ob"] = dict(zip(("time", "open", "high", "low", "close"), ob))
+    return rec
+
+def _bar(s: CandleSeries, i: int) -> Tuple[int, float, float, float, float]:
+    return int(s.t[i]), float(s.o[i]), float(s.h[i]), float(s.l[i]), float(s.c[i])
+
+def event_record(s: CandleSeries, e: Event) -> Dict[str, Any]:
+    kind, side, j, i, level, ob = e
+    return _record(kind, side, int(s.t[j]), float(s.c[j]), level, int(s.t[i]), None if ob is None else _bar(s, ob))
+
+def analyze(candles, strength: int = DEFAULT_STRENGTH) -> Structure:
+    """Swings + BOS / CHoCH over the whole series in one O(n) pass."""
+    s = as_series(candles)
+    k = int(strength)
+    highs, lows = swing_points(s, k)
+    n = len(s)
+    # swing i becomes usable once bar i + k has closed
+    sh_at = dict(zip((highs + k).tolist(), zip(highs.tolist(), s.h[highs].tolist())))
+    sl_at = dict(zip((lows + k).tolist(), zip(lows.tolist(), s.l[lows].tolist())))
+    m = _Machine()
+    events: List[Event] = []
+    o, c = s.o.tolist(), s.c.tolist()
+    for j in range(n):
+        m.step(j, o[j], c[j], sh_at.get(j), sl_at.get(j), events)
+    return Structure(s, k, highs, lows, events, m.trend)
+
+class StructureTracker:
+    """analyze() fed one bar at a time; the same events when the same bars are replayed."""
+    def __init__(self, strength: int = DEFAULT_STRENGTH):
+        self.strength = int(strength)
+        self.window: Deque[Tuple[int, float, float, float, float]] = deque(maxlen=2 * self.strength + 1)
+        self.machine = _Machine()
+        self.events: List[Dict[str, Any]] = []
+        self._undo: Optional[tuple] = None
+
+    @property
+    def last_t(self) -> Optional[int]:
+        return self.window[-1][0] if self.window else None
+
+    @property
+    def trend(self) -> int:
+        return self.machine.trend
+
+    def _confirmed(self):
+        k = self.strength
+        if k < 1 or len(self.window) < 2 * k + 1:
+            return None, None
+        bars = list(self.window)
+        mid = bars[k]
+        others = bars[:k] + bars[k + 1:]
+        sh = (mid, mid[2]) if all(mid[2] > b[2] for b in others) else None
+        sl = (mid, mid[3]) if all(mid[3] < b[3] for b in others) else None
+        return sh, sl
+
+    def on_bar(self, bar) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """Feed the next bar, or the forming bar again (same time) to revise it; returns (added, removed)."""
+        row = _row(bar)
+        last = self.last_t
+        removed: List[Dict[str, Any]] = []
+        if last is not None and row[0] < last:
+            return [], []
+        if last is not None and row[0] == last and self._undo is not None:
+            # revised forming bar: roll back its step only
+            self.machine, self.window, n_events = self._undo
+            removed = self.events[n_events:]
+            del self.events[n_events:]
+        self._undo = (copy.copy(self.machine), copy.copy(self.window), len(self.events))
+        self.window.append(row)
+        fresh: List[Event] = []
+        sh, sl = self._confirmed()
+        self.machine.step(row, row[1], row[4], sh, sl, fresh)
+        added = [_record(kind, side, b[0], b[4], level, sw[0], ob) for kind, side, b, sw, level, ob in fresh]
+        self.events.extend(added)
+        return [r for r in added if r not in removed], [r for r in removed if r not in added]
+
+    def reset(self):
+        self.__init__(self.strength)
+
+    def records(self) -> List[Dict[str, Any]]:
+        return list(self.events)
+
+    signals = records   # app.live_detectors.DetectorSet interface
+
+    def timed(self) -> List[Tuple[int, Dict[str, Any]]]:
+        return [(int(r["time"]), r) for r in self.events]
@@ -0,0 +1,78 @@
+# Backtester (app/backtest.py) against a per-trade bar loop.
+# Run from backend/: python -m pytest -q app/test_backtest.py
+import numpy as np
+import pytest
+
+from app import backtest
+from app.candle_series import CandleSeries
+
+def make_minutes(n: int, seed: int = 0) -> CandleSeries:
+    rng = np.random.default_rng(seed)
+    c = 100 + np.cumsum(rng.normal(0, 0.05, n))
+    o = c + rng.normal(0, 0.05, n)
+    o[::23] += rng.normal(0, 0.4, len(o[::23]))   # opening gaps through stops / targets
+    h = np.maximum(o, c) + rng.random(n) * 0.05
+    l = np.minimum(o, c) - rng.random(n) * 0.05
+    return CandleSeries(1_704_067_200 + 60 * np.arange(n), o, h, l, c)
+
+def exit_loop(s, p0, side, stop, target, max_bars):
+    for k in range(max_bars):
+        i = p0 + k
+        if i >= len(s):
+            return len(s) - 1, float(s.c[-1]), backtest.EOD
+        o, h, l = float(s.o[i]), float(s.h[i]), float(s.l[i])
+        if (l <= stop) if side > 0 else (h >= stop):
+            return i, (min(o, stop) if side > 0 else max(o, stop)), backtest.STOP
+        if target == target and ((h >= target) if side > 0 else (l <= target)):
+            return i, (max(o, target) if side > 0 else min(o, target)), backtest.TARGET
+    return p0 + max_bars - 1, float(s.c[p0 + max_bars - 1]), backtest.TIME
+
+@pytest.mark.parametrize("max_bars", [1, 7, 60])
+def test_exits_match_loop(monkeypatch, max_bars):
+    monkeypatch.setattr(backtest, "BACKTEST_CHUNK_CELLS", 500)   # several chunks
+    s = make_minutes(3000, 1)
+    rng = np.random.default_rng(2)
+    p0 = np.sort(rng.integers(1, len(s), 400))
+    side = rng.choice([-1, 1], len(p0))
+    risk = rng.random(len(p0)) * 0.3 + 0.01
+    px = s.o[p0]
+    stop = px - side * risk
+    target = np.where(rng.random(len(p0)) < 0.2, np.nan, px + side * risk * 2)
+    exit_i, exit_px, reason = backtest.exits(s, p0, side, stop, target, max_bars)
+    for j in range(len(p0)):
+        i, price, why = exit_loop(s, int(p0[j]), int(side[j]), float(stop[j]), float(target[j]), max_bars)
+        assert (exit_i[j], reason[j]) == (i, why)
+        assert exit_px[j] == pytest.approx(price)
+
+def test_signals_do_not_look_ahead():
+    s = make_minutes(4 * 1440, 3)
+    full = backtest.collect(s)
+    assert len(full.kinds) > 10
+    for k in (500, 2000, 4321):
+        part = backtest.collect(s[:k])
+        keep = full.idx < k
+        got = sorted(zip(part.idx.tolist(), (part.kinds[c] for c in part.code.tolist())))
+        want = sorted(zip(full.idx[keep].tolist(), (full.kinds[c] for c in full.code[keep].tolist())))
+        assert got == want
+
+def test_report_totals_and_one_trade_per_type():
+    s = make_minutes(3 * 1440, 4)
+    res = backtest.run(s, rules=backtest.Rules(overlap=False, max_bars=30, cost_bps=0.5))
+    rep = res.report(trades=5)
+    assert rep["summary"]["trades"] == len(res) == sum(v["trades"] for v in rep["by_type"].values())
+    assert rep["summary"]["total_r"] == pytest.approx(sum(v.get("total_r", 0) for v in rep["by_type"].values()),
+                                                      abs=1e-2)
+    assert sum(rep["summary"]["exits"].values()) == len(res)
+    assert len(rep["trades"]) == 5
+    assert np.all(res.entry_i > res.signal_i)
+    for c in np.unique(res.code).tolist():
+        sel = np.flatnonzero(res.code == c)
+        order = np.argsort(res.entry_i[sel])
+        assert np.all(res.entry_i[sel][order][1:] > res.exit_i[sel][order][:-1])
+
+def test_rules_validate():
+    for kw in ({"entry": "limit"}, {"max_bars": 0}, {"stop_atr": 0}, {"stop_pct": -0.01}, {"target_r": -1}):
+        with pytest.raises(ValueError):
+            backtest.Rules(**kw)
+    with pytest.raises(ValueError):
+        backtest.collect(make_minutes(50), ["nope"])
@@ -0,0 +1,134 @@
+# Candle cache (app/candle_cache.py): single-flight, cancellation, validity and eviction.
+# Run from backend/: python -m pytest -q app/test_candle_cache.py
+import asyncio
+import threading
+import time
+
+import pytest
+
+from app.candle_cache import CandleCache, _estimate_size
+
+def test_concurrent_async_callers_share_one_fetch():
+    cache = CandleCache()
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.02)
+        return [1, 2, 3]
+
+    async def main():
+        return await asyncio.gather(*(cache.aget_or_fetch("td", "EUR/USD", "1min", 100, fetch) for _ in range(10)))
+
+    res = asyncio.run(main())
+    assert len(calls) == 1 and all(r == [1, 2, 3] for r in res)
+    st = cache.stats()
+    assert (st["misses"], st["coalesced"], st["inflight"]) == (1, 9, 0)
+    assert cache.get(cache.make_key("td", "eurusd", "1min", 100)) == [1, 2, 3]
+
+def test_concurrent_thread_callers_share_one_fetch():
+    cache = CandleCache()
+    calls = []
+    started = threading.Event()
+
+    def fetch():
+        calls.append(1)
+        started.set()
+        time.sleep(0.05)
+        return "bars"
+
+    out = []
+    threads = [threading.Thread(target=lambda: out.append(cache.get_or_fetch("td", "X", "1min", 1, fetch)))
+               for _ in range(8)]
+    threads[0].start()
+    started.wait()
+    for t in threads[1:]:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(calls) == 1 and out == ["bars"] * 8
+
+def test_cancelled_waiter_does_not_cancel_the_fill():
+    cache = CandleCache()
+
+    async def main():
+        gate = asyncio.Event()
+
+        async def fetch():
+            await gate.wait()
+            return "bars"
+
+        first = asyncio.ensure_future(cache.aget_or_fetch("td", "X", "1min", 1, fetch))
+        second = asyncio.ensure_future(cache.aget_or_fetch("td", "X", "1min", 1, fetch))
+        await asyncio.sleep(0)
+        first.cancel()          # e.g. a hedged-failover loser
+        await asyncio.sleep(0)
+        gate.set()
+        return first, await second
+
+    first, res = asyncio.run(main())
+    assert first.cancelled() and res == "bars"
+    assert cache.get(cache.make_key("td", "X", "1min", 1)) == "bars"
+
+def test_errors_are_shared_but_not_cached():
+    cache = CandleCache()
+    calls = []
+
+    async def boom():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        raise RuntimeError("upstream down")
+
+    async def main():
+        return await asyncio.gather(*(cache.aget_or_fetch("td", "X", "1min", 1, boom) for _ in range(3)),
+                                    return_exceptions=True)
+
+    res = asyncio.run(main())
+    assert len(calls) == 1 and all(isinstance(r, RuntimeError) for r in res)
+    asyncio.run(main())
+    assert len(calls) == 2     # the failure was not cached
+    with pytest.raises(ZeroDivisionError):
+        cache.get_or_fetch("td", "X", "1min", 1, lambda: 1 / 0)
+    assert cache.stats()["entries"] == 0
+
+def test_invalid_results_are_returned_not_stored():
+    cache = CandleCache()
+    err = {"error": "rate limited"}
+    ok = lambda v: isinstance(v, list)
+    assert cache.get_or_fetch("td", "X", "1min", 1, lambda: err, is_valid=ok) is err
+
+    async def fetch():
+        return err
+
+    assert asyncio.run(cache.aget_or_fetch("td", "X", "1min", 1, fetch, is_valid=ok)) is err
+    assert cache.stats()["entries"] == 0
+    assert cache.get_or_fetch("td", "X", "1min", 1, lambda: [1], is_valid=ok) == [1]
+    assert cache.stats()["entries"] == 1
+
+def test_eviction_by_entry_count_is_lru():
+    cache = CandleCache(max_entries=3)
+    for i in range(3):
+        cache.store("td", f"S{i}", "1min", 1, [i])
+    assert cache.lookup("td", "S0", "1min", 1) == [0]     # S0 becomes most recently used
+    cache.store("td", "S3", "1min", 1, [3])
+    assert cache.lookup("td", "S1", "1min", 1) is None
+    assert [cache.lookup("td", f"S{i}", "1min", 1) for i in (0, 2, 3)] == [[0], [2], [3]]
+    assert cache.stats()["evictions"] == 1
+
+def test_eviction_by_bytes():
+    value = list(range(100))
+    size = _estimate_size(value)
+    cache = CandleCache(max_entries=100, max_bytes=int(size * 2.5))
+    for i in range(4):
+        cache.store("td", f"S{i}", "1min", 1, list(value))
+    st = cache.stats()
+    assert st["entries"] == 2 and st["bytes"] <= cache.max_bytes and st["evictions"] == 2
+    cache.store("td", "big", "1min", 1, list(range(1000)))      # larger than the whole cap: not stored
+    assert cache.lookup("td", "big", "1min", 1) is None and cache.stats()["entries"] == 2
+
+def test_entries_expire(monkeypatch):
+    cache = CandleCache()
+    cache.put(("k",), "v", ttl=10)
+    now = time.monotonic()
+    monkeypatch.setattr(time, "monotonic", lambda: now + 11)
+    assert cache.get(("k",)) is None and cache.stats()["bytes"] == 0
@@ -0,0 +1,118 @@
+# Candle store (app/candle_store.py): append, backfill rewrite, sparse-index lookups, main.py backfill bookkeeping.
+# Run from backend/: python -m pytest -q app/test_candle_store.py
+import os
+
+import numpy as np
+import pytest
+
+from app import candle_store
+from app.candle_series import CandleSeries
+from app.candle_store import CandleStore
+
+T0 = 1_704_067_200   # 2024-01-01 00:00 UTC
+NOW = T0 + 10**8     # far past every bar: nothing is forming unless a test says so
+
+def make_minutes(n: int, t0: int = T0) -> CandleSeries:
+    c = 100 + np.arange(n) * 0.01
+    return CandleSeries(t0 + 60 * np.arange(n), c, c + 0.5, c - 0.5, c + 0.1, np.ones(n))
+
+def same(a: CandleSeries, b: CandleSeries):
+    assert len(a) == len(b)
+    for col in ("t", "o", "h", "l", "c", "v"):
+        np.testing.assert_allclose(getattr(a, col), getattr(b, col))
+
+def series_dir(store: CandleStore) -> str:
+    return os.path.join(store.root, "EURUSD", "60s")
+
+@pytest.fixture
+def store(tmp_path):
+    return CandleStore(str(tmp_path))
+
+def test_default_dir_does_not_depend_on_cwd():
+    if not os.getenv("CANDLE_STORE_DIR"):
+        assert os.path.isabs(candle_store.STORE_DIR)
+        assert candle_store.STORE_DIR.endswith(os.path.join("data", "candles"))
+
+def test_append_is_incremental_and_ignores_overlap(store):
+    bars = make_minutes(300)
+    assert store.append("EUR/USD", "1min", bars[:200], now=NOW) == 200
+    assert store.append("EUR/USD", "1min", bars[:200], now=NOW) == 0
+    assert store.append("EUR/USD", "1min", bars[150:], now=NOW) == 100
+    same(store.read("EUR/USD", "1min"), bars)
+    meta = open(os.path.join(series_dir(store), "meta.json")).read()
+    assert '"gen": 0' in meta and '"count": 300' in meta
+    # a second store on the same directory (another worker) sees the committed bars
+    same(CandleStore(store.root).read("EURUSD", "1min"), bars)
+
+def test_forming_bar_is_skipped(store):
+    bars = make_minutes(10)
+    # the last bar opened 30s before `now`: still forming
+    now = int(bars.t[-1]) + 30
+    assert store.append("EUR/USD", "1min", bars, now=now) == 9
+    assert int(store.read("EUR/USD", "1min").t[-1]) == int(bars.t[-2])
+    assert store.append("EUR/USD", "1min", bars, now=now + 60) == 1
+    assert store.coverage("EUR/USD", "1min") == {"count": 10, "first": T0, "last": int(bars.t[-1])}
+
+def test_backfill_rewrites_new_generation(store):
+    bars = make_minutes(500)
+    store.append("EUR/USD", "1min", bars[300:], now=NOW)
+    reader = store._get("EUR/USD", "1min").view()
+    held = store.read("EUR/USD", "1min")
+    assert store.append("EUR/USD", "1min", bars[:320], now=NOW) == 300
+    same(store.read("EUR/USD", "1min"), bars)
+    files = set(os.listdir(series_dir(store)))
+    assert {f"{k}.1" for k in "tohlcv"} <= files
+    assert not {f"{k}.0" for k in "tohlcv"} & files
+    assert store._get("EUR/USD", "1min").view().gen == 1
+    # readers mapping the old generation keep their (unlinked) files
+    assert reader.gen == 0
+    same(held, bars[300:])
+
+def test_backfill_into_hole(store):
+    bars = make_minutes(400)
+    store.append("EUR/USD", "1min", bars[:100], now=NOW)
+    store.append("EUR/USD", "1min", bars[300:], now=NOW)
+    assert store.append("EUR/USD", "1min", bars[50:350], now=NOW) == 200
+    same(store.read("EUR/USD", "1min"), bars)
+
+@pytest.mark.parametrize("stride", [7, 64, 1024])
+def test_bound_across_index_blocks(store, monkeypatch, stride):
+    monkeypatch.setattr(candle_store, "INDEX_STRIDE", stride)
+    bars = make_minutes(2500)
+    store.append("EUR/USD", "1min", bars, now=NOW)
+    r = store._get("EUR/USD", "1min").view()
+    assert len(r.index) == -(-2500 // stride)
+    t = bars.t
+    # every bar time, the gaps between bars and both ends
+    probes = np.concatenate([t, t + 30, [t[0] - 1]])
+    for ts in map(int, probes):
+        for side in ("left", "right"):
+            assert r.bound(ts, side) == int(np.searchsorted(t, ts, side=side)), (ts, side)
+
+def test_ranged_read_and_limit(store):
+    bars = make_minutes(1000)
+    store.append("EUR/USD", "1min", bars, now=NOW)
+    lo, hi = int(bars.t[100]), int(bars.t[199])
+    same(store.read("EUR/USD", "1min", lo, hi), bars[100:200])
+    # bounds between bars
+    same(store.read("EUR/USD", "1min", lo - 30, hi + 30), bars[100:200])
+    # limit keeps the newest
+    same(store.read("EUR/USD", "1min", lo, hi, limit=10), bars[190:200])
+    same(store.tail("EUR/USD", "1min", 5), bars[-5:])
+    assert not len(store.read("EUR/USD", "1min", int(bars.t[-1]) + 1))
+    assert not len(store.read("EUR/USD", "1min", hi, lo))
+
+def test_empty_series(store):
+    assert not len(store.read("GBP/USD", "1min"))
+    assert store.coverage("GBP/USD", "1min") == {"count": 0, "first": None, "last": None}
+    assert store.append("GBP/USD", "1min", CandleSeries.empty(), now=NOW) == 0
+
+def test_backfill_tracking_is_bounded(monkeypatch):
+    main = pytest.importorskip("app.main")
+    monkeypatch.setattr(main, "_backfilled", type(main._backfilled)())
+    monkeypatch.setattr(main, "BACKFILL_TRACK_MAX", 2)
+    main._tried_ranges("A", 60).append((0, 1))
+    main._tried_ranges("B", 60)
+    assert main._tried_ranges("A", 60) == [(0, 1)]   # touched: B is now the oldest
+    main._tried_ranges("C", 60)
+    assert list(main._backfilled) == [("A", 60), ("C", 60)]
@@ -0,0 +1,105 @@
+# Incremental series sync (app/candle_sync.py) against a fake provider.
+# Run from backend/: python -m pytest -q app/test_candle_sync.py
+import asyncio
+import time
+
+from app.candle_sync import SeriesSync
+from app.quota import Shrunk
+
+class FakeProvider:
+    """Minute bars up to the current one; start_date / outputsize behave like TwelveData."""
+    def __init__(self, n: int):
+        now = int(time.time()) // 60 * 60
+        self.bars = [self.bar(now - 60 * k, k) for k in range(n - 1, -1, -1)]
+        self.calls = []
+        self.delay = 0.0
+
+    @staticmethod
+    def bar(t: int, x: float):
+        return {"t": t, "o": x, "h": x + 1, "l": x - 1, "c": x}
+
+    async def fetch(self, size, start):
+        self.calls.append((size, start))
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        sel = [b for b in self.bars if start is None or b["t"] >= start]
+        return sel[-size:]
+
+    def revise_last(self, close: float):
+        self.bars[-1] = {**self.bars[-1], "c": close, "h": max(self.bars[-1]["h"], close)}
+
+def sync(s: SeriesSync, p: FakeProvider, n: int, fetch=None):
+    return asyncio.run(s.async_sync("test", "EUR/USD", "1min", n, fetch or p.fetch,
+                                    time_of=lambda c: c["t"], start_of=lambda c: c["t"]))
+
+def test_forming_bar_revision_is_merged_incrementally():
+    p, s = FakeProvider(300), SeriesSync()
+    assert sync(s, p, 100) == p.bars[-100:]
+    p.revise_last(123.0)
+    got = sync(s, p, 100)
+    assert got == p.bars[-100:] and got[-1]["c"] == 123.0
+    assert p.calls[1][1] == p.bars[-1]["t"] and p.calls[1][0] <= 3    # resumed at the forming bar
+    assert (s.full_fetches, s.incremental_fetches) == (1, 1)
+
+def test_new_closed_bar_is_appended():
+    p, s = FakeProvider(300), SeriesSync()
+    sync(s, p, 50)
+    p.bars.append(FakeProvider.bar(p.bars[-1]["t"] + 60, 999))
+    st = s.state("test", "EUR/USD", "1min")
+    st.synced_at -= 60      # a minute has passed
+    assert sync(s, p, 50) == p.bars[-50:]
+    assert s.incremental_fetches == 1 and len(st.candles) == 50
+
+def test_response_not_starting_at_forming_bar_falls_back_to_full_fetch():
+    p, s = FakeProvider(300), SeriesSync()
+    sync(s, p, 50)
+    forming = p.bars[-1]["t"]
+    p.bars = [b for b in p.bars if b["t"] != forming]     # the provider reshuffled its history
+    assert sync(s, p, 50) == p.bars[-50:]
+    assert (s.full_fetches, s.incremental_fetches) == (2, 1)
+
+def test_larger_window_and_stale_series_refetch_in_full():
+    p, s = FakeProvider(300), SeriesSync()
+    sync(s, p, 50)
+    assert sync(s, p, 120) == p.bars[-120:]
+    assert p.calls[-1] == (120, None)
+    assert sync(s, p, 80) == p.bars[-80:]         # smaller windows are served from what is held
+    s.state("test", "EUR/USD", "1min").synced_at -= 3 * 3600
+    sync(s, p, 80)
+    assert p.calls[-1] == (120, None) and s.full_fetches == 3
+
+def test_shrunk_full_fetch_claims_only_what_came_back():
+    p, s = FakeProvider(300), SeriesSync()
+
+    async def shrunk(size, start):
+        bars = await p.fetch(min(size, 40), start)
+        return Shrunk(bars, size, 40) if start is None and size > 40 else bars
+
+    got = sync(s, p, 100, shrunk)
+    assert isinstance(got, Shrunk) and got.bars == p.bars[-40:] and got.requested == 100
+    assert s.state("test", "EUR/USD", "1min").capacity == 40
+    assert sync(s, p, 100) == p.bars[-100:]       # credits are back: the full window is fetched
+    assert p.calls[-1] == (100, None)
+
+def test_errors_leave_the_series_untouched():
+    p, s = FakeProvider(300), SeriesSync()
+    sync(s, p, 50)
+
+    async def down(size, start):
+        return {"error": "rate limited"}
+
+    assert sync(s, p, 50, down) == {"error": "rate limited"}
+    assert s.state("test", "EUR/USD", "1min").candles == p.bars[-50:]
+
+def test_concurrent_syncs_of_one_series_fetch_in_full_once():
+    p, s = FakeProvider(300), SeriesSync()
+    p.delay = 0.02
+
+    async def main():
+        return await asyncio.gather(*(s.async_sync("test", "EUR/USD", "1min", 60, p.fetch, time_of=lambda c: c["t"],
+                                                   start_of=lambda c: c["t"]) for _ in range(5)))
+
+    res = asyncio.run(main())
+    assert all(r == p.bars[-60:] for r in res)
+    assert s.full_fetches == 1 and s.incremental_fetches == 4
+    assert [start for _, start in p.calls[1:]] == [p.bars[-1]["t"]] * 4
@@ -0,0 +1,131 @@
+# Circuit breakers (app/circuit_breaker.py): tripping, half-open probes, cooldowns, guarded().
+# Run from backend/: python -m pytest -q app/test_circuit_breaker.py
+import asyncio
+import time
+import types
+
+import pytest
+
+from app import circuit_breaker as cb
+from app.quota import QuotaExhausted
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cb, "time", types.SimpleNamespace(monotonic=lambda: now[0], perf_counter=time.perf_counter))
+    return now
+
+@pytest.fixture
+def breakers(monkeypatch):
+    reg = cb.BreakerRegistry()
+    monkeypatch.setattr(cb, "BREAKERS", reg)
+    return reg
+
+def trip(br):
+    for _ in range(cb.BREAKER_MIN_CALLS):
+        br.record(False, 10)
+    assert br.state == cb.OPEN
+
+def test_trips_only_after_min_calls_and_failure_rate(clock):
+    br = cb.CircuitBreaker("p")
+    for _ in range(cb.BREAKER_MIN_CALLS - 1):
+        br.record(False, 10)
+    assert br.state == cb.CLOSED          # too few calls to judge
+    br = cb.CircuitBreaker("p")
+    for ok in [True, True, True, False, False]:
+        br.record(ok, 10)
+    assert br.state == cb.CLOSED          # 40% < 50%
+    br.record(False, 10)
+    assert br.state == cb.OPEN and br.trips == 1   # 50%
+    with pytest.raises(cb.CircuitOpenError):
+        br.allow()
+
+def test_single_half_open_probe(clock):
+    br = cb.CircuitBreaker("p")
+    trip(br)
+    clock[0] += cb.BREAKER_COOLDOWN
+    br.allow()                            # the probe
+    assert br.state == cb.HALF_OPEN
+    with pytest.raises(cb.CircuitOpenError):
+        br.allow()                        # a second caller while the probe is out
+    br.record(True, 10)
+    assert br.state == cb.CLOSED
+    br.allow()
+    br.allow()
+
+def test_failed_probes_double_the_cooldown_up_to_the_max(clock):
+    br = cb.CircuitBreaker("p")
+    trip(br)
+    cooldowns = []
+    for _ in range(6):
+        clock[0] += br._cooldown - 0.1
+        with pytest.raises(cb.CircuitOpenError):
+            br.allow()
+        clock[0] += 0.1
+        br.allow()
+        br.record(False, 10)
+        cooldowns.append(br._cooldown)
+    assert cooldowns == [60.0, 120.0, 240.0, 300.0, 300.0, 300.0]
+    clock[0] += 300
+    br.allow()
+    br.record(True, 10)
+    assert br._cooldown == cb.BREAKER_COOLDOWN
+
+def test_slow_calls_count_as_failures(clock):
+    br = cb.CircuitBreaker("p")
+    for _ in range(cb.BREAKER_MIN_CALLS):
+        br.record(True, cb.BREAKER_SLOW_CALL_MS + 1)
+    assert br.state == cb.OPEN
+
+def test_guarded_records_outcomes(clock, breakers):
+    async def ok():
+        return [1]
+
+    async def bad():
+        raise RuntimeError("down")
+
+    async def main():
+        assert await cb.guarded("p", ok) == [1]
+        assert await cb.guarded("p", ok, is_valid=lambda v: False) == [1]
+        for _ in range(3):    # with the invalid result: 4 of 5 calls failed
+            with pytest.raises(RuntimeError):
+                await cb.guarded("p", bad)
+        calls = []
+        with pytest.raises(cb.CircuitOpenError):
+            await cb.guarded("p", lambda: calls.append(1))
+        return calls
+
+    assert asyncio.run(main()) == []      # open: fn not called at all
+    assert breakers.get("p").state == cb.OPEN
+
+def test_guarded_slow_call_is_a_failure(clock, breakers, monkeypatch):
+    monkeypatch.setattr(cb, "BREAKER_SLOW_CALL_MS", 5.0)
+
+    async def slow():
+        await asyncio.sleep(0.02)
+        return [1]
+
+    async def main():
+        for _ in range(cb.BREAKER_MIN_CALLS):
+            await cb.guarded("p", slow)
+
+    asyncio.run(main())
+    assert breakers.get("p").state == cb.OPEN
+
+@pytest.mark.parametrize("exc", [QuotaExhausted("p", "daily", 10.0), asyncio.CancelledError()])
+def test_quota_and_cancellation_release_without_recording(clock, breakers, exc):
+    br = breakers.get("p")
+    trip(br)
+    clock[0] += cb.BREAKER_COOLDOWN
+
+    async def refused():
+        raise exc
+
+    async def main():
+        with pytest.raises(type(exc)):
+            await cb.guarded("p", refused)
+
+    asyncio.run(main())
+    # the probe slot is free again and nothing was recorded against the provider
+    assert br.state == cb.HALF_OPEN and not br._probe_inflight and br.trips == 1
+    br.allow()
@@ -0,0 +1,382 @@
+# Array detectors (app/detector_arrays.py) against the loop versions they replace.
+# Run from backend/: python -m pytest -q app/test_detectors.py
+import numpy as np
+import pytest
+
+from app import main, signals, ict_models
+from app import detector_arrays as arrays
+from app import live_detectors, pipeline, structure
+from app.candle_series import CandleSeries, format_time
+from app.rolling import RollingExtremes, SparseTable, trailing_max, trailing_min
+from app.stream import signal_id
+
+def make_series(n: int, seed: int, vol: float = 0.4) -> CandleSeries:
+    rng = np.random.default_rng(seed)
+    c = 100 + np.cumsum(rng.normal(0, vol, n))
+    o = c + rng.normal(0, vol, n)
+    h = np.maximum(o, c) + rng.random(n) * vol
+    l = np.minimum(o, c) - rng.random(n) * vol
+    # repeated prices so equality edges (>, <) are exercised
+    h[::17] = np.roll(h, 1)[::17]
+    l[::19] = np.roll(l, 1)[::19]
+    return CandleSeries(1_700_000_000 + 60 * np.arange(n), o, h, l, c)
+
+SERIES = [make_series(n, seed) for n, seed in ((0, 0), (1, 1), (2, 2), (5, 3), (6, 4), (40, 5), (600, 6))]
+
+@pytest.mark.parametrize("s", SERIES, ids=lambda s: f"{len(s)}bars")
+def test_main_family_matches_loops(s):
+    assert arrays.detect_order_blocks(s) == main.detect_order_blocks(s)
+    assert arrays.detect_fvg(s) == main.detect_fvg(s)
+    assert arrays.detect_turtle_soup(s) == main.detect_turtle_soup(s)
+    assert arrays.detect_liq_sweep(s) == main.detect_liq_sweep(s)
+    reference = sorted(main.detect_order_blocks(s) + main.detect_fvg(s) + main.detect_turtle_soup(s)
+                       + main.detect_liq_sweep(s), key=lambda x: x.get("time", ""))
+    assert main.detect_all(s) == reference
+
+@pytest.mark.parametrize("s", SERIES, ids=lambda s: f"{len(s)}bars")
+def test_signals_and_models_match_loops(s):
+    assert signals.compute_all_signals(s) == {"turtle": signals.detect_turtle_soup(s), "fvg": signals.detect_fvg(s),
+                                              "order_blocks": signals.detect_order_blocks(s)}
+    assert arrays.detect_bos(s) == ict_models.detect_bos(s)
+    models = ict_models.compute_all_ict_models(s)
+    events = structure.analyze(s).records()
+    assert models["bos"] + models["choch"] == sorted(events, key=lambda e: e["type"].startswith("choch"))
+    assert models["choch"] == ict_models.detect_choch(s)
+
+def test_signal_family_order_blocks_share_structure(monkeypatch):
+    s = SERIES[-1]
+    calls = []
+    analyze = structure.analyze
+    monkeypatch.setattr(structure, "analyze", lambda *a, **kw: calls.append(1) or analyze(*a, **kw))
+    res = pipeline.PIPELINE.run(s, ("signals",))
+    assert len(calls) == 1
+    assert res.signals["structure_ob"] == signals.detect_order_blocks(s)
+    # each block is placed at its break bar
+    t = res.features.t
+    assert [int(t[i]) for i in arrays.order(res.selected["structure_ob"])[0]] == \
+        [b["break_time"] for b in res.signals["structure_ob"]]
+
+def test_pipeline_shares_features_and_times_detectors():
+    s = make_series(500, 13)
+    res = pipeline.PIPELINE.run(s)
+    assert set(res.timing_ms) == {"features", *pipeline.REGISTRY}
+    # every detector read the same feature buffers
+    assert {lookback for lookback, _ in res.features._extremes} == {arrays.EXTREME_LOOKBACK}
+    for name, hits in res.hits.items():
+        assert all(np.all(np.diff(v) > 0) for v in hits.values()), name
+    merged = res.merged(["turtle", "fvg_gap", "bos"])
+    assert [x["time"] for x in merged] == sorted(x["time"] for x in merged)
+    assert len(merged) == sum(len(res.signals[k]) for k in ("turtle", "fvg_gap", "bos"))
+
+def test_order_block_lookback():
+    s = make_series(200, 7, vol=1.0)
+    for lookback in (1, 2, 3, 30, 250):
+        assert arrays.detect_order_blocks(s, lookback) == main.detect_order_blocks(s, lookback)
+
+@pytest.mark.parametrize("lookback", [1, 2, 6, 10, 50, 500])
+def test_extreme_lookback(lookback):
+    s = make_series(300, 10, vol=1.0)
+    turtle = arrays.turtle_soup_hits(s, lookback)
+    sweep = arrays.liq_sweep_hits(s, lookback)
+    for k in range(len(s)):
+        w = s[:k + 1]
+        for hits, loop in ((turtle, main.detect_turtle_soup), (sweep, main.detect_liq_sweep)):
+            expected = sorted(sig["type"] for sig in loop(w, lookback))
+            assert sorted(t for t, idx in hits.items() if k in idx) == expected
+
+@pytest.mark.parametrize("lookback", [1, 6, 20])
+def test_live_extreme_lookback_matches_loops(lookback):
+    s = make_series(120, 11, vol=1.0)
+    live = live_detectors.DetectorSet({"turtle_soup": live_detectors.TurtleSoup(lookback),
+                                       "liq_sweep": live_detectors.LiquiditySweep(lookback)})
+    for k in range(1, len(s) + 1):
+        live.feed(s[:k])
+        assert live.signals() == {"turtle_soup": main.detect_turtle_soup(s[:k], lookback),
+                                  "liq_sweep": main.detect_liq_sweep(s[:k], lookback)}
+
+def test_extreme_lookback_needs_full_window():
+    s = make_series(60, 12, vol=1.0)
+    for bad in (0, -3):
+        for fn in (main.detect_turtle_soup, main.detect_liq_sweep, arrays.turtle_soup_hits, arrays.liq_sweep_hits):
+            with pytest.raises(ValueError):
+                fn(s, bad)
+        for cls in (live_detectors.TurtleSoup, live_detectors.LiquiditySweep):
+            with pytest.raises(ValueError):
+                cls(bad)
+    # shorter than the window: nothing, rather than a partial window (or max() of nothing)
+    assert main.detect_turtle_soup(s[:21], 20) == [] and main.detect_liq_sweep(s[:20], 20) == []
+    assert not any(k < 21 for idx in arrays.turtle_soup_hits(s, 20).values() for k in idx)
+    assert not any(k < 20 for idx in arrays.liq_sweep_hits(s, 20).values() for k in idx)
+
+def test_hits_at_every_bar_match_window_loops():
+    # the loop versions only judge the last bar of their window: replay every prefix
+    s = make_series(300, 8, vol=1.0)
+    fvg = arrays.fvg3_hits(s)
+    turtle = arrays.turtle_soup_hits(s)
+    sweep = arrays.liq_sweep_hits(s)
+    # the extremes exclude the breakout / sweep bar itself, so both patterns do fire
+    assert all(len(idx) for idx in {**turtle, **sweep}.values())
+    for k in range(len(s)):
+        w = s[:k + 1]
+        for hits, loop in ((fvg, main.detect_fvg), (turtle, main.detect_turtle_soup), (sweep, main.detect_liq_sweep)):
+            expected = sorted(sig["type"] for sig in loop(w))
+            assert sorted(t for t, idx in hits.items() if k in idx) == expected
+
+def test_hits_are_sorted_int_indices():
+    s = make_series(1000, 9)
+    for fn in (arrays.order_block_hits, arrays.fvg3_hits, arrays.gap_hits, arrays.turtle_break_hits, arrays.bos_hits):
+        for idx in fn(s).values():
+            assert idx.dtype == np.int64
+            assert np.all(np.diff(idx) > 0)
+
+@pytest.mark.parametrize("window", [1, 2, 3, 10, 64, 1000])
+def test_rolling_backends_match_bruteforce(window):
+    x = np.random.default_rng(11).normal(size=400).round(1)   # rounded: ties
+    hi = np.array([x[max(0, i - window + 1):i + 1].max() for i in range(len(x))])
+    lo = np.array([x[max(0, i - window + 1):i + 1].min() for i in range(len(x))])
+    assert np.array_equal(trailing_max(x, window), hi)
+    assert np.array_equal(trailing_min(x, window), lo)
+    r = RollingExtremes(window)
+    for i, v in enumerate(x):
+        r.push(v)
+        assert (r.max(), r.min()) == (hi[i], lo[i])
+
+def test_sparse_table_ranges():
+    x = np.random.default_rng(12).normal(size=257)
+    st = SparseTable(x, np.minimum)
+    lo = np.array([0, 5, 100, 256, 0])
+    hi = np.array([256, 5, 228, 256, 1])
+    assert np.array_equal(st.query(lo, hi), [x[a:b + 1].min() for a, b in zip(lo, hi)])
+    with pytest.raises(ValueError):
+        SparseTable(x, max_len=4).query(0, 10)
+
+@pytest.mark.parametrize("strength", [1, 2, 3, 5])
+def test_swing_points_match_bruteforce(strength):
+    s = make_series(400, 14, vol=1.0)
+    k = strength
+    highs = [i for i in range(k, len(s) - k)
+             if all(s.h[i] > s.h[j] for j in range(i - k, i + k + 1) if j != i)]
+    lows = [i for i in range(k, len(s) - k)
+            if all(s.l[i] < s.l[j] for j in range(i - k, i + k + 1) if j != i)]
+    sh, sl = structure.swing_points(s, k)
+    assert sh.tolist() == highs and sl.tolist() == lows
+
+@pytest.mark.parametrize("strength", [1, 2, 3, 5])
+def test_structure_tracker_matches_analyze(strength):
+    s = make_series(500, 15, vol=1.0)
+    tracker = structure.StructureTracker(strength)
+    for j in range(len(s)):
+        # a forming bar revised once before it closes
+        bar = s[j]
+        tracker.on_bar({"t": bar["t"], "o": bar["o"], "h": bar["o"], "l": bar["o"], "c": bar["o"]})
+        tracker.on_bar(bar)
+    assert tracker.records() == structure.analyze(s, strength).records()
+
+def test_structure_events():
+    s = make_series(2000, 16, vol=1.0)
+    st = structure.analyze(s)
+    events = st.records()
+    assert events
+    trend = 0
+    for e in events:
+        kind, side = e["type"].split("_")
+        sign = 1 if side == "bull" else -1
+        # CHoCH only against an established trend, BOS with it (or before one exists)
+        assert (kind == "choch") == (trend == -sign)
+        trend = sign
+        assert (e["price"] > e["level"]) if sign == 1 else (e["price"] < e["level"])
+        assert e["swing_time"] < e["time"]
+        ob = e["ob"]
+        assert ob["time"] <= e["time"] and (ob["close"] < ob["open"]) == (sign == 1)
+    assert st.trend == trend
+    blocks = signals.detect_order_blocks(s)
+    assert len({(b["time"], b["type"]) for b in blocks}) == len(blocks)
+    assert all(b["break_time"] >= b["time"] for b in blocks)
+
+def test_fvg_tracker_incremental_matches_bootstrap():
+    from app.fvg_tracker import FVGTracker
+    s = make_series(800, 17, vol=1.0)
+    live = FVGTracker()
+    for j in range(len(s)):
+        bar = s[j]
+        live.on_bar({"t": bar["t"], "o": bar["o"], "h": bar["o"], "l": bar["o"], "c": bar["o"]})   # forming
+        live.on_bar(bar)
+    boot = FVGTracker()
+    filled = boot.load(s)
+    # a gap filled during the bootstrap keeps the time of the first bar that reached its far edge
+    assert len(filled) == boot.filled and len({g.filled_t for g in filled}) > 1
+    for g in filled:
+        j = int(np.searchsorted(s.t, g.t))
+        k = next(k for k in range(j + 1, len(s))
+                 if (s.l[k] <= g.bottom if g.type == "fvg_bull" else s.h[k] >= g.top))
+        assert g.filled_t == int(s.t[k])
+    key = lambda g: (g.t, g.type, g.top, g.bottom, g.open_top, g.open_bottom)
+    assert sorted(map(key, live.order.values())) == sorted(map(key, boot.order.values()))
+    assert (live.created, live.filled) == (boot.created, boot.filled)
+    assert live.created == sum(len(v) for v in arrays.fvg3_hits(s[:-1]).values())
+    for g in boot.order.values():
+        j = int(np.searchsorted(s.t, g.t))
+        if g.type == "fvg_bull":
+            assert g.open_top == min(g.top, s.l[j + 1:].min()) > g.bottom
+        else:
+            assert g.open_bottom == max(g.bottom, s.h[j + 1:].max()) < g.top
+
+def test_fvg_interval_index_queries():
+    from app.fvg_tracker import BULL, Gap
+    from app.interval_index import IntervalIndex
+    rng = np.random.default_rng(18)
+    idx, gaps = IntervalIndex(), []
+    for _ in range(500):
+        lo = float(rng.uniform(0, 100))
+        g = Gap(BULL, 0, lo + float(rng.uniform(0, 5)), lo)
+        idx.insert(g, g.open_bottom, g.open_top)
+        gaps.append(g)
+    for g in gaps[::3]:
+        idx.remove(g, g.open_bottom)
+    alive = gaps[1::3] + gaps[2::3]
+    assert len(idx) == len(alive) and [g.open_bottom for g in idx] == sorted(g.open_bottom for g in alive)
+    for lo, hi in ((-1, 0.5), (10, 10), (40, 47.5), (99, 200), (-5, 500)):
+        expected = {g.id for g in alive if g.open_bottom <= hi and g.open_top >= lo}
+        assert {g.id for g in idx.overlapping(lo, hi)} == expected
+
+def _zone_state(z, s):
+    after = s.t > z["break_time"]
+    if z["type"].endswith("bull"):
+        broke, hit = np.any(s.c[after] < z["bottom"]), np.any(s.l[after] <= z["top"])
+    else:
+        broke, hit = np.any(s.c[after] > z["top"]), np.any(s.h[after] >= z["bottom"])
+    return "invalidated" if broke else "mitigated" if hit else "active"
+
+def test_zone_store_dedupes_and_tracks_mitigation():
+    from detectors.ict_ob import detect_order_blocks
+    from detectors.zone_store import ZoneStore
+    s = make_series(1500, 19, vol=1.0)
+    store = ZoneStore(max_per_key=10_000, max_age_s=10**9)
+    # overlapping polled windows, as a client re-posting its recent bars would send
+    for end in range(300, len(s) + 1, 200):
+        w = s[max(0, end - 300):end]
+        store.ingest("XAU/USD", "5m", detect_order_blocks(w, "XAU/USD", "5m"), w)
+    zones = store.records("XAUUSD", "5m")
+    assert len({z["time"] for z in zones}) == len(zones) and store.duplicates > 0
+    for z in zones:
+        assert z["state"] == _zone_state(z, s), z
+    price = float(s.c[-1])
+    expected = [z for z in zones if z["state"] != "invalidated"
+                and z["bottom"] <= price * 1.01 and z["top"] >= price * 0.99]
+    near = store.near("xauusd", "5m", price, 0.01)
+    assert sorted(z["time"] for z in near) == sorted(z["time"] for z in expected)
+
+def test_zone_store_retention():
+    from detectors.ict_ob import detect_order_blocks
+    from detectors.zone_store import ZoneStore
+    s = make_series(1500, 20, vol=1.0)
+    cands = detect_order_blocks(s, "EURUSD", "1m")
+    store = ZoneStore(max_per_key=5, max_age_s=10**9)
+    store.ingest("EURUSD", "1m", cands, s)
+    kept = store.records("EURUSD", "1m")
+    assert [z["time"] for z in kept] == sorted(c["time"] for c in cands)[-5:]
+    store = ZoneStore(max_per_key=10_000, max_age_s=600)
+    store.ingest("EURUSD", "1m", cands, s)
+    assert all(z["time"] >= int(s.t[-1]) - 600 for z in store.records())
+    assert store.stats()["indexed"] <= store.stats()["zones"]
+
+def test_mtf_context_uses_closed_higher_bars():
+    from app import mtf
+    from app.resample import resample
+    base = make_series(3000, 22, vol=0.3)
+    base = CandleSeries(base.t - base.t[0] % 3600, base.o, base.h, base.l, base.c)   # hour aligned
+    frames = mtf.run({iv: base if iv == "1min" else resample(base, iv) for iv in ("1min", "15min", "1h")})
+    out = mtf.confluence(frames, limit=10**9)
+    entries = sum(len(v) for f in frames.values() for name in mtf.ENTRY_DETECTORS
+                  for v in f.result.hits[name].values())
+    assert len(out) == entries
+    assert [x["epoch"] for x in out] == sorted((x["epoch"] for x in out), reverse=True)
+    for x in out[:300]:
+        f = frames[x["tf"]]
+        lag = 1 if x["type"].startswith("order_block") else 0
+        known = int(f.series.t[int(np.searchsorted(f.series.t, x["epoch"])) + lag]) + f.step
+        biases = []
+        for iv, ctx in x["context"].items():
+            h = frames[iv]
+            closed = [i for i in range(len(h.series)) if h.series.t[i] + h.step <= known]
+            if not closed:
+                assert ctx is None
+                continue
+            i = closed[-1]
+            # brute-force bias: side of the last structure event up to bar i
+            evs = [e for e in h.events if e["time"] <= h.series.t[i]]
+            bias = None if not evs else ("bull" if evs[-1]["type"].endswith("bull") else "bear")
+            assert ctx["bias"] == bias and ctx["bar_time"] == format_time(h.series.t[i])
+            biases.append(bias)
+        biases = [b for b in biases if b]
+        agree = [b for b in biases if (b == "bull") == (x["side"] > 0)]
+        assert x["score"] == len(agree) and x["aligned"] == (bool(biases) and len(agree) == len(biases))
+    assert all(x["tf"] != "1h" or x["context"] == {} for x in out)
+
+def _replay(s: CandleSeries, window: int):
+    """Poll-style windows through main_detectors(); the forming bar is first seen flat, then revised."""
+    live = live_detectors.main_detectors()
+    held = {}
+    for k in range(1, len(s) + 1):
+        w = s[max(0, k - window):k]
+        last = w[-1:]
+        flat = CandleSeries(last.t, last.o, last.o, last.o, last.o)
+        for win in (CandleSeries.concat([w[:-1], flat]), w):
+            added, removed = live.feed(win)
+            # index_from_end shifts with every bar: match signals by their stable id
+            for sig in removed:
+                held.pop(signal_id(sig))
+            for sig in added:
+                held[signal_id(sig)] = sig
+        yield w, live, held
+
+@pytest.mark.parametrize("window", [30, 41, 200])   # windows at least as long as the lookbacks
+def test_live_detectors_replay_matches_batch(window):
+    s = make_series(400, 9, vol=0.6)
+    seen = 0
+    for w, live, held in _replay(s, window):
+        want = main.detect_all(w)
+        assert live.merged() == want
+        assert sorted(held) == sorted(map(signal_id, want))
+        seen += len(want)
+    assert seen > 50
+
+def _replay_history(s: CandleSeries, live):
+    """Every prefix of `s` through `live`; the forming bar is first seen flat, then revised."""
+    held = {}
+    for k in range(1, len(s) + 1):
+        w = s[:k]
+        last = w[-1:]
+        flat = CandleSeries(last.t, last.o, last.o, last.o, last.o)
+        for win in (CandleSeries.concat([w[:-1], flat]), w):
+            added, removed = live.feed(win)
+            for sig in removed:
+                held.pop(repr(sig))
+            for sig in added:
+                held[repr(sig)] = sig
+        yield w, held
+
+def test_live_signal_family_replay_matches_batch():
+    s = make_series(300, 11)
+    live = live_detectors.signal_detectors()
+    for w, held in _replay_history(s, live):
+        want = {"turtle": signals.detect_turtle_soup(w), "fvg": signals.detect_fvg(w)}
+        assert live.signals() == want
+        assert sorted(held) == sorted(map(repr, want["turtle"] + want["fvg"]))
+    assert all(len(v) for v in want.values())
+    assert live.merged() == sorted(want["turtle"] + want["fvg"], key=lambda x: x["time"])
+
+def test_live_bos_replay_matches_batch():
+    s = make_series(300, 12)
+    live = live_detectors.DetectorSet({"bos": live_detectors.BreakOfStructure()})
+    for w, held in _replay_history(s, live):
+        want = ict_models.detect_bos(w)
+        assert live.merged() == want
+        assert sorted(held) == sorted(map(repr, want))
+    assert want
+
+def test_live_merge_is_by_integer_time():
+    s = make_series(200, 13)
+    live = live_detectors.ict_model_detectors()
+    live.feed(s)
+    assert live.merged() == structure.analyze(s).records()
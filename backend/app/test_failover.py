@@ -0,0 +1,75 @@
+# Provider failover (app/failover.py) with fake providers.
+# Run from backend/: python -m pytest -q app/test_failover.py
+import asyncio
+import time
+
+from app import failover
+
+class Fake:
+    """A provider that answers `value` (or raises it) after `delay` seconds."""
+    def __init__(self, name, delay, value):
+        self.name, self.delay, self.value = name, delay, value
+        self.started = None
+        self.cancelled = False
+
+    async def __call__(self):
+        self.started = time.perf_counter()
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        if isinstance(self.value, Exception):
+            raise self.value
+        return self.value
+
+def run(fakes, **kw):
+    async def main():
+        t0 = time.perf_counter()
+        res = await failover.race([(f.name, f) for f in fakes], adaptive=False, **kw)
+        await asyncio.sleep(0)    # let cancellations land
+        return res, t0
+    return asyncio.run(main())
+
+def test_slow_primary_triggers_a_hedge():
+    slow, fast = Fake("a", 1.0, "A"), Fake("b", 0.01, "B")
+    res, t0 = run([slow, fast], mode="hedged", hedge_delay=0.05)
+    assert res["provider"] == "b" and res["result"] == "B" and res["mode"] == "hedged"
+    assert 0.04 <= fast.started - t0 < 0.5
+    assert slow.cancelled
+    assert res["ttfb_ms"] < 500
+
+def test_failed_primary_launches_the_next_immediately():
+    down, ok = Fake("a", 0.01, RuntimeError("boom")), Fake("b", 0.01, "B")
+    res, t0 = run([down, ok], mode="hedged", hedge_delay=5.0)
+    assert res["provider"] == "b" and res["errors"] == {"a": "boom"}
+    assert ok.started - t0 < 0.5      # not after the 5s hedge delay
+
+def test_invalid_result_counts_as_failure_in_sequential_mode():
+    bad, ok = Fake("a", 0.01, {"error": "no data"}), Fake("b", 0.01, "B")
+    res, _ = run([bad, ok], mode="sequential", is_valid=lambda v: isinstance(v, str))
+    assert res["provider"] == "b" and res["errors"] == {"a": {"error": "no data"}}
+    assert ok.started >= bad.started + 0.01
+
+def test_sequential_waits_for_a_slow_provider():
+    slow, other = Fake("a", 0.1, "A"), Fake("b", 0.01, "B")
+    res, _ = run([slow, other], mode="sequential")
+    assert res["provider"] == "a" and other.started is None
+
+def test_parallel_fires_all_and_cancels_losers():
+    fakes = [Fake("a", 1.0, "A"), Fake("b", 0.02, "B"), Fake("c", 1.0, "C")]
+    res, t0 = run(fakes, mode="parallel")
+    assert res["provider"] == "b"
+    assert all(f.started - t0 < 0.05 for f in fakes)
+    assert fakes[0].cancelled and fakes[2].cancelled
+
+def test_all_failing_returns_no_provider_with_errors():
+    fakes = [Fake("a", 0.01, RuntimeError("down")), Fake("b", 0.02, None), Fake("c", 0.01, ValueError("bad"))]
+    for mode in failover.FAILOVER_MODES:
+        res, _ = run(fakes, mode=mode, hedge_delay=0.01)
+        assert res["provider"] is None and res["result"] is None
+        assert res["errors"] == {"a": "down", "b": None, "c": "bad"}
+
+def test_unknown_mode_falls_back_to_hedged():
+    res, _ = run([Fake("a", 0.01, "A")], mode="bogus")
+    assert res["mode"] == "hedged" and res["provider"] == "a"
@@ -0,0 +1,74 @@
+# HTTP client layer (app/http_client.py): per-loop client pools and shutdown.
+# Run from backend/: python -m pytest -q app/test_http_client.py
+import asyncio
+import threading
+
+import pytest
+
+from app import http_client
+
+TD = "https://api.twelvedata.com/time_series"
+FH = "https://finnhub.io/api/v1/quote"
+
+@pytest.fixture(autouse=True)
+def fresh_pools(monkeypatch):
+    monkeypatch.setattr(http_client, "_clients", {})
+    monkeypatch.setattr(http_client, "_session", None)
+
+@pytest.fixture
+def worker_loop():
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    yield loop
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join(5)
+    loop.close()
+
+def on(loop, coro):
+    return asyncio.run_coroutine_threadsafe(coro, loop).result(5)
+
+async def open_clients():
+    return [http_client.get_client(TD), http_client.get_client(FH)]
+
+def test_one_client_per_host_per_loop():
+    async def main():
+        a = http_client.get_client(TD)
+        assert http_client.get_client(TD + "?symbol=EUR/USD") is a
+        assert http_client.get_client(FH) is not a
+        await http_client.aclose()
+        assert a.is_closed
+    asyncio.run(main())
+
+def test_aclose_closes_every_loop(worker_loop):
+    theirs = on(worker_loop, open_clients())
+
+    async def main():
+        ours = await open_clients()
+        assert not set(map(id, ours)) & set(map(id, theirs))
+        assert len(http_client._clients) == 2
+        await http_client.aclose()
+        return ours
+
+    ours = asyncio.run(main())
+    assert all(c.is_closed for c in ours + theirs)
+    assert http_client._clients == {}
+
+def test_closed_loop_pools_are_dropped():
+    asyncio.run(open_clients())        # loop closed without aclose()
+    assert len(http_client._clients) == 1
+
+    async def main():
+        http_client.get_client(TD)
+        assert len(http_client._clients) == 1
+        assert asyncio.get_running_loop() in http_client._clients
+        await http_client.aclose()
+    asyncio.run(main())
+    assert http_client._clients == {}
+
+def test_aclose_closes_sync_session():
+    session = http_client.get_session()
+    assert http_client.get_session() is session
+    asyncio.run(http_client.aclose())
+    assert http_client._session is None
+    assert http_client.get_session() is not session
@@ -0,0 +1,73 @@
+# Streaming indicators (app/indicators.py) against the batch arrays of app/indicator_series.py.
+# Run from backend/: python -m pytest -q app/test_indicators.py
+import json
+
+import numpy as np
+import pytest
+
+from app import indicator_series as batch
+from app.candle_series import CandleSeries
+from app.indicators import ATR, EMA, RSI, SMA, BankStore, Bollinger, IndicatorBank
+
+def make_minutes(n: int, seed: int = 0) -> CandleSeries:
+    rng = np.random.default_rng(seed)
+    c = 100 + np.cumsum(rng.normal(0, 0.05, n))
+    o = c + rng.normal(0, 0.05, n)
+    h = np.maximum(o, c) + rng.random(n) * 0.05
+    l = np.minimum(o, c) - rng.random(n) * 0.05
+    return CandleSeries(1_704_067_200 + 60 * np.arange(n), o, h, l, c)
+
+def make_bank() -> IndicatorBank:
+    return IndicatorBank({"sma": SMA(9), "ema": EMA(21), "rsi": RSI(14), "atr": ATR(14), "bb": Bollinger(20, 2.0)})
+
+def expected(s: CandleSeries, i: int):
+    f = batch.IndicatorFrame(s)
+    out = {"sma": f.sma(9)[i], "ema": f.ema(21)[i], "rsi": f.rsi(14)[i], "atr": f.atr(14)[i]}
+    if i >= 19:
+        w = s.c[i - 19:i + 1]
+        out["bb"] = (w.mean(), w.mean() + 2 * w.std(), w.mean() - 2 * w.std())
+    return out
+
+def check(got, want):
+    for k, v in want.items():
+        if k == "bb":
+            assert got[k] == pytest.approx(v, abs=1e-9)
+        elif np.isnan(v):
+            assert got[k] is None, k
+        else:
+            assert got[k] == pytest.approx(v, abs=1e-9), k
+
+def test_streaming_matches_batch_with_revised_forming_bar():
+    s = make_minutes(400, 1)
+    bank = make_bank()
+    for k in range(2, len(s) + 1, 7):
+        w = s[max(0, k - 120):k]
+        # the forming bar is first seen with a different close, then revised
+        last = w[-1:]
+        early = CandleSeries.concat([w[:-1], CandleSeries(last.t, last.o, last.h, last.l, last.o)])
+        bank.feed(early)
+        bank.values(early)
+        bank.feed(w)
+        check(bank.values(w), expected(s[:k], k - 1))
+        check(bank.previous(), expected(s[:k - 1], k - 2))
+
+def test_values_do_not_refold_a_committed_bar():
+    s = make_minutes(100, 2)
+    bank = make_bank()
+    bank.feed(s)                       # commits s[:-1]
+    assert bank.values(s[:-1]) == bank.previous()
+    check(bank.values(s), expected(s, len(s) - 1))
+
+def test_store_starts_over_when_params_change(tmp_path):
+    s = make_minutes(60, 3)
+    key = ("twelvedata", "EUR/USD", "1min")
+    BankStore("b", make_bank, root=str(tmp_path)).feed(key, s)
+    assert BankStore("b", make_bank, root=str(tmp_path))._load(key).last_t == int(s.t[-2])
+    other = lambda: IndicatorBank({"sma": SMA(10), "ema": EMA(21), "rsi": RSI(14), "atr": ATR(14),
+                                   "bb": Bollinger(20, 2.0)})
+    assert BankStore("b", other, root=str(tmp_path))._load(key).last_t is None
+    wider = lambda: IndicatorBank({"sma": SMA(9), "ema": EMA(21), "rsi": RSI(14), "atr": ATR(14),
+                                   "bb": Bollinger(20, 2.5)})
+    assert BankStore("b", wider, root=str(tmp_path))._load(key).last_t is None
+    path = BankStore("b", make_bank, root=str(tmp_path))._file(key)
+    assert json.load(open(path))["indicators"]["sma"]["params"] == {"period": 9}
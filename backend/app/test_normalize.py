@@ -0,0 +1,88 @@
+# Provider payload normalization (app/normalize.py) on fixture payloads.
+# Run from backend/: python -m pytest -q app/test_normalize.py
+import numpy as np
+
+from app import normalize
+
+T0 = 1_704_067_200   # 2024-01-01 00:00:00 UTC
+
+TWELVEDATA = {
+    "meta": {"symbol": "EUR/USD", "interval": "1min", "exchange_timezone": "UTC"},
+    "values": [   # newest first, strings everywhere
+        {"datetime": "2024-01-01 00:03:00", "open": "1.1040", "high": "1.1050", "low": "1.1030", "close": "1.1045"},
+        {"datetime": "2024-01-01 00:02:00", "open": "1.1030", "high": "1.1020", "low": "1.1040", "close": "1.1035"},
+        {"datetime": "2024-01-01 00:01:00", "open": "", "high": "1.1030", "low": "1.1010", "close": "1.1025"},
+        {"datetime": "not a date", "open": "1.1", "high": "1.1", "low": "1.1", "close": "1.1"},
+        {"datetime": "2024-01-01 00:00:00", "open": "1.1000", "high": "1.1010", "low": "1.0990", "close": "1.1005"},
+    ],
+    "status": "ok",
+}
+
+FINNHUB = {"s": "ok", "t": [T0, T0 + 60, T0 + 120, T0 + 180], "o": [10, 11, None, 13, 99],
+           "h": [10.5, 11.5, 12.5, 13.5], "l": [9.5, 10.5, 11.5, 12.5], "c": [10.2, 11.2, 12.2, 13.2],
+           "v": [100, 200, 300, 400]}
+
+ALPHAVANTAGE = {
+    "Meta Data": {"1. Information": "Intraday (1min)", "2. Symbol": "IBM", "6. Time Zone": "US/Eastern"},
+    "Time Series (1min)": {
+        "2024-07-01 09:31:00": {"1. open": "170.0", "2. high": "171.0", "3. low": "169.5", "4. close": "170.5",
+                                "5. volume": "1200"},
+        "2024-07-01 09:30:00": {"1. open": "169.0", "2. high": "170.2", "3. low": "168.9", "4. close": "170.0",
+                                "5. volume": "3400"},
+        "2024-07-01 09:29:00": {"1. open": "nan", "2. high": "1", "3. low": "1", "4. close": "1", "5. volume": "1"},
+    },
+}
+
+def test_twelvedata_values_are_parsed_sorted_and_rejected_by_reason():
+    res = normalize.normalize_twelvedata(TWELVEDATA)
+    s = res.series
+    assert s.t.tolist() == [T0, T0 + 180]
+    assert s.o.tolist() == [1.1, 1.104] and s.h.tolist() == [1.101, 1.105]
+    assert s.l.tolist() == [1.099, 1.103] and s.c.tolist() == [1.1005, 1.1045]
+    assert res.reasons == {"time": 1, "price": 1, "range": 1} and res.rejected == 3
+    assert res.timezone == "UTC"
+
+def test_twelvedata_exchange_timezone():
+    payload = {"meta": {"exchange_timezone": "America/New_York"},
+               "values": [{"datetime": "2024-07-01 09:30:00", "open": "1", "high": "2", "low": "0.5", "close": "1.5",
+                           "volume": "10"}]}
+    res = normalize.normalize_twelvedata(payload)
+    assert res.series.t.tolist() == [1_719_840_600]     # 13:30 UTC (EDT)
+    assert res.series.v.tolist() == [10.0] and res.timezone == "America/New_York"
+
+def test_finnhub_ragged_arrays_and_missing_prices():
+    res = normalize.normalize_finnhub(FINNHUB)
+    s = res.series
+    assert s.t.tolist() == [T0, T0 + 60, T0 + 180]
+    assert s.o.tolist() == [10.0, 11.0, 13.0] and s.c.tolist() == [10.2, 11.2, 13.2]
+    assert s.v.tolist() == [100.0, 200.0, 400.0]
+    assert res.reasons == {"price": 1}     # the extra "o" value is past the common length of t
+    short = normalize.normalize_finnhub({**FINNHUB, "c": FINNHUB["c"][:2]})
+    assert len(short.series) == 2 and short.reasons == {"ragged": 2}
+
+def test_alphavantage_wall_clock_in_meta_zone():
+    res = normalize.normalize_alphavantage(ALPHAVANTAGE)
+    s = res.series
+    assert s.t.tolist() == [1_719_840_600, 1_719_840_660]     # 09:30 / 09:31 EDT
+    assert s.o.tolist() == [169.0, 170.0] and s.h.tolist() == [170.2, 171.0]
+    assert s.l.tolist() == [168.9, 169.5] and s.c.tolist() == [170.0, 170.5]
+    assert s.v.tolist() == [3400.0, 1200.0]
+    assert res.reasons == {"price": 1} and res.timezone == "US/Eastern"
+    assert len(normalize.normalize_alphavantage({"Note": "rate limited"}).series) == 0
+
+def test_records_mixed_time_column():
+    rows = [{"t": T0, "o": 1, "h": 2, "l": 0, "c": 1},
+            {"time": "2024-01-01 00:01:00", "o": 1, "h": 2, "l": 0, "c": 1},
+            {"t": "2024-01-01T00:02:00Z", "o": 1, "h": 2, "l": 0, "c": 1},
+            {"t": str(T0 + 180), "o": 1, "h": 2, "l": 0, "c": 1},
+            {"t": None, "o": 1, "h": 2, "l": 0, "c": 1},
+            {"t": float("nan"), "o": 1, "h": 2, "l": 0, "c": 1}]
+    res = normalize.normalize_records(rows)
+    assert res.series.t.tolist() == [T0, T0 + 60, T0 + 120, T0 + 180]
+    assert res.reasons == {"time": 2}
+
+def test_records_string_first_then_ints():
+    rows = [{"datetime": "2024-01-01 00:00:00", "open": 1, "high": 2, "low": 0, "close": 1},
+            {"datetime": T0 + 60, "open": 1, "high": 2, "low": 0, "close": 1}]
+    assert normalize.normalize_records(rows).series.t.tolist() == [T0, T0 + 60]
+    assert np.array_equal(normalize.to_epoch([]), np.zeros(0, dtype=np.int64))
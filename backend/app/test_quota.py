@@ -0,0 +1,85 @@
+# Quota scheduler (app/quota.py): token buckets, rejection and priority order.
+# Run from backend/: python -m pytest -q app/test_quota.py
+import asyncio
+import time
+
+import pytest
+
+from app.quota import PRIORITY_BACKFILL, PRIORITY_LIVE, QuotaExhausted, QuotaScheduler
+
+LIMITS = {"twelvedata": {"per_minute": 8, "per_day": 800}}
+
+def test_cost_above_minute_capacity_is_rejected_at_once():
+    q = QuotaScheduler(LIMITS)
+    t0 = time.monotonic()
+    with pytest.raises(QuotaExhausted) as e:
+        asyncio.run(asyncio.wait_for(q.acquire("twelvedata", "k", cost=9), timeout=2))
+    assert time.monotonic() - t0 < 1
+    assert "8/min" in str(e.value)
+    b = q.budget("twelvedata", "k")
+    assert b.rejected == 1 and b.used_today == 0 and b.minute.available() == pytest.approx(8, abs=0.1)
+
+def test_cost_at_capacity_is_served():
+    q = QuotaScheduler(LIMITS)
+    asyncio.run(q.acquire("twelvedata", "k", cost=8))
+    assert q.budget("twelvedata", "k").used_today == 8
+
+def test_daily_budget():
+    q = QuotaScheduler({"twelvedata": {"per_minute": None, "per_day": 3}})
+    asyncio.run(q.acquire("twelvedata", "k", cost=3))
+    with pytest.raises(QuotaExhausted):
+        asyncio.run(q.acquire("twelvedata", "k"))
+
+def test_wait_beyond_max_wait_is_rejected():
+    q = QuotaScheduler(LIMITS)
+    asyncio.run(q.acquire("twelvedata", "k", cost=8))
+    # 8 credits refill in 60s: more than a live request may wait
+    with pytest.raises(QuotaExhausted):
+        asyncio.run(q.acquire("twelvedata", "k", cost=1, level=PRIORITY_LIVE))
+
+def test_waiters_are_served_by_priority():
+    q = QuotaScheduler({"twelvedata": {"per_minute": 600, "per_day": None}})
+    order = []
+
+    async def take(level, name):
+        await q.acquire("twelvedata", "k", cost=1, level=level)
+        order.append(name)
+
+    async def main():
+        b = q.budget("twelvedata", "k")
+        b.minute.set_available(0)    # next credit in 0.1s
+        backfill = asyncio.ensure_future(take(PRIORITY_BACKFILL, "backfill"))
+        await asyncio.sleep(0)
+        live = asyncio.ensure_future(take(PRIORITY_LIVE, "live"))
+        await asyncio.gather(backfill, live)
+
+    asyncio.run(main())
+    assert order == ["live", "backfill"]
+
+def test_batch_size_fits_minute_bucket():
+    q = QuotaScheduler(LIMITS)
+    assert q.batch_size("twelvedata", "k", 120) == 8
+    assert q.batch_size("twelvedata", "k", 5) == 5
+    assert q.batch_size("finnhub", "k", 120) == 120    # no limits configured
+
+def test_candle_batches_are_chunked_to_minute_credits(monkeypatch):
+    from app import main
+    from app.candle_series import CandleSeries
+    q = QuotaScheduler({"twelvedata": {"per_minute": 8, "per_day": None}})
+    monkeypatch.setattr(main, "QUOTA", q)
+    monkeypatch.setattr(main, "CACHE", type(main.CACHE)())
+    monkeypatch.setitem(main.KEYS, "TWELVEDATA", "k")
+    calls = []
+
+    async def fake_batch(symbols, interval, outputsize):
+        calls.append(list(symbols))
+        await q.acquire("twelvedata", "k", cost=len(symbols), level=PRIORITY_BACKFILL)
+        return {s: CandleSeries([0, 60], [1, 1], [1, 1], [1, 1], [1, 1]) for s in symbols}
+
+    monkeypatch.setattr(main, "fetch_candles_twelvedata_batch", fake_batch)
+    syms = [f"S{i}" for i in range(20)]
+    q.budget("twelvedata", "k").minute.rate = 600.0    # refill fast: the test checks sizing, not pacing
+    out = asyncio.run(main.get_candles_batch(syms, "1min", 2))
+    assert sorted(len(c) for c in calls) == [4, 8, 8]
+    assert sorted(sum(calls, [])) == sorted(syms)
+    assert all(out[s]["provider"] == "twelvedata" for s in syms)
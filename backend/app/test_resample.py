@@ -0,0 +1,52 @@
+# Resampler (app/resample.py): incremental books against one-shot resample().
+# Run from backend/: python -m pytest -q app/test_resample.py
+import numpy as np
+import pytest
+
+from app.candle_series import CandleSeries
+from app.resample import ResampleBook, bucket_starts, resample
+
+T0 = 1_704_067_200   # 2024-01-01 00:00 UTC
+
+def make_minutes(n: int, seed: int = 0, t0: int = T0) -> CandleSeries:
+    rng = np.random.default_rng(seed)
+    c = 100 + np.cumsum(rng.normal(0, 0.05, n))
+    o = c + rng.normal(0, 0.05, n)
+    h = np.maximum(o, c) + rng.random(n) * 0.05
+    l = np.minimum(o, c) - rng.random(n) * 0.05
+    return CandleSeries(t0 + 60 * np.arange(n), o, h, l, c, rng.random(n) * 10)
+
+def same(a: CandleSeries, b: CandleSeries):
+    assert len(a) == len(b)
+    for col in ("t", "o", "h", "l", "c", "v"):
+        np.testing.assert_allclose(getattr(a, col), getattr(b, col))
+
+def test_bucket_starts_session_offset():
+    t = np.array([T0 + 3600 * k for k in (0, 21, 22, 23)])
+    assert bucket_starts(t, "1day", offset=79200).tolist() == [T0 - 7200] * 2 + [T0 + 79200] * 2
+    assert bucket_starts(t, "4h").tolist() == [T0, T0 + 72000, T0 + 72000, T0 + 72000]
+
+@pytest.mark.parametrize("interval", ["5min", "15min", "1h", "4h"])
+def test_sliding_windows_match_one_shot(interval):
+    s = make_minutes(3000, 1)
+    book = ResampleBook(interval, offset=0)
+    for end in range(1200, len(s) + 1, 37):
+        book.update(s[end - 1200:end])
+        same(book.series(10_000), resample(s[:end], interval, 0))
+
+def test_revised_forming_bar_replaces_held_one():
+    s = make_minutes(600, 2)
+    book = ResampleBook("15min", offset=0)
+    book.update(s[:-1])
+    last = s[-1:]
+    book.update(CandleSeries(last.t, last.o, last.h + 5, last.l, last.c))
+    book.update(last)    # provider revises the forming 1min bar back
+    same(book.series(1000), resample(s, "15min", 0))
+
+def test_window_past_a_gap_warm_starts():
+    s = make_minutes(500, 3)
+    later = make_minutes(500, 4, t0=T0 + 86400 + 7 * 60)   # starts mid-bucket, a day later
+    book = ResampleBook("15min", offset=0)
+    book.update(s)
+    book.update(later)
+    same(book.series(1000), resample(later, "15min", 0))
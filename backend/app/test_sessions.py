@@ -0,0 +1,103 @@
+# Session engine (app/sessions.py) against per-bar zoneinfo arithmetic.
+# Run from backend/: python -m pytest -q app/test_sessions.py
+import datetime as dt
+from zoneinfo import ZoneInfo
+
+import numpy as np
+import pytest
+
+from app import detector_arrays as arrays
+from app import sessions
+from app.candle_series import CandleSeries
+
+def make_minutes(start: str, days: float, seed: int = 0, step: int = 60) -> CandleSeries:
+    t0 = int(dt.datetime.fromisoformat(start).replace(tzinfo=dt.timezone.utc).timestamp())
+    n = int(days * 86400 // step)
+    rng = np.random.default_rng(seed)
+    c = 100 + np.cumsum(rng.normal(0, 0.05, n))
+    o = c + rng.normal(0, 0.05, n)
+    h = np.maximum(o, c) + rng.random(n) * 0.05
+    l = np.minimum(o, c) - rng.random(n) * 0.05
+    return CandleSeries(t0 + step * np.arange(n), o, h, l, c)
+
+# spans the US (Mar 10) and UK (Mar 31) 2024 DST switches and the autumn ones
+SPANS = [("2024-03-07 00:00:00", 6), ("2024-03-28 00:00:00", 6), ("2024-10-25 00:00:00", 12)]
+
+def _local(t: int, w: sessions.Window):
+    local = dt.datetime.fromtimestamp(t, ZoneInfo(w.tz))
+    sec = local.hour * 3600 + local.minute * 60 + local.second
+    inside = (sec - w.start_s) % 86400 < w.duration
+    day = local.date() if sec >= w.start_s else local.date() - dt.timedelta(days=1)
+    return inside, day
+
+@pytest.mark.parametrize("tz", sorted({w.tz for w in sessions.WINDOWS.values()}))
+def test_utc_offsets(tz):
+    t = np.sort(np.random.default_rng(1).integers(1_690_000_000, 1_760_000_000, 3000))
+    expected = [dt.datetime.fromtimestamp(int(x), ZoneInfo(tz)).utcoffset().total_seconds() for x in t]
+    assert sessions.utc_offsets(t, tz).tolist() == expected
+
+@pytest.mark.parametrize("start,days", SPANS)
+def test_labels_and_levels(start, days):
+    s = make_minutes(start, days, step=300)
+    lab = sessions.labels(s)
+    for j in range(0, len(s), 7):
+        t = int(s.t[j])
+        mask = sum(1 << i for i, w in enumerate(sessions.SESSION_WINDOWS) if _local(t, w)[0])
+        kz = next((i for i, w in enumerate(sessions.KILLZONE_WINDOWS) if _local(t, w)[0]), -1)
+        assert (int(lab["sessions"][j]), int(lab["killzone"][j])) == (mask, kz)
+    for w in sessions.WINDOWS.values():
+        groups = {}
+        for j in range(len(s)):
+            inside, day = _local(int(s.t[j]), w)
+            if inside:
+                groups.setdefault(day, []).append(j)
+        lv = sessions.levels(s, w)
+        assert [r["day"] for r in lv.records(w)] == [d.isoformat() for d in groups]
+        for k, idx in enumerate(groups.values()):
+            assert (lv.o[k], lv.h[k], lv.l[k], lv.c[k]) == (s.o[idx[0]], s.h[idx].max(), s.l[idx].min(), s.c[idx[-1]])
+
+def test_prior_levels_and_session_detectors():
+    s = make_minutes("2024-03-07 00:00:00", 10, seed=2, step=300)
+    f = arrays.features(s)
+    w = sessions.WINDOWS["london"]
+    lv = sessions.levels(s, w)
+    hi, lo = f.session_levels("london")
+    closes = [(dt.datetime.combine(dt.date.fromisoformat(r["day"]), dt.time()) + dt.timedelta(seconds=w.start_s + w.duration)
+               ).replace(tzinfo=ZoneInfo(w.tz)).timestamp() for r in lv.records(w)]
+    for j in range(0, len(s), 5):
+        done = [k for k, close in enumerate(closes) if close <= s.t[j]]
+        if done:
+            assert (hi[j], lo[j]) == (lv.h[done[-1]], lv.l[done[-1]])
+        else:
+            assert np.isnan(hi[j]) and np.isnan(lo[j])
+    hits = arrays.session_sweep_hits(f, ("london",))
+    expected = [j for j in range(len(s)) if s.h[j] > hi[j] and s.c[j] < hi[j]]
+    assert hits["london_sweep_high"].tolist() == expected
+    turtle = arrays.session_turtle_hits(f, ("london",))
+    expected = [j for j in range(1, len(s)) if s.l[j - 1] < lo[j] and s.c[j] > lo[j]]
+    assert turtle["london_turtle_long_fail"].tolist() == expected
+
+def test_session_book_incremental():
+    s = make_minutes("2024-10-25 00:00:00", 12, seed=3)
+    book = sessions.SessionBook()
+    for end in range(500, len(s) + 1, 250):
+        w = s[max(0, end - 1000):end]
+        # the window first arrives with a flat forming bar, then polled again with it revised
+        o = w.o.copy()
+        book.update(CandleSeries(w.t, o, np.r_[w.h[:-1], o[-1]], np.r_[w.l[:-1], o[-1]], np.r_[w.c[:-1], o[-1]]))
+        book.update(w)
+    cur = book.current()
+    for name, w in sessions.WINDOWS.items():
+        full = sessions.levels(s, w)
+        got = sessions.Levels.concat([book.closed[name], cur[name]])
+        for col in sessions.Levels.COLUMNS:
+            assert np.array_equal(getattr(got, col), getattr(full, col)), (name, col)
+
+def test_session_books_evict_least_recently_used():
+    books = sessions.SessionBooks(max_books=2)
+    a = books.book("EUR/USD", "1min")
+    books.book("XAU/USD", "1min")
+    assert books.book("eurusd", "1min") is a    # touched: XAU/USD is now the oldest
+    books.book("GBP/USD", "1min")
+    assert list(books._books) == [("EURUSD", "1min"), ("GBPUSD", "1min")]
+    assert books.stats() == {"books": 2, "updates": 0, "evicted_books": 1}
@@ -0,0 +1,64 @@
+# Signal journal (app/signal_journal.py): batched background writes and keyset pagination.
+# Run from backend/: python -m pytest -q app/test_signal_journal.py
+from app.signal_journal import SignalJournal, decode_cursor
+
+def _signals(n, types=("bos_bull", "fvg_up", "turtle_bear")):
+    return [{"time": 1_700_000_000 + 60 * (i // len(types)), "type": types[i % len(types)], "price": float(i)}
+            for i in range(n)]
+
+def test_batched_writes_dedupe(tmp_path):
+    j = SignalJournal(str(tmp_path / "signals.db"), batch_max=100, flush_ms=20)
+    sigs = _signals(1000)
+    assert j.record("XAU/USD", "1min", "ict_signals", sigs) == 1000
+    j.record("xauusd", "1min", "mentor", sigs[:500])   # same signals from another endpoint
+    assert j.flush()
+    st = j.stats()
+    assert (st["written"], st["duplicates"]) == (1000, 500)
+    assert st["batches"] >= 10
+    j.close()
+
+def test_history_pages(tmp_path):
+    j = SignalJournal(str(tmp_path / "signals.db"), flush_ms=1)
+    sigs = _signals(900)
+    j.record("EURUSD", "5min", "ict_signals", sigs)
+    j.record("EURUSD", "1min", "ict_signals", sigs[:10])
+    assert j.flush()
+    seen, cursor = [], None
+    while True:
+        rows, nxt = j.history("EUR/USD", "5min", limit=128, cursor=cursor)
+        seen += rows
+        if nxt is None:
+            break
+        cursor = decode_cursor(nxt)
+    assert len(seen) == 900 and len({r["id"] for r in seen}) == 900
+    keys = [(r["epoch"], r["id"]) for r in seen]
+    assert keys == sorted(keys, reverse=True)
+    rows, _ = j.history("EURUSD", "5min", types=["fvg_up"], start=1_700_000_000 + 60 * 100,
+                        end=1_700_000_000 + 60 * 199, limit=1000)
+    assert len(rows) == 100 and {r["type"] for r in rows} == {"fvg_up"}
+    assert rows[0]["signal"] == {"time": 1_700_000_000 + 60 * 199, "type": "fvg_up", "price": 598.0}
+    j.close()
+
+def test_history_several_types_pages(tmp_path):
+    j = SignalJournal(str(tmp_path / "signals.db"), flush_ms=1)
+    sigs = _signals(900)
+    j.record("EURUSD", "5min", "ict_signals", sigs)
+    assert j.flush()
+    types = ["turtle_bear", "bos_bull", "turtle_bear"]
+    seen, cursor = [], None
+    while True:
+        rows, nxt = j.history("EURUSD", "5min", types=types, end=1_700_000_000 + 60 * 250, limit=37, cursor=cursor)
+        seen += rows
+        if nxt is None:
+            break
+        cursor = decode_cursor(nxt)
+    want, _ = j.history("EURUSD", "5min", end=1_700_000_000 + 60 * 250, limit=1000)
+    want = [r for r in want if r["type"] in types]
+    assert len(seen) == 2 * 251 and [r["id"] for r in seen] == [r["id"] for r in want]
+    # each type is one range scan of signals_key, with no sort step
+    plan = j._reader().execute(
+        "EXPLAIN QUERY PLAN SELECT id FROM signals WHERE symbol = ? AND interval = ? AND type = ? "
+        "AND (time, id) < (?, ?) ORDER BY time DESC, id DESC LIMIT 10", ("EURUSD", "5min", "bos_bull", 0, 0)).fetchall()
+    detail = " ".join(r[-1] for r in plan)
+    assert "signals_key" in detail and "TEMP B-TREE" not in detail
+    j.close()
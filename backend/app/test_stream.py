@@ -0,0 +1,103 @@
+# Stream hub (app/stream.py): bar deltas and slow-client backpressure.
+# Run from backend/: python -m pytest -q app/test_stream.py
+import asyncio
+
+import numpy as np
+
+from app import stream
+from app.candle_series import CandleSeries
+
+T0 = 1_704_067_200
+
+def make_minutes(n: int, seed: int = 0) -> CandleSeries:
+    rng = np.random.default_rng(seed)
+    c = 100 + np.cumsum(rng.normal(0, 0.05, n))
+    o = c + rng.normal(0, 0.05, n)
+    return CandleSeries(T0 + 60 * np.arange(n), o, np.maximum(o, c) + 0.01, np.minimum(o, c) - 0.01, c)
+
+def revised(s: CandleSeries, high: float) -> CandleSeries:
+    h = s.h.copy()
+    h[-1] = high
+    return CandleSeries(s.t, s.o, h, s.l, s.c, s.v)
+
+def test_bar_deltas():
+    s = make_minutes(60)
+    prev = s[:50]
+    assert stream.bar_deltas(prev, prev) == []
+    # the forming bar closed with a new high and one more bar started forming
+    cur = CandleSeries.concat([revised(s[:50], 200.0), s[50:51]])
+    bars = stream.bar_deltas(prev, cur)
+    assert [b["time"] for b in bars] == [r["time"] for r in s[49:51].to_records()]
+    assert [b["closed"] for b in bars] == [True, False]
+    assert bars[0]["high"] == 200.0
+    # a window that no longer holds the last bar sent: history rewritten -> snapshot
+    assert stream.bar_deltas(prev, s[55:]) is None
+    assert stream.bar_deltas(CandleSeries.empty(), prev) is None
+
+def test_poll_sends_snapshot_then_deltas():
+    s = make_minutes(80, 1)
+    feed = {"candles": s[:50]}
+
+    async def fetch(symbol, interval, n):
+        return {"provider": "fake", "candles": feed["candles"]}
+
+    def detect(c):
+        # one signal per 10-bar block, keyed by the block's open bar
+        return [{"type": "block", "time": int(c.t[i]), "price": float(c.o[i])} for i in range(0, len(c), 10)]
+
+    async def main():
+        hub = stream.StreamHub(fetch, detect, window=50)
+        p = stream._Producer(hub, "EURUSD", "1min")
+        client = stream._Client(lambda m: None)
+        p.clients.add(client)
+        await p.poll()
+        feed["candles"] = CandleSeries.concat([revised(s[:50], 200.0), s[50:51]])
+        await p.poll()
+        await p.poll()   # unchanged: nothing sent
+        return [client.queue.get_nowait()[1] for _ in range(client.queue.qsize())]
+
+    msgs = asyncio.run(main())
+    assert [m["type"] for m in msgs] == ["snapshot", "delta"]
+    assert len(msgs[0]["candles"]) == 50
+    delta = msgs[1]
+    assert [b["closed"] for b in delta["bars"]] == [True, False] and delta["bars"][0]["high"] == 200.0
+    assert [sig["time"] for sig in delta["signals"]["added"]] == [int(s.t[50])]
+    assert delta["signals"]["removed"] == []
+
+def test_slow_client_is_resent_a_fresh_snapshot():
+    s = make_minutes(200, 2)
+    feed = {"candles": s[:50]}
+    got = []
+    unblock, closed = asyncio.Event(), asyncio.Event()
+
+    async def fetch(symbol, interval, n):
+        return {"provider": "fake", "candles": feed["candles"]}
+
+    async def send(msg):
+        got.append(msg)
+        await unblock.wait()   # the socket stalls on the first message
+
+    async def receive():
+        await closed.wait()
+        raise ConnectionError
+
+    async def main():
+        hub = stream.StreamHub(fetch, lambda c: [], window=50)
+        serving = asyncio.ensure_future(hub.serve(send, receive, ["EURUSD"], "1min"))
+        await asyncio.sleep(0.05)   # first poll -> snapshot, writer stuck in send()
+        p = next(iter(hub._producers.values()))
+        client = next(iter(p.clients))
+        for k in range(1, stream.STREAM_QUEUE_MAX + 10):
+            feed["candles"] = s[k:k + 50]
+            await p.poll()
+        assert client.dropped > 0 and client.stale
+        unblock.set()
+        await asyncio.sleep(0.05)
+        closed.set()
+        await serving
+        return hub
+
+    hub = asyncio.run(main())
+    assert [m["type"] for m in got] == ["snapshot", "snapshot"]
+    assert got[1]["candles"] == feed["candles"].to_records()
+    assert hub.clients == 0 and not hub._producers
@@ -1,7 +1,10 @@
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from detectors.ict_ob import detect_order_blocks
+from detectors.zone_store import ZoneStore
+from app.candle_series import CandleSeries
+from app.signal_journal import JOURNAL
 
 router = APIRouter(prefix="/api/detect", tags=["detect"])
 
@@ -18,21 +21,33 @@ class BarsReq(BaseModel):
     tf: str
     bars: List[Bar]
 
-STORE: List[Dict[str, Any]] = []
+# zones by (symbol, tf) and price; deduped on anchor time, bounded (detectors/zone_store.py)
+STORE = ZoneStore()
 
 @router.post("/ob")
 async def detect_ob(req: BarsReq):
     try:
-        bars = [b.dict() for b in req.bars]
+        bars = CandleSeries.from_records(b.dict() for b in req.bars)
         candidates = detect_order_blocks(bars, symbol=req.symbol, tf=req.tf)
-        for c in candidates:
-            STORE.append(c)
-        return {"ok": True, "candidates": candidates}
+        new = STORE.ingest(req.symbol, req.tf, candidates, bars)
+        JOURNAL.record(req.symbol, req.tf, "detect_ob", new)
+        return {"ok": True, "candidates": candidates, "new": len(new)}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/candidates")
-async def list_candidates(symbol: str = None):
-    if symbol:
-        return [c for c in STORE if c.get("symbol") == symbol]
-    return STORE
\ No newline at end of file
+async def list_candidates(symbol: str = None, tf: str = None, price: Optional[float] = None, pct: float = 0.005,
+                          include_mitigated: bool = True):
+    """
+    Stored zones, or with symbol + tf + price the zones not yet invalidated within pct
+    (0.005 = 0.5%) of price, nearest first.
+    """
+    if price is not None:
+        if not (symbol and tf):
+            raise HTTPException(status_code=400, detail="price queries need symbol and tf")
+        return STORE.near(symbol, tf, price, pct, include_mitigated)
+    return STORE.records(symbol, tf)
+
+@router.get("/stats")
+async def zone_stats():
+    return STORE.stats()
\ No newline at end of file
@@ -1,4 +1,5 @@
-import os, httpx
+import os
+from app import http_client, structure
 
 ALPHAVANTAGE_KEY = os.getenv("ALPHAVANTAGE_API_KEY")
 FINNHUB_KEY = os.getenv("FINNHUB_API_KEY")
@@ -6,6 +7,10 @@ TWELVEDATA_KEY = os.getenv("TWELVEDATA_API_KEY")
 
 async def fetch_candles(symbol: str, interval: str = "5m"):
     url = f"https://api.twelvedata.com/time_series?symbol={symbol}&interval={interval}&apikey={TWELVEDATA_KEY}"
-    async with httpx.AsyncClient() as client:
-        r = await client.get(url)
-        return r.json()
+    r = await http_client.get(url)
+    return r.json()
+
+def detect_order_blocks(bars, symbol: str = "", tf: str = "", strength: int = 2):
+    """Order-block candidates of a bar series (anchored on swing breaks, app/structure.py)."""
+    zones = structure.order_blocks(structure.analyze(bars, strength).records())
+    return [{"symbol": symbol, "tf": tf, **z} for z in zones]
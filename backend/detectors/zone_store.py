@@ -0,0 +1,183 @@
+# backend/detectors/zone_store.py
+# Order-block zones posted to /api/detect/ob, indexed instead of kept in an ever-growing list.
+#
+# - one book per (symbol, tf); a zone is identified by its anchor candle time, so re-posting
+#   the same bars finds the zones already stored
+# - live zones (not yet invalidated) sit in an app/interval_index.IntervalIndex per side, so
+#   "zones within x% of price" only visits the search path plus the zones it returns
+# - posted bars update zone state: a demand zone is mitigated once a later low trades into it
+#   and invalidated (dropped from the index) once a close lands below it; supply mirrors it.
+#   Zones new to the store are brought up to date with suffix min / max arrays over the posted
+#   bars, stored zones only see bars newer than the book's last bar
+# - retention: at most ZONE_MAX_PER_KEY zones per book and none anchored more than
+#   ZONE_MAX_AGE_S before the book's last bar, oldest anchors dropped first
+
+import heapq
+import itertools
+import os
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from app.candle_cache import normalize_symbol
+from app.candle_series import CandleSeries
+from app.interval_index import IntervalIndex
+
+ZONE_MAX_PER_KEY = int(os.getenv("ZONE_MAX_PER_KEY", "1000"))
+ZONE_MAX_AGE_S = int(os.getenv("ZONE_MAX_AGE_S", str(30 * 86400)))
+
+ACTIVE, MITIGATED, INVALIDATED = "active", "mitigated", "invalidated"
+
+_ids = itertools.count(1)
+
+class Zone:
+    __slots__ = ("id", "t", "demand", "top", "bottom", "after", "state", "changed_t", "candidate")
+
+    def __init__(self, candidate: Dict[str, Any]):
+        self.id = next(_ids)
+        self.t = int(candidate["time"])
+        self.demand = candidate["type"].endswith("bull")
+        self.top, self.bottom = float(candidate["top"]), float(candidate["bottom"])
+        self.after = int(candidate.get("break_time", self.t))   # bars after this one update the state
+        self.state = ACTIVE
+        self.changed_t: Optional[int] = None
+        self.candidate = candidate
+
+    def distance(self, price: float) -> float:
+        return max(self.bottom - price, price - self.top, 0.0)
+
+    def record(self) -> Dict[str, Any]:
+        return {**self.candidate, "state": self.state, "state_time": self.changed_t}
+
+class _Book:
+    def __init__(self):
+        self.demand = IntervalIndex()
+        self.supply = IntervalIndex()
+        self.zones: Dict[int, Zone] = {}           # anchor time -> zone
+        self.heap: List[Tuple[int, int]] = []      # (anchor time, zone id), lazily pruned
+        self.last_t: Optional[int] = None
+
+    def index(self, z: Zone) -> IntervalIndex:
+        return self.demand if z.demand else self.supply
+
+class ZoneStore:
+    """Order-block zones by (symbol, tf) and price."""
+    def __init__(self, max_per_key: int = ZONE_MAX_PER_KEY, max_age_s: int = ZONE_MAX_AGE_S):
+        self.max_per_key = max_per_key
+        self.max_age_s = max_age_s
+        self._lock = threading.Lock()
+        self._books: Dict[Tuple[str, str], _Book] = {}
+        self.added = self.duplicates = self.dropped = 0
+
+    def ingest(self, symbol: str, tf: str, candidates: Iterable[Dict[str, Any]],
+               bars: Optional[CandleSeries] = None) -> List[Dict[str, Any]]:
+        """Store new candidates, update every zone with `bars`; returns the candidates that were new."""
+        key = (normalize_symbol(symbol), tf)
+        with self._lock:
+            book = self._books.setdefault(key, _Book())
+            fresh = []
+            for c in candidates:
+                if int(c["time"]) in book.zones:
+                    self.duplicates += 1
+                    continue
+                z = Zone(c)
+                book.zones[z.t] = z
+                heapq.heappush(book.heap, (z.t, z.id))
+                fresh.append(z)
+            self.added += len(fresh)
+            if bars is not None and len(bars):
+                self._catch_up(fresh, bars)
+                self._apply(book, bars)
+            for z in fresh:
+                if z.state != INVALIDATED:
+                    book.index(z).insert(z, z.bottom, z.top)
+            self._retain(book)
+            return [z.candidate for z in fresh if book.zones.get(z.t) is z]
+
+    def _catch_up(self, zones: List[Zone], bars: CandleSeries):
+        """State of new zones after every posted bar past their break (arrays, one pass)."""
+        if not zones:
+            return
+        t = bars.t
+        low_after = np.minimum.accumulate(bars.l[::-1])[::-1]
+        high_after = np.maximum.accumulate(bars.h[::-1])[::-1]
+        close_min = np.minimum.accumulate(bars.c[::-1])[::-1]
+        close_max = np.maximum.accumulate(bars.c[::-1])[::-1]
+        for z in zones:
+            j = int(np.searchsorted(t, z.after, side="right"))
+            if j >= len(t):
+                continue
+            if z.demand:
+                hit, broke = low_after[j] <= z.top, close_min[j] < z.bottom
+            else:
+                hit, broke = high_after[j] >= z.bottom, close_max[j] > z.top
+            # only zones that changed pay for locating the bar that changed them
+            if broke:
+                k = np.argmax(bars.c[j:] < z.bottom) if z.demand else np.argmax(bars.c[j:] > z.top)
+                z.state, z.changed_t = INVALIDATED, int(t[j + k])
+            elif hit:
+                k = np.argmax(bars.l[j:] <= z.top) if z.demand else np.argmax(bars.h[j:] >= z.bottom)
+                z.state, z.changed_t = MITIGATED, int(t[j + k])
+
+    def _apply(self, book: _Book, bars: CandleSeries):
+        """Bars newer than the book's last bar against the indexed zones."""
+        start = 0 if book.last_t is None else int(np.searchsorted(bars.t, book.last_t, side="right"))
+        for t, h, l, c in zip(bars.t[start:].tolist(), bars.h[start:].tolist(),
+                              bars.l[start:].tolist(), bars.c[start:].tolist()):
+            for z in book.demand.overlapping(l, float("inf")):
+                if t <= z.after:
+                    continue
+                if c < z.bottom:
+                    book.demand.remove(z, z.bottom)
+                    z.state, z.changed_t = INVALIDATED, t
+                elif z.state == ACTIVE:
+                    z.state, z.changed_t = MITIGATED, t
+            for z in book.supply.overlapping(float("-inf"), h):
+                if t <= z.after:
+                    continue
+                if c > z.top:
+                    book.supply.remove(z, z.bottom)
+                    z.state, z.changed_t = INVALIDATED, t
+                elif z.state == ACTIVE:
+                    z.state, z.changed_t = MITIGATED, t
+        book.last_t = int(bars.t[-1]) if book.last_t is None else max(book.last_t, int(bars.t[-1]))
+
+    def _retain(self, book: _Book):
+        oldest = None if book.last_t is None else book.last_t - self.max_age_s
+        while book.heap and (len(book.zones) > self.max_per_key or (oldest is not None and book.heap[0][0] < oldest)):
+            t, zid = heapq.heappop(book.heap)
+            z = book.zones.get(t)
+            if z is None or z.id != zid:
+                continue
+            del book.zones[t]
+            if z.state != INVALIDATED:
+                book.index(z).remove(z, z.bottom)
+            self.dropped += 1
+
+    def near(self, symbol: str, tf: str, price: float, pct: float,
+             include_mitigated: bool = True) -> List[Dict[str, Any]]:
+        """Zones that are not invalidated within pct (0.005 = 0.5%) of price, nearest first."""
+        lo, hi = price * (1 - pct), price * (1 + pct)
+        with self._lock:
+            book = self._books.get((normalize_symbol(symbol), tf))
+            if book is None:
+                return []
+            zones = book.demand.overlapping(lo, hi) + book.supply.overlapping(lo, hi)
+            if not include_mitigated:
+                zones = [z for z in zones if z.state == ACTIVE]
+            return [z.record() for z in sorted(zones, key=lambda z: (z.distance(price), -z.t))]
+
+    def records(self, symbol: Optional[str] = None, tf: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Every stored zone (all states), optionally for one symbol / tf, by anchor time."""
+        sym = normalize_symbol(symbol) if symbol else None
+        with self._lock:
+            books = [b for (s, f), b in self._books.items() if (sym is None or s == sym) and (tf is None or f == tf)]
+            return [z.record() for b in books for _, z in sorted(b.zones.items())]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            books = list(self._books.values())
+            return {"books": len(books), "zones": sum(len(b.zones) for b in books),
+                    "indexed": sum(len(b.demand) + len(b.supply) for b in books),
+                    "added": self.added, "duplicates": self.duplicates, "dropped": self.dropped}
@@ -1,8 +1,14 @@
 # backend/proxy_candles.py
 from fastapi import APIRouter, Query, HTTPException
-import requests
 from typing import Optional
 
+from app.candle_cache import CACHE, interval_seconds
+from app import http_client
+from app.failover import race
+from app.circuit_breaker import guarded
+from app.normalize import normalize_twelvedata, normalize_alphavantage, normalize_finnhub
+from app.resample import RESAMPLER, BASE_INTERVAL, base_bars_for, can_resample
+
 router = APIRouter()
 
 # ---- PROVIDER KEYS (you said skip env, so they are embedded here) ----
@@ -11,7 +17,7 @@ ALPHAV_KEY     = "YOUR_ALPHAV_KEY"          # replace with your key string
 FINNHUB_KEY    = "d38ogk1r01qthpo0oqa0d38ogk1r01qthpo0oqag"         # replace with your key string
 # ---------------------------------------------------------------------
 
-def twelvedata_request(symbol: str, interval: str, limit: int):
+async def twelvedata_request(symbol: str, interval: str, limit: int):
     # twelvedata expects symbol format like: XAU/USD or BTC/USD or EUR/USD
     url = "https://api.twelvedata.com/time_series"
     params = {
@@ -19,31 +25,19 @@ def twelvedata_request(symbol: str, interval: str, limit: int):
         "interval": interval,
         "outputsize": limit,
         "format": "JSON",
+        "timezone": "UTC",
         "apikey": TWELVEDATA_KEY
     }
-    r = requests.get(url, params=params, timeout=10)
+    r = await http_client.get(url, params=params, timeout=10)
     if r.status_code != 200:
         raise RuntimeError(f"TwelveData bad status {r.status_code}")
     data = r.json()
-    # Normalize TwelveData -> standard candle list
+    # Normalize TwelveData -> CandleSeries (oldest-first, UTC)
     if "values" in data:
-        values = data["values"]
-        # TwelveData returns newest-first; convert to oldest-first if needed
-        values = list(reversed(values))
-        candles = []
-        for v in values:
-            candles.append({
-                "datetime": v.get("datetime"),
-                "open": float(v.get("open")),
-                "high": float(v.get("high")),
-                "low": float(v.get("low")),
-                "close": float(v.get("close")),
-                "volume": float(v.get("volume", 0))
-            })
-        return {"provider": "twelvedata", "candles": candles}
+        return normalize_twelvedata(data["values"], tz="UTC").series
     raise RuntimeError("TwelveData: no values")
 
-def alphav_request(symbol: str, interval: str, limit: int):
+async def alphav_request(symbol: str, interval: str, limit: int):
     # AlphaVantage: their forex/time series endpoints are different.
     # For simplicity, try TIME_SERIES_INTRADAY for equities or FX endpoints depending on symbol.
     # We attempt TIME_SERIES_INTRADAY if symbol looks like "SYMBOL" else FX intraday for pairs.
@@ -54,10 +48,11 @@ def alphav_request(symbol: str, interval: str, limit: int):
         "function": "TIME_SERIES_INTRADAY",
         "symbol": symbol.replace("/", ""),
         "interval": interval,
-        "outputsize": "compact",
+        # compact = latest 100 bars
+        "outputsize": "compact" if limit <= 100 else "full",
         "apikey": ALPHAV_KEY
     }
-    r = requests.get(url, params=params, timeout=10)
+    r = await http_client.get(url, params=params, timeout=10)
     if r.status_code != 200:
         raise RuntimeError(f"AlphaVantage bad status {r.status_code}")
     data = r.json()
@@ -69,24 +64,13 @@ def alphav_request(symbol: str, interval: str, limit: int):
             break
     if not ts_key:
         raise RuntimeError("AlphaVantage: no timeseries")
-    items = data[ts_key]
-    # items is dict datetime->ohlc, sorted newest-first
-    items_list = sorted(items.items(), key=lambda x: x[0])
-    candles = []
-    for dt, v in items_list[:limit]:
-        candles.append({
-            "datetime": dt,
-            "open": float(v.get("1. open")),
-            "high": float(v.get("2. high")),
-            "low": float(v.get("3. low")),
-            "close": float(v.get("4. close")),
-            "volume": float(v.get(list(v.keys())[-1], 0))
-        })
-    return {"provider": "alphavantage", "candles": candles}
+    # oldest-first series in UTC; the newest `limit` bars
+    return normalize_alphavantage(data).series.tail(limit)
 
-def finnhub_request(symbol: str, interval: str, limit: int):
+async def finnhub_request(symbol: str, interval: str, limit: int):
     # Finnhub: use /api/v1/forex/candle or /crypto/candle depending on symbol
-    # Map interval strings to Finnhub resolution:
+    # Map interval strings to Finnhub resolution
+    # (the route asks for "1min" and resamples these locally unless the window is too long):
     res_map = {
         "1min": "1",
         "5min": "5",
@@ -98,33 +82,24 @@ def finnhub_request(symbol: str, interval: str, limit: int):
     # compute epoch times
     import time
     to_ts = int(time.time())
-    from_ts = to_ts - (limit * 60)  # naive: limit minutes back for 1min; not exact for 5min but ok
+    from_ts = to_ts - limit * interval_seconds(interval)
     # choose endpoint: if symbol contains '/', treat as FX (e.g. OANDA: "OANDA:EUR_USD" not standard). For simplicity try crypto first then forex.
     url = f"https://finnhub.io/api/v1/forex/candle"
     params = {"symbol": symbol, "resolution": resolution, "from": from_ts, "to": to_ts, "token": FINNHUB_KEY}
-    r = requests.get(url, params=params, timeout=10)
+    r = await http_client.get(url, params=params, timeout=10)
     if r.status_code != 200:
         raise RuntimeError(f"Finnhub bad status {r.status_code}")
     data = r.json()
     if data.get("s") != "ok":
         raise RuntimeError("Finnhub no data")
-    # Finnhub returns arrays
-    candles = []
-    for i, t in enumerate(data["t"][:limit]):
-        candles.append({
-            "datetime": time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(t)),
-            "open": float(data["o"][i]),
-            "high": float(data["h"][i]),
-            "low": float(data["l"][i]),
-            "close": float(data["c"][i]),
-            "volume": float(data.get("v", [0]*len(data["t"]))[i])
-        })
-    return {"provider": "finnhub", "candles": candles}
+    # Finnhub returns arrays -> columns as-is
+    return normalize_finnhub(data).series.tail(limit)
 
 @router.get("/ict/candles")
-def get_candles(symbol: str = Query(..., description="Symbol e.g. XAU/USD or BTC/USD or EUR/USD"),
+async def get_candles(symbol: str = Query(..., description="Symbol e.g. XAU/USD or BTC/USD or EUR/USD"),
                 interval: str = Query("1min", description="Interval e.g. 1min, 5min"),
-                limit: int = Query(50, description="Number of bars to return")):
+                limit: int = Query(50, description="Number of bars to return"),
+                failover_mode: Optional[str] = Query(None, description="sequential | hedged | parallel")):
     # Try each provider in order; return first success
     # Normalize symbol for providers:
     sym = symbol
@@ -133,18 +108,26 @@ def get_candles(symbol: str = Query(..., description="Symbol e.g. XAU/USD or BTC
         # naive split for pairs like EURUSD -> EUR/USD
         if len(sym) % 3 == 0:
             sym = sym[:3] + "/" + sym[3:]
+    # 5min..60min are built from the provider's cached 1min bars (app/resample.py)
+    # instead of a separate upstream call per interval
+    resampled = can_resample(interval, limit)
+    fetch_iv, fetch_limit = (BASE_INTERVAL, base_bars_for(interval, limit)) if resampled else (interval, limit)
     providers = [
-        ("twelvedata", lambda: twelvedata_request(sym, interval, limit)),
-        ("alphavantage", lambda: alphav_request(sym.replace("/", ""), interval, limit)),
-        ("finnhub", lambda: finnhub_request(sym.replace("/", ""), interval, limit)),
+        ("twelvedata", lambda: twelvedata_request(sym, fetch_iv, fetch_limit)),
+        ("alphavantage", lambda: alphav_request(sym.replace("/", ""), fetch_iv, fetch_limit)),
+        ("finnhub", lambda: finnhub_request(sym.replace("/", ""), fetch_iv, fetch_limit)),
     ]
-    errors = {}
-    for name, fn in providers:
-        try:
-            res = fn()
-            return res
-        except Exception as e:
-            errors[name] = str(e)
-            continue
+    # hedged failover: the next provider starts once the current one is slower than its p95
+    # (or has failed); provider errors raise, so only successful payloads reach the shared cache
+    # the breaker sits inside the cache fill: open circuits fail fast, cached bars still serve
+    attempts = [(name, lambda name=name, fn=fn: CACHE.aget_or_fetch(name, sym, fetch_iv, fetch_limit,
+                                                                    lambda: guarded(name, fn)))
+                for name, fn in providers]
+    res = await race(attempts, mode=failover_mode)
+    if res["provider"] is not None:
+        bars = res["result"]
+        if resampled:
+            bars = RESAMPLER.get(f"proxy.{res['provider']}", sym, interval, limit, bars)
+        return {"provider": res["provider"], "candles": bars.to_records("datetime"), "ttfb_ms": res["ttfb_ms"]}
     # if none worked:
-    raise HTTPException(status_code=502, detail={"msg": "No provider returned data", "errors": errors})
+    raise HTTPException(status_code=502, detail={"msg": "No provider returned data", "errors": res["errors"]})
@@ -1,5 +1,9 @@
 from fastapi import FastAPI
 from proxy_candles import router as proxy_candles_router
+from app.candle_cache import CACHE
+from app import http_client
+from app.circuit_breaker import BREAKERS
+from app.quota import QUOTA
 
 app = FastAPI(
     title="AstroQuant ICT Backend",
@@ -10,9 +14,13 @@ app = FastAPI(
 # Attach ICT candles router
 app.include_router(proxy_candles_router, prefix="/ict")
 
+@app.on_event("shutdown")
+async def _close_http_clients():
+    await http_client.aclose()
+
 @app.get("/health")
 async def health():
-    return {"status": "ok"}
+    return {"status": "ok", "candle_cache": CACHE.stats(), "providers": BREAKERS.snapshot(), "quota": QUOTA.snapshot()}
 
 @app.get("/hello")
 async def hello():
@@ -4,6 +4,9 @@ import typing as t
 from fastapi import APIRouter, HTTPException, Query
 import requests
 
+from app.http_client import get_session
+from app.normalize import normalize_twelvedata as _normalize_td
+
 router = APIRouter()
 
 # Environment configuration
@@ -22,30 +25,20 @@ def fetch_candles_from_twelvedata(symbol: str, interval: str = "5min", outputsiz
         "interval": interval,
         "outputsize": outputsize,
         "format": "JSON",
+        "timezone": "UTC",
         "apikey": TWELVEDATA_KEY,
     }
-    resp = requests.get(url, params=params, timeout=20)
+    resp = get_session().get(url, params=params, timeout=20)
     resp.raise_for_status()
     return resp.json()
 
 def normalize_twelvedata(values: t.List[dict]) -> t.List[dict]:
-    # TwelveData returns most-recent-first; reverse for oldest-first
-    normalized = []
-    for v in reversed(values):
-        # defensive conversion
-        normalized.append({
-            "time": v.get("datetime") or v.get("timestamp") or v.get("time"),
-            "open": float(v.get("open", 0)) if v.get("open") not in (None, "") else None,
-            "high": float(v.get("high", 0)) if v.get("high") not in (None, "") else None,
-            "low": float(v.get("low", 0)) if v.get("low") not in (None, "") else None,
-            "close": float(v.get("close", 0)) if v.get("close") not in (None, "") else None,
-            "volume": float(v.get("volume")) if v.get("volume") not in (None, "") else None,
-        })
-    return normalized
+    # oldest-first {"time","open","high","low","close","volume"} dicts; malformed rows dropped
+    return _normalize_td(values, tz="UTC").series.to_records("time")
 
 def post_to_ict(symbol: str, interval: str, candles: t.List[dict]) -> requests.Response:
     payload = {"symbol": symbol, "interval": interval, "candles": candles}
-    resp = requests.post(ICT_ENDPOINT, json=payload, timeout=20)
+    resp = get_session().post(ICT_ENDPOINT, json=payload, timeout=20)
     return resp
 
 @router.post("/ict/fetch_twelvedata")
@@ -1,5 +1,5 @@
 import { createIctChart, toLwCandles, overlaySignals } from './ict.js';
-import { fetchCandles, fetchSignals } from './api.js';
+import { fetchSignals } from './api.js';
 import { addIctControls } from './components/IctPanel/IctControls.js';
 import { renderSignalTable } from './components/Shared/SignalTable.js';
 import { loadNarrative } from './components/IctPanel/IctNarrator.js';
@@ -7,14 +7,46 @@ import { loadNarrative } from './components/IctPanel/IctNarrator.js';
 const root = document.getElementById('chart');
 const { chart, series } = createIctChart(root);
 
-async function load(symbol){
-  const data = await fetchCandles(symbol,'1min',200);
-  const lw = toLwCandles(data.candles);
-  series.setData(lw);
+// live bars + signals over /ws/stream: one snapshot, then only the bars / signals that changed
+const WS_BASE = `${location.protocol === 'https:' ? 'wss' : 'ws'}://${location.hostname}:8000`;
+let socket = null;
+let signals = new Map();
+
+function showSignals(){
+  const list = [...signals.values()];
+  overlaySignals(series, list);
+  renderSignalTable(document.getElementById("signal-table"), list);
+}
+
+function onMessage(msg){
+  if (msg.type === 'snapshot') {
+    series.setData(toLwCandles(msg.candles));
+    signals = new Map(msg.signals.map(s => [s.id, s]));
+    showSignals();
+  } else if (msg.type === 'delta') {
+    // cost is the number of changed bars, not the window size
+    for (const bar of toLwCandles(msg.bars)) series.update(bar);
+    if (msg.signals.added.length || msg.signals.removed.length) {
+      msg.signals.removed.forEach(id => signals.delete(id));
+      msg.signals.added.forEach(s => signals.set(s.id, s));
+      showSignals();
+    }
+  } else if (msg.type === 'error') {
+    console.warn('stream error', msg.symbol, msg.error);
+  }
+}
+
+function subscribe(symbol, interval = '1min'){
+  if (socket) socket.close();
+  const ws = new WebSocket(`${WS_BASE}/ws/stream?symbols=${encodeURIComponent(symbol)}&interval=${interval}`);
+  ws.onmessage = ev => onMessage(JSON.parse(ev.data));
+  // reconnect unless we replaced this socket ourselves
+  ws.onclose = () => { if (socket === ws) setTimeout(() => subscribe(symbol, interval), 3000); };
+  socket = ws;
+}
 
-  const sig = await fetchSignals(symbol,'1min',200,false);
-  overlaySignals(series, sig.signals);
-  renderSignalTable(document.getElementById("signal-table"), sig.signals);
+async function load(symbol){
+  subscribe(symbol);
   await loadNarrative(symbol);
 }
 